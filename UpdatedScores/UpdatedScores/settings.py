@@ -32,6 +32,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # Prometheus metrics - first so that it measures the whole middleware stack
+    'scores.middleware.MetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.locale.LocaleMiddleware',
@@ -170,6 +172,23 @@ CACHE_MIDDLEWARE_ALIAS = 'default'
 CACHE_MIDDLEWARE_SECONDS = 600  # 10 minutes
 CACHE_MIDDLEWARE_KEY_PREFIX = 'updatedscores'
 
+# Prometheus metrics (/metrics)
+# METRICS_MODE: 'local' (single process), 'directory' (snapshots in a shared
+# directory) or 'cache' (snapshots in a shared cache such as Redis)
+METRICS_MODE = env('METRICS_MODE', default='local')
+METRICS_DIRECTORY = env('METRICS_DIRECTORY', default=str(BASE_DIR / 'metrics'))
+METRICS_CACHE_ALIAS = env('METRICS_CACHE_ALIAS', default='default')
+METRICS_PUBLISH_INTERVAL = env.int('METRICS_PUBLISH_INTERVAL', default=5)  # seconds
+METRICS_STALE_SECONDS = env.int('METRICS_STALE_SECONDS', default=300)
+# Bearer token for /metrics; when empty the endpoint only answers with DEBUG on
+METRICS_TOKEN = env('METRICS_TOKEN', default='')
+
+# Live score stream (/live/stream/, Server-Sent Events)
+LIVE_STREAM_HEARTBEAT = env.int('LIVE_STREAM_HEARTBEAT', default=15)  # seconds between keep-alive comments
+LIVE_STREAM_QUEUE_SIZE = env.int('LIVE_STREAM_QUEUE_SIZE', default=100)  # per connection, then 'resync'
+LIVE_STREAM_BACKLOG = env.int('LIVE_STREAM_BACKLOG', default=1000)  # deltas kept for Last-Event-ID
+LIVE_STREAM_MAX_SUBSCRIBERS = env.int('LIVE_STREAM_MAX_SUBSCRIBERS', default=5000)  # per process
+
 # Session cache
 SESSION_ENGINE = 'django.contrib.sessions.backends.cached_db'
 SESSION_CACHE_ALIAS = 'default'
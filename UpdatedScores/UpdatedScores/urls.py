@@ -3,6 +3,7 @@ from django.urls import path, include
 from django.conf import settings
 from django.conf.urls.static import static
 from django.conf.urls.i18n import i18n_patterns
+from scores.metrics import metrics_view
 
 # Add i18n URLs first
 urlpatterns = [
@@ -12,6 +13,7 @@ urlpatterns = [
 # Then add the rest of the URLs
 urlpatterns += [
     path('admin/', admin.site.urls),
+    path('metrics', metrics_view, name='metrics'),  # Prometheus metrics
     path('', include('scores.urls', namespace='scores_main')),  # Ana dizine yönlendirme
     path('scores/', include('scores.urls')),
     path('accounts/', include('django.contrib.auth.urls')),  # Django'nun yerleşik kimlik doğrulama görünümleri
@@ -3,8 +3,19 @@ from django import forms
 from .models import League, Team, Player, Match, Event, Profile, MatchPreview, MatchAnalysis
 from .notifications import Notification
 from datetime import datetime, timedelta
+from . import search
 
-class LeagueAdmin(admin.ModelAdmin):
+class IndexedSearchMixin:
+    """Admin arama kutusu icontains taraması yerine arama dizinini kullanır"""
+    search_kind = None
+
+    def get_search_results(self, request, queryset, search_term):
+        if not search_term.strip():
+            return queryset, False
+        return queryset.filter(pk__in=search.object_ids(self.search_kind, search_term)), False
+
+class LeagueAdmin(IndexedSearchMixin, admin.ModelAdmin):
+    search_kind = 'league'
     list_display = ('name', 'country')
     search_fields = ('name', 'country')
 
@@ -13,7 +24,8 @@ class LeagueAdmin(admin.ModelAdmin):
     def has_change_permission(self, request, obj=None):
         return False
 
-class PlayerAdmin(admin.ModelAdmin):
+class PlayerAdmin(IndexedSearchMixin, admin.ModelAdmin):
+    search_kind = 'player'
     list_display = ('name', 'team', 'position')
     list_filter = ('team', 'position')
     search_fields = ('name',)
@@ -29,8 +41,9 @@ class EventAdmin(admin.ModelAdmin):
     list_filter = ('event_type', 'match')
     search_fields = ('description', 'player__name')
 
-class TeamAdmin(admin.ModelAdmin):
-    pass
+class TeamAdmin(IndexedSearchMixin, admin.ModelAdmin):
+    search_kind = 'team'
+    search_fields = ('name',)
 
 class ProfileAdmin(admin.ModelAdmin):
     list_display = ('user', 'first_name', 'last_name', 'birth_date', 'notification_method')
@@ -1,17 +1,35 @@
 import os
+import threading
+import time
+from collections import deque
+
 import requests
 from datetime import datetime, timedelta
+from . import circuit_breaker, metrics
+from .json_stream import CHUNK_SIZE, JSONStream
+from .cassettes import CASSETTE_MODES, CassetteStore, Interaction, notify_replayed
 
 API_KEY = os.getenv("THESPORTSDB_API_KEY")
+# Most fixture ids API-FOOTBALL accepts in one fixtures?ids= request
+FIXTURE_IDS_BATCH = 20
 BASE_URL = f"https://www.thesportsdb.com/api/v1/json/{API_KEY}/"
+# (connect, read) seconds; a slow upstream fails fast instead of holding up the scheduler
+THESPORTSDB_TIMEOUT = (3.05, 10)
+API_FOOTBALL_TIMEOUT = (
+    float(os.environ.get('API_FOOTBALL_CONNECT_TIMEOUT', 3.05)),
+    float(os.environ.get('API_FOOTBALL_READ_TIMEOUT', 10)),
+)
+API_FOOTBALL_MAX_RETRIES = int(os.environ.get('API_FOOTBALL_MAX_RETRIES', 2))
+# Statuses worth another attempt; all but 429 also count as failures for the circuit breaker
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
 
 def fetch_leagues():
     url = BASE_URL + "all_leagues.php"
-    return requests.get(url).json()
+    return requests.get(url, timeout=THESPORTSDB_TIMEOUT).json()
 
 def fetch_events_by_league(league_id):
     url = BASE_URL + f"eventsnextleague.php?id={league_id}"
-    return requests.get(url).json()
+    return requests.get(url, timeout=THESPORTSDB_TIMEOUT).json()
 
 class TheSportsDBAPI:
     """TheSportsDB API ile iletişim kuran yardımcı sınıf"""
@@ -23,7 +41,7 @@ class TheSportsDBAPI:
     def get_leagues(self):
         """Mevcut futbol liglerini getir"""
         url = f"{self.base_url}/all_leagues.php?s=Soccer"
-        response = requests.get(url)
+        response = requests.get(url, timeout=THESPORTSDB_TIMEOUT)
         if response.status_code == 200:
             return response.json().get('leagues', [])
         return []
@@ -31,7 +49,7 @@ class TheSportsDBAPI:
     def get_teams_by_league(self, league_id):
         """Belirli bir ligteki takımları getir"""
         url = f"{self.base_url}/lookup_all_teams.php?id={league_id}"
-        response = requests.get(url)
+        response = requests.get(url, timeout=THESPORTSDB_TIMEOUT)
         if response.status_code == 200:
             return response.json().get('teams', [])
         return []
@@ -39,7 +57,7 @@ class TheSportsDBAPI:
     def get_team_players(self, team_id):
         """Belirli bir takıma ait oyuncuları getir"""
         url = f"{self.base_url}/lookup_all_players.php?id={team_id}"
-        response = requests.get(url)
+        response = requests.get(url, timeout=THESPORTSDB_TIMEOUT)
         if response.status_code == 200:
             return response.json().get('player', [])
         return []
@@ -51,7 +69,7 @@ class TheSportsDBAPI:
             date_str = datetime.now().strftime('%Y-%m-%d')
         
         url = f"{self.base_url}/eventsday.php?d={date_str}&l={league_id}"
-        response = requests.get(url)
+        response = requests.get(url, timeout=THESPORTSDB_TIMEOUT)
         if response.status_code == 200:
             return response.json().get('events', [])
         return []
@@ -59,7 +77,7 @@ class TheSportsDBAPI:
     def get_league_next_events(self, league_id, days=7):
         """Bir lig için gelecek maçları getir"""
         url = f"{self.base_url}/eventsnextleague.php?id={league_id}"
-        response = requests.get(url)
+        response = requests.get(url, timeout=THESPORTSDB_TIMEOUT)
         if response.status_code == 200:
             events = response.json().get('events', [])
             if events:
@@ -77,32 +95,180 @@ class TheSportsDBAPI:
     def get_event_details(self, event_id):
         """Belirli bir etkinliğin detaylarını getir"""
         url = f"{self.base_url}/lookupevent.php?id={event_id}"
-        response = requests.get(url)
+        response = requests.get(url, timeout=THESPORTSDB_TIMEOUT)
         if response.status_code == 200:
             return response.json().get('events', [])
         return []
 
+class RequestRateLimiter:
+    """
+    Client-side cap of ``per_minute`` requests in any 60 seconds. One
+    instance can be shared by several clients and threads; ``wait`` blocks
+    until the next request may go out.
+    """
+
+    def __init__(self, per_minute, clock=time.monotonic, sleep=time.sleep):
+        self.per_minute = per_minute
+        self.clock = clock
+        self.sleep = sleep
+        self.lock = threading.Lock()
+        self.recent = deque()
+
+    def wait(self):
+        """Take one slot; returns the seconds spent waiting for it"""
+        waited = 0.0
+        # Waiters hold the lock, so they are served in arrival order
+        with self.lock:
+            while True:
+                now = self.clock()
+                while self.recent and self.recent[0] <= now - 60:
+                    self.recent.popleft()
+                if not self.per_minute or len(self.recent) < self.per_minute:
+                    self.recent.append(now)
+                    return waited
+                delay = self.recent[0] + 60 - now
+                self.sleep(delay)
+                waited += delay
+
+
 class APIFootballClient:
-    def __init__(self):
+    def __init__(self, cassette_mode=None, cassette_dir=None, cassette_timing=None, rate_limiter=None,
+                 breakers=None, retry_budget=None, max_retries=API_FOOTBALL_MAX_RETRIES, sleep=time.sleep):
         self.api_key = os.environ.get('API_FOOTBALL_KEY')
         self.base_url = os.environ.get('API_FOOTBALL_BASE_URL', 'https://v3.football.api-sports.io')
         self.headers = {
             'x-apisports-key': self.api_key
         }
+        # Kayıt/tekrar oynatma (cassette) modu: off, record, replay veya auto
+        self.cassette_mode = cassette_mode or os.environ.get('API_FOOTBALL_CASSETTE_MODE', 'off')
+        if self.cassette_mode not in CASSETTE_MODES:
+            raise ValueError(f"Unknown cassette mode '{self.cassette_mode}', choose one of: {', '.join(CASSETTE_MODES)}")
+        self.cassettes = None
+        if self.cassette_mode != 'off':
+            self.cassettes = CassetteStore(cassette_dir or os.environ.get('API_FOOTBALL_CASSETTE_DIR', 'cassettes'))
+        if cassette_timing is None:
+            cassette_timing = float(os.environ.get('API_FOOTBALL_CASSETTE_TIMING', 0))
+        self.cassette_timing = cassette_timing
+        # Optional RequestRateLimiter, shared when several clients fetch in parallel
+        self.rate_limiter = rate_limiter
+        # Circuit breakers and retry budget are shared by the whole process unless given
+        self.breakers = breakers or circuit_breaker.BREAKERS
+        self.retry_budget = retry_budget or circuit_breaker.RETRY_BUDGET
+        self.max_retries = max_retries
+        self.timeout = API_FOOTBALL_TIMEOUT
+        self.sleep = sleep
+
+    def _replay(self, endpoint, interaction):
+        """Serve a recorded response, optionally taking as long as the original call"""
+        if self.cassette_timing:
+            time.sleep(interaction.duration * self.cassette_timing)
+        metrics.record_api_response(endpoint, interaction, interaction.duration * self.cassette_timing)
+        notify_replayed(interaction)
+        if not interaction.ok:
+            print(f"API request error (replayed): {interaction.status_code} for {endpoint}")
+            return None
+        return interaction.body
         
     def _make_request(self, endpoint, params=None):
         """
         Helper method to make API requests with error handling
         """
-        url = f"{self.base_url}/{endpoint}"
+        if self.cassettes is not None and self.cassette_mode in ('replay', 'auto'):
+            interaction = self.cassettes.load(endpoint, params)
+            if interaction is not None:
+                return self._replay(endpoint, interaction)
+            if self.cassette_mode == 'replay':
+                metrics.record_api_response(endpoint, error=True)
+                print(f"API request error: no cassette for {endpoint} {params}")
+                return None
+
+        response, duration = self._send(endpoint, params)
+        if response is None:
+            return None
+        if self.cassettes is not None:
+            self.cassettes.save(Interaction.from_response(endpoint, params, response, duration))
         try:
-            response = requests.get(url, headers=self.headers, params=params, timeout=30)
             response.raise_for_status()
             return response.json()
         except requests.exceptions.RequestException as e:
             print(f"API request error: {str(e)}")
             return None
 
+    def _send(self, endpoint, params=None, **options):
+        """
+        GET ``endpoint`` through its circuit breaker. Connection errors,
+        timeouts, 429 and 5xx are retried up to ``max_retries`` times with
+        jittered exponential backoff while the retry budget lasts.
+
+        Returns (response, seconds) of the last attempt; the response is None
+        when the circuit is open or no attempt got an answer.
+        """
+        breaker = self.breakers.get(endpoint)
+        url = f"{self.base_url}/{endpoint}"
+        self.retry_budget.deposit()
+        attempt = 0
+        while True:
+            if not breaker.allow():
+                metrics.record_short_circuit(endpoint)
+                print(f"API request skipped: circuit open for {endpoint}")
+                return None, 0.0
+            if self.rate_limiter is not None:
+                self.rate_limiter.wait()
+            start_time = time.perf_counter()
+            try:
+                response = requests.get(url, headers=self.headers, params=params, timeout=self.timeout, **options)
+            except requests.exceptions.RequestException as e:
+                duration = time.perf_counter() - start_time
+                metrics.record_api_response(endpoint, duration=duration, error=True)
+                breaker.record_failure()
+                response, error = None, e
+            else:
+                duration = time.perf_counter() - start_time
+                metrics.record_api_response(endpoint, response, duration)
+                if response.status_code in RETRY_STATUSES and response.status_code != 429:
+                    breaker.record_failure()
+                else:
+                    breaker.record_success()
+                if response.status_code not in RETRY_STATUSES:
+                    return response, duration
+            if attempt >= self.max_retries or not self.retry_budget.withdraw():
+                if response is None:
+                    print(f"API request error: {str(error)}")
+                return response, duration
+            delay = circuit_breaker.backoff(attempt, retry_after=circuit_breaker.retry_after(response))
+            if response is not None:
+                response.close()
+            metrics.record_api_retry(endpoint)
+            self.sleep(delay)
+            attempt += 1
+
+    def _stream_request(self, endpoint, params=None, key='response'):
+        """
+        Like ``_make_request``, but the body is parsed while it downloads:
+        returns a JSONStream yielding the items of ``key`` one by one, or None
+        when the request fails. Cassettes are recorded and replayed whole.
+        A connection dropped mid-body raises from the iteration.
+        """
+        if self.cassettes is not None:
+            data = self._make_request(endpoint, params)
+            return None if data is None else JSONStream.from_data(data, key)
+
+        response, _ = self._send(endpoint, params, stream=True)
+        if response is None:
+            return None
+        try:
+            response.raise_for_status()
+        except requests.exceptions.RequestException as e:
+            response.close()
+            print(f"API request error: {str(e)}")
+            return None
+
+        def chunks():
+            with response:
+                yield from response.iter_content(CHUNK_SIZE)
+
+        return JSONStream(chunks(), key)
+
     def get_leagues(self, country=None, season=None):
         """
         Get available leagues
@@ -166,6 +332,43 @@ class APIFootballClient:
         Returns:
             dict: API response with fixtures information
         """
+        params = self._fixture_params(league_id, team_id, date, season, next, last, from_date, to_date,
+                                      fixture_id, status, round)
+        return self._make_request("fixtures", params)
+
+    def iter_fixtures(self, league_id=None, team_id=None, date=None, season=None,
+                      next=None, last=None, from_date=None, to_date=None, fixture_id=None,
+                      status=None, round=None):
+        """
+        Streaming ``get_fixtures``: a JSONStream of fixture items parsed as
+        they arrive (None on failure); ``errors`` is in its ``meta`` once
+        iterated. Use it for season-wide queries.
+        """
+        params = self._fixture_params(league_id, team_id, date, season, next, last, from_date, to_date,
+                                      fixture_id, status, round)
+        return self._stream_request("fixtures", params)
+
+    def iter_fixture_details(self, fixture_ids, batch_size=FIXTURE_IDS_BATCH):
+        """
+        Fixtures with their events, lineups, statistics and players embedded,
+        ``batch_size`` (at most 20) ids per ``fixtures?ids=a-b-c`` request.
+
+        Yields (batch, items) per request: the ids asked for and the fixture
+        items returned, or None when that request failed.
+        """
+        fixture_ids = list(dict.fromkeys(str(fixture_id) for fixture_id in fixture_ids))
+        size = max(1, min(batch_size, FIXTURE_IDS_BATCH))
+        for start in range(0, len(fixture_ids), size):
+            batch = fixture_ids[start:start + size]
+            data = self._make_request("fixtures", {'ids': '-'.join(batch)})
+            if data is None or data.get("errors"):
+                yield batch, None
+            else:
+                yield batch, data.get("response") or []
+
+    @staticmethod
+    def _fixture_params(league_id, team_id, date, season, next, last, from_date, to_date, fixture_id, status,
+                        round):
         params = {}
         if league_id:
             params['league'] = league_id
@@ -189,8 +392,7 @@ class APIFootballClient:
             params['status'] = status
         if round:
             params['round'] = round
-            
-        return self._make_request("fixtures", params)
+        return params
     
     def get_lineups(self, fixture_id):
         """
@@ -288,6 +490,25 @@ class APIFootballClient:
             
         return self._make_request("players", params)
 
+    def iter_players(self, team_id, season=None):
+        """
+        Every player of a team, across all pages of ``players``, streamed one
+        item at a time. Stops at the first page that fails.
+        """
+        page = 1
+        while True:
+            params = {'team': team_id, 'page': page}
+            if season:
+                params['season'] = season
+            stream = self._stream_request("players", params)
+            if stream is None:
+                return
+            yield from stream
+            paging = stream.meta.get('paging') or {}
+            if page >= (paging.get('total') or 1):
+                return
+            page += 1
+
 # Test amaçlı fonksiyon
 if __name__ == "__main__":
     client = APIFootballClient()
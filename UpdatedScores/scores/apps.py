@@ -9,6 +9,8 @@ class ScoresConfig(AppConfig):
         Django uygulaması başladığında çalıştırılır.
         Zamanlanmış görevleri başlatmak için scheduler importunu burada yap.
         """
-        from . import scheduler
-        scheduler.start()
+        from . import parallel, scheduler
+        # Process pool workers (parallel.py) only run batch tasks
+        if not parallel.in_worker():
+            scheduler.start()
         from . import signals  # signals.py dosyasını burada import et
\ No newline at end of file
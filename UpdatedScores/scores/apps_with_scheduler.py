@@ -13,11 +13,12 @@ class ScoresConfig(AppConfig):
         """
         try:
             # İmport here to avoid AppRegistryNotReady exception
-            from scores import scheduler
+            from scores import parallel, scheduler
             
             # Sadece ana process'te çalıştır (Reloader'da çalışmayı engelle)
             import os
-            if os.environ.get('RUN_MAIN', None) != 'true':
+            # Process pool workers (parallel.py) only run batch tasks
+            if os.environ.get('RUN_MAIN', None) != 'true' and not parallel.in_worker():
                 scheduler.start()
         except Exception as e:
             print(f"Scheduler başlatılamadı: {e}")
@@ -0,0 +1,467 @@
+"""
+Benchmark suite for the hot views, the REST API and the ingestion commands.
+
+Each benchmark is run a few times; the median wall time and the number of
+SQL queries are recorded. Results can be saved as a JSON baseline and later
+runs compared against it to catch regressions:
+
+    python manage.py generate_synthetic_data --scale medium
+    python manage.py run_benchmarks --save benchmarks/baseline.json
+    python manage.py run_benchmarks --compare benchmarks/baseline.json
+"""
+import io
+import json
+import logging
+import platform
+import random
+import statistics
+import time
+from dataclasses import dataclass, field, asdict
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.db.models import Count
+from django.test import Client
+from django.test.utils import override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from . import match_ratings, search
+from .models import League, Team, Player, Match, Event, Profile
+from .text_utils import tokens
+
+logger = logging.getLogger(__name__)
+
+GROUPS = ('views', 'api', 'ingestion')
+# Ingestion benchmarks call the API-FOOTBALL endpoints, so they only run on request
+DEFAULT_GROUPS = ('views', 'api')
+BASELINE_VERSION = 1
+# Differences below this are noise on a shared machine, whatever the ratio
+NOISE_FLOOR_MS = 5.0
+
+
+@dataclass
+class Benchmark:
+    name: str
+    group: str
+    func: object
+    description: str = ''
+
+
+@dataclass
+class BenchmarkResult:
+    name: str
+    group: str
+    runs: int = 0
+    median_ms: float = 0.0
+    min_ms: float = 0.0
+    max_ms: float = 0.0
+    queries: int = 0
+    status: str = 'ok'
+    detail: str = ''
+
+
+@dataclass
+class Regression:
+    name: str
+    metric: str
+    baseline: float
+    current: float
+
+    def __str__(self):
+        return f"{self.name}: {self.metric} {self.baseline:g} -> {self.current:g}"
+
+
+@dataclass
+class BenchmarkContext:
+    """Sample objects the benchmarks request, picked once per run"""
+    client: Client
+    auth_client: Client
+    league_id: str = None
+    team_id: str = None
+    match_id: str = None
+    extra: dict = field(default_factory=dict)
+
+
+class QueryCounter:
+    """Counts queries with an execute wrapper; unlike connection.queries it has no cap"""
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+class SkipBenchmark(Exception):
+    """Raised by a benchmark that cannot run against the current dataset"""
+
+
+def _get(client, url, **params):
+    response = client.get(url, params, secure=True)
+    if response.status_code != 200:
+        raise RuntimeError(f"GET {url} returned {response.status_code}")
+    # Consume streaming responses so their queries are counted too
+    if getattr(response, 'streaming', False):
+        b''.join(response.streaming_content)
+    return response
+
+
+def _require(value, what):
+    if value is None:
+        raise SkipBenchmark(f"no {what} in the database")
+    return value
+
+
+# ---------------------------------------------------------------------------
+# Benchmarks
+# ---------------------------------------------------------------------------
+
+def bench_index(ctx):
+    _get(ctx.client, reverse('scores:index'))
+
+
+def bench_index_authenticated(ctx):
+    _get(ctx.auth_client, reverse('scores:index'))
+
+
+def bench_league_detail(ctx):
+    _get(ctx.client, reverse('scores:league_detail', args=[_require(ctx.league_id, 'league')]))
+
+
+def bench_team_detail(ctx):
+    _get(ctx.client, reverse('scores:team_detail', args=[_require(ctx.team_id, 'team')]))
+
+
+def bench_match_detail(ctx):
+    _get(ctx.client, reverse('scores:match_detail', args=[_require(ctx.match_id, 'match')]), bypass_cache=1)
+
+
+def bench_upcoming_matches(ctx):
+    _get(ctx.client, reverse('scores:upcoming_matches'))
+
+
+def bench_api_leagues(ctx):
+    _get(ctx.client, '/api/leagues/')
+
+
+def bench_api_teams(ctx):
+    _get(ctx.client, '/api/teams/')
+
+
+def bench_api_matches(ctx):
+    _get(ctx.client, '/api/matches/')
+
+
+def bench_api_search(ctx):
+    _get(ctx.client, '/api/search/', q='ma')
+
+
+def bench_api_favorites(ctx):
+    _get(ctx.auth_client, reverse('scores:api-favorites'))
+
+
+def _run_command(name, **options):
+    # Roll back so every run starts from the same dataset
+    with transaction.atomic():
+        call_command(name, stdout=io.StringIO(), stderr=io.StringIO(), **options)
+        transaction.set_rollback(True)
+
+
+def bench_fetch_matches(ctx):
+    _run_command('fetch_api_football_matches', no_delete=True, date=timezone.now().strftime('%Y-%m-%d'))
+
+
+def bench_fetch_match_events(ctx):
+    _run_command('fetch_match_events', match_id=_require(ctx.match_id, 'match'))
+
+
+def bench_fetch_match_statistics(ctx):
+    _run_command('fetch_match_statistics', match_id=_require(ctx.match_id, 'match'))
+
+
+def bench_fetch_match_lineups(ctx):
+    _run_command('fetch_match_lineups', match_id=_require(ctx.match_id, 'match'))
+
+
+def bench_generate_match_analysis(ctx):
+    _run_command('generate_match_analysis', match_id=_require(ctx.match_id, 'match'))
+
+
+BENCHMARKS = [
+    Benchmark('index', 'views', bench_index, 'Ana sayfa (anonim)'),
+    Benchmark('index_authenticated', 'views', bench_index_authenticated, 'Ana sayfa (favorili kullanıcı)'),
+    Benchmark('league_detail', 'views', bench_league_detail, 'En çok maçı olan lig'),
+    Benchmark('team_detail', 'views', bench_team_detail, 'En çok maçı olan takım'),
+    Benchmark('enhanced_match_detail', 'views', bench_match_detail, 'Olayları olan bir maç (önbelleksiz)'),
+    Benchmark('upcoming_matches', 'views', bench_upcoming_matches, 'Gelecek 7 gün'),
+    Benchmark('api_leagues', 'api', bench_api_leagues),
+    Benchmark('api_teams', 'api', bench_api_teams),
+    Benchmark('api_matches', 'api', bench_api_matches),
+    Benchmark('api_favorites', 'api', bench_api_favorites),
+    Benchmark('api_search', 'api', bench_api_search, 'İki harflik takım/oyuncu/lig araması'),
+    Benchmark('fetch_api_football_matches', 'ingestion', bench_fetch_matches),
+    Benchmark('fetch_match_events', 'ingestion', bench_fetch_match_events),
+    Benchmark('fetch_match_statistics', 'ingestion', bench_fetch_match_statistics),
+    Benchmark('fetch_match_lineups', 'ingestion', bench_fetch_match_lineups),
+    Benchmark('generate_match_analysis', 'ingestion', bench_generate_match_analysis),
+]
+
+
+def select_benchmarks(groups=None, only=None):
+    groups = set(groups or DEFAULT_GROUPS)
+    unknown = groups - set(GROUPS)
+    if unknown:
+        raise ValueError(f"Unknown benchmark group(s): {', '.join(sorted(unknown))}")
+    selected = [b for b in BENCHMARKS if b.group in groups]
+    if only:
+        names = set(only)
+        selected = [b for b in BENCHMARKS if b.name in names]
+        missing = names - {b.name for b in selected}
+        if missing:
+            raise ValueError(f"Unknown benchmark(s): {', '.join(sorted(missing))}")
+    return selected
+
+
+def build_context():
+    """Pick the busiest league, team and match so the numbers reflect worst cases."""
+    league = League.objects.annotate(n=Count('matches')).order_by('-n', 'id').first()
+    team = Team.objects.annotate(
+        n=Count('home_matches', distinct=True) + Count('away_matches', distinct=True)
+    ).order_by('-n', 'id').first()
+    match = Match.objects.filter(score__isnull=False).annotate(
+        n=Count('events')
+    ).order_by('-n', 'id').first() or Match.objects.order_by('id').first()
+
+    auth_client = Client()
+    profile = Profile.objects.annotate(
+        n=Count('favorite_teams')
+    ).filter(n__gt=0).select_related('user').order_by('-n', 'id').first()
+    user = profile.user if profile else User.objects.order_by('id').first()
+    if user:
+        auth_client.force_login(user)
+
+    return BenchmarkContext(
+        client=Client(),
+        auth_client=auth_client,
+        league_id=league.id if league else None,
+        team_id=team.id if team else None,
+        match_id=match.id if match else None,
+    )
+
+
+def run_benchmark(benchmark, ctx, repeat=5, warmup=1, cold=True):
+    result = BenchmarkResult(name=benchmark.name, group=benchmark.group)
+    timings = []
+    queries = []
+    try:
+        for i in range(warmup + repeat):
+            if cold:
+                cache.clear()
+            counter = QueryCounter()
+            with connection.execute_wrapper(counter):
+                started = time.perf_counter()
+                benchmark.func(ctx)
+                elapsed = (time.perf_counter() - started) * 1000
+            if i >= warmup:
+                timings.append(elapsed)
+                queries.append(counter.count)
+    except SkipBenchmark as e:
+        result.status = 'skipped'
+        result.detail = str(e)
+        return result
+    except Exception as e:
+        logger.exception(f"Benchmark {benchmark.name} failed")
+        result.status = 'error'
+        result.detail = f"{type(e).__name__}: {e}"
+        return result
+
+    result.runs = len(timings)
+    result.median_ms = round(statistics.median(timings), 3)
+    result.min_ms = round(min(timings), 3)
+    result.max_ms = round(max(timings), 3)
+    result.queries = max(queries)
+    return result
+
+
+def run_benchmarks(benchmarks, repeat=5, warmup=1, cold=True, progress=None):
+    # The test client talks to 'testserver' over https
+    with override_settings(ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver']):
+        ctx = build_context()
+        results = []
+        for benchmark in benchmarks:
+            result = run_benchmark(benchmark, ctx, repeat=repeat, warmup=warmup, cold=cold)
+            results.append(result)
+            if progress:
+                progress(result)
+    return results
+
+
+def serializer_throughput(rows=1000, repeat=3):
+    """
+    Rows/sec of the ModelSerializer path against the .values() path for the
+    REST API list output, best of ``repeat`` runs over the same rows.
+    """
+    from .serializers import (
+        LeagueSerializer, TeamSerializer, MatchSerializer,
+        LeagueValuesSerializer, TeamValuesSerializer, MatchValuesSerializer,
+    )
+    cases = [
+        ('matches', Match.objects.select_related('home_team__league', 'away_team__league', 'league').order_by('id'),
+         MatchSerializer, MatchValuesSerializer),
+        ('teams', Team.objects.select_related('league').order_by('id'), TeamSerializer, TeamValuesSerializer),
+        ('leagues', League.objects.order_by('id'), LeagueSerializer, LeagueValuesSerializer),
+    ]
+
+    def best(func):
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            count = len(func())
+            timings.append(time.perf_counter() - started)
+        return count, min(timings)
+
+    results = []
+    for name, queryset, model_serializer, values_serializer in cases:
+        queryset = queryset[:rows]
+        count, model_seconds = best(lambda: model_serializer(list(queryset), many=True).data)
+        _, values_seconds = best(lambda: values_serializer().to_representation(values_serializer().values(queryset)))
+        results.append({
+            'name': name,
+            'rows': count,
+            'model_rows_per_sec': round(count / model_seconds) if model_seconds else 0,
+            'values_rows_per_sec': round(count / values_seconds) if values_seconds else 0,
+            'speedup': round(model_seconds / values_seconds, 1) if values_seconds else None,
+        })
+    return results
+
+
+def search_latency(queries=500, seed=1):
+    """
+    p50/p95/max milliseconds of search.search() for typeahead prefixes (2-6
+    characters) cut from random player, team and league names.
+    """
+    rng = random.Random(seed)
+    names = []
+    for model in (Player, Team, League):
+        ids = list(model.objects.values_list('pk', flat=True)[:5000])
+        names.extend(model.objects.filter(pk__in=rng.sample(ids, min(len(ids), 200))).values_list('name', flat=True))
+    words = [word for name in names for word in tokens(name) if len(word) >= 2]
+    if not words:
+        return None
+    prefixes = [word[:rng.randint(2, min(6, len(word)))] for word in (rng.choice(words) for _ in range(queries))]
+
+    timings, hits = [], 0
+    for prefix in prefixes:
+        started = time.perf_counter()
+        hits += bool(search.search(prefix))
+        timings.append((time.perf_counter() - started) * 1000)
+    timings.sort()
+    return {
+        'queries': len(timings),
+        'backend': 'fts5' if search.enabled() else 'icontains',
+        'players': Player.objects.count(),
+        'hit_rate': round(hits / len(timings), 3),
+        'p50_ms': round(timings[len(timings) // 2], 3),
+        'p95_ms': round(timings[int(len(timings) * 0.95) - 1], 3),
+        'max_ms': round(timings[-1], 3),
+    }
+
+
+def _per_player_ratings(match):
+    """The former generate_player_ratings query pattern: three exists() per squad player"""
+    for player in Player.objects.filter(team_id__in=[match.home_team_id, match.away_team_id]):
+        Event.objects.filter(match=match, player=player, event_type='GOAL').exists()
+        Event.objects.filter(match=match, player=player, event_type='ASSIST').exists()
+        Event.objects.filter(match=match, player=player, event_type__in=['YELLOW', 'RED']).exists()
+
+
+def rating_throughput(matches=100, repeat=3):
+    """
+    Queries and milliseconds per match for player ratings: the former
+    per-player queries against match_ratings.for_matches over the same
+    completed matches (best of ``repeat`` runs).
+    """
+    sample = list(Match.objects.filter(score__isnull=False).annotate(n=Count('events')).order_by('-n', 'id')[:matches])
+    if not sample:
+        return None
+
+    def measure(func):
+        timings, counter = [], QueryCounter()
+        for _ in range(repeat):
+            counter = QueryCounter()
+            with connection.execute_wrapper(counter):
+                started = time.perf_counter()
+                func()
+                timings.append(time.perf_counter() - started)
+        return counter.count / len(sample), min(timings) * 1000 / len(sample)
+
+    before_queries, before_ms = measure(lambda: [_per_player_ratings(match) for match in sample])
+    after_queries, after_ms = measure(lambda: match_ratings.for_matches(sample))
+    return {
+        'matches': len(sample),
+        'players': Player.objects.filter(team_id__in={t for m in sample for t in (m.home_team_id, m.away_team_id)}).count(),
+        'before_queries_per_match': round(before_queries, 2),
+        'before_ms_per_match': round(before_ms, 3),
+        'after_queries_per_match': round(after_queries, 3),
+        'after_ms_per_match': round(after_ms, 3),
+        'speedup': round(before_ms / after_ms, 1) if after_ms else None,
+    }
+
+
+def dataset_summary():
+    return {
+        'leagues': League.objects.count(),
+        'teams': Team.objects.count(),
+        'matches': Match.objects.count(),
+        'profiles': Profile.objects.count(),
+    }
+
+
+def to_baseline(results):
+    return {
+        'version': BASELINE_VERSION,
+        'created': timezone.now().isoformat(),
+        'python': platform.python_version(),
+        'database': connection.vendor,
+        'dataset': dataset_summary(),
+        'results': {r.name: asdict(r) for r in results},
+    }
+
+
+def save_baseline(path, results):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(to_baseline(results), f, indent=2, ensure_ascii=False)
+
+
+def load_baseline(path):
+    with open(path, encoding='utf-8') as f:
+        data = json.load(f)
+    if data.get('version') != BASELINE_VERSION:
+        raise ValueError(f"Unsupported baseline version: {data.get('version')}")
+    return data
+
+
+def compare(results, baseline, time_threshold=0.25):
+    """
+    Return the regressions of results against a baseline.
+
+    Any increase in query count is a regression; wall time regresses when it
+    grows more than time_threshold (a ratio) and more than the noise floor.
+    """
+    regressions = []
+    previous = baseline.get('results', {})
+    for result in results:
+        before = previous.get(result.name)
+        if result.status != 'ok' or not before or before.get('status') != 'ok':
+            continue
+        if result.queries > before['queries']:
+            regressions.append(Regression(result.name, 'queries', before['queries'], result.queries))
+        limit = before['median_ms'] * (1 + time_threshold)
+        if result.median_ms > limit and result.median_ms - before['median_ms'] > NOISE_FLOOR_MS:
+            regressions.append(Regression(result.name, 'median_ms', before['median_ms'], result.median_ms))
+    return regressions
@@ -0,0 +1,123 @@
+"""
+Composite match payload behind ``/api/matches/bundle/``.
+
+A match screen needs the match plus its events, lineups, statistics and
+preview. Each relation has a loader that resolves every requested match id
+with one query (two for lineups: the lineups and their players), in the
+spirit of a dataloader: the number of queries depends on ``include``, never
+on how many matches are requested.
+"""
+from rest_framework.exceptions import ValidationError
+
+from .models import Event, Lineup, LineupPlayer, MatchAnalysis, MatchPreview
+
+MAX_BUNDLE_IDS = 50
+
+
+class Loader:
+    """Batch-loads one relation for many matches"""
+    many = True
+
+    def fetch(self, match_ids):
+        """Yield (match_id, item) pairs for all ``match_ids`` at once"""
+        raise NotImplementedError
+
+    def load_many(self, match_ids):
+        result = {match_id: [] if self.many else None for match_id in match_ids}
+        for match_id, item in self.fetch(match_ids):
+            if self.many:
+                result[match_id].append(item)
+            else:
+                result[match_id] = item
+        return result
+
+
+class EventLoader(Loader):
+    def fetch(self, match_ids):
+        rows = Event.objects.filter(match_id__in=match_ids).order_by('match_id', 'minute', 'id').values_list(
+            'match_id', 'id', 'minute', 'event_type', 'description', 'player_id', 'player__name', 'player__team_id')
+        for match_id, pk, minute, event_type, description, player_id, player_name, team_id in rows:
+            player = {'id': player_id, 'name': player_name, 'team': team_id} if player_id else None
+            yield match_id, {'id': pk, 'minute': minute, 'type': event_type, 'description': description, 'player': player}
+
+
+class LineupLoader(Loader):
+    def fetch(self, match_ids):
+        lineups = {}
+        rows = Lineup.objects.filter(match_id__in=match_ids).order_by('match_id', 'id').values_list(
+            'id', 'match_id', 'team_id', 'formation', 'is_confirmed')
+        for pk, match_id, team_id, formation, is_confirmed in rows:
+            lineups[pk] = (match_id, {
+                'team': team_id, 'formation': formation, 'confirmed': is_confirmed, 'starting': [], 'substitutes': [],
+            })
+        players = LineupPlayer.objects.filter(lineup_id__in=list(lineups)).order_by('lineup_id', 'id').values_list(
+            'lineup_id', 'player_id', 'player__name', 'position', 'shirt_number', 'is_starter')
+        for lineup_id, player_id, name, position, shirt_number, is_starter in players:
+            entry = {'id': player_id, 'name': name, 'position': position, 'number': shirt_number}
+            lineups[lineup_id][1]['starting' if is_starter else 'substitutes'].append(entry)
+        return lineups.values()
+
+
+class StatisticsLoader(Loader):
+    many = False
+    fields = ('possession', 'shots', 'shots_on_target', 'corners', 'fouls', 'yellows', 'reds',
+              'analysis_text', 'key_moments', 'player_ratings')
+
+    def fetch(self, match_ids):
+        for row in MatchAnalysis.objects.filter(match_id__in=match_ids).values('match_id', *self.fields):
+            yield row.pop('match_id'), row
+
+
+class PreviewLoader(Loader):
+    many = False
+    fields = ('home_form', 'away_form', 'home_stats', 'away_stats', 'key_players', 'prediction',
+              'preview_text', 'head_to_head')
+
+    def fetch(self, match_ids):
+        for row in MatchPreview.objects.filter(match_id__in=match_ids).values('match_id', *self.fields):
+            yield row.pop('match_id'), row
+
+
+LOADERS = {
+    'events': EventLoader,
+    'lineups': LineupLoader,
+    'stats': StatisticsLoader,
+    'preview': PreviewLoader,
+}
+
+
+def _names(params, name):
+    raw = params.get(name)
+    return None if raw is None else list(dict.fromkeys(v.strip() for v in raw.split(',') if v.strip()))
+
+
+def parse(params):
+    """(match ids, relations) from ?ids= and ?include= (default: every relation)"""
+    ids = _names(params, 'ids')
+    if not ids:
+        raise ValidationError({'ids': "En az bir maç kimliği verilmeli."})
+    if len(ids) > MAX_BUNDLE_IDS:
+        raise ValidationError({'ids': f"En fazla {MAX_BUNDLE_IDS} maç istenebilir."})
+    include = _names(params, 'include')
+    if include is None:
+        include = list(LOADERS)
+    unknown = set(include) - set(LOADERS)
+    if unknown:
+        raise ValidationError({'include': f"Bilinmeyen ilişki(ler): {', '.join(sorted(unknown))}"})
+    return ids, include
+
+
+def build(serializer, queryset, ids, include):
+    """Bundles in request order; ids that do not exist are listed in ``missing``"""
+    matches = {row['id']: row for row in serializer.values(queryset.filter(pk__in=ids), 'id')}
+    found = [match_id for match_id in ids if match_id in matches]
+    related = {name: LOADERS[name]().load_many(found) for name in include} if found else {}
+    represented = serializer.to_representation([matches[match_id] for match_id in found])
+
+    results = []
+    for match_id, match in zip(found, represented):
+        bundle = {'id': match_id, 'match': match}
+        for name in include:
+            bundle[name] = related[name][match_id]
+        results.append(bundle)
+    return {'results': results, 'missing': [match_id for match_id in ids if match_id not in matches]}
@@ -3,6 +3,7 @@ import logging
 import time
 import hashlib
 import json
+from . import metrics
 
 logger = logging.getLogger(__name__)
 
@@ -42,6 +43,7 @@ class CacheManager:
         """Get preprocessed match data from cache"""
         key = cls._generate_cache_key('match', match_id)
         data = cache.get(key)
+        metrics.record_cache_lookup('match', data)
         logger.debug(f"Cache {'hit' if data else 'miss'} for match data: {key}")
         return data
     
@@ -58,6 +60,7 @@ class CacheManager:
         """Get timeline events from cache"""
         key = cls._generate_cache_key('timeline', match_id)
         events = cache.get(key)
+        metrics.record_cache_lookup('timeline', events)
         logger.debug(f"Cache {'hit' if events else 'miss'} for timeline events: {key}")
         return events
     
@@ -74,6 +77,7 @@ class CacheManager:
         """Get match statistics from cache"""
         key = cls._generate_cache_key('stats', match_id)
         stats = cache.get(key)
+        metrics.record_cache_lookup('stats', stats)
         logger.debug(f"Cache {'hit' if stats else 'miss'} for match stats: {key}")
         return stats
     
@@ -90,6 +94,7 @@ class CacheManager:
         """Get team form data from cache"""
         key = cls._generate_cache_key('team_form', team_id)
         form = cache.get(key)
+        metrics.record_cache_lookup('team_form', form)
         logger.debug(f"Cache {'hit' if form else 'miss'} for team form: {key}")
         return form
     
@@ -0,0 +1,175 @@
+"""
+Record/replay cassettes for APIFootballClient.
+
+In ``record`` mode every API-FOOTBALL response is written to a gzip'd JSON
+file keyed by endpoint plus parameters; ``replay`` serves responses from
+those files without touching the network, ``auto`` replays what it has and
+records the rest. The mode is picked per client or from the environment:
+
+    API_FOOTBALL_CASSETTE_MODE=record API_FOOTBALL_CASSETTE_DIR=cassettes/matchday python manage.py fetch_match_events
+    python manage.py replay_ingestion cassettes/matchday
+
+API_FOOTBALL_CASSETTE_TIMING replays the recorded latency scaled by the
+given factor (0, the default, replays as fast as possible).
+"""
+import gzip
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from dataclasses import dataclass, field, asdict
+
+from requests.structures import CaseInsensitiveDict
+
+logger = logging.getLogger(__name__)
+
+CASSETTE_MODES = ('off', 'record', 'replay', 'auto')
+# Response headers worth keeping; the rest only make the cassettes bigger
+KEPT_HEADERS = (
+    'content-type', 'x-ratelimit-requests-limit', 'x-ratelimit-requests-remaining',
+    'x-ratelimit-limit', 'x-ratelimit-remaining',
+)
+
+_listeners = []
+_listeners_lock = threading.Lock()
+
+
+def normalize_params(params):
+    """Parameters as the API sees them: strings, without empty values"""
+    return {key: str(value) for key, value in (params or {}).items() if value is not None}
+
+
+def request_key(endpoint, params):
+    """Stable key for an API request, independent of parameter order"""
+    params = normalize_params(params)
+    query = '&'.join(f'{key}={params[key]}' for key in sorted(params))
+    return hashlib.sha1(f"{endpoint.strip('/')}?{query}".encode('utf-8')).hexdigest()
+
+
+@dataclass
+class Interaction:
+    """One recorded API call; quacks like a requests.Response for metrics"""
+    endpoint: str
+    params: dict
+    status_code: int
+    body: object
+    duration: float = 0.0
+    headers: dict = field(default_factory=dict)
+    recorded_at: float = 0.0
+
+    @classmethod
+    def from_response(cls, endpoint, params, response, duration):
+        try:
+            body = response.json()
+        except ValueError:
+            body = None
+        headers = {name: value for name, value in response.headers.items() if name.lower() in KEPT_HEADERS}
+        return cls(
+            endpoint=endpoint.strip('/'),
+            params=normalize_params(params),
+            status_code=response.status_code,
+            body=body,
+            duration=round(duration, 6),
+            headers=headers,
+            recorded_at=time.time(),
+        )
+
+    def __post_init__(self):
+        self.headers = CaseInsensitiveDict(self.headers)
+
+    @property
+    def ok(self):
+        return 200 <= self.status_code < 400
+
+    def to_dict(self):
+        data = asdict(self)
+        data['headers'] = dict(self.headers)
+        return data
+
+
+class CassetteStore:
+    """One ``<endpoint>/<sha1 of endpoint+params>.json.gz`` file per request"""
+
+    def __init__(self, directory):
+        self.directory = directory
+
+    def path(self, endpoint, params):
+        folder = endpoint.strip('/').replace('/', '_') or 'root'
+        return os.path.join(self.directory, folder, f"{request_key(endpoint, params)}.json.gz")
+
+    def save(self, interaction):
+        path = self.path(interaction.endpoint, interaction.params)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Write then rename, so a concurrent replay never reads half a file
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as raw, gzip.GzipFile(fileobj=raw, mode='wb', mtime=0) as f:
+                f.write(json.dumps(interaction.to_dict(), ensure_ascii=False).encode('utf-8'))
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+
+    @staticmethod
+    def read(path):
+        with gzip.open(path, 'rb') as f:
+            return Interaction(**json.loads(f.read().decode('utf-8')))
+
+    def load(self, endpoint, params):
+        path = self.path(endpoint, params)
+        if not os.path.exists(path):
+            return None
+        return self.read(path)
+
+    def __iter__(self):
+        if not os.path.isdir(self.directory):
+            return
+        for folder in sorted(os.listdir(self.directory)):
+            folder_path = os.path.join(self.directory, folder)
+            if not os.path.isdir(folder_path):
+                continue
+            for name in sorted(os.listdir(folder_path)):
+                if name.endswith('.json.gz'):
+                    yield self.read(os.path.join(folder_path, name))
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+
+def add_listener(listener):
+    """Call ``listener(interaction)`` for every replayed interaction"""
+    with _listeners_lock:
+        _listeners.append(listener)
+
+
+def remove_listener(listener):
+    with _listeners_lock:
+        if listener in _listeners:
+            _listeners.remove(listener)
+
+
+def notify_replayed(interaction):
+    with _listeners_lock:
+        listeners = list(_listeners)
+    for listener in listeners:
+        try:
+            listener(interaction)
+        except Exception:
+            logger.exception("Cassette listener failed")
+
+
+def fixture_ids(interaction):
+    """Fixture ids an interaction is about (fixture param or fixtures in the body)"""
+    if 'fixture' in interaction.params:
+        return {interaction.params['fixture']}
+    if interaction.endpoint != 'fixtures' or not isinstance(interaction.body, dict):
+        return set()
+    return {
+        str(item.get('fixture', {}).get('id'))
+        for item in interaction.body.get('response') or []
+        if isinstance(item, dict) and item.get('fixture', {}).get('id') is not None
+    }
@@ -0,0 +1,173 @@
+"""
+Append-only match change log behind ``/api/changes/?since=<seq>``.
+
+Ingestion writes one ``MatchChange`` row per match and kind of change
+(``match`` for score/status/kick-off, ``events``, ``statistics``, ``lineups``,
+``deleted``). ``seq`` is an AUTOINCREMENT primary key, so it only grows and a
+client can keep the last ``next`` value it saw and ask for what changed after
+it instead of polling the full match lists.
+
+``compact`` keeps the table small: superseded rows (an older row for the same
+match and kind) are dropped, and rows past the retention window are removed
+entirely. The highest expired seq is stored as a watermark; a client asking
+for changes below it gets ``reset: true`` and must reload its lists.
+"""
+from collections import defaultdict
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import Max, OuterRef, Subquery
+from django.utils import timezone
+
+from .models import ChangeLogCompaction, Event, LineupPlayer, Match, MatchAnalysis, MatchChange
+
+KINDS = ('match', 'events', 'statistics', 'lineups', 'deleted')
+DEFAULT_LIMIT = 500
+MAX_LIMIT = 2000
+DEFAULT_RETENTION = timedelta(days=7)
+
+
+def record(kind, match_ids):
+    """Append one change per match id; returns the rows written"""
+    if kind not in KINDS:
+        raise ValueError(f"Unknown change kind: {kind}")
+    now = timezone.now()
+    rows = [MatchChange(match_id=str(match_id), kind=kind, changed_at=now) for match_id in dict.fromkeys(match_ids)]
+    return MatchChange.objects.bulk_create(rows)
+
+
+def latest_seq():
+    return max(MatchChange.objects.aggregate(seq=Max('seq'))['seq'] or 0, watermark())
+
+
+def watermark():
+    """Highest seq removed by compaction (0 if nothing was ever removed)"""
+    return ChangeLogCompaction.objects.aggregate(seq=Max('compacted_through'))['seq'] or 0
+
+
+@transaction.atomic
+def reset():
+    """Force every client to reload, e.g. after all matches were deleted"""
+    # A fresh row takes a seq no client has seen yet, so even a client that
+    # is fully caught up falls below the new watermark
+    through = MatchChange.objects.create(match_id='', kind='deleted').seq
+    removed = MatchChange.objects.filter(seq__lte=through).delete()[0]
+    ChangeLogCompaction.objects.create(compacted_through=through, removed=removed)
+
+
+# ---------------------------------------------------------------------------
+# Fingerprints: ingestion commands rewrite rows wholesale, so they compare a
+# snapshot taken before and after and only log a change if it differs.
+# ---------------------------------------------------------------------------
+
+def fingerprint(kind, match_id):
+    if kind == 'events':
+        rows = Event.objects.filter(match_id=match_id).values_list('minute', 'event_type', 'player_id', 'description')
+    elif kind == 'lineups':
+        rows = LineupPlayer.objects.filter(lineup__match_id=match_id).values_list(
+            'lineup__team_id', 'lineup__formation', 'player_id', 'is_starter', 'position', 'shirt_number')
+    elif kind == 'statistics':
+        rows = MatchAnalysis.objects.filter(match_id=match_id).values_list(
+            'possession', 'shots', 'shots_on_target', 'corners', 'fouls', 'yellows', 'reds', 'player_ratings')
+        return repr(list(rows))
+    else:
+        raise ValueError(f"No fingerprint for change kind: {kind}")
+    return sorted(rows, key=repr)
+
+
+def record_if_changed(kind, match_id, before):
+    """Log ``kind`` for the match if its fingerprint moved since ``before``"""
+    if fingerprint(kind, match_id) == before:
+        return False
+    record(kind, [match_id])
+    return True
+
+
+# ---------------------------------------------------------------------------
+# Reading
+# ---------------------------------------------------------------------------
+
+def changes_since(since, limit=DEFAULT_LIMIT):
+    """
+    Changes with seq > since, at most ``limit`` log rows.
+
+    Several rows for the same match collapse into one entry with the current
+    state, so the payload is bounded by the number of changed matches, not by
+    how often they changed. ``next`` is the seq to pass as ``since`` on the
+    next call and ``more`` says whether it would return anything right away.
+    """
+    limit = max(1, min(limit, MAX_LIMIT))
+    if since < watermark():
+        return {'since': since, 'next': latest_seq(), 'more': False, 'reset': True,
+                'matches': [], 'events': {}, 'stale': {'statistics': [], 'lineups': []}, 'deleted': []}
+
+    rows = list(MatchChange.objects.filter(seq__gt=since).order_by('seq').values_list('seq', 'match_id', 'kind')[:limit + 1])
+    more = len(rows) > limit
+    rows = rows[:limit]
+    kinds = defaultdict(set)
+    for _, match_id, kind in rows:
+        kinds[match_id].add(kind)
+
+    matches = {
+        row['id']: row for row in Match.objects.filter(pk__in=list(kinds)).values(
+            'id', 'score', 'status', 'match_date', 'league_id', 'home_team_id', 'away_team_id')
+    }
+    deleted = sorted(match_id for match_id in kinds if match_id not in matches)
+    changed = lambda kind: sorted(m for m, k in kinds.items() if kind in k and m in matches)
+
+    events = defaultdict(list)
+    event_rows = Event.objects.filter(match_id__in=changed('events')).order_by('match_id', 'minute', 'id').values_list(
+        'match_id', 'minute', 'event_type', 'player_id', 'player__name')
+    for match_id, minute, event_type, player_id, player_name in event_rows:
+        events[match_id].append({'minute': minute, 'type': event_type, 'player': player_id, 'name': player_name})
+    # A match whose events were all removed still needs its list cleared
+    for match_id in changed('events'):
+        events.setdefault(match_id, [])
+
+    return {
+        'since': since,
+        'next': rows[-1][0] if rows else max(since, latest_seq()),
+        'more': more,
+        'reset': False,
+        'matches': [
+            {
+                'id': m['id'],
+                'score': m['score'],
+                'status': m['status'],
+                'date': m['match_date'].isoformat() if m['match_date'] else None,
+                'league': m['league_id'],
+                'home': m['home_team_id'],
+                'away': m['away_team_id'],
+            }
+            for m in (matches[match_id] for match_id in changed('match'))
+        ],
+        'events': dict(events),
+        'stale': {'statistics': changed('statistics'), 'lineups': changed('lineups')},
+        'deleted': deleted,
+    }
+
+
+# ---------------------------------------------------------------------------
+# Compaction
+# ---------------------------------------------------------------------------
+
+@transaction.atomic
+def compact(retention=DEFAULT_RETENTION):
+    """
+    Drop superseded and expired rows; returns (removed rows, watermark).
+
+    A row is superseded once a later row exists for the same match and kind:
+    readers get the current state from the later row, so removing it never
+    needs a reset. Rows older than ``retention`` are removed outright and move
+    the watermark, so only clients that stopped polling for longer than that
+    are asked to reload.
+    """
+    latest = MatchChange.objects.filter(match_id=OuterRef('match_id'), kind=OuterRef('kind')).order_by('-seq')
+    superseded = MatchChange.objects.exclude(seq=Subquery(latest.values('seq')[:1])).delete()[0]
+
+    expired = MatchChange.objects.filter(changed_at__lt=timezone.now() - retention)
+    through = expired.aggregate(seq=Max('seq'))['seq']
+    removed = expired.delete()[0]
+    if removed:
+        ChangeLogCompaction.objects.create(compacted_through=through, removed=removed)
+    return superseded + removed, watermark()
@@ -0,0 +1,162 @@
+"""
+Failure handling for API-FOOTBALL calls.
+
+``_make_request`` used to wait up to 30 seconds for every call and never
+retried, so when the upstream degraded the every-minute
+``update_match_events`` job sat through one timeout per fixture and the next
+runs queued up behind ``max_instances=1``. Three pieces keep a run short:
+
+* ``CircuitBreaker`` per endpoint: after ``threshold`` consecutive failures
+  (connection errors, timeouts, 5xx) the circuit opens and calls fail at once
+  for ``reset_timeout`` seconds; then a single half-open probe goes out, which
+  closes the circuit when it succeeds and opens it again when it fails.
+* ``backoff``: retries wait a random time up to an exponentially growing cap
+  ("full jitter"), so clients that failed together do not retry together.
+* ``RetryBudget``: every call earns ``ratio`` of a retry and every retry
+  spends one, so retries stay a bounded fraction of the traffic during an
+  outage instead of multiplying it.
+
+Breakers and the budget are shared by every client of the process
+(``BREAKERS``, ``RETRY_BUDGET``), so state carries over from one scheduler
+run to the next. State changes are exported as the
+``api_football_circuit_state`` gauge (metrics.py).
+"""
+import os
+import random
+import threading
+import time
+
+from . import metrics
+
+CLOSED = 'closed'
+HALF_OPEN = 'half_open'
+OPEN = 'open'
+
+FAILURE_THRESHOLD = int(os.environ.get('API_FOOTBALL_BREAKER_THRESHOLD', 5))
+RESET_TIMEOUT = float(os.environ.get('API_FOOTBALL_BREAKER_RESET', 30))
+BACKOFF_BASE = 0.5
+BACKOFF_CAP = 8.0
+
+
+class CircuitBreaker:
+    """Closed/open/half-open state of one endpoint; thread-safe"""
+
+    def __init__(self, name, threshold=FAILURE_THRESHOLD, reset_timeout=RESET_TIMEOUT, clock=time.monotonic):
+        self.name = name
+        self.threshold = threshold
+        self.reset_timeout = reset_timeout
+        self.clock = clock
+        self.lock = threading.Lock()
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.probe_started = None
+
+    def _set_state(self, state):
+        if state != self.state:
+            self.state = state
+            metrics.record_circuit_state(self.name, state)
+
+    def allow(self):
+        """Whether a call may go out now; in half-open state only one probe at a time does"""
+        with self.lock:
+            now = self.clock()
+            if self.state == OPEN:
+                if now - self.opened_at < self.reset_timeout:
+                    return False
+                self._set_state(HALF_OPEN)
+                self.probe_started = None
+            if self.state == HALF_OPEN:
+                # A probe that never reported back (e.g. its thread died) frees its slot after reset_timeout
+                if self.probe_started is not None and now - self.probe_started < self.reset_timeout:
+                    return False
+                self.probe_started = now
+            return True
+
+    def record_success(self):
+        with self.lock:
+            self.failures = 0
+            self.probe_started = None
+            self._set_state(CLOSED)
+
+    def record_failure(self):
+        with self.lock:
+            self.failures += 1
+            self.probe_started = None
+            if self.state == HALF_OPEN or self.failures >= self.threshold:
+                self.opened_at = self.clock()
+                self._set_state(OPEN)
+
+
+class CircuitBreakers:
+    """One CircuitBreaker per endpoint, created on first use"""
+
+    def __init__(self, threshold=FAILURE_THRESHOLD, reset_timeout=RESET_TIMEOUT, clock=time.monotonic):
+        self.threshold = threshold
+        self.reset_timeout = reset_timeout
+        self.clock = clock
+        self.lock = threading.Lock()
+        self.breakers = {}
+
+    def get(self, endpoint):
+        with self.lock:
+            breaker = self.breakers.get(endpoint)
+            if breaker is None:
+                breaker = self.breakers[endpoint] = CircuitBreaker(
+                    endpoint, self.threshold, self.reset_timeout, self.clock)
+            return breaker
+
+    def states(self):
+        """{endpoint: state} of every endpoint called so far"""
+        with self.lock:
+            return {endpoint: breaker.state for endpoint, breaker in self.breakers.items()}
+
+
+class RetryBudget:
+    """
+    Token bucket for retries: each call deposits ``ratio`` tokens (up to
+    ``capacity``), each retry withdraws one. Starts full.
+    """
+
+    def __init__(self, ratio=0.2, capacity=10.0):
+        self.ratio = ratio
+        self.capacity = capacity
+        self.lock = threading.Lock()
+        self.tokens = capacity
+
+    def deposit(self):
+        with self.lock:
+            self.tokens = min(self.capacity, self.tokens + self.ratio)
+
+    def withdraw(self):
+        """Take one retry; False when the budget is spent"""
+        with self.lock:
+            if self.tokens < 1:
+                return False
+            self.tokens -= 1
+            return True
+
+
+def backoff(attempt, base=BACKOFF_BASE, cap=BACKOFF_CAP, retry_after=None, rng=random):
+    """
+    Seconds to wait before retry number ``attempt`` (0 for the first): a
+    uniform draw up to min(cap, base * 2^attempt), or the server's
+    Retry-After (capped) when that is longer.
+    """
+    delay = rng.uniform(0, min(cap, base * 2 ** attempt))
+    if retry_after is not None:
+        delay = max(delay, min(retry_after, cap))
+    return delay
+
+
+def retry_after(response):
+    """Seconds from a response's Retry-After header (None when absent or a date)"""
+    value = response.headers.get('Retry-After') if response is not None else None
+    try:
+        return max(0.0, float(value)) if value is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+BREAKERS = CircuitBreakers()
+RETRY_BUDGET = RetryBudget()
@@ -1,12 +1,13 @@
 # Import necessary modules
 from django.shortcuts import render, get_object_or_404
-from django.db.models import Q, Prefetch
+from django.db.models import Prefetch
 from django.utils import timezone
 from django.core.cache import cache
 from datetime import timedelta
 from .models import Match, MatchPreview, MatchAnalysis, Event, Team, Player
 from .performance import timing_decorator, caching_decorator, query_debugger
 from .cache_utils import CacheManager
+from . import h2h, team_form
 
 # Enhanced view function for match detail with optimizations
 @timing_decorator
@@ -37,40 +38,11 @@ def enhanced_match_detail(request, match_id):
     except MatchAnalysis.DoesNotExist:
         analysis = None
     
-    # Get the last matches with efficient querying
-    def get_last_matches(team, match_date):
-        """Get last 5 matches for a team with efficient querying"""
-        cache_key = f"last_matches_{team.id}_{match_date.date()}"
-        cached_result = cache.get(cache_key)
-        if cached_result:
-            return cached_result
-        
-        last_matches = Match.objects.filter(
-            Q(home_team=team) | Q(away_team=team),
-            match_date__lt=match_date,
-            score__isnull=False
-        ).select_related('home_team', 'away_team').order_by('-match_date')[:5]
-        
-        cache.set(cache_key, last_matches, 3600)  # Cache for 1 hour
-        return last_matches
-    
-    # Get last 5 match results for each team
-    home_team_last_matches = get_last_matches(match.home_team, match.match_date)
-    away_team_last_matches = get_last_matches(match.away_team, match.match_date)
+    # Last 5 results of each team from the form table (one keyed lookup)
+    home_team_last_matches, away_team_last_matches = team_form.last_matches(match)
     
-    # Head-to-head matches with efficient querying
-    head_to_head_cache_key = f"h2h_{match.home_team.id}_{match.away_team.id}_{match.match_date.date()}"
-    head_to_head = cache.get(head_to_head_cache_key)
-    
-    if not head_to_head:
-        head_to_head = Match.objects.filter(
-            Q(home_team=match.home_team, away_team=match.away_team) | 
-            Q(home_team=match.away_team, away_team=match.home_team),
-            match_date__lt=match.match_date,
-            score__isnull=False
-        ).select_related('home_team', 'away_team').order_by('-match_date')[:5]
-        
-        cache.set(head_to_head_cache_key, head_to_head, 3600)  # Cache for 1 hour
+    # Head-to-head from the pair table (one keyed lookup)
+    head_to_head = h2h.recent_meetings(match)
     
     # Match status (live, completed, upcoming)
     current_time = timezone.now()
@@ -167,10 +139,10 @@ def enhanced_match_detail(request, match_id):
         # Process head-to-head stats
         if preview and preview.head_to_head:
             try:
-                h2h = preview.head_to_head
-                match_stats['home_wins'] = h2h.get('home_wins', 0)
-                match_stats['away_wins'] = h2h.get('away_wins', 0)
-                match_stats['draws'] = h2h.get('draws', 0)
+                h2h_stats = preview.head_to_head
+                match_stats['home_wins'] = h2h_stats.get('home_wins', 0)
+                match_stats['away_wins'] = h2h_stats.get('away_wins', 0)
+                match_stats['draws'] = h2h_stats.get('draws', 0)
                 total_h2h = match_stats['home_wins'] + match_stats['away_wins'] + match_stats['draws']
                 
                 if total_h2h > 0:
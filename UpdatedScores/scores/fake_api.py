@@ -0,0 +1,892 @@
+"""
+Local stand-in for the API-FOOTBALL v3 endpoints used by the ingestion commands.
+
+The server answers ``fixtures`` (plus ``events``, ``lineups``, ``statistics``,
+``players`` and ``headtohead``), ``predictions``, ``teams``, ``leagues``,
+``players`` and ``status`` with responses shaped like the real API. Data comes
+from a generated world (deterministic for a seed), from the local database,
+or from cassettes recorded with APIFootballClient (scores.cassettes).
+Latency, rate-limit headers, 429/5xx injection and a live mode that advances
+matches faster than real time make it possible to benchmark ingestion and
+live monitoring without spending API quota:
+
+    python manage.py run_fake_api_football --port 8099 --live 10
+    API_FOOTBALL_BASE_URL=http://127.0.0.1:8099 python manage.py fetch_match_events
+"""
+import json
+import logging
+import math
+import os
+import random
+import threading
+import time
+from collections import defaultdict, deque
+from dataclasses import dataclass
+from datetime import datetime, timezone as dt_timezone
+from functools import lru_cache
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qsl
+
+from .cassettes import CassetteStore
+
+logger = logging.getLogger(__name__)
+
+ENDPOINTS = (
+    'status', 'leagues', 'teams', 'players', 'fixtures', 'fixtures/events', 'fixtures/lineups',
+    'fixtures/statistics', 'fixtures/players', 'fixtures/headtohead', 'predictions',
+)
+
+# The leagues fetch_api_football_leagues looks for, with their real ids
+KNOWN_LEAGUES = [
+    (39, 'Premier League', 'England'),
+    (140, 'La Liga', 'Spain'),
+    (78, 'Bundesliga', 'Germany'),
+    (135, 'Serie A', 'Italy'),
+    (61, 'Ligue 1', 'France'),
+    (203, 'Süper Lig', 'Turkey'),
+    (2, 'UEFA Champions League', 'World'),
+    (3, 'UEFA Europa League', 'World'),
+]
+
+STATUS_LONG = {
+    'NS': 'Not Started', '1H': 'First Half', 'HT': 'Halftime', '2H': 'Second Half', 'FT': 'Match Finished',
+}
+POSITION_NAMES = {'G': 'Goalkeeper', 'D': 'Defender', 'M': 'Midfielder', 'F': 'Attacker'}
+DB_POSITIONS = {'GK': 'G', 'DF': 'D', 'MF': 'M', 'FW': 'F'}
+SQUAD_SHAPE = 'G' * 3 + 'D' * 8 + 'M' * 8 + 'F' * 6
+FORMATIONS = {'4-4-2': (4, 4, 2), '4-3-3': (4, 3, 3), '3-5-2': (3, 5, 2), '4-5-1': (4, 5, 1)}
+FIRST_NAMES = ['Ali', 'Mehmet', 'John', 'Luca', 'Pierre', 'Hans', 'Diego', 'Jan', 'Emre', 'Marco', 'Kerem', 'Thomas']
+LAST_NAMES = ['Yılmaz', 'Smith', 'Rossi', 'Müller', 'García', 'Silva', 'Dupont', 'Öztürk', 'Jansen', 'Costa', 'Kaya']
+LINEUPS_BEFORE_KICKOFF = 40 * 60  # seconds
+
+
+def envelope(endpoint, params, response, errors=None, page=1, total_pages=1):
+    return {
+        'get': endpoint,
+        'parameters': params,
+        'errors': errors or [],
+        'results': len(response) if isinstance(response, list) else 1,
+        'paging': {'current': page, 'total': total_pages},
+        'response': response,
+    }
+
+
+def _poisson(rng, lam):
+    limit = math.exp(-lam)
+    k, p = 0, 1.0
+    while True:
+        p *= rng.random()
+        if p <= limit:
+            return k
+        k += 1
+
+
+def _iso(timestamp):
+    return datetime.fromtimestamp(timestamp, dt_timezone.utc).strftime('%Y-%m-%dT%H:%M:%S+00:00')
+
+
+@dataclass
+class Fixture:
+    id: int
+    league_id: int
+    season: int
+    home_id: int
+    away_id: int
+    kickoff: float  # epoch seconds
+    round: str
+    venue: str
+
+
+class Catalog:
+    """Leagues, teams, squads and the fixture calendar the server answers from"""
+
+    def __init__(self):
+        self.leagues = {}   # id -> (name, country)
+        self.teams = {}     # id -> (name, league_id)
+        self.squads = {}    # team id -> [(player id, name, position letter)]
+        self.fixtures = {}  # id -> Fixture
+        self.by_league = defaultdict(list)
+        self.by_team = defaultdict(list)
+        self.by_date = defaultdict(list)
+
+    def add_fixture(self, fixture):
+        self.fixtures[fixture.id] = fixture
+
+    def build_indexes(self):
+        for index in (self.by_league, self.by_team, self.by_date):
+            index.clear()
+        for fixture in sorted(self.fixtures.values(), key=lambda f: (f.kickoff, f.id)):
+            self.by_league[fixture.league_id].append(fixture)
+            self.by_team[fixture.home_id].append(fixture)
+            self.by_team[fixture.away_id].append(fixture)
+            self.by_date[_iso(fixture.kickoff)[:10]].append(fixture)
+
+    def squad(self, team_id):
+        squad = self.squads.get(team_id)
+        if squad is None or len(squad) < 18:
+            # Pad thin squads (e.g. database teams without players) with generated ones
+            squad = list(squad or [])
+            known = {player_id for player_id, _, _ in squad}
+            rng = random.Random(f'squad:{team_id}')
+            for n, position in enumerate(SQUAD_SHAPE):
+                if len(squad) >= len(SQUAD_SHAPE):
+                    break
+                player_id = int(team_id) * 100 + n
+                if player_id not in known:
+                    squad.append((player_id, f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}", position))
+            self.squads[team_id] = squad
+        return squad
+
+    @classmethod
+    def generate(cls, seed=42, leagues=8, teams_per_league=20, season=None, now=None, played_fraction=0.6):
+        """A double round-robin season per league; ``played_fraction`` of the rounds are in the past"""
+        catalog = cls()
+        now = now if now is not None else time.time()
+        season = season or datetime.fromtimestamp(now, dt_timezone.utc).year
+        teams_per_league = max(2, min(teams_per_league, 98))
+        rng = random.Random(seed)
+
+        league_specs = KNOWN_LEAGUES[:leagues]
+        for n in range(len(league_specs), leagues):
+            league_specs.append((10000 + n, f"Synthetic League {n + 1}", rng.choice(['Netherlands', 'Portugal', 'Belgium'])))
+
+        for league_id, name, country in league_specs:
+            catalog.leagues[league_id] = (name, country)
+            team_ids = [league_id * 100 + k for k in range(teams_per_league)]
+            for k, team_id in enumerate(team_ids):
+                catalog.teams[team_id] = (f"{name.split()[0]} Club {k + 1}", league_id)
+                catalog.squads[team_id] = [
+                    (team_id * 100 + n, f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}", position)
+                    for n, position in enumerate(SQUAD_SHAPE)
+                ]
+
+            rounds = cls._round_robin(team_ids)
+            season_start = now - int(len(rounds) * played_fraction) * 7 * 86400
+            index = 0
+            for round_number, pairs in enumerate(rounds, 1):
+                # Rounds are a week apart, kick-offs spread between 12:00 and 20:00
+                round_day = int((season_start + (round_number - 1) * 7 * 86400) // 86400) * 86400
+                for home_id, away_id in pairs:
+                    kickoff = round_day + (12 + rng.randrange(9)) * 3600 + rng.choice([0, 1800])
+                    catalog.add_fixture(Fixture(
+                        id=league_id * 10000 + index,
+                        league_id=league_id,
+                        season=season,
+                        home_id=home_id,
+                        away_id=away_id,
+                        kickoff=kickoff,
+                        round=f"Regular Season - {round_number}",
+                        venue=f"{catalog.teams[home_id][0]} Stadium",
+                    ))
+                    index += 1
+        catalog.build_indexes()
+        return catalog
+
+    @staticmethod
+    def _round_robin(team_ids):
+        teams = list(team_ids)
+        if len(teams) % 2:
+            teams.append(None)
+        half = len(teams) // 2
+        first_leg = []
+        for _ in range(len(teams) - 1):
+            pairs = [(teams[i], teams[-i - 1]) for i in range(half)]
+            first_leg.append([pair for pair in pairs if None not in pair])
+            teams = [teams[0], teams[-1]] + teams[1:-1]
+        second_leg = [[(away, home) for home, away in pairs] for pairs in first_leg]
+        return first_leg + second_leg
+
+    @classmethod
+    def from_database(cls):
+        """Serve the leagues, teams, players and matches in the local database (numeric ids only)"""
+        from .models import League, Team, Player, Match
+
+        catalog = cls()
+        for league_id, name, country in League.objects.values_list('id', 'name', 'country').iterator():
+            if str(league_id).isdigit():
+                catalog.leagues[int(league_id)] = (name, country)
+        for team_id, name, league_id in Team.objects.values_list('id', 'name', 'league_id').iterator():
+            if str(team_id).isdigit() and str(league_id).isdigit():
+                catalog.teams[int(team_id)] = (name, int(league_id))
+        for player_id, name, team_id, position in Player.objects.values_list(
+            'id', 'name', 'team_id', 'position'
+        ).iterator():
+            if str(player_id).isdigit() and str(team_id).isdigit():
+                catalog.squads.setdefault(int(team_id), []).append(
+                    (int(player_id), name, DB_POSITIONS.get(position, 'M'))
+                )
+        rows = Match.objects.values_list(
+            'id', 'league_id', 'season', 'home_team_id', 'away_team_id', 'match_date', 'round', 'stadium'
+        )
+        for match_id, league_id, season, home_id, away_id, match_date, round_name, stadium in rows.iterator():
+            if not all(str(value).isdigit() for value in (match_id, league_id, home_id, away_id)):
+                continue
+            catalog.add_fixture(Fixture(
+                id=int(match_id),
+                league_id=int(league_id),
+                season=int(season) if season and str(season).isdigit() else match_date.year,
+                home_id=int(home_id),
+                away_id=int(away_id),
+                kickoff=match_date.timestamp(),
+                round=round_name or 'Regular Season',
+                venue=stadium,
+            ))
+        catalog.build_indexes()
+        return catalog
+
+
+class RecordedResponses:
+    """
+    Responses recorded from the real API with APIFootballClient's record mode
+    (see scores.cassettes). A recorded response wins over generated data for
+    the same request; recorded errors are served with their status code.
+    """
+
+    def __init__(self, directory):
+        if not os.path.isdir(directory):
+            raise OSError(f"No such cassette directory: {directory}")
+        self.store = CassetteStore(directory)
+
+    def lookup(self, endpoint, params):
+        return self.store.load(endpoint, params)
+
+
+class RateLimiter:
+    """API-FOOTBALL style quota: requests per day and per minute"""
+
+    def __init__(self, daily_limit=7500, per_minute_limit=300, clock=time.time):
+        self.daily_limit = daily_limit
+        self.per_minute_limit = per_minute_limit
+        self.clock = clock
+        self.lock = threading.Lock()
+        self.day = None
+        self.used_today = 0
+        self.recent = deque()
+
+    def acquire(self):
+        """Return (allowed, reason, headers) for one request"""
+        with self.lock:
+            now = self.clock()
+            day = int(now // 86400)
+            if day != self.day:
+                self.day, self.used_today = day, 0
+            while self.recent and self.recent[0] <= now - 60:
+                self.recent.popleft()
+
+            reason = None
+            if self.per_minute_limit and len(self.recent) >= self.per_minute_limit:
+                reason = 'minute'
+            elif self.daily_limit and self.used_today >= self.daily_limit:
+                reason = 'day'
+            else:
+                self.recent.append(now)
+                self.used_today += 1
+            headers = {
+                'x-ratelimit-requests-limit': str(self.daily_limit),
+                'x-ratelimit-requests-remaining': str(max(self.daily_limit - self.used_today, 0)),
+                'X-RateLimit-Limit': str(self.per_minute_limit),
+                'X-RateLimit-Remaining': str(max(self.per_minute_limit - len(self.recent), 0)),
+            }
+            return reason is None, reason, headers
+
+
+class FakeAPIFootball:
+    """
+    Request handling, independent of HTTP so it can be exercised directly.
+
+    Live fixtures kick off when the server starts and their clock runs
+    ``live_speed`` times faster than real time (90 means one match minute
+    per second), so events, score and status advance between polls.
+    """
+
+    def __init__(self, catalog, seed=42, recorded=None, latency_ms=0, jitter_ms=0, error_rate=0.0,
+                 throttle_rate=0.0, rate_limiter=None, api_key=None, live=0, live_speed=90.0,
+                 clock=time.time, sleep=time.sleep):
+        self.catalog = catalog
+        self.seed = seed
+        self.recorded = recorded
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.throttle_rate = throttle_rate
+        self.rate_limiter = rate_limiter or RateLimiter(daily_limit=0, per_minute_limit=0, clock=clock)
+        self.api_key = api_key
+        self.live_speed = live_speed
+        self.clock = clock
+        self.sleep = sleep
+        self.rng = random.Random(f'{seed}:faults')
+        self.rng_lock = threading.Lock()
+        self.stats_lock = threading.Lock()
+        self.stats = defaultdict(int)
+        self.details = lru_cache(maxsize=4096)(self._build_details)
+        self.live_ids = set()
+        if live:
+            self.start_live(live)
+
+    # -- live simulation -------------------------------------------------
+
+    def start_live(self, count):
+        """Move the next ``count`` unplayed fixtures to kick off now"""
+        now = self.clock()
+        upcoming = sorted(
+            (f for f in self.catalog.fixtures.values() if f.kickoff > now and f.id not in self.live_ids),
+            key=lambda f: (f.kickoff, f.id),
+        )[:count]
+        for fixture in upcoming:
+            fixture.kickoff = now
+            self.live_ids.add(fixture.id)
+        self.catalog.build_indexes()
+        return [fixture.id for fixture in upcoming]
+
+    def match_clock(self, fixture, now=None):
+        """(status short code, elapsed minute) of a fixture at ``now``"""
+        seconds = (now if now is not None else self.clock()) - fixture.kickoff
+        if fixture.id in self.live_ids:
+            seconds *= self.live_speed
+        minutes = seconds / 60
+        if minutes < 0:
+            return 'NS', None
+        if minutes < 45:
+            return '1H', int(minutes) + 1
+        if minutes < 60:
+            return 'HT', 45
+        if minutes < 105:
+            return '2H', min(int(minutes) - 14, 90)
+        return 'FT', 90
+
+    # -- generated match details -----------------------------------------
+
+    def _build_details(self, fixture_id):
+        fixture = self.catalog.fixtures[fixture_id]
+        rng = random.Random(f'{self.seed}:{fixture_id}')
+        sides = {}
+        events = []
+        for side, team_id, strength in (('home', fixture.home_id, 1.45), ('away', fixture.away_id, 1.15)):
+            squad = self.catalog.squad(team_id)
+            formation = rng.choice(sorted(FORMATIONS))
+            starters, bench = self._pick_lineup(rng, squad, FORMATIONS[formation])
+            sides[side] = {'team_id': team_id, 'formation': formation, 'starters': starters, 'bench': bench}
+            outfield = [p for p in starters if p[2] != 'G']
+
+            for _ in range(_poisson(rng, strength)):
+                scorer = rng.choice(outfield)
+                assist = rng.choice([p for p in outfield if p != scorer]) if rng.random() < 0.7 else None
+                detail = 'Penalty' if rng.random() < 0.1 else 'Normal Goal'
+                events.append((rng.randint(1, 90), side, 'Goal', detail, scorer, assist))
+            for _ in range(_poisson(rng, 1.8)):
+                events.append((rng.randint(1, 90), side, 'Card', 'Yellow Card', rng.choice(starters), None))
+            if rng.random() < 0.06:
+                events.append((rng.randint(20, 90), side, 'Card', 'Red Card', rng.choice(outfield), None))
+            substitutions = zip(rng.sample(outfield, 3), rng.sample(bench, min(3, len(bench))))
+            for n, (player_out, player_in) in enumerate(substitutions, 1):
+                events.append((rng.randint(46, 88), side, 'subst', f"Substitution {n}", player_out, player_in))
+        events.sort(key=lambda e: (e[0], e[1], e[2]))
+
+        totals = {}
+        for side in ('home', 'away'):
+            goals = sum(1 for e in events if e[1] == side and e[2] == 'Goal')
+            shots = goals * 2 + rng.randint(5, 14)
+            on_target = min(shots, goals + rng.randint(1, 5))
+            totals[side] = {
+                'Shots on Goal': on_target,
+                'Shots off Goal': shots - on_target,
+                'Total Shots': shots,
+                'Corner Kicks': rng.randint(1, 10),
+                'Fouls': rng.randint(6, 18),
+                'Offsides': rng.randint(0, 5),
+                'Goalkeeper Saves': rng.randint(0, 6),
+                'Total passes': rng.randint(300, 650),
+            }
+        home_possession = rng.randint(35, 65)
+        totals['home']['Ball Possession'] = home_possession
+        totals['away']['Ball Possession'] = 100 - home_possession
+        ratings = {
+            player[0]: round(rng.uniform(5.8, 8.2), 1)
+            for side in sides.values() for player in side['starters']
+        }
+        return {'sides': sides, 'events': events, 'totals': totals, 'ratings': ratings}
+
+    @staticmethod
+    def _pick_lineup(rng, squad, shape):
+        by_position = defaultdict(list)
+        for player in squad:
+            by_position[player[2]].append(player)
+        starters = by_position['G'][:1]
+        for letter, count in zip('DMF', shape):
+            starters += by_position[letter][:count]
+        # Thin squads: fill the XI with whoever is left
+        remaining = [p for p in squad if p not in starters]
+        starters += remaining[:11 - len(starters)]
+        bench = [p for p in squad if p not in starters]
+        rng.shuffle(bench)
+        return starters, bench[:7]
+
+    def _state(self, fixture, now):
+        status, elapsed = self.match_clock(fixture, now)
+        details = self.details(fixture.id)
+        if status == 'NS':
+            return status, elapsed, [], None, None
+        visible = [e for e in details['events'] if e[0] <= elapsed]
+        home_goals = sum(1 for e in visible if e[2] == 'Goal' and e[1] == 'home')
+        away_goals = sum(1 for e in visible if e[2] == 'Goal' and e[1] == 'away')
+        return status, elapsed, visible, home_goals, away_goals
+
+    # -- serializers -----------------------------------------------------
+
+    def _team(self, team_id):
+        name = self.catalog.teams.get(team_id, (f"Team {team_id}", None))[0]
+        return {'id': team_id, 'name': name, 'logo': f"https://media.api-sports.io/football/teams/{team_id}.png"}
+
+    @staticmethod
+    def _player(player):
+        return {'id': player[0], 'name': player[1]} if player else {'id': None, 'name': None}
+
+    def _league(self, fixture):
+        name, country = self.catalog.leagues.get(fixture.league_id, (f"League {fixture.league_id}", 'World'))
+        return {
+            'id': fixture.league_id, 'name': name, 'country': country,
+            'logo': f"https://media.api-sports.io/football/leagues/{fixture.league_id}.png",
+            'flag': None, 'season': fixture.season, 'round': fixture.round,
+        }
+
+    def fixture_json(self, fixture, now, include_details=False):
+        status, elapsed, visible, home_goals, away_goals = self._state(fixture, now)
+        winner = {'home': None, 'away': None}
+        if status == 'FT':
+            if home_goals != away_goals:
+                winner = {'home': home_goals > away_goals, 'away': away_goals > home_goals}
+        halftime = None
+        if status not in ('NS', '1H'):
+            first_half = [e for e in visible if e[0] <= 45 and e[2] == 'Goal']
+            halftime = {
+                'home': sum(1 for e in first_half if e[1] == 'home'),
+                'away': sum(1 for e in first_half if e[1] == 'away'),
+            }
+        home, away = self._team(fixture.home_id), self._team(fixture.away_id)
+        home['winner'], away['winner'] = winner['home'], winner['away']
+        data = {
+            'fixture': {
+                'id': fixture.id,
+                'referee': None,
+                'timezone': 'UTC',
+                'date': _iso(fixture.kickoff),
+                'timestamp': int(fixture.kickoff),
+                'periods': {
+                    'first': int(fixture.kickoff) if status != 'NS' else None,
+                    'second': int(fixture.kickoff) + 3600 if status in ('2H', 'FT') else None,
+                },
+                'venue': {'id': None, 'name': fixture.venue, 'city': None},
+                'status': {'long': STATUS_LONG[status], 'short': status, 'elapsed': elapsed},
+            },
+            'league': self._league(fixture),
+            'teams': {'home': home, 'away': away},
+            'goals': {'home': home_goals, 'away': away_goals},
+            'score': {
+                'halftime': halftime or {'home': None, 'away': None},
+                'fulltime': {'home': home_goals, 'away': away_goals} if status == 'FT' else {'home': None, 'away': None},
+                'extratime': {'home': None, 'away': None},
+                'penalty': {'home': None, 'away': None},
+            },
+        }
+        if include_details:
+            data['events'] = self.events_json(fixture, now)
+            data['lineups'] = self.lineups_json(fixture, now)
+            data['statistics'] = self.statistics_json(fixture, now)
+            data['players'] = self.players_json(fixture, now)
+        return data
+
+    def events_json(self, fixture, now, team=None):
+        _, _, visible, _, _ = self._state(fixture, now)
+        sides = self.details(fixture.id)['sides']
+        response = []
+        for minute, side, kind, detail, player, assist in visible:
+            team_id = sides[side]['team_id']
+            if team and str(team_id) != str(team):
+                continue
+            response.append({
+                'time': {'elapsed': minute, 'extra': None},
+                'team': self._team(team_id),
+                'player': self._player(player),
+                'assist': self._player(assist),
+                'type': kind,
+                'detail': detail,
+                'comments': None,
+            })
+        return response
+
+    def lineups_json(self, fixture, now, team=None):
+        if (now if now is not None else self.clock()) < fixture.kickoff - LINEUPS_BEFORE_KICKOFF:
+            return []
+        response = []
+        for side in self.details(fixture.id)['sides'].values():
+            if team and str(side['team_id']) != str(team):
+                continue
+
+            def entry(player, number):
+                return {'player': {'id': player[0], 'name': player[1], 'number': number, 'pos': player[2], 'grid': None}}
+
+            response.append({
+                'team': dict(self._team(side['team_id']), colors=None),
+                'formation': side['formation'],
+                'startXI': [entry(p, n) for n, p in enumerate(side['starters'], 1)],
+                'substitutes': [entry(p, n) for n, p in enumerate(side['bench'], 12)],
+                'coach': {'id': side['team_id'], 'name': f"Coach {side['team_id']}", 'photo': None},
+            })
+        return response
+
+    def statistics_json(self, fixture, now, team=None):
+        status, elapsed, _, home_goals, away_goals = self._state(fixture, now)
+        if status == 'NS':
+            return []
+        details = self.details(fixture.id)
+        progress = elapsed / 90
+        response = []
+        for side, goals in (('home', home_goals), ('away', away_goals)):
+            team_id = details['sides'][side]['team_id']
+            if team and str(team_id) != str(team):
+                continue
+            statistics = []
+            for name, value in details['totals'][side].items():
+                if name == 'Ball Possession':
+                    statistics.append({'type': name, 'value': f"{value}%"})
+                    continue
+                current = int(round(value * progress))
+                if name in ('Shots on Goal', 'Total Shots'):
+                    current = max(current, goals)
+                statistics.append({'type': name, 'value': current})
+            cards = [e for e in self.events_json(fixture, now, team=team_id) if e['type'] == 'Card']
+            statistics.append({'type': 'Yellow Cards', 'value': sum(1 for e in cards if e['detail'] == 'Yellow Card')})
+            statistics.append({'type': 'Red Cards', 'value': sum(1 for e in cards if e['detail'] == 'Red Card')})
+            response.append({'team': self._team(team_id), 'statistics': statistics})
+        return response
+
+    def players_json(self, fixture, now, team=None):
+        status, elapsed, visible, _, _ = self._state(fixture, now)
+        if status == 'NS':
+            return []
+        details = self.details(fixture.id)
+        response = []
+        for side in details['sides'].values():
+            if team and str(side['team_id']) != str(team):
+                continue
+            players = []
+            for number, player in enumerate(side['starters'], 1):
+                goals = sum(1 for e in visible if e[2] == 'Goal' and e[4] == player)
+                assists = sum(1 for e in visible if e[2] == 'Goal' and e[5] == player)
+                cards = [e for e in visible if e[2] == 'Card' and e[4] == player]
+                players.append({
+                    'player': {'id': player[0], 'name': player[1], 'photo': None},
+                    'statistics': [{
+                        'games': {
+                            'minutes': elapsed, 'number': number, 'position': player[2],
+                            'rating': str(details['ratings'][player[0]]), 'captain': number == 1, 'substitute': False,
+                        },
+                        'goals': {'total': goals or None, 'conceded': 0, 'assists': assists or None, 'saves': None},
+                        'shots': {'total': goals + (player[0] % 3), 'on': goals},
+                        'passes': {'total': 20 + player[0] % 40, 'key': player[0] % 4, 'accuracy': str(70 + player[0] % 25)},
+                        'cards': {
+                            'yellow': sum(1 for e in cards if e[3] == 'Yellow Card'),
+                            'red': sum(1 for e in cards if e[3] == 'Red Card'),
+                        },
+                    }],
+                })
+            response.append({
+                'team': dict(self._team(side['team_id']), update=_iso(now if now is not None else self.clock())),
+                'players': players,
+            })
+        return response
+
+    def _form(self, team_id, before, now, count=5):
+        results = []
+        for fixture in reversed(self.catalog.by_team.get(team_id, [])):
+            if fixture.kickoff >= before:
+                continue
+            status, _, _, home_goals, away_goals = self._state(fixture, now)
+            if status != 'FT':
+                continue
+            scored, conceded = (home_goals, away_goals) if fixture.home_id == team_id else (away_goals, home_goals)
+            results.append('W' if scored > conceded else 'D' if scored == conceded else 'L')
+            if len(results) == count:
+                break
+        return ''.join(reversed(results))
+
+    def prediction_json(self, fixture, now):
+        rng = random.Random(f'{self.seed}:prediction:{fixture.id}')
+        home_percent = rng.randint(20, 60)
+        draw_percent = rng.randint(15, 100 - home_percent - 10)
+        away_percent = 100 - home_percent - draw_percent
+        favourite = fixture.home_id if home_percent >= away_percent else fixture.away_id
+        teams = {}
+        for side, team_id in (('home', fixture.home_id), ('away', fixture.away_id)):
+            played = [f for f in self.catalog.by_team.get(team_id, []) if f.kickoff < fixture.kickoff]
+            teams[side] = dict(self._team(team_id), league={
+                'form': self._form(team_id, fixture.kickoff, now),
+                'fixtures': {'played': {'total': len(played)}},
+                'goals': {'for': {'average': {'total': f"{rng.uniform(0.8, 2.2):.1f}"}}},
+                'biggest': {},
+                'clean_sheet': {'total': rng.randint(0, len(played) // 3 + 1)},
+            })
+        return {
+            'predictions': {
+                'winner': {'id': favourite, 'name': self._team(favourite)['name'], 'comment': 'Win or draw'},
+                'win_or_draw': True,
+                'under_over': rng.choice(['-2.5', '+2.5', None]),
+                'goals': {'home': '-2.5', 'away': '-1.5'},
+                'advice': f"Double chance : {self._team(favourite)['name']} or draw",
+                'percent': {'home': f"{home_percent}%", 'draw': f"{draw_percent}%", 'away': f"{away_percent}%"},
+            },
+            'league': self._league(fixture),
+            'teams': teams,
+            'comparison': {},
+        }
+
+    # -- endpoints -------------------------------------------------------
+
+    def _fixture_param(self, params):
+        try:
+            return self.catalog.fixtures.get(int(params.get('fixture', '')))
+        except ValueError:
+            return None
+
+    def _select_fixtures(self, params, now):
+        catalog = self.catalog
+        if params.get('id'):
+            candidates = [catalog.fixtures.get(int(params['id']))] if params['id'].isdigit() else []
+        elif params.get('ids'):
+            candidates = [catalog.fixtures.get(int(i)) for i in params['ids'].split('-')[:20] if i.isdigit()]
+        elif params.get('live'):
+            wanted = None if params['live'] == 'all' else {int(i) for i in params['live'].split('-') if i.isdigit()}
+            return [
+                f for f in self.live_candidates(now)
+                if wanted is None or f.league_id in wanted
+            ]
+        elif params.get('league', '').isdigit():
+            candidates = catalog.by_league.get(int(params['league']), [])
+        elif params.get('team', '').isdigit():
+            candidates = catalog.by_team.get(int(params['team']), [])
+        elif params.get('date'):
+            candidates = catalog.by_date.get(params['date'], [])
+        else:
+            candidates = sorted(catalog.fixtures.values(), key=lambda f: (f.kickoff, f.id))
+        fixtures = [f for f in candidates if f is not None]
+
+        if params.get('season', '').isdigit():
+            fixtures = [f for f in fixtures if f.season == int(params['season'])]
+        if params.get('league') and params.get('team', '').isdigit():
+            team = int(params['team'])
+            fixtures = [f for f in fixtures if team in (f.home_id, f.away_id)]
+        if params.get('date') and not params.get('id'):
+            fixtures = [f for f in fixtures if _iso(f.kickoff)[:10] == params['date']]
+        if params.get('from'):
+            fixtures = [f for f in fixtures if _iso(f.kickoff)[:10] >= params['from']]
+        if params.get('to'):
+            fixtures = [f for f in fixtures if _iso(f.kickoff)[:10] <= params['to']]
+        if params.get('round'):
+            fixtures = [f for f in fixtures if f.round == params['round']]
+        if params.get('status'):
+            wanted = set(params['status'].split('-'))
+            fixtures = [f for f in fixtures if self.match_clock(f, now)[0] in wanted]
+        if params.get('last', '').isdigit():
+            played = [f for f in fixtures if self.match_clock(f, now)[0] == 'FT']
+            fixtures = played[-int(params['last']):] if int(params['last']) else []
+        if params.get('next', '').isdigit():
+            fixtures = [f for f in fixtures if self.match_clock(f, now)[0] == 'NS'][:int(params['next'])]
+        return fixtures
+
+    def live_candidates(self, now):
+        # Only fixtures that kicked off in the last few hours can be in play
+        window = now - 3 * 3600
+        days = sorted({_iso(window)[:10], _iso(now)[:10]})
+        return [
+            f for day in days for f in self.catalog.by_date.get(day, [])
+            if window <= f.kickoff <= now and self.match_clock(f, now)[0] in ('1H', 'HT', '2H')
+        ]
+
+    def endpoint_response(self, endpoint, params, now):
+        """The ``response`` list for an endpoint (and paging), or raise KeyError"""
+        catalog = self.catalog
+        if endpoint == 'status':
+            limiter = self.rate_limiter
+            return {
+                'account': {'firstname': 'Fake', 'lastname': 'API'},
+                'subscription': {'plan': 'Local', 'active': True},
+                'requests': {'current': limiter.used_today, 'limit_day': limiter.daily_limit},
+            }, 1, 1
+        if endpoint == 'leagues':
+            leagues = sorted(catalog.leagues.items())
+            if params.get('id', '').isdigit():
+                leagues = [(i, l) for i, l in leagues if i == int(params['id'])]
+            if params.get('country'):
+                leagues = [(i, l) for i, l in leagues if l[1].lower() == params['country'].lower()]
+            season = int(params['season']) if params.get('season', '').isdigit() else None
+            return [{
+                'league': {'id': league_id, 'name': name, 'type': 'League',
+                           'logo': f"https://media.api-sports.io/football/leagues/{league_id}.png"},
+                'country': {'name': country, 'code': None, 'flag': None},
+                'seasons': [{'year': season or datetime.fromtimestamp(now, dt_timezone.utc).year, 'current': True}],
+            } for league_id, (name, country) in leagues], 1, 1
+        if endpoint == 'teams':
+            teams = sorted(catalog.teams.items())
+            if params.get('id', '').isdigit():
+                teams = [(i, t) for i, t in teams if i == int(params['id'])]
+            if params.get('league', '').isdigit():
+                teams = [(i, t) for i, t in teams if t[1] == int(params['league'])]
+            return [{
+                'team': self._team(team_id) | {'country': catalog.leagues.get(league_id, ('', ''))[1], 'founded': None},
+                'venue': {'id': None, 'name': f"{name} Stadium", 'city': None},
+            } for team_id, (name, league_id) in teams], 1, 1
+        if endpoint == 'players':
+            if not params.get('team', '').isdigit():
+                return [], 1, 1
+            team_id = int(params['team'])
+            if team_id not in catalog.teams:
+                return [], 1, 1
+            squad = catalog.squad(team_id)
+            if params.get('id', '').isdigit():
+                squad = [p for p in squad if p[0] == int(params['id'])]
+            page = int(params['page']) if params.get('page', '').isdigit() else 1
+            per_page = 20
+            total_pages = max(1, math.ceil(len(squad) / per_page))
+            chunk = squad[(page - 1) * per_page:page * per_page]
+            return [{
+                'player': {'id': p[0], 'name': p[1], 'firstname': p[1].split()[0], 'lastname': p[1].split()[-1],
+                           'age': 20 + p[0] % 15, 'nationality': None, 'photo': None},
+                'statistics': [{'team': self._team(team_id), 'games': {'position': POSITION_NAMES[p[2]]}}],
+            } for p in chunk], page, total_pages
+        if endpoint == 'fixtures':
+            include_details = bool(params.get('id') or params.get('ids'))
+            return [self.fixture_json(f, now, include_details) for f in self._select_fixtures(params, now)], 1, 1
+        if endpoint == 'fixtures/headtohead':
+            try:
+                first, second = (int(i) for i in params.get('h2h', '').split('-'))
+            except ValueError:
+                return [], 1, 1
+            fixtures = [
+                f for f in self.catalog.by_team.get(first, [])
+                if {f.home_id, f.away_id} == {first, second} and self.match_clock(f, now)[0] == 'FT'
+            ]
+            if params.get('last', '').isdigit():
+                fixtures = fixtures[-int(params['last']):]
+            return [self.fixture_json(f, now) for f in reversed(fixtures)], 1, 1
+        if endpoint in ('fixtures/events', 'fixtures/lineups', 'fixtures/statistics', 'fixtures/players', 'predictions'):
+            fixture = self._fixture_param(params)
+            if fixture is None:
+                return [], 1, 1
+            if endpoint == 'predictions':
+                return [self.prediction_json(fixture, now)], 1, 1
+            builder = {
+                'fixtures/events': self.events_json,
+                'fixtures/lineups': self.lineups_json,
+                'fixtures/statistics': self.statistics_json,
+                'fixtures/players': self.players_json,
+            }[endpoint]
+            return builder(fixture, now, team=params.get('team')), 1, 1
+        raise KeyError(endpoint)
+
+    def _roll(self, rate):
+        if not rate:
+            return False
+        with self.rng_lock:
+            return self.rng.random() < rate
+
+    def _latency(self):
+        if not self.latency_ms and not self.jitter_ms:
+            return 0
+        with self.rng_lock:
+            delay = self.rng.gauss(self.latency_ms, self.jitter_ms) if self.jitter_ms else self.latency_ms
+        return max(delay, 0) / 1000
+
+    def handle(self, path, headers):
+        """Return (status code, headers, body dict) for a GET request"""
+        split = urlsplit(path)
+        endpoint = split.path.strip('/')
+        params = dict(parse_qsl(split.query, keep_blank_values=True))
+        now = self.clock()
+        with self.stats_lock:
+            self.stats[endpoint] += 1
+
+        delay = self._latency()
+        if delay:
+            self.sleep(delay)
+
+        if endpoint == '_fake/stats':
+            return 200, {}, {'requests': dict(self.stats), 'live': sorted(self.live_ids)}
+
+        allowed, reason, limit_headers = self.rate_limiter.acquire()
+        if not allowed and reason == 'minute':
+            return 429, limit_headers, envelope(endpoint, params, [], {'rateLimit': 'Too many requests. Your rate limit is exceeded.'})
+        if self._roll(self.throttle_rate):
+            return 429, limit_headers, envelope(endpoint, params, [], {'rateLimit': 'Too many requests. Your rate limit is exceeded.'})
+        if self._roll(self.error_rate):
+            with self.rng_lock:
+                status = self.rng.choice([500, 502, 503])
+            return status, limit_headers, {'message': 'Injected server error'}
+        if not allowed:
+            return 200, limit_headers, envelope(endpoint, params, [], {'requests': 'You have reached the request limit for the day.'})
+        if self.api_key and headers.get('x-apisports-key') != self.api_key:
+            return 200, limit_headers, envelope(endpoint, params, [], {'token': 'Error/Missing application key.'})
+
+        if self.recorded is not None:
+            interaction = self.recorded.lookup(endpoint, params)
+            if interaction is not None:
+                return interaction.status_code, limit_headers, interaction.body
+        try:
+            response, page, total_pages = self.endpoint_response(endpoint, params, now)
+        except KeyError:
+            return 404, limit_headers, envelope(endpoint, params, [], {'endpoint': f"The endpoint {endpoint} does not exist."})
+        return 200, limit_headers, envelope(endpoint, params, response, page=page, total_pages=total_pages)
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server_version = 'FakeAPIFootball/1.0'
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        status, headers, body = self.server.api.handle(self.path, self.headers)
+        payload = json.dumps(body, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        logger.debug("%s - %s", self.address_string(), format % args)
+
+
+class FakeAPIFootballServer:
+    """Threaded HTTP server around a FakeAPIFootball; ``port=0`` picks a free port"""
+
+    def __init__(self, api, host='127.0.0.1', port=0):
+        self.httpd = ThreadingHTTPServer((host, port), _Handler)
+        self.httpd.daemon_threads = True
+        self.httpd.api = api
+        self.api = api
+        self.thread = None
+
+    @property
+    def base_url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self.thread = threading.Thread(target=self.httpd.serve_forever, name='fake-api-football', daemon=True)
+        self.thread.start()
+        return self
+
+    def serve_forever(self):
+        self.httpd.serve_forever()
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        if self.thread:
+            self.thread.join(timeout=5)
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
@@ -0,0 +1,82 @@
+"""
+Query-string filters for the REST API viewsets.
+
+Every filter maps to an indexed column (see the Match indexes); date ranges
+compare ``match_date`` against aware datetimes rather than using ``__date``,
+which would wrap the column in a function and bypass the index.
+"""
+from datetime import datetime, time, timedelta
+
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from rest_framework.exceptions import ValidationError
+
+MAX_FILTER_VALUES = 50
+
+
+def _values(params, name):
+    """Comma separated and/or repeated values: ?status=FT,2H&status=HT"""
+    values = [v.strip() for raw in params.getlist(name) for v in raw.split(',') if v.strip()]
+    if len(values) > MAX_FILTER_VALUES:
+        raise ValidationError({name: f"En fazla {MAX_FILTER_VALUES} değer verilebilir."})
+    return values
+
+
+def _parse_moment(params, name):
+    """(aware datetime, date_only) for a YYYY-MM-DD or ISO 8601 parameter"""
+    raw = params.get(name)
+    if not raw:
+        return None, False
+    try:
+        # parse_datetime also accepts a bare date, so try the date first
+        day = parse_date(raw)
+        date_only = day is not None
+        value = datetime.combine(day, time.min) if date_only else parse_datetime(raw)
+        if value is None:
+            raise ValueError(raw)
+    except ValueError:
+        raise ValidationError({name: "YYYY-MM-DD veya ISO 8601 tarih-saat olmalı."})
+    if timezone.is_naive(value):
+        value = timezone.make_aware(value)
+    return value, date_only
+
+
+def filter_matches(queryset, params):
+    """?date_from, ?date_to, ?league, ?team (home or away), ?status"""
+    start, _ = _parse_moment(params, 'date_from')
+    if start:
+        queryset = queryset.filter(match_date__gte=start)
+    end, date_only = _parse_moment(params, 'date_to')
+    if end and date_only:
+        # A bare end date includes the whole day
+        queryset = queryset.filter(match_date__lt=end + timedelta(days=1))
+    elif end:
+        queryset = queryset.filter(match_date__lte=end)
+
+    leagues = _values(params, 'league')
+    if leagues:
+        queryset = queryset.filter(league_id__in=leagues)
+    teams = _values(params, 'team')
+    if teams:
+        queryset = queryset.filter(Q(home_team_id__in=teams) | Q(away_team_id__in=teams))
+    statuses = _values(params, 'status')
+    if statuses:
+        queryset = queryset.filter(status__in=statuses)
+    return queryset
+
+
+def filter_teams(queryset, params):
+    """?league"""
+    leagues = _values(params, 'league')
+    if leagues:
+        queryset = queryset.filter(league_id__in=leagues)
+    return queryset
+
+
+def filter_leagues(queryset, params):
+    """?country"""
+    countries = _values(params, 'country')
+    if countries:
+        queryset = queryset.filter(country__in=countries)
+    return queryset
@@ -0,0 +1,58 @@
+"""
+Batched fixture details (``fixtures?ids=``).
+
+``fetch_match_events``, ``fetch_match_lineups`` and ``fetch_match_statistics``
+asked the API once per fixture and resource, statistics twice (team and
+player statistics). ``fixtures?ids=a-b-c`` returns up to 20 fixtures with
+their events, lineups, statistics and players embedded, in the same shapes
+as the per-fixture endpoints. ``FixtureDetails`` fetches the fixtures of a
+run in such batches and hands every command the payload its own endpoint
+would have returned, so a matchday of N fixtures costs ceil(N / 20)
+requests for all four resources instead of up to 4N.
+
+A fixture whose batch failed is fetched again from its own endpoint; one the
+API left out of a successful batch counts as having no details yet.
+"""
+from .api_client import FIXTURE_IDS_BATCH
+
+RESOURCES = ('events', 'lineups', 'statistics', 'players')
+
+
+class FixtureDetails:
+    """Fixture detail payloads of one ingestion run, keyed by fixture id"""
+
+    def __init__(self, client, batch_size=FIXTURE_IDS_BATCH):
+        self.client = client
+        self.batch_size = batch_size
+        self.items = {}
+        self.requested = set()
+        self.requests = 0
+
+    def prefetch(self, fixture_ids):
+        """Fetch the details of every fixture not asked for yet; returns the number of fixtures now known"""
+        missing = [fixture_id for fixture_id in dict.fromkeys(map(str, fixture_ids))
+                   if fixture_id not in self.requested]
+        for batch, items in self.client.iter_fixture_details(missing, self.batch_size):
+            self.requests += 1
+            self.requested.update(batch)
+            if items is None:
+                continue
+            for item in items:
+                fixture_id = str((item.get('fixture') or {}).get('id') or '')
+                if fixture_id:
+                    self.items[fixture_id] = item
+            for fixture_id in batch:
+                self.items.setdefault(fixture_id, {})
+        return len(self.items)
+
+    def payload(self, resource, fixture_id):
+        """``{'response': [...]}`` of ``resource`` for a prefetched fixture, else None"""
+        item = self.items.get(str(fixture_id))
+        if item is None:
+            return None
+        return {'response': item.get(resource) or []}
+
+    def get(self, resource, fixture_id, fallback):
+        """The prefetched payload of ``resource``, or ``fallback()`` (the per-fixture endpoint)"""
+        data = self.payload(resource, fixture_id)
+        return fallback() if data is None else data
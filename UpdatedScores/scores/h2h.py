@@ -0,0 +1,246 @@
+"""
+Head-to-head records (``HeadToHead``).
+
+The match screens built the head-to-head list with their own query on every
+request (``enhanced_views`` cached it for an hour per kick-off date), the
+preview generator computed it again and ``fetch_match_previews`` asked the
+API for it for every fixture. ``HeadToHead`` keeps one row per unordered team
+pair, stored as (team_a_id, team_b_id) with team_a_id < team_b_id: total
+W/D/L and goals over every meeting, and summaries of the last ``MEETINGS``
+meetings, most recent first.
+
+Rows are maintained from ``post_save`` on ``Match`` the same way as the team
+form table (team_form.py): a result newer than everything in the row is added
+to it, anything else (a corrected or withdrawn score, an older result, a pair
+without a row) rebuilds that pair with one query. ``rebuild_head_to_head``
+rebuilds every pair.
+
+``fetch_match_previews`` only calls the API's fixtures/headtohead for pairs
+whose local history is incomplete: fewer meetings stored than it asks for,
+and fewer than the API reported the last time it was asked.
+"""
+from datetime import datetime
+
+from django.db.models import Q
+
+from .models import HeadToHead, Match
+from .team_form import final_goals
+
+MEETINGS = 10
+RECENT = 5
+COUNTER_FIELDS = ['played', 'team_a_wins', 'draws', 'team_b_wins', 'team_a_goals', 'team_b_goals', 'meetings',
+                  'last_match_date']
+
+
+def pair_key(team_id, other_id):
+    """(team_a_id, team_b_id) of a pair, whichever side is at home"""
+    return (team_id, other_id) if team_id < other_id else (other_id, team_id)
+
+
+def meeting(match_id, match_date, league_name, home_id, home_name, away_id, away_name, score):
+    """Summary of one meeting, as stored in ``HeadToHead.meetings``"""
+    return {
+        'id': match_id,
+        'date': match_date.isoformat(),
+        'league_name': league_name,
+        'home_team_id': home_id,
+        'home_team_name': home_name,
+        'away_team_id': away_id,
+        'away_team_name': away_name,
+        'score': score,
+    }
+
+
+def _add(row, home_id, home_goals, away_goals):
+    """Count one meeting into the totals of ``row``"""
+    a_goals, b_goals = (home_goals, away_goals) if home_id == row.team_a_id else (away_goals, home_goals)
+    row.played += 1
+    row.team_a_goals += a_goals
+    row.team_b_goals += b_goals
+    if a_goals > b_goals:
+        row.team_a_wins += 1
+    elif a_goals < b_goals:
+        row.team_b_wins += 1
+    else:
+        row.draws += 1
+
+
+# ---------------------------------------------------------------------------
+# Writing
+# ---------------------------------------------------------------------------
+
+def rebuild(pairs=None, batch_size=500):
+    """
+    Recompute the rows of ``pairs`` (every pair when None) from the matches
+    table with one query; returns the number of rows written. The
+    ``api_meetings`` note of existing rows is kept.
+    """
+    queryset = Match.objects.filter(score__isnull=False)
+    if pairs is not None:
+        pairs = {pair_key(*pair) for pair in pairs}
+        if not pairs:
+            return 0
+        condition = Q()
+        for team_a, team_b in pairs:
+            condition |= Q(home_team_id=team_a, away_team_id=team_b) | Q(home_team_id=team_b, away_team_id=team_a)
+        queryset = queryset.filter(condition)
+    rows = queryset.order_by('-match_date', '-id').values_list(
+        'id', 'match_date', 'score', 'status', 'league__name',
+        'home_team_id', 'home_team__name', 'away_team_id', 'away_team__name')
+
+    records = {}
+    for match_id, match_date, score, status, league_name, home_id, home_name, away_id, away_name in rows:
+        goals = final_goals(score, status)
+        if goals is None or home_id == away_id:
+            continue
+        key = pair_key(home_id, away_id)
+        row = records.get(key)
+        if row is None:
+            row = records[key] = HeadToHead(team_a_id=key[0], team_b_id=key[1], last_match_date=match_date)
+        _add(row, home_id, *goals)
+        if len(row.meetings) < MEETINGS:
+            row.meetings.append(meeting(match_id, match_date, league_name, home_id, home_name, away_id, away_name,
+                                        score))
+
+    # Rows in scope without any finished meeting left (a score was withdrawn)
+    existing = HeadToHead.objects.all()
+    if pairs is not None:
+        existing = existing.filter(team_a_id__in={a for a, _ in pairs}, team_b_id__in={b for _, b in pairs})
+    stale = [pk for pk, team_a, team_b in existing.values_list('pk', 'team_a_id', 'team_b_id')
+             if (team_a, team_b) not in records and (pairs is None or (team_a, team_b) in pairs)]
+    if stale:
+        HeadToHead.objects.filter(pk__in=stale).update(
+            played=0, team_a_wins=0, draws=0, team_b_wins=0, team_a_goals=0, team_b_goals=0, meetings=[],
+            last_match_date=None)
+    if records:
+        HeadToHead.objects.bulk_create(
+            list(records.values()), batch_size=batch_size, update_conflicts=True,
+            unique_fields=['team_a', 'team_b'], update_fields=[*COUNTER_FIELDS, 'last_updated'],
+        )
+    return len(records)
+
+
+def record_result(match, previous=None):
+    """
+    Update the pair row of ``match``'s teams after a save. ``previous`` is
+    the (score, status, match_date) snapshot from before it; None for a new
+    match.
+    """
+    if previous == match.snapshot() or match.home_team_id == match.away_team_id:
+        return
+    goals = final_goals(match.score, match.status)
+    was_final = previous is not None and final_goals(previous[0], previous[1]) is not None
+    if goals is None and not was_final:
+        return
+    key = pair_key(match.home_team_id, match.away_team_id)
+    if goals is not None and not was_final:
+        row = HeadToHead.objects.filter(team_a_id=key[0], team_b_id=key[1]).first()
+        if row is not None and row.last_match_date and match.match_date > row.last_match_date:
+            _add(row, match.home_team_id, *goals)
+            row.meetings = [meeting(match.id, match.match_date, match.league.name, match.home_team_id,
+                                    match.home_team.name, match.away_team_id, match.away_team.name, match.score),
+                            *row.meetings][:MEETINGS]
+            row.last_match_date = match.match_date
+            row.save(update_fields=[*COUNTER_FIELDS, 'last_updated'])
+            return
+    # Corrected, withdrawn or out-of-order result, or a pair without a row
+    rebuild([key])
+
+
+def note_api_meetings(team_id, other_id, count):
+    """Remember how many meetings the API returned for a pair"""
+    team_a, team_b = pair_key(team_id, other_id)
+    HeadToHead.objects.update_or_create(team_a_id=team_a, team_b_id=team_b, defaults={'api_meetings': count})
+
+
+# ---------------------------------------------------------------------------
+# Reading
+# ---------------------------------------------------------------------------
+
+def lookup(team_id, other_id):
+    """The pair row of two teams, or None (one keyed query)"""
+    team_a, team_b = pair_key(team_id, other_id)
+    return HeadToHead.objects.filter(team_a_id=team_a, team_b_id=team_b).first()
+
+
+def for_matches(matches):
+    """{pair_key: HeadToHead} for the teams of every match (one query)"""
+    keys = {pair_key(match.home_team_id, match.away_team_id) for match in matches}
+    if not keys:
+        return {}
+    rows = HeadToHead.objects.filter(team_a_id__in={a for a, _ in keys}, team_b_id__in={b for _, b in keys})
+    return {(row.team_a_id, row.team_b_id): row for row in rows if (row.team_a_id, row.team_b_id) in keys}
+
+
+def is_complete(row, limit=MEETINGS):
+    """Whether the local meetings are all the API would return for ``last=limit``"""
+    if row is None:
+        return False
+    return row.played >= min(limit, MEETINGS) or (row.api_meetings is not None and row.played >= row.api_meetings)
+
+
+def meetings(row, before=None, n=RECENT):
+    """
+    Up to ``n`` meeting summaries (most recent first) before ``before``, each
+    with ``match_date`` added; None when the stored list cannot answer and
+    the caller has to query.
+    """
+    if row is None:
+        return None
+    selected = []
+    for item in row.meetings:
+        match_date = datetime.fromisoformat(item['date'])
+        if before is not None and match_date >= before:
+            continue
+        selected.append({**item, 'match_date': match_date})
+        if len(selected) == n:
+            return selected
+    # Fewer than n: only an answer if nothing older was dropped from the list
+    return selected if row.played <= len(row.meetings) else None
+
+
+def summary(row, home_id, before=None, n=RECENT):
+    """Last ``n`` meetings counted from ``home_id``'s side, in the MatchPreview.head_to_head shape; or None"""
+    items = meetings(row, before, n)
+    if items is None:
+        return None
+    result = {'total': len(items), 'home_wins': 0, 'draws': 0, 'away_wins': 0, 'matches': []}
+    for item in items:
+        home_goals, away_goals = map(int, item['score'].split('-'))
+        scored, conceded = (home_goals, away_goals) if item['home_team_id'] == home_id else (away_goals, home_goals)
+        if scored > conceded:
+            result['home_wins'] += 1
+            outcome = 'HOME_WIN'
+        elif scored < conceded:
+            result['away_wins'] += 1
+            outcome = 'AWAY_WIN'
+        else:
+            result['draws'] += 1
+            outcome = 'DRAW'
+        result['matches'].append({
+            'date': item['match_date'].strftime('%Y-%m-%d'),
+            'home_team': item['home_team_name'],
+            'away_team': item['away_team_name'],
+            'score': item['score'],
+            'result': outcome,
+        })
+    return result
+
+
+def recent_meetings(match, n=RECENT):
+    """
+    The last ``n`` meetings of ``match``'s teams before it: one keyed query,
+    or the ordered query when the stored list cannot answer.
+    """
+    items = meetings(lookup(match.home_team_id, match.away_team_id), match.match_date, n)
+    if items is not None:
+        return items
+    return [
+        {**meeting(m.id, m.match_date, m.league.name, m.home_team_id, m.home_team.name, m.away_team_id,
+                   m.away_team.name, m.score), 'match_date': m.match_date}
+        for m in Match.objects.filter(
+            Q(home_team_id=match.home_team_id, away_team_id=match.away_team_id) |
+            Q(home_team_id=match.away_team_id, away_team_id=match.home_team_id),
+            match_date__lt=match.match_date, score__isnull=False,
+        ).select_related('home_team', 'away_team', 'league').order_by('-match_date')[:n]
+    ]
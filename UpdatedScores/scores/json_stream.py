@@ -0,0 +1,146 @@
+"""
+Incremental parsing of large API-FOOTBALL payloads.
+
+A season of ``fixtures`` or a page of ``players`` arrives as one JSON object
+whose ``response`` member is a long array. ``response.json()`` holds the
+whole body, its decoded text and every parsed item at once. ``JSONStream``
+reads the body chunk by chunk (``iter_content``) and yields the array items
+one at a time, so a consumer that writes them out in batches keeps only the
+current chunk and batch in memory, however long the season is.
+
+Each item is decoded by the C parser (``JSONDecoder.raw_decode``) straight
+from the buffer; an item cut off at the end of a chunk is decoded again once
+the next chunk has arrived. The other top-level members (``errors``, ``paging``,
+``results``...) are collected into ``meta``; API-FOOTBALL sends them before
+``response``, and ``meta`` is complete once iteration has finished.
+"""
+import codecs
+import json
+import re
+
+CHUNK_SIZE = 64 * 1024
+
+_DECODER = json.JSONDecoder()
+_WHITESPACE = re.compile(r'\s*')
+
+
+class JSONStream:
+    """
+    Items of the top-level array ``key`` of a JSON object given as an
+    iterable of byte chunks. Iterate once; malformed or truncated input
+    raises ValueError.
+    """
+
+    def __init__(self, chunks, key='response'):
+        self.key = key
+        self.meta = {}
+        self.count = 0
+        self._chunks = iter(chunks)
+        self._decoder = codecs.getincrementaldecoder('utf-8')()
+        self._buffer = ''
+        self._pos = 0
+        self._eof = False
+        self._data = None
+
+    @classmethod
+    def from_data(cls, data, key='response'):
+        """The same interface over an already parsed body (cassettes, tests)"""
+        stream = cls((), key)
+        stream._data = data
+        return stream
+
+    def __iter__(self):
+        if self._data is not None:
+            self.meta = {name: value for name, value in self._data.items() if name != self.key}
+            for item in self._data.get(self.key) or []:
+                self.count += 1
+                yield item
+            return
+
+        self._expect('{')
+        if self._peek() == '}':
+            return
+        while True:
+            name = self._value()
+            self._expect(':')
+            if name == self.key and self._peek() == '[':
+                self._pos += 1
+                yield from self._items()
+            else:
+                self.meta[name] = self._value()
+            separator = self._next()
+            if separator == '}':
+                return
+            if separator != ',':
+                raise ValueError(f"Expected ',' or '}}' in JSON object, got {separator!r}")
+
+    def _items(self):
+        if self._peek() == ']':
+            self._pos += 1
+            return
+        while True:
+            item = self._value()
+            self.count += 1
+            yield item
+            separator = self._next()
+            if separator == ']':
+                return
+            if separator != ',':
+                raise ValueError(f"Expected ',' or ']' in JSON array, got {separator!r}")
+
+    # -- buffer ----------------------------------------------------------------
+
+    def _fill(self):
+        """Append the next chunk to the buffer, dropping what was consumed; False at the end"""
+        if self._eof:
+            return False
+        if self._pos:
+            self._buffer = self._buffer[self._pos:]
+            self._pos = 0
+        for chunk in self._chunks:
+            if chunk:
+                self._buffer += self._decoder.decode(chunk) if isinstance(chunk, bytes) else chunk
+                return True
+        self._buffer += self._decoder.decode(b'', final=True)
+        self._eof = True
+        return False
+
+    def _peek(self):
+        """Next non-whitespace character, without consuming it (None at the end)"""
+        while True:
+            self._pos = _WHITESPACE.match(self._buffer, self._pos).end()
+            if self._pos < len(self._buffer):
+                return self._buffer[self._pos]
+            if not self._fill():
+                return None
+
+    def _next(self):
+        char = self._peek()
+        if char is None:
+            raise ValueError("Truncated JSON payload")
+        self._pos += 1
+        return char
+
+    def _expect(self, char):
+        found = self._next()
+        if found != char:
+            raise ValueError(f"Expected {char!r} in JSON payload, got {found!r}")
+
+    def _value(self):
+        """Parse the complete value at the current position, reading more chunks as needed"""
+        if self._peek() is None:
+            raise ValueError("Truncated JSON payload")
+        while True:
+            try:
+                value, end = _DECODER.raw_decode(self._buffer, self._pos)
+            except json.JSONDecodeError:
+                # Most likely cut off at the end of the buffer; give up only at the end of the input
+                if not self._fill():
+                    raise
+                continue
+            # A number at the very end of the buffer may continue in the next chunk
+            if end == len(self._buffer) and not self._eof:
+                self._fill()
+                continue
+            self._pos = end
+            return value
@@ -0,0 +1,422 @@
+"""
+Server-Sent Events stream of live score deltas.
+
+One in-process ``Broadcaster`` receives score/status changes and new events
+from the Match and Event post_save signals, so everything that writes
+through the ORM in this process (the scheduler jobs, monitor_live_events,
+refresh) feeds it. Each connected client is a subscriber to any mix of
+channels:
+
+    /live/stream/?match=123,456      those matches
+    /live/stream/?league=39          every match of a league
+    /live/stream/?favorites=1        the logged-in user's favorite teams and leagues
+
+Under ASGI (``uvicorn UpdatedScores.asgi:application``) a subscriber is an
+asyncio queue, so idle connections cost no thread. Under WSGI (runserver)
+the same view streams from a blocking queue, one thread per connection.
+Deltas carry an increasing id; a reconnecting EventSource sends it back as
+Last-Event-ID and gets what it missed from a short backlog.
+"""
+import asyncio
+import itertools
+import json
+import logging
+import queue
+import threading
+from collections import OrderedDict, deque
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.db import transaction
+from django.http import HttpResponse, StreamingHttpResponse
+
+from . import metrics
+
+logger = logging.getLogger(__name__)
+
+LIVE_STATUSES = ('1H', 'HT', '2H', 'ET', 'BT', 'P', 'LIVE')
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+class Delta:
+    """One change, routed by match, league and teams"""
+    __slots__ = ('id', 'kind', 'match_id', 'league_id', 'team_ids', 'data', 'encoded')
+
+    def __init__(self, id, kind, match_id, league_id, team_ids, data):
+        self.id = id
+        self.kind = kind
+        self.match_id = str(match_id)
+        self.league_id = str(league_id) if league_id is not None else None
+        self.team_ids = tuple(str(t) for t in team_ids if t is not None)
+        self.data = data
+        # Encoded once, however many subscribers receive it
+        self.encoded = f"id: {id}\nevent: {kind}\ndata: {json.dumps(data, separators=(',', ':'))}\n\n".encode()
+
+
+class Subscriber:
+    """A client's channels and its bounded delivery queue"""
+
+    def __init__(self, matches=(), leagues=(), teams=(), queue_size=100):
+        self.matches = frozenset(str(m) for m in matches)
+        self.leagues = frozenset(str(l) for l in leagues)
+        self.teams = frozenset(str(t) for t in teams)
+        self.queue_size = queue_size
+        # Set when deltas were dropped; the client is told to refetch
+        self.lagged = False
+
+    def wants(self, delta):
+        return (
+            delta.match_id in self.matches
+            or delta.league_id in self.leagues
+            or any(team in self.teams for team in delta.team_ids)
+        )
+
+    def deliver(self, delta):
+        raise NotImplementedError
+
+
+class AsyncSubscriber(Subscriber):
+    def __init__(self, loop, **kwargs):
+        super().__init__(**kwargs)
+        self.loop = loop
+        self.queue = asyncio.Queue(maxsize=self.queue_size)
+
+    def _put(self, delta):
+        try:
+            self.queue.put_nowait(delta)
+        except asyncio.QueueFull:
+            self.lagged = True
+            metrics.LIVE_STREAM_DROPPED.inc()
+
+    def deliver(self, delta):
+        # Publishers run on other threads (scheduler jobs, WSGI requests)
+        try:
+            self.loop.call_soon_threadsafe(self._put, delta)
+        except RuntimeError:
+            pass  # loop closed; the subscriber is going away
+
+    async def get(self, timeout):
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+
+class ThreadSubscriber(Subscriber):
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.queue = queue.Queue(maxsize=self.queue_size)
+
+    def deliver(self, delta):
+        try:
+            self.queue.put_nowait(delta)
+        except queue.Full:
+            self.lagged = True
+            metrics.LIVE_STREAM_DROPPED.inc()
+
+    def get(self, timeout):
+        try:
+            return self.queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+
+class Broadcaster:
+    """
+    Fans deltas out to subscribers through channel indexes, so a publish
+    costs a few dict lookups however many clients are connected.
+    """
+
+    def __init__(self, backlog=1000, dedupe=5000):
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+        self._by_match = {}
+        self._by_league = {}
+        self._by_team = {}
+        self._count = 0
+        self.backlog = deque(maxlen=backlog)
+        # Ingestion re-creates the events of a match on every poll; publish each once
+        self._seen_events = OrderedDict()
+        self._dedupe = dedupe
+        # match id -> ((league id, home team id, away team id), (score, status))
+        self._matches = OrderedDict()
+
+    @property
+    def subscriber_count(self):
+        with self._lock:
+            return self._count
+
+    def _index(self, subscriber, add):
+        for index, keys in ((self._by_match, subscriber.matches), (self._by_league, subscriber.leagues),
+                            (self._by_team, subscriber.teams)):
+            for key in keys:
+                if add:
+                    index.setdefault(key, set()).add(subscriber)
+                else:
+                    bucket = index.get(key)
+                    if bucket is not None:
+                        bucket.discard(subscriber)
+                        if not bucket:
+                            del index[key]
+
+    def subscribe(self, subscriber, last_event_id=None):
+        """Register a subscriber; returns the backlog deltas it missed"""
+        with self._lock:
+            self._index(subscriber, add=True)
+            self._count += 1
+            count = self._count
+            missed = [d for d in self.backlog if d.id > last_event_id and subscriber.wants(d)] \
+                if last_event_id is not None else []
+        metrics.LIVE_STREAM_SUBSCRIBERS.set(count)
+        return missed
+
+    def unsubscribe(self, subscriber):
+        with self._lock:
+            self._index(subscriber, add=False)
+            self._count -= 1
+            count = self._count
+        metrics.LIVE_STREAM_SUBSCRIBERS.set(count)
+
+    def remember_match(self, match_id, route, state=None):
+        match_id = str(match_id)
+        with self._lock:
+            if state is None and match_id in self._matches:
+                state = self._matches[match_id][1]
+            self._matches[match_id] = (route, state)
+            self._matches.move_to_end(match_id)
+            while len(self._matches) > self._dedupe:
+                self._matches.popitem(last=False)
+
+    def known_match(self, match_id):
+        """(route, last published state) of a match, or None"""
+        return self._matches.get(str(match_id))
+
+    def seen_event(self, key):
+        """True if this event was already published (and remember it otherwise)"""
+        with self._lock:
+            if key in self._seen_events:
+                return True
+            self._seen_events[key] = None
+            while len(self._seen_events) > self._dedupe:
+                self._seen_events.popitem(last=False)
+            return False
+
+    def publish(self, kind, match_id, league_id, team_ids, data):
+        with self._lock:
+            delta = Delta(next(self._ids), kind, match_id, league_id, team_ids, data)
+            self.backlog.append(delta)
+            targets = set(self._by_match.get(delta.match_id, ()))
+            if delta.league_id is not None:
+                targets.update(self._by_league.get(delta.league_id, ()))
+            for team in delta.team_ids:
+                targets.update(self._by_team.get(team, ()))
+        for subscriber in targets:
+            subscriber.deliver(delta)
+        metrics.LIVE_STREAM_MESSAGES.inc(len(targets), kind=kind)
+        return delta
+
+
+_broadcaster = None
+_broadcaster_lock = threading.Lock()
+
+
+def get_broadcaster():
+    global _broadcaster
+    if _broadcaster is None:
+        with _broadcaster_lock:
+            if _broadcaster is None:
+                _broadcaster = Broadcaster(
+                    backlog=_setting('LIVE_STREAM_BACKLOG', 1000),
+                )
+    return _broadcaster
+
+
+# ---------------------------------------------------------------------------
+# Publishing (called from scores.signals)
+# ---------------------------------------------------------------------------
+
+def publish_match(match, loaded=None):
+    """Publish the score/status of a match if either changed
+
+    ``loaded`` is the ``Match.snapshot()`` from before the save, if known.
+    """
+    broadcaster = get_broadcaster()
+    state = (match.score, match.status)
+    known = broadcaster.known_match(match.pk)
+    # What was loaded from the database, else what this process last saw
+    previous = loaded[:2] if loaded else (known[1] if known else None)
+    broadcaster.remember_match(match.pk, (match.league_id, match.home_team_id, match.away_team_id), state)
+    if previous == state:
+        return None
+    # Without a previous state only live matches are news
+    if previous is None and match.status not in LIVE_STATUSES:
+        return None
+    return broadcaster.publish(
+        'score',
+        match.pk,
+        match.league_id,
+        (match.home_team_id, match.away_team_id),
+        {'match': str(match.pk), 'score': match.score, 'status': match.status},
+    )
+
+
+def _cached(instance, name):
+    """A related object already loaded on ``instance`` (None when it would take a query)"""
+    return instance._meta.get_field(name).get_cached_value(instance, None)
+
+
+def publish_event(event):
+    """Publish a new match event (goal, card, substitution) once
+
+    Runs inside the Event post_save receiver, so the payload is built from
+    what is already in memory: the match route this process has seen and the
+    match and player cached on the instance. When one of them would take a
+    query, publishing waits until the transaction commits.
+    """
+    broadcaster = get_broadcaster()
+    key = (str(event.match_id), event.minute, event.event_type, event.player_id)
+    if broadcaster.seen_event(key):
+        return None
+    known = broadcaster.known_match(event.match_id)
+    match = _cached(event, 'match')
+    route = known[0] if known else (
+        (match.league_id, match.home_team_id, match.away_team_id) if match is not None else None)
+    player = _cached(event, 'player') if event.player_id else None
+    if route is not None and (player is not None or not event.player_id):
+        return _publish_event(broadcaster, event, route, player)
+    transaction.on_commit(lambda: _publish_loaded_event(event, route))
+    return None
+
+
+def _publish_loaded_event(event, route):
+    """Look up what ``publish_event`` could not take from memory, then publish"""
+    from .models import Match, Player
+    broadcaster = get_broadcaster()
+    if route is None:
+        route = Match.objects.filter(pk=event.match_id).values_list(
+            'league_id', 'home_team_id', 'away_team_id').first()
+        if route is None:
+            return None
+        broadcaster.remember_match(event.match_id, route)
+    player = Player.objects.filter(pk=event.player_id).only('name', 'team_id').first() if event.player_id else None
+    return _publish_event(broadcaster, event, route, player)
+
+
+def _publish_event(broadcaster, event, route, player):
+    league_id, home_team_id, away_team_id = route
+    team_id = player.team_id if player else None
+    return broadcaster.publish(
+        'event',
+        event.match_id,
+        league_id,
+        (home_team_id, away_team_id),
+        {
+            'match': str(event.match_id),
+            'minute': event.minute,
+            'type': event.event_type,
+            'player': player.name if player else None,
+            'team': 'home' if team_id == home_team_id else 'away' if team_id == away_team_id else None,
+        },
+    )
+
+
+# ---------------------------------------------------------------------------
+# View
+# ---------------------------------------------------------------------------
+
+def _ids(request, name):
+    raw = request.GET.get(name, '')
+    return [value.strip() for value in raw.split(',') if value.strip()][:_setting('LIVE_STREAM_MAX_CHANNELS', 100)]
+
+
+def _favorites(user):
+    from .models import Profile
+    profile = Profile.objects.filter(user=user).first()
+    if profile is None:
+        return [], []
+    return (
+        list(profile.favorite_teams.values_list('id', flat=True)),
+        list(profile.favorite_leagues.values_list('id', flat=True)),
+    )
+
+
+def _last_event_id(request):
+    raw = request.headers.get('Last-Event-ID') or request.GET.get('last_event_id')
+    try:
+        return int(raw) if raw else None
+    except ValueError:
+        return None
+
+
+RESYNC = b"event: resync\ndata: {}\n\n"
+
+
+async def _async_stream(broadcaster, subscriber, missed, heartbeat):
+    try:
+        yield f"retry: {_setting('LIVE_STREAM_RETRY_MS', 3000)}\n\n".encode()
+        for delta in missed:
+            yield delta.encoded
+        while True:
+            delta = await subscriber.get(heartbeat)
+            if subscriber.lagged:
+                subscriber.lagged = False
+                yield RESYNC
+            yield delta.encoded if delta is not None else b": ping\n\n"
+    finally:
+        broadcaster.unsubscribe(subscriber)
+
+
+def _sync_stream(broadcaster, subscriber, missed, heartbeat):
+    try:
+        yield f"retry: {_setting('LIVE_STREAM_RETRY_MS', 3000)}\n\n".encode()
+        for delta in missed:
+            yield delta.encoded
+        while True:
+            delta = subscriber.get(heartbeat)
+            if subscriber.lagged:
+                subscriber.lagged = False
+                yield RESYNC
+            yield delta.encoded if delta is not None else b": ping\n\n"
+    finally:
+        broadcaster.unsubscribe(subscriber)
+
+
+async def live_stream(request):
+    """SSE endpoint: text/event-stream of 'score', 'event' and 'resync' messages"""
+    matches, leagues, teams = _ids(request, 'match'), _ids(request, 'league'), []
+    if request.GET.get('favorites'):
+        user = await request.auser()
+        if not user.is_authenticated:
+            return HttpResponse(status=401)
+        teams, favorite_leagues = await sync_to_async(_favorites)(user)
+        leagues = leagues + favorite_leagues
+    if not (matches or leagues or teams):
+        return HttpResponse("match, league veya favorites parametresi gerekli", status=400)
+
+    broadcaster = get_broadcaster()
+    if broadcaster.subscriber_count >= _setting('LIVE_STREAM_MAX_SUBSCRIBERS', 5000):
+        response = HttpResponse(status=503)
+        response['Retry-After'] = '30'
+        return response
+
+    queue_size = _setting('LIVE_STREAM_QUEUE_SIZE', 100)
+    heartbeat = _setting('LIVE_STREAM_HEARTBEAT', 15)
+    channels = dict(matches=matches, leagues=leagues, teams=teams, queue_size=queue_size)
+    if isinstance(request, ASGIRequest):
+        subscriber = AsyncSubscriber(asyncio.get_running_loop(), **channels)
+        missed = broadcaster.subscribe(subscriber, _last_event_id(request))
+        stream = _async_stream(broadcaster, subscriber, missed, heartbeat)
+    else:
+        subscriber = ThreadSubscriber(**channels)
+        missed = broadcaster.subscribe(subscriber, _last_event_id(request))
+        stream = _sync_stream(broadcaster, subscriber, missed, heartbeat)
+
+    response = StreamingHttpResponse(stream, content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    # Tell nginx not to buffer the stream
+    response['X-Accel-Buffering'] = 'no'
+    return response
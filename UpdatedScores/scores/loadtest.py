@@ -0,0 +1,404 @@
+"""
+Load generator for the web tier.
+
+Virtual users pick routes from a weighted traffic profile and hit them as
+fast as they can (or with a think time), either over HTTP against a running
+server or in-process through the Django test client. Latency percentiles
+and throughput are reported per route:
+
+    python manage.py generate_synthetic_data --scale medium
+    SECURE_SSL_REDIRECT=False python manage.py runserver --noreload
+    python manage.py run_load_test --url http://127.0.0.1:8000 --profile matchday --users 20 --duration 60
+
+With ``--ingest`` the ingestion commands run in a background thread against
+an in-process fake API-FOOTBALL server while the load runs, so the effect of
+SQLite write locks on read latency shows up in the "during ingestion"
+columns.
+"""
+import io
+import logging
+import math
+import os
+import random
+import threading
+import time
+from collections import defaultdict
+from dataclasses import dataclass, field
+
+from django.conf import settings
+from django.core.management import call_command
+from django.db import connection
+from django.test import Client
+from django.test.utils import override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from .models import League, Team, Match, Profile
+from .synthetic import DEFAULT_PASSWORD
+
+logger = logging.getLogger(__name__)
+
+LIVE_STATUSES = ('1H', 'HT', '2H', 'ET', 'BT', 'P', 'LIVE')
+PERCENTILES = (50, 90, 95, 99)
+
+
+@dataclass
+class Route:
+    name: str
+    weight: int
+    func: object
+    authenticated: bool = False
+
+
+@dataclass
+class Sample:
+    route: str
+    status: int
+    latency_ms: float
+    started: float
+    ingesting: bool = False
+    error: str = ''
+
+
+@dataclass
+class Pool:
+    """Ids the virtual users request, read from the database once"""
+    live_match_ids: list = field(default_factory=list)
+    match_ids: list = field(default_factory=list)
+    league_ids: list = field(default_factory=list)
+    team_ids: list = field(default_factory=list)
+    usernames: list = field(default_factory=list)
+
+    @classmethod
+    def from_database(cls, limit=500):
+        today = timezone.now().date()
+        live = list(Match.objects.filter(status__in=LIVE_STATUSES).values_list('id', flat=True)[:limit])
+        recent = list(Match.objects.filter(
+            match_date__date__gte=today - timezone.timedelta(days=3),
+            match_date__date__lte=today + timezone.timedelta(days=3),
+        ).values_list('id', flat=True)[:limit])
+        # Users with favorites are the expensive ones on the home page
+        usernames = list(Profile.objects.filter(favorite_teams__isnull=False).values_list(
+            'user__username', flat=True).distinct()[:limit])
+        return cls(
+            live_match_ids=live,
+            match_ids=recent or live or list(Match.objects.values_list('id', flat=True)[:limit]),
+            league_ids=list(League.objects.values_list('id', flat=True)[:limit]),
+            team_ids=list(Team.objects.values_list('id', flat=True)[:limit]),
+            usernames=usernames,
+        )
+
+
+class ClientTarget:
+    """In-process requests through the Django test client"""
+
+    def __init__(self):
+        self.client = Client()
+
+    def login(self, username, password):
+        from django.contrib.auth.models import User
+        self.client.force_login(User.objects.get(username=username))
+        return True
+
+    def get(self, path, **params):
+        response = self.client.get(path, params, secure=True)
+        if getattr(response, 'streaming', False):
+            b''.join(response.streaming_content)
+        return response.status_code
+
+    def close(self):
+        # Virtual user threads each opened their own database connection
+        if threading.current_thread() is not threading.main_thread():
+            connection.close()
+
+
+class HTTPTarget:
+    """Requests against a running server; one session (cookies) per virtual user"""
+
+    def __init__(self, base_url, timeout=30):
+        import requests
+        self.base_url = base_url.rstrip('/')
+        self.session = requests.Session()
+        self.timeout = timeout
+
+    def login(self, username, password):
+        url = f"{self.base_url}{reverse('login')}"
+        self.session.get(url, timeout=self.timeout)
+        response = self.session.post(url, data={
+            'username': username,
+            'password': password,
+            'csrfmiddlewaretoken': self.session.cookies.get('csrftoken', ''),
+        }, headers={'Referer': url}, timeout=self.timeout, allow_redirects=False)
+        return response.status_code == 302
+
+    def get(self, path, **params):
+        response = self.session.get(f"{self.base_url}{path}", params=params, timeout=self.timeout,
+                                    allow_redirects=False)
+        return response.status_code
+
+    def close(self):
+        self.session.close()
+
+
+# ---------------------------------------------------------------------------
+# Routes
+# ---------------------------------------------------------------------------
+
+def _choice(rng, ids, what):
+    if not ids:
+        raise LookupError(f"no {what} in the database")
+    return rng.choice(ids)
+
+
+def route_index(target, pool, rng):
+    return target.get(reverse('scores:index'))
+
+
+def route_today_matches(target, pool, rng):
+    return target.get(reverse('scores:today_matches'))
+
+
+def route_upcoming_matches(target, pool, rng):
+    return target.get(reverse('scores:upcoming_matches'))
+
+
+def route_live_match_detail(target, pool, rng):
+    ids = pool.live_match_ids or pool.match_ids
+    return target.get(reverse('scores:match_detail', args=[_choice(rng, ids, 'match')]))
+
+
+def route_match_detail(target, pool, rng):
+    return target.get(reverse('scores:match_detail', args=[_choice(rng, pool.match_ids, 'match')]))
+
+
+def route_league_detail(target, pool, rng):
+    return target.get(reverse('scores:league_detail', args=[_choice(rng, pool.league_ids, 'league')]))
+
+
+def route_team_detail(target, pool, rng):
+    return target.get(reverse('scores:team_detail', args=[_choice(rng, pool.team_ids, 'team')]))
+
+
+def route_api_matches(target, pool, rng):
+    return target.get('/api/matches/')
+
+
+def route_api_favorites(target, pool, rng):
+    return target.get(reverse('scores:api-favorites'))
+
+
+def route_refresh_data(target, pool, rng):
+    # Regular users are redirected back; the point is the cost of the attempt
+    return target.get(reverse('scores:refresh_data'), type='matches')
+
+
+PROFILES = {
+    # Peak matchday: live scores dominate, logged-in users poll their favorites
+    'matchday': [
+        Route('index', 25, route_index),
+        Route('today_matches', 20, route_today_matches),
+        Route('match_detail_live', 20, route_live_match_detail),
+        Route('index_authenticated', 10, route_index, authenticated=True),
+        Route('api_matches', 10, route_api_matches),
+        Route('api_favorites', 5, route_api_favorites, authenticated=True),
+        Route('league_detail', 4, route_league_detail),
+        Route('team_detail', 4, route_team_detail),
+        Route('refresh_data', 2, route_refresh_data, authenticated=True),
+    ],
+    # A quiet weekday: browsing rather than live following
+    'weekday': [
+        Route('index', 30, route_index),
+        Route('upcoming_matches', 15, route_upcoming_matches),
+        Route('match_detail', 15, route_match_detail),
+        Route('league_detail', 15, route_league_detail),
+        Route('team_detail', 15, route_team_detail),
+        Route('index_authenticated', 5, route_index, authenticated=True),
+        Route('api_matches', 5, route_api_matches),
+    ],
+}
+
+
+# ---------------------------------------------------------------------------
+# Runner
+# ---------------------------------------------------------------------------
+
+class IngestionLoop(threading.Thread):
+    """
+    Runs ingestion commands against an in-process fake API-FOOTBALL server
+    until stopped, flagging the time spent writing.
+    """
+
+    def __init__(self, interval=5.0, live=20, commands=None):
+        super().__init__(name='loadtest-ingestion', daemon=True)
+        self.interval = interval
+        self.live = live
+        self.commands = commands or [
+            ('fetch_api_football_matches', {'no_delete': True, 'date': timezone.now().strftime('%Y-%m-%d')}),
+            ('fetch_match_events', {'days': 0}),
+        ]
+        self.writing = threading.Event()
+        self.stopped = threading.Event()
+        self.runs = 0
+        self.errors = 0
+
+    def run(self):
+        from .fake_api import Catalog, FakeAPIFootball, FakeAPIFootballServer, RateLimiter
+
+        api = FakeAPIFootball(Catalog.from_database(), live=self.live, rate_limiter=RateLimiter(0, 0))
+        try:
+            with FakeAPIFootballServer(api) as server:
+                previous = os.environ.get('API_FOOTBALL_BASE_URL')
+                os.environ['API_FOOTBALL_BASE_URL'] = server.base_url
+                try:
+                    self._loop()
+                finally:
+                    if previous is None:
+                        os.environ.pop('API_FOOTBALL_BASE_URL', None)
+                    else:
+                        os.environ['API_FOOTBALL_BASE_URL'] = previous
+        finally:
+            connection.close()
+
+    def _loop(self):
+        while not self.stopped.is_set():
+            for name, options in self.commands:
+                self.writing.set()
+                try:
+                    call_command(name, stdout=io.StringIO(), stderr=io.StringIO(), **options)
+                    self.runs += 1
+                except Exception:
+                    self.errors += 1
+                    logger.exception(f"Ingestion command {name} failed during load test")
+                finally:
+                    self.writing.clear()
+            self.stopped.wait(self.interval)
+
+    def stop(self):
+        self.stopped.set()
+        self.join()
+
+
+class LoadTest:
+    def __init__(self, routes, target_factory, pool, users=10, duration=30.0, requests=None,
+                 think_time=0.0, seed=42, ingestion=None):
+        self.routes = routes
+        self.target_factory = target_factory
+        self.pool = pool
+        self.users = users
+        self.duration = duration
+        self.max_requests = requests
+        self.think_time = think_time
+        self.seed = seed
+        self.ingestion = ingestion
+        self.samples = []
+        self._lock = threading.Lock()
+        self._issued = 0
+
+    def _take_ticket(self):
+        with self._lock:
+            if self.max_requests is not None and self._issued >= self.max_requests:
+                return False
+            self._issued += 1
+            return True
+
+    def _user(self, index, deadline):
+        rng = random.Random(self.seed * 1000 + index)
+        target = self.target_factory()
+        username = self.pool.usernames[index % len(self.pool.usernames)] if self.pool.usernames else None
+        logged_in = bool(username) and target.login(username, DEFAULT_PASSWORD)
+        # Without a user to log in as, the anonymous routes share the traffic
+        routes = [route for route in self.routes if logged_in or not route.authenticated]
+        weights = [route.weight for route in routes]
+        samples = []
+        try:
+            while time.perf_counter() < deadline and self._take_ticket():
+                route = rng.choices(routes, weights)[0]
+                ingesting = bool(self.ingestion and self.ingestion.writing.is_set())
+                started = time.perf_counter()
+                status, error = 0, ''
+                try:
+                    status = route.func(target, self.pool, rng)
+                except LookupError as e:
+                    # Nothing to request for this route in the dataset
+                    error = str(e)
+                except Exception as e:
+                    error = f"{type(e).__name__}: {e}"
+                latency = (time.perf_counter() - started) * 1000
+                samples.append(Sample(route.name, status, latency, started, ingesting, error))
+                if self.think_time:
+                    time.sleep(rng.expovariate(1 / self.think_time))
+        finally:
+            target.close()
+            with self._lock:
+                self.samples.extend(samples)
+
+    def run(self):
+        started = time.perf_counter()
+        deadline = started + self.duration if self.duration else math.inf
+        # The test client talks to 'testserver' over https
+        with override_settings(ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver']):
+            if self.ingestion:
+                self.ingestion.start()
+            try:
+                if self.users == 1:
+                    # No concurrency to simulate; stay on this thread and its connection
+                    self._user(0, deadline)
+                else:
+                    threads = [
+                        threading.Thread(target=self._user, args=(i, deadline), name=f'loadtest-user-{i}')
+                        for i in range(self.users)
+                    ]
+                    for thread in threads:
+                        thread.start()
+                    for thread in threads:
+                        thread.join()
+            finally:
+                if self.ingestion:
+                    self.ingestion.stop()
+        return summarize(self.samples, time.perf_counter() - started)
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of an already sorted list"""
+    if not values:
+        return None
+    rank = max(1, math.ceil(pct / 100 * len(values)))
+    return values[rank - 1]
+
+
+def _stats(samples, elapsed):
+    latencies = sorted(s.latency_ms for s in samples)
+    stats = {
+        'requests': len(samples),
+        'errors': sum(1 for s in samples if s.error or s.status >= 500),
+        'rps': round(len(samples) / elapsed, 2) if elapsed else 0.0,
+        'max_ms': round(latencies[-1], 2) if latencies else None,
+    }
+    for pct in PERCENTILES:
+        value = percentile(latencies, pct)
+        stats[f'p{pct}_ms'] = round(value, 2) if value is not None else None
+    return stats
+
+
+def summarize(samples, elapsed):
+    by_route = defaultdict(list)
+    for sample in samples:
+        by_route[sample.route].append(sample)
+
+    routes = {}
+    for name, route_samples in sorted(by_route.items()):
+        stats = _stats(route_samples, elapsed)
+        stats['statuses'] = dict(sorted(
+            (str(status), sum(1 for s in route_samples if s.status == status))
+            for status in {s.status for s in route_samples}
+        ))
+        during = [s for s in route_samples if s.ingesting]
+        stats['p95_ms_ingesting'] = _stats(during, elapsed)['p95_ms'] if during else None
+        stats['sample_error'] = next((s.error for s in route_samples if s.error), '')
+        routes[name] = stats
+
+    return {
+        'elapsed_s': round(elapsed, 3),
+        'total': _stats(samples, elapsed),
+        'routes': routes,
+    }
@@ -0,0 +1,52 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from scores import metrics, player_stats
+from scores.models import MatchAnalysis
+from scores.player_index import PlayerIndex
+
+
+class Command(BaseCommand):
+    help = "Mevcut MatchAnalysis.player_ratings verilerinden oyuncu maç istatistiklerini (PlayerMatchStat) doldurur"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=200, help='Tek işlemde işlenen maç sayısı')
+        parser.add_argument('--match-id', type=str, help='Sadece bu maçı doldur')
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        analyses = MatchAnalysis.objects.select_related('match').exclude(player_ratings={}).order_by('match_id')
+        if options.get('match_id'):
+            analyses = analyses.filter(match_id=options['match_id'])
+
+        matches = written = 0
+        batch = []
+        for analysis in analyses.iterator(chunk_size=options['batch_size']):
+            batch.append(analysis)
+            if len(batch) >= options['batch_size']:
+                matches, written = self.write(batch, matches, written)
+                batch = []
+        if batch:
+            matches, written = self.write(batch, matches, written)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"{matches} maçtan {written} oyuncu istatistiği yazıldı ({time.perf_counter() - started:.1f} sn)"
+        ))
+
+    def write(self, analyses, matches, written):
+        """Upsert the rows of one batch of analyses in a single transaction"""
+        players = PlayerIndex()
+        players.load_teams({team_id for a in analyses for team_id in (a.match.home_team_id, a.match.away_team_id)})
+        rows = []
+        for analysis in analyses:
+            match_rows = player_stats.from_ratings(analysis.match, analysis.player_ratings, players)
+            matches += bool(match_rows)
+            rows.extend(match_rows)
+        with transaction.atomic():
+            created, _ = players.flush()
+            metrics.record_rows('backfill_player_match_stats', 'Player', 'created', created)
+            count = player_stats.upsert(rows)
+            metrics.record_rows('backfill_player_match_stats', 'PlayerMatchStat', 'upserted', count)
+        return matches, written + count
@@ -0,0 +1,25 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+
+from scores import changelog
+
+
+class Command(BaseCommand):
+    help = "Değişiklik günlüğünü (/api/changes/) sıkıştırır: eskimiş ve saklama süresini aşmış kayıtları siler"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--retention-days',
+            type=float,
+            default=changelog.DEFAULT_RETENTION.days,
+            help=f'Bu kadar günden eski kayıtları tamamen sil (varsayılan: {changelog.DEFAULT_RETENTION.days})',
+        )
+
+    def handle(self, *args, **options):
+        if options['retention_days'] <= 0:
+            raise CommandError('--retention-days sıfırdan büyük olmalı')
+        removed, watermark = changelog.compact(timedelta(days=options['retention_days']))
+        self.stdout.write(self.style.SUCCESS(
+            f"{removed} kayıt silindi; #{watermark} öncesinden itibaren soran istemciler listeleri yeniden yükleyecek"
+        ))
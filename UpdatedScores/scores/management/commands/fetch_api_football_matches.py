@@ -0,0 +1,4 @@
+# Scheduler, views and fetch_sports_data call 'fetch_api_football_matches';
+# the implementation lives in fetch_api_football_matches_new. They all pass
+# no_delete=True: without it the command deletes every stored match first.
+from .fetch_api_football_matches_new import Command  # noqa: F401
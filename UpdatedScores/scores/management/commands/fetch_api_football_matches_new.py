@@ -1,10 +1,122 @@
 from django.core.management.base import BaseCommand
 from scores.models import League, Team, Match
-import requests
-import os
+from scores.api_client import APIFootballClient, RequestRateLimiter
 import datetime
+import os
+import queue
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
 from django.utils.dateparse import parse_datetime
 from django.db import transaction
+from scores import changelog, metrics
+from scores.match_updates import MatchUpdates
+
+COMMAND = 'fetch_api_football_matches'
+# Akış halinde çekilen maçlar bu büyüklükte partilerle yazılır
+FETCH_BATCH = 200
+MATCH_FIELDS = ['home_team', 'away_team', 'match_date', 'league', 'stadium', 'score', 'round', 'season', 'status']
+
+
+def parse_fixture(match_data):
+    """API maç kaydını yazılacak alanlara çevirir; eksik veride ValueError"""
+    fixture = match_data.get("fixture", {})
+    teams = match_data.get("teams", {})
+    goals = match_data.get("goals") or {}
+    if not fixture or not teams:
+        raise ValueError("Eksik veri, bu maç atlanıyor.")
+
+    # Maçın skorunu alalım (eğer maç oynanmışsa)
+    score = None
+    if goals.get("home") is not None and goals.get("away") is not None:
+        score = f"{goals['home']}-{goals['away']}"
+
+    home = teams.get("home") or {}
+    away = teams.get("away") or {}
+    if not home.get("id") or not away.get("id"):
+        raise ValueError("Takım ID'leri eksik, bu maç atlanıyor.")
+
+    match_date_str = fixture.get("date")
+    if not match_date_str:
+        raise ValueError("Maç tarihi bulunamadı, bu maç atlanıyor.")
+    try:
+        # ISO formatındaki tarih-saat verisini parse et, olmazsa Python'un kendi parser'ını dene
+        match_date = parse_datetime(match_date_str) or datetime.datetime.fromisoformat(
+            match_date_str.replace('Z', '+00:00'))
+    except ValueError as e:
+        raise ValueError(f"Tarih ayrıştırma hatası: {str(e)} - Tarih: {match_date_str}")
+
+    match_id = str(fixture.get("id") or "")
+    if not match_id:
+        raise ValueError("Maç ID'si bulunamadı, bu maç atlanıyor.")
+    return {
+        "id": match_id,
+        "home": {"id": str(home["id"]), "name": home.get("name") or "Bilinmeyen Takım", "logo": home.get("logo")},
+        "away": {"id": str(away["id"]), "name": away.get("name") or "Bilinmeyen Takım", "logo": away.get("logo")},
+        "match_date": match_date,
+        "stadium": (fixture.get("venue") or {}).get("name") or "",
+        "score": score,
+        "round": (match_data.get("league") or {}).get("round", ""),
+        "season": str((match_data.get("league") or {}).get("season", "")),
+        "status": (fixture.get("status") or {}).get("short", ""),
+    }
+
+
+def new_shard():
+    """Bir ligin istek sayaçları ve mesajları"""
+    return {'requests': 0, 'failed': 0, 'messages': []}
+
+
+def fetch_league(league, queries, season, backup_season, shard, rate_limiter=None, batch_size=FETCH_BATCH):
+    """
+    Bir ligin (shard) maçlarını API'den akış halinde çeker ve en fazla
+    ``batch_size`` kayıtlık listeler olarak verir; yanıtın tamamı hiçbir
+    zaman bellekte tutulmaz. Veritabanına dokunmaz, bu yüzden iş
+    parçacıklarında çalışabilir. Boş dönen sorgular önceki sezonla tekrar
+    denenir; istek sayıları ve mesajlar ``shard`` içine yazılır.
+    """
+    client = APIFootballClient(rate_limiter=rate_limiter)
+    for query, url_type in queries:
+        try:
+            for attempt, query_season in enumerate((season, backup_season)):
+                shard['requests'] += 1
+                stream = client.iter_fixtures(league_id=league.id, season=query_season, **query)
+
+                # API yanit vermediyse (HTTP hatasi, zaman asimi) bu sorguyu atla
+                if stream is None:
+                    shard['failed'] += 1
+                    suffix = " (önceki sezon)" if attempt else ""
+                    shard['messages'].append(('ERROR', f"  API isteği başarısız: {league.name} - {url_type}{suffix}"))
+                    break
+
+                # Maçları geldikçe partiler halinde aktar
+                batch = []
+                for match_data in stream:
+                    batch.append(match_data)
+                    if len(batch) >= batch_size:
+                        yield batch
+                        batch = []
+                if batch:
+                    yield batch
+
+                # API yanıt içeriğini kontrol et (errors alanı maç listesinden önce gelir)
+                if stream.meta.get("errors"):
+                    shard['failed'] += 1
+                    shard['messages'].append(('ERROR', f"  API Hata döndürdü: {stream.meta['errors']}"))
+                    break
+                if stream.count:
+                    shard['messages'].append((None, f"  {url_type}: {stream.count} maç bulundu."))
+                    break
+                # API yanıtında maç yoksa önceki sezonu deneyelim
+            else:
+                shard['messages'].append((
+                    'WARNING', f"  {league.name} için {url_type} maçları bulunamadı (önceki sezonda da)."))
+        except Exception as e:
+            shard['failed'] += 1
+            shard['messages'].append(('ERROR', f"  API isteği sırasında hata: {str(e)}"))
+
 
 class Command(BaseCommand):
     help = "API-FOOTBALL'dan liglerin maclarini ceker ve kaydeder."
@@ -37,11 +149,20 @@ class Command(BaseCommand):
             action='store_true',
             help='Önceki maç verilerini silmeden ekle/güncelle',
         )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=1,
+            help='Ligleri bu kadar iş parçacığında paralel çek (varsayılan: 1, sıralı)',
+        )
+        parser.add_argument(
+            '--rate-limit',
+            type=int,
+            default=int(os.environ.get('API_FOOTBALL_RATE_LIMIT', 300)),
+            help='Tüm iş parçacıkları için dakikada en fazla istek (varsayılan: API_FOOTBALL_RATE_LIMIT veya 300, 0: sınırsız)',
+        )
 
     def handle(self, *args, **options):
-        api_key = os.getenv("API_FOOTBALL_KEY")
-        base_url = os.getenv("API_FOOTBALL_BASE_URL")
-        headers = {"x-apisports-key": api_key}
         leagues = League.objects.all()
         total = 0
         
@@ -56,13 +177,18 @@ class Command(BaseCommand):
             # Mac verilerini siliyoruz cunku guncel veri cekecegiz
             # Transaction icinde yap ki yarim kalirsa sorun olusmasin
             with transaction.atomic():
-                Match.objects.all().delete()
+                deleted = Match.objects.all().delete()[0]
+                changelog.reset()
+                metrics.record_rows('fetch_api_football_matches', 'Match', 'deleted', deleted)
                 self.stdout.write(self.style.SUCCESS("Eski mac verileri silindi. Yeni veriler cekiliyor..."))
         elif specific_date and not no_delete:
             # Sadece belirtilen tarih için olan maçları sil
             try:
                 date_obj = datetime.datetime.strptime(specific_date, '%Y-%m-%d').date()
-                count = Match.objects.filter(match_date__date=date_obj).delete()[0]
+                day_matches = Match.objects.filter(match_date__date=date_obj)
+                changelog.record('deleted', day_matches.values_list('id', flat=True))
+                count = day_matches.delete()[0]
+                metrics.record_rows('fetch_api_football_matches', 'Match', 'deleted', count)
                 self.stdout.write(self.style.SUCCESS(f"{specific_date} tarihindeki {count} maç silindi."))
             except ValueError:
                 self.stdout.write(self.style.ERROR(f"Geçersiz tarih formatı: {specific_date}. YYYY-MM-DD formatında olmalı."))
@@ -72,205 +198,65 @@ class Command(BaseCommand):
         
         # Günümüzün yılını alma ve güncel sezonu belirleme
         current_year = datetime.datetime.now().year
-        season = options.get('season', current_year)
+        season = options.get('season') or current_year
         # Backup sezon olarak bir önceki yılı da hazır tutalım
         backup_season = season - 1
         
         self.stdout.write(self.style.WARNING(f"Maçlar {season} sezonu için çekilecek (yoksa {backup_season} denenecek)"))
+        leagues = list(leagues)
+        workers = max(1, options.get('workers') or 1)
         # Ilgili ligleri ID'leri ile birlikte yazdir
-        self.stdout.write(self.style.WARNING(f"Toplam {leagues.count()} lig icin veri cekiliyor..."))
-        
-        for idx, league in enumerate(leagues, 1):
-            league_id = getattr(league, 'id', None)
-            if not league_id:
+        self.stdout.write(self.style.WARNING(f"Toplam {len(leagues)} lig icin veri cekiliyor ({workers} iş parçacığı)..."))
+
+        # Parametre değerlerini al
+        last_days = options.get('last', 14)
+        next_days = options.get('next', 14)
+        if specific_date:
+            # Sadece belirtilen tarih için maçları çek
+            queries = [({'date': specific_date}, f"{specific_date} tarihi")]
+        else:
+            # Once gecmis maclari, sonra bugunku ve gelecek maclari cekelim
+            queries = [
+                ({'last': last_days}, "Gecmis"),
+                ({'date': datetime.datetime.now().strftime('%Y-%m-%d')}, "Bugun"),
+                ({'next': next_days}, "Gelecek"),
+            ]
+
+        # Tüm iş parçacıkları aynı hız sınırını paylaşır
+        rate_limiter = RequestRateLimiter(options.get('rate_limit', 300))
+        fetch = partial(fetch_league, queries=queries, season=season, backup_season=backup_season,
+                        rate_limiter=rate_limiter)
+        started = time.perf_counter()
+        summary = Counter()
+        updates = MatchUpdates()
+        league_counts = {}
+        # Aynı maç birden fazla sorguda gelebilir (örn. geçmiş ve bugün); sadece kimlikleri tutulur
+        seen = set()
+        finished = 0
+        for league, shard, batch in self.fetch_shards(leagues, fetch, workers):
+            counts = league_counts.setdefault(league.id, Counter(created=0, updated=0, changed=0))
+            if batch is not None:
+                counts.update(self.save_batch(league, batch, seen, updates))
                 continue
-                
-            self.stdout.write(f"[{idx}/{leagues.count()}] {league.name} ({league.country}) - ID: {league_id}")
-            
-            # Parametre değerlerini al
-            last_days = options.get('last', 14)
-            next_days = options.get('next', 14)
-            
-            if specific_date:
-                # Sadece belirtilen tarih için maçları çek
-                specific_date_url = f"{base_url}/fixtures?league={league_id}&season={season}&date={specific_date}"
-                urls = [(specific_date_url, f"{specific_date} tarihi")]
-                self.stdout.write(self.style.WARNING(f"{specific_date} tarihi için maçlar çekilecek"))
-            else:
-                # Once gecmis maclari cekelim (son iki hafta)
-                past_url = f"{base_url}/fixtures?league={league_id}&season={season}&last={last_days}"
-                
-                # Sonra gelecek maclari cekelim (onumuzdeki iki hafta)
-                next_url = f"{base_url}/fixtures?league={league_id}&season={season}&next={next_days}"
-                
-                # Bugunku maclari cekelim
-                today_url = f"{base_url}/fixtures?league={league_id}&season={season}&date={datetime.datetime.now().strftime('%Y-%m-%d')}"
-                
-                # URL listesi oluştur
-                urls = [(past_url, "Gecmis"), (today_url, "Bugun"), (next_url, "Gelecek")]
-            
-            for url, url_type in urls:
-                try:
-                    self.stdout.write(f"  Cekiliyor: {league.name} - {url_type} maclari...")
-                    try:
-                        resp = requests.get(url, headers=headers, timeout=30)
-                        
-                        # API yanit durum kodunu kontrol et
-                        if resp.status_code != 200:
-                            self.stdout.write(self.style.ERROR(f"  API Hatasi ({resp.status_code}): {resp.text}"))
-                            continue
-                            
-                        data = resp.json()
-                    except requests.exceptions.RequestException as e:
-                        self.stdout.write(self.style.ERROR(f"  HTTP istegi hatasi: {str(e)}"))
-                        continue
-                    
-                    # API yanıt içeriğini kontrol et
-                    if data.get("errors"):
-                        self.stdout.write(self.style.ERROR(f"  API Hata döndürdü: {data.get('errors')}"))
-                        continue
-                    
-                    # API yanıtında "response" alanı yoksa önceki sezonu deneyelim
-                    if not data.get("response"):
-                        self.stdout.write(self.style.WARNING(f"  {league.name} için {url_type} maçları bulunamadı. Önceki sezonu deniyorum..."))
-                        # Önceki sezonu deneyelim
-                        backup_url = url.replace(f"season={season}", f"season={backup_season}")
-                        resp = requests.get(backup_url, headers=headers)
-                        if resp.status_code != 200:
-                            self.stdout.write(self.style.ERROR(f"  API Hatası (önceki sezon): {resp.status_code}"))
-                            continue
-                        data = resp.json()
-                        
-                        if not data.get("response"):
-                            self.stdout.write(self.style.WARNING(f"  {league.name} için {url_type} maçları bulunamadı (önceki sezonda da)."))
-                            continue
-                    
-                    # Gelen maçların sayısını bildirme
-                    match_count = len(data.get("response", []))
-                    self.stdout.write(f"  {match_count} maç bulundu.")
-                    
-                    # Maçları işleyelim
-                    for match_data in data.get("response", []):
-                        try:
-                            fixture = match_data.get("fixture", {})
-                            teams = match_data.get("teams", {})
-                            goals = match_data.get("goals", {})
-                            
-                            if not fixture or not teams:
-                                self.stdout.write(self.style.WARNING("  Eksik veri, bu maç atlanıyor."))
-                                continue
-                            
-                            # Maçın skorunu alalım (eğer maç oynanmışsa)
-                            home_score = goals.get("home")
-                            away_score = goals.get("away")
-                            score = None
-                            if home_score is not None and away_score is not None:
-                                score = f"{home_score}-{away_score}"
-                            
-                            # Takımları veritabanından çekelim
-                            home_team_id = str(teams.get("home", {}).get("id", ""))
-                            away_team_id = str(teams.get("away", {}).get("id", ""))
-                            
-                            if not home_team_id or not away_team_id:
-                                self.stdout.write(self.style.WARNING("  Takım ID'leri eksik, bu maç atlanıyor."))
-                                continue
-                            
-                            home_team = Team.objects.filter(id=home_team_id).first()
-                            away_team = Team.objects.filter(id=away_team_id).first()
-                            
-                            # Takımlar veritabanında yoksa, oluşturalım
-                            if not home_team:
-                                try:
-                                    home_team, created = Team.objects.get_or_create(
-                                        id=home_team_id,
-                                        defaults={
-                                            "name": teams.get("home", {}).get("name", "Bilinmeyen Takım"),
-                                            "logo": teams.get("home", {}).get("logo"),
-                                            "league": league
-                                        }
-                                    )
-                                    if created:
-                                        self.stdout.write(f"    + Yeni ev sahibi takım eklendi: {home_team.name}")
-                                except Exception as e:
-                                    self.stdout.write(self.style.ERROR(f"    Ev sahibi takım oluşturulurken hata: {str(e)}"))
-                                    continue
-                            
-                            if not away_team:
-                                try:
-                                    away_team, created = Team.objects.get_or_create(
-                                        id=away_team_id,
-                                        defaults={
-                                            "name": teams.get("away", {}).get("name", "Bilinmeyen Takım"),
-                                            "logo": teams.get("away", {}).get("logo"),
-                                            "league": league
-                                        }
-                                    )
-                                    if created:
-                                        self.stdout.write(f"    + Yeni deplasman takımı eklendi: {away_team.name}")
-                                except Exception as e:
-                                    self.stdout.write(self.style.ERROR(f"    Deplasman takımı oluşturulurken hata: {str(e)}"))
-                                    continue
-                                    
-                            # Maç verisini kaydetmek için tarih-saat verisi kontrol etmeliyiz
-                            match_date_str = fixture.get("date")
-                            if not match_date_str:
-                                self.stdout.write(self.style.WARNING("    Maç tarihi bulunamadı, bu maç atlanıyor."))
-                                continue
-                            
-                            try:
-                                # ISO formatındaki tarih-saat verisini parse et
-                                match_date = parse_datetime(match_date_str)
-                                
-                                if not match_date:
-                                    # Alternatif olarak Python'un kendi parser'ını deneyelim
-                                    from datetime import datetime as dt
-                                    match_date = dt.fromisoformat(match_date_str.replace('Z', '+00:00'))
-                                    
-                                if not match_date:
-                                    self.stdout.write(self.style.WARNING(f"    Maç tarihi ayrıştırılamadı: {match_date_str}"))
-                                    continue
-                                    
-                            except Exception as e:
-                                self.stdout.write(self.style.ERROR(f"    Tarih ayrıştırma hatası: {str(e)} - Tarih: {match_date_str}"))
-                                continue
-                            
-                            # Benzersiz ID'yi oluşturalım
-                            match_id = str(fixture.get("id", ""))
-                            if not match_id:
-                                self.stdout.write(self.style.WARNING("    Maç ID'si bulunamadı, bu maç atlanıyor."))
-                                continue
-                            
-                            # Transaction içinde güvenle kaydedelim
-                            with transaction.atomic():
-                                match, created = Match.objects.update_or_create(
-                                    id=match_id,
-                                    defaults={
-                                        "home_team": home_team,
-                                        "away_team": away_team,
-                                        "match_date": match_date,
-                                        "league": league,
-                                        "stadium": fixture.get("venue", {}).get("name", ""),
-                                        "score": score,
-                                        "round": match_data.get("league", {}).get("round", ""),
-                                        "season": str(match_data.get("league", {}).get("season", "")),
-                                        "status": fixture.get("status", {}).get("short", "")
-                                    }
-                                )
-                                
-                                if created:
-                                    self.stdout.write(f"    + Yeni maç eklendi: {home_team.name} vs {away_team.name} ({match_date.strftime('%Y-%m-%d %H:%M')})")
-                                else:
-                                    self.stdout.write(f"    * Maç güncellendi: {home_team.name} vs {away_team.name} ({match_date.strftime('%Y-%m-%d %H:%M')})")
-                                
-                                total += 1
-                                
-                        except Exception as e:
-                            self.stdout.write(self.style.ERROR(f"    Maç kaydedilirken hata: {str(e)}"))
-                            continue
-                            
-                except Exception as e:
-                    self.stdout.write(self.style.ERROR(f"  API isteği sırasında hata: {str(e)}"))
-                    continue
+            finished += 1
+            self.stdout.write(f"[{finished}/{len(leagues)}] {league.name} ({league.country}) - ID: {league.id}")
+            for level, message in shard['messages']:
+                self.stdout.write(getattr(self.style, level)(message) if level else message)
+            self.stdout.write(
+                f"  {counts['created']} yeni, {counts['updated']} güncellenen, {counts['changed']} değişen maç"
+            )
+            summary.update(league_counts.pop(league.id))
+            summary.update(requests=shard['requests'], failed=shard['failed'], leagues=1)
+        total = summary['created'] + summary['updated']
+
+        # Okuma modelleri tüm partiler yazıldıktan sonra bir kez güncellenir
+        updates.apply()
+        self.stdout.write(self.style.SUCCESS(
+            f"Özet: {summary['leagues']} lig, {summary['requests']} istek ({summary['failed']} başarısız), "
+            f"{summary['created']} yeni / {summary['updated']} güncellenen maç, {summary['changed']} değişiklik, "
+            f"{summary['teams']} yeni takım, {summary['skipped']} atlanan kayıt "
+            f"({time.perf_counter() - started:.1f} sn)"
+        ))
         
         # Bir özetleme yapalım
         try:
@@ -285,3 +271,108 @@ class Command(BaseCommand):
             self.stdout.write(self.style.SUCCESS(f"Gelecek maçlar: {future_matches}"))
         except Exception as e:
             self.stdout.write(self.style.ERROR(f"Özet oluştururken hata: {str(e)}"))
+
+    def fetch_shards(self, leagues, fetch, workers):
+        """
+        (lig, shard, parti) üçlüleri: bir ligin maçları geldikçe partiler,
+        lig bitince parti yerine None. --workers > 1 ise ligler iş
+        parçacıklarında çekilir; kuyruk sınırlı olduğundan yazma geride
+        kalırsa çekme bekler ve bellekte en fazla birkaç parti bulunur.
+        """
+        if workers == 1:
+            for league in leagues:
+                shard = new_shard()
+                for batch in fetch(league, shard=shard):
+                    yield league, shard, batch
+                yield league, shard, None
+            return
+
+        batches = queue.Queue(maxsize=workers * 2)
+        stop = threading.Event()
+
+        def put(item):
+            while not stop.is_set():
+                try:
+                    batches.put(item, timeout=0.5)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+
+        def work(league):
+            shard = new_shard()
+            try:
+                for batch in fetch(league, shard=shard):
+                    if not put((league, shard, batch)):
+                        return
+            finally:
+                put((league, shard, None))
+
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='fetch-matches') as pool:
+            try:
+                for league in leagues:
+                    pool.submit(work, league)
+                remaining = len(leagues)
+                while remaining:
+                    item = batches.get()
+                    if item[2] is None:
+                        remaining -= 1
+                    yield item
+            finally:
+                # Ana süreç erken çıkarsa iş parçacıkları kuyrukta beklemesin
+                stop.set()
+
+    def save_batch(self, league, fixtures, seen, updates):
+        """
+        Bir parti maçı toplu yazar: eksik takımlar tek bir INSERT, maçlar tek
+        bir upsert; ``seen`` içindeki (bu çalıştırmada zaten yazılmış) maçlar
+        atlanır. Toplu yazma sinyalleri atladığı için değişen maçlar ve yeni
+        takımlar, post_save ile aynı adımları çalıştıran ``updates``
+        (match_updates.MatchUpdates) üzerinden işlenir.
+        """
+        counts = Counter(created=0, updated=0, changed=0, teams=0, skipped=0)
+        rows = {}
+        for match_data in fixtures:
+            try:
+                row = parse_fixture(match_data)
+            except ValueError as e:
+                self.stdout.write(self.style.WARNING(f"    {str(e)}"))
+                counts['skipped'] += 1
+                continue
+            if row['id'] not in seen:
+                rows[row['id']] = row
+        if not rows:
+            return counts
+        seen.update(rows)
+
+        # Takımlar veritabanında yoksa, oluşturalım
+        sides = {side['id']: side for row in rows.values() for side in (row['home'], row['away'])}
+        existing = set(Team.objects.filter(id__in=sides).values_list('id', flat=True))
+        new_teams = [Team(id=team_id, name=side['name'], logo=side['logo'], league=league)
+                     for team_id, side in sides.items() if team_id not in existing]
+        if new_teams:
+            Team.objects.bulk_create(new_teams, ignore_conflicts=True)
+            counts['teams'] = len(new_teams)
+            metrics.record_rows(COMMAND, 'Team', 'created', len(new_teams))
+
+        previous = {match_id: (score, status, match_date) for match_id, score, status, match_date in
+                    Match.objects.filter(id__in=rows).values_list('id', 'score', 'status', 'match_date')}
+        matches = [
+            Match(id=row['id'], home_team_id=row['home']['id'], away_team_id=row['away']['id'],
+                  match_date=row['match_date'], league=league, stadium=row['stadium'], score=row['score'],
+                  round=row['round'], season=row['season'], status=row['status'])
+            for row in rows.values()
+        ]
+        changed = [match for match in matches if previous.get(match.id) != match.snapshot()]
+        # Transaction içinde güvenle kaydedelim
+        with transaction.atomic():
+            Match.objects.bulk_create(matches, batch_size=500, update_conflicts=True, unique_fields=['id'],
+                                      update_fields=MATCH_FIELDS)
+            updates.add([(match, previous.get(match.id)) for match in changed], new_teams)
+        counts['created'] = sum(1 for match in matches if match.id not in previous)
+        counts['updated'] = len(matches) - counts['created']
+        counts['changed'] = len(changed)
+        metrics.record_rows(COMMAND, 'Match', 'created', counts['created'])
+        metrics.record_rows(COMMAND, 'Match', 'updated', counts['updated'])
+
+        return counts
@@ -2,6 +2,7 @@ from django.core.management.base import BaseCommand
 from scores.models import League, Team
 import requests
 import os
+import datetime
 
 class Command(BaseCommand):
     help = "API-FOOTBALL'dan seçili liglerin takımlarını çeker ve kaydeder."
@@ -1,12 +1,20 @@
 from django.core.management.base import BaseCommand
-from scores.models import Match, Event, Player
+from scores.models import Match, Event
 from scores.api_client import APIFootballClient
+from scores import changelog, metrics
+from scores.fixture_details import FixtureDetails
+from scores.player_index import PlayerIndex
 from django.db import transaction
 import datetime
 
+# Matches that might have events
+EVENT_STATUSES = ['FT', 'HT', '1H', '2H', 'ET', 'BT', 'P', 'SUSP', 'INT', 'AET', 'PEN']
+
 
 class Command(BaseCommand):
     help = "Fetch match events (goals, cards, substitutions) from API-FOOTBALL"
+    # Batched fixtures?ids= payloads of a date-range run; None fetches per fixture
+    details = None
 
     def add_arguments(self, parser):
         parser.add_argument(
@@ -25,6 +33,8 @@ class Command(BaseCommand):
         client = APIFootballClient()
         days = options.get('days', 2)
         specific_match_id = options.get('match_id')
+        # Players are resolved from memory; unknown ones are created in bulk per match
+        self.players = PlayerIndex()
         
         # Fetch events for specific match if ID provided
         if specific_match_id:
@@ -45,7 +55,7 @@ class Command(BaseCommand):
         matches = Match.objects.filter(
             match_date__date__gte=from_date,
             match_date__date__lte=to_date,
-            status__in=['FT', 'HT', '1H', '2H', 'ET', 'BT', 'P', 'SUSP', 'INT', 'AET', 'PEN']  # Matches that might have events
+            status__in=EVENT_STATUSES
         )
         
         if not matches:
@@ -53,6 +63,13 @@ class Command(BaseCommand):
             return
             
         self.stdout.write(self.style.SUCCESS(f"Found {matches.count()} matches to fetch events for"))
+        self.players.load_teams(
+            {team_id for pair in matches.values_list('home_team_id', 'away_team_id') for team_id in pair}
+        )
+        # Events of up to 20 matches per request
+        self.details = FixtureDetails(client)
+        self.details.prefetch(matches.values_list('id', flat=True))
+        self.stdout.write(f"Fetched details of {len(self.details.items)} matches in {self.details.requests} requests")
         
         # Fetch events for each match
         for idx, match in enumerate(matches, 1):
@@ -64,27 +81,42 @@ class Command(BaseCommand):
         self.stdout.write(f"Fetching events for match: {match}")
         
         try:
-            events_data = client.get_events(match.id)
+            details = self.details or FixtureDetails(client)
+            events_data = details.get('events', match.id, lambda: client.get_events(match.id))
             
             # Check if API returned data
             if not events_data or "response" not in events_data or not events_data["response"]:
                 self.stdout.write(self.style.WARNING(f"No event data available for match {match.id}"))
                 return
             
+            before = changelog.fingerprint('events', match.id)
+
             # First, clear existing events for this match to avoid duplicates
-            Event.objects.filter(match=match).delete()
+            deleted = Event.objects.filter(match=match).delete()[0]
+            metrics.record_rows('fetch_match_events', 'Event', 'deleted', deleted)
             
-            # Process events
-            for event_data in events_data["response"]:
-                self.process_event(event_data, match)
-                
+            # Resolve every player of the response with at most two queries
+            self.players.load_teams([match.home_team_id, match.away_team_id])
+            self.players.prefetch_ids(
+                (event_data.get("player") or {}).get("id") for event_data in events_data["response"]
+            )
+            events = [self.process_event(event_data, match) for event_data in events_data["response"]]
+
+            # New players first so the events can reference them
+            created, _ = self.players.flush()
+            metrics.record_rows('fetch_match_events', 'Player', 'created', created)
+            for event in events:
+                if event is not None:
+                    self.save_event(event)
+
+            changelog.record_if_changed('events', match.id, before)
             self.stdout.write(self.style.SUCCESS(f"Successfully processed events for {match}"))
                     
         except Exception as e:
             self.stdout.write(self.style.ERROR(f"Error fetching events for match {match.id}: {str(e)}"))
     
     def process_event(self, event_data, match):
-        """Process event data and create Event record"""
+        """Process event data and return an unsaved Event (None if not tracked)"""
         event_type = event_data.get("type")
         detail = event_data.get("detail")
         
@@ -112,39 +144,23 @@ class Command(BaseCommand):
         player_obj = None
         
         if "player" in event_data and event_data["player"]:
-            player_id = str(event_data["player"].get("id", ""))
-            player_name = event_data["player"].get("name", "Unknown Player")
+            player_id = str(event_data["player"].get("id") or "")
+            player_name = event_data["player"].get("name") or "Unknown Player"
             
             if player_id:
-                # Try to find player in database
-                player_obj = Player.objects.filter(id=player_id).first()
+                player_obj = self.players.get(player_id)
                 
-                # If player not found, try to create it
-                if not player_obj and player_id and player_name:
-                    try:
-                        team_id = str(event_data.get("team", {}).get("id", ""))
-                        team = Team.objects.filter(id=team_id).first()
-                        if team:
-                            # Determine likely position based on event type
-                            event_type = event_data.get("type")
-                            position = "MF"  # Default to midfielder
-                            if event_type == "Goal":
-                                position = "FW"  # Goal scorer likely forward
-                            elif event_type == "Card" and event_data.get("detail") == "Red Card":
-                                position = "DF"  # Red cards often to defenders
-                                
-                            player_obj, created = Player.objects.get_or_create(
-                                id=player_id,
-                                defaults={
-                                    "name": player_name,
-                                    "team": team,
-                                    "position": position
-                                }
-                            )
-                            if created:
-                                self.stdout.write(f"Created new player: {player_name} for {team.name}")
-                    except Exception as e:
-                        self.stdout.write(self.style.ERROR(f"Error creating player: {str(e)}"))
+                # Unknown players are queued and created with the other new ones
+                team_id = str(event_data.get("team", {}).get("id", ""))
+                if not player_obj and team_id in (match.home_team_id, match.away_team_id):
+                    # Determine likely position based on event type
+                    position = "MF"  # Default to midfielder
+                    if event_type == "Goal":
+                        position = "FW"  # Goal scorer likely forward
+                    elif event_type == "Card" and detail == "Red Card":
+                        position = "DF"  # Red cards often to defenders
+                    player_obj = self.players.get_or_add(player_id, player_name, team_id, position)
+                    self.stdout.write(f"Created new player: {player_name} for team {team_id}")
         
         # Build description
         team_name = event_data.get("team", {}).get("name", "Unknown Team")
@@ -166,18 +182,22 @@ class Command(BaseCommand):
         else:
             description = f"{event_type} - {detail} - {player_name} ({team_name})"
         
+        return Event(
+            match=match,
+            minute=minute,
+            event_type=model_event_type,
+            description=description,
+            player=player_obj  # May be None
+        )
+
+    def save_event(self, event):
+        """Save one event; saved one by one so notifications and the live stream see it"""
         try:
             with transaction.atomic():
-                # Create event record
-                event = Event.objects.create(
-                    match=match,
-                    minute=minute,
-                    event_type=model_event_type,
-                    description=description,
-                    player=player_obj  # May be None
-                )
+                event.save()
+                metrics.record_rows('fetch_match_events', 'Event', 'created')
                 
-                self.stdout.write(f"Created event: {description} at {minute}'")
+                self.stdout.write(f"Created event: {event.description} at {event.minute}'")
                 
         except Exception as e:
             self.stdout.write(self.style.ERROR(f"Error creating event: {str(e)}"))
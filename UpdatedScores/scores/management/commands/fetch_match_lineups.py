@@ -1,12 +1,20 @@
 from django.core.management.base import BaseCommand
-from scores.models import Match, Player, Team, Lineup, LineupPlayer
+from scores.models import Match, Team, Lineup, LineupPlayer
 from scores.api_client import APIFootballClient
+from scores import changelog, metrics
+from scores.fixture_details import FixtureDetails
+from scores.player_index import PlayerIndex
+from scores.signals import lineups_confirmed
 from django.db import transaction
 import datetime
+import hashlib
+import json
 
 
 class Command(BaseCommand):
     help = "Fetch lineup data from API-FOOTBALL for recent or upcoming matches"
+    # Batched fixtures?ids= payloads of a date-range run; None fetches per fixture
+    details = None
 
     def add_arguments(self, parser):
         parser.add_argument(
@@ -25,6 +33,8 @@ class Command(BaseCommand):
         client = APIFootballClient()
         days = options.get('days', 2)
         specific_match_id = options.get('match_id')
+        # Players are resolved from memory; unknown ones are created in bulk per match
+        self.players = PlayerIndex()
         
         # Fetch lineups for specific match if ID provided
         if specific_match_id:
@@ -52,6 +62,13 @@ class Command(BaseCommand):
             return
             
         self.stdout.write(self.style.SUCCESS(f"Found {matches.count()} matches within date range"))
+        self.players.load_teams(
+            {team_id for pair in matches.values_list('home_team_id', 'away_team_id') for team_id in pair}
+        )
+        # Lineups of up to 20 matches per request
+        self.details = FixtureDetails(client)
+        self.details.prefetch(matches.values_list('id', flat=True))
+        self.stdout.write(f"Fetched details of {len(self.details.items)} matches in {self.details.requests} requests")
         
         # Fetch lineups for each match
         for idx, match in enumerate(matches, 1):
@@ -59,109 +76,160 @@ class Command(BaseCommand):
             self.fetch_and_save_lineup(client, match)
     
     def fetch_and_save_lineup(self, client, match):
-        """Fetch and save lineup data for a specific match"""
+        """
+        Fetch the lineups of one match and store only what changed.
+
+        A team whose payload hash matches the stored confirmed lineup is
+        skipped without touching its rows. For the others the stored
+        LineupPlayer rows are diffed against the feed and the difference is
+        written with bulk inserts, updates and deletes in one transaction.
+        """
         self.stdout.write(f"Fetching lineup for match: {match}")
         
         try:
-            lineup_data = client.get_lineups(match.id)
+            details = self.details or FixtureDetails(client)
+            lineup_data = details.get('lineups', match.id, lambda: client.get_lineups(match.id))
             
             # Check if API returned data
             if not lineup_data or "response" not in lineup_data or not lineup_data["response"]:
                 self.stdout.write(self.style.WARNING(f"No lineup data available for match {match.id}"))
                 return
-            
+
+            stored = {lineup.team_id: lineup for lineup in Lineup.objects.filter(match=match)}
+            sides = {match.home_team_id, match.away_team_id}
+            confirmed = {team_id for team_id, lineup in stored.items() if lineup.is_confirmed}
+            was_confirmed = sides <= confirmed
+            team_ids = {str(team_lineup.get("team", {}).get("id") or "") for team_lineup in lineup_data["response"]}
+            teams = Team.objects.in_bulk(team_ids - {""})
+
+            changed = []
             for team_lineup in lineup_data["response"]:
-                team_id = str(team_lineup.get("team", {}).get("id"))
+                team_id = str(team_lineup.get("team", {}).get("id") or "")
                 if not team_id:
                     continue
-                      # Get team from database
-                try:
-                    team = Team.objects.get(id=team_id)
-                except Team.DoesNotExist:
+                team = teams.get(team_id)
+                if team is None:
                     self.stdout.write(self.style.ERROR(f"Team with ID {team_id} not found"))
                     continue
-                
-                formation = team_lineup.get("formation")
-                
-                # Create or update the lineup record
-                with transaction.atomic():
-                    lineup, created = Lineup.objects.update_or_create(
-                        match=match,
-                        team=team,
-                        defaults={
-                            'formation': formation,
-                            'is_confirmed': True
-                        }
-                    )
-                    
-                    status = "Created new" if created else "Updated existing"
-                    self.stdout.write(f"{status} lineup for {team.name}")
-                    
-                    # First, clear any existing players from this lineup to avoid duplicates
-                    LineupPlayer.objects.filter(lineup=lineup).delete()
-                
-                # Create or update players from starting XI
-                for player_data in team_lineup.get("startXI", []):
-                    self.process_player(player_data["player"], team, match, lineup, is_starter=True)
-                
-                # Create or update players from substitutes
-                for player_data in team_lineup.get("substitutes", []):
-                    self.process_player(player_data["player"], team, match, lineup, is_starter=False)
-                    
+                payload_hash = self.payload_hash(team_lineup)
+                lineup = stored.get(team_id)
+                if lineup is not None and lineup.is_confirmed and lineup.payload_hash == payload_hash:
+                    self.stdout.write(f"Lineup for {team.name} unchanged")
+                    continue
+                changed.append((team, team_lineup, payload_hash))
+
                 # Add coach if available
                 if "coach" in team_lineup and team_lineup["coach"]:
-                    coach_data = team_lineup["coach"]
-                    coach_name = coach_data.get("name", "Unknown Coach")
+                    coach_name = team_lineup["coach"].get("name", "Unknown Coach")
                     self.stdout.write(f"Coach for {team.name}: {coach_name}")
-                    
-            self.stdout.write(self.style.SUCCESS(f"Successfully processed lineup for {match}"))
-                      except Exception as e:
-            self.stdout.write(self.style.ERROR(f"Error fetching lineup for match {match.id}: {str(e)}"))
-            
-    def process_player(self, player_data, team, match, lineup, is_starter=False):
-        """Process player data and create or update Player record"""
-        player_id = str(player_data.get("id"))
-        if not player_id:
-            return
-        
-        player_name = player_data.get("name", "Unknown Player")
-        position = self.map_position(player_data.get("pos", ""))
-        shirt_number = player_data.get("number")
-        
-        try:
+
+            if not changed:
+                self.stdout.write(self.style.SUCCESS(f"Lineups unchanged for {match}"))
+                return
+
+            self.players.load_teams([match.home_team_id, match.away_team_id] + [team.id for team, _, _ in changed])
+            self.players.prefetch_ids(
+                entry["player"].get("id")
+                for _, team_lineup, _ in changed
+                for entry in team_lineup.get("startXI", []) + team_lineup.get("substitutes", [])
+            )
+
             with transaction.atomic():
-                player, created = Player.objects.get_or_create(
-                    id=player_id,
-                    defaults={
-                        "name": player_name,
-                        "team": team,
-                        "position": position
-                    }
-                )
-                
-                if created:
-                    self.stdout.write(f"Created new player: {player_name} ({position}) for {team.name}")
-                else:
-                    # Update player info if it has changed
-                    if player.team != team:
-                        player.team = team
-                        player.save()
-                        self.stdout.write(f"Updated player {player_name}'s team to {team.name}")
-                
-                # Create the lineup player record
-                lineup_player = LineupPlayer.objects.create(
-                    lineup=lineup,
-                    player=player,
-                    is_starter=is_starter,
-                    position=player_data.get("pos"),
-                    shirt_number=shirt_number
-                )
-                
-                status = "Starting XI" if is_starter else "Substitute"
-                self.stdout.write(f"Player {player_name} - {status} for {team.name}")
-                
+                desired = {}
+                for team, team_lineup, payload_hash in changed:
+                    lineup = stored.get(team.id)
+                    created = lineup is None
+                    if created:
+                        lineup = Lineup(match=match, team=team)
+                    lineup.formation = team_lineup.get("formation")
+                    lineup.is_confirmed = True
+                    lineup.payload_hash = payload_hash
+                    lineup.save()
+                    metrics.record_rows('fetch_match_lineups', 'Lineup', 'created' if created else 'updated')
+                    status = "Created new" if created else "Updated existing"
+                    self.stdout.write(f"{status} lineup for {team.name}")
+                    desired[lineup] = self.desired_rows(team, team_lineup)
+
+                # New and transferred players first, then the lineup rows that reference them
+                created, moved = self.players.flush()
+                metrics.record_rows('fetch_match_lineups', 'Player', 'created', created)
+                metrics.record_rows('fetch_match_lineups', 'Player', 'updated', moved)
+                to_create, to_update, to_delete = self.diff_rows(desired)
+                LineupPlayer.objects.bulk_create(to_create)
+                LineupPlayer.objects.bulk_update(to_update, ['is_starter', 'position', 'shirt_number'])
+                LineupPlayer.objects.filter(pk__in=to_delete).delete()
+                metrics.record_rows('fetch_match_lineups', 'LineupPlayer', 'created', len(to_create))
+                metrics.record_rows('fetch_match_lineups', 'LineupPlayer', 'updated', len(to_update))
+                metrics.record_rows('fetch_match_lineups', 'LineupPlayer', 'deleted', len(to_delete))
+
+                changelog.record('lineups', [match.id])
+                # Announced once, when the second side is confirmed, with both starting elevens
+                if not was_confirmed and sides <= confirmed | {lineup.team_id for lineup in desired}:
+                    lineup_info = self.lineup_info(match)
+                    transaction.on_commit(
+                        lambda: lineups_confirmed.send(sender=Lineup, match=match, lineup_info=lineup_info))
+
+            self.stdout.write(self.style.SUCCESS(
+                f"Successfully processed lineup for {match} "
+                f"({len(to_create)} added, {len(to_update)} updated, {len(to_delete)} removed)"))
         except Exception as e:
-            self.stdout.write(self.style.ERROR(f"Error processing player {player_name}: {str(e)}"))
+            self.stdout.write(self.style.ERROR(f"Error fetching lineup for match {match.id}: {str(e)}"))
+
+    @staticmethod
+    def payload_hash(team_lineup):
+        """Stable hash of the parts of a team's lineup that end up in the database"""
+        payload = {key: team_lineup.get(key) for key in ("formation", "startXI", "substitutes")}
+        return hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode()).hexdigest()
+
+    def desired_rows(self, team, team_lineup):
+        """{player_id: (player, is_starter, position, shirt_number)} as the feed has it"""
+        rows = {}
+        for key, is_starter in (("startXI", True), ("substitutes", False)):
+            for entry in team_lineup.get(key, []):
+                player_data = entry["player"]
+                player_id = str(player_data.get("id") or "")
+                if not player_id:
+                    continue
+                player_name = player_data.get("name", "Unknown Player")
+                known = self.players.get(player_id)
+                previous_team = known.team_id if known else None
+                player = self.players.get_or_add(
+                    player_id, player_name, team.id, self.map_position(player_data.get("pos", "")), move=True)
+                if known is None:
+                    self.stdout.write(f"Created new player: {player_name} ({player.position}) for {team.name}")
+                elif previous_team != player.team_id:
+                    self.stdout.write(f"Updated player {player_name}'s team to {team.name}")
+                rows.setdefault(player_id, (player, is_starter, player_data.get("pos"), player_data.get("number")))
+        return rows
+
+    @staticmethod
+    def diff_rows(desired):
+        """(rows to create, rows to update, pks to delete) against the stored lineup players"""
+        stored = {
+            (row.lineup_id, row.player_id): row
+            for row in LineupPlayer.objects.filter(lineup__in=[lineup.pk for lineup in desired])
+        }
+        to_create, to_update = [], []
+        for lineup, rows in desired.items():
+            for player_id, (player, is_starter, position, shirt_number) in rows.items():
+                row = stored.pop((lineup.pk, player_id), None)
+                if row is None:
+                    to_create.append(LineupPlayer(lineup=lineup, player=player, is_starter=is_starter,
+                                                  position=position, shirt_number=shirt_number))
+                elif (row.is_starter, row.position, row.shirt_number) != (is_starter, position, shirt_number):
+                    row.is_starter, row.position, row.shirt_number = is_starter, position, shirt_number
+                    to_update.append(row)
+        return to_create, to_update, [row.pk for row in stored.values()]
+
+    @staticmethod
+    def lineup_info(match):
+        """Starter names per side from the stored lineups, as NotificationService.notify_lineup expects them"""
+        info = {"home_team": [], "away_team": []}
+        starters = LineupPlayer.objects.filter(lineup__match=match, is_starter=True).order_by('pk').values_list(
+            'lineup__team_id', 'player__name')
+        for team_id, name in starters:
+            info["home_team" if team_id == match.home_team_id else "away_team"].append(name)
+        return info
     
     def map_position(self, api_position):
         """Map API position codes to our model's position choices"""
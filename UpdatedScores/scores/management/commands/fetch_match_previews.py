@@ -1,9 +1,13 @@
 from django.core.management.base import BaseCommand
 from scores.models import Match, MatchPreview, Team
 from scores.api_client import APIFootballClient
+from scores import h2h, team_form
 from django.db import transaction
 import datetime
 
+# Meetings asked from fixtures/headtohead, and needed locally to skip that call
+H2H_LIMIT = 10
+
 
 class Command(BaseCommand):
     help = "Fetch match previews from API-FOOTBALL including head-to-head stats and predictions"
@@ -53,12 +57,16 @@ class Command(BaseCommand):
             
         self.stdout.write(self.style.SUCCESS(f"Found {matches.count()} upcoming matches to fetch previews for"))
         
+        # Local form and head-to-head rows of every team involved, one query each
+        forms = team_form.for_matches(matches)
+        pairs = h2h.for_matches(matches)
+        
         # Fetch previews for each match
         for idx, match in enumerate(matches, 1):
             self.stdout.write(f"[{idx}/{matches.count()}] Fetching preview for {match}")
-            self.fetch_and_save_preview(client, match)
+            self.fetch_and_save_preview(client, match, forms, pairs)
     
-    def fetch_and_save_preview(self, client, match):
+    def fetch_and_save_preview(self, client, match, forms=None, pairs=None):
         """Fetch and save preview data for a specific match"""
         self.stdout.write(f"Fetching preview for match: {match}")
         
@@ -66,12 +74,22 @@ class Command(BaseCommand):
             # Fetch predictions
             predictions_data = client.get_predictions(match.id)
             
-            # Get head-to-head data for the two teams
-            h2h_data = self.fetch_head_to_head(client, match.home_team.id, match.away_team.id)
+            # Head-to-head from the local pair table; the API only when its history is incomplete
+            if pairs is None:
+                pairs = h2h.for_matches([match])
+            pair = pairs.get(h2h.pair_key(match.home_team_id, match.away_team_id))
+            h2h_info = self.local_head_to_head(match, pair) if h2h.is_complete(pair, H2H_LIMIT) else None
+            h2h_data = None
+            if h2h_info is None:
+                h2h_info = {}
+                h2h_data = self.fetch_head_to_head(client, match.home_team.id, match.away_team.id, H2H_LIMIT)
+                if h2h_data and "response" in h2h_data:
+                    h2h.note_api_meetings(match.home_team_id, match.away_team_id, len(h2h_data["response"]))
             
             # Process prediction data
             prediction_info = {}
-            h2h_info = {}
+            home_stats = {}
+            away_stats = {}
             
             if predictions_data and "response" in predictions_data and predictions_data["response"]:
                 prediction = predictions_data["response"][0]
@@ -164,6 +182,15 @@ class Command(BaseCommand):
                         "result": match_result
                     })
             
+            # Prefer the form from the local table (most recent first) over the API's league form:
+            # the team's row in this match's competition
+            if forms is None:
+                forms = team_form.for_matches([match])
+            for stats, team_id in ((home_stats, match.home_team_id), (away_stats, match.away_team_id)):
+                local_form = team_form.form(forms.get((team_id, match.league_id)), match.match_date)
+                if local_form:
+                    stats["form"] = local_form
+            
             # Create or update match preview
             with transaction.atomic():
                 # Build preview text based on statistics and predictions
@@ -208,7 +235,20 @@ class Command(BaseCommand):
         except Exception as e:
             self.stdout.write(self.style.ERROR(f"Error fetching preview for match {match.id}: {str(e)}"))
     
-    def fetch_head_to_head(self, client, home_team_id, away_team_id, limit=10):
+    def local_head_to_head(self, match, pair):
+        """Head-to-head info in the same shape as the API branch, from the local pair table (or None)"""
+        summary = h2h.summary(pair, match.home_team_id, match.match_date, H2H_LIMIT)
+        if summary is None:
+            return None
+        return {
+            "total_matches": summary["total"],
+            "matches": [dict(item, result=item["result"].lower()) for item in summary["matches"]],
+            "home_wins": summary["home_wins"],
+            "away_wins": summary["away_wins"],
+            "draws": summary["draws"],
+        }
+    
+    def fetch_head_to_head(self, client, home_team_id, away_team_id, limit=H2H_LIMIT):
         """Fetch head-to-head statistics between two teams"""
         try:
             # Construct endpoint parameters
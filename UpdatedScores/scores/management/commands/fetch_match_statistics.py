@@ -1,12 +1,20 @@
 from django.core.management.base import BaseCommand
 from scores.models import Match, MatchAnalysis
 from scores.api_client import APIFootballClient
+from scores import changelog, metrics, player_stats
+from scores.fixture_details import FixtureDetails
+from scores.player_index import PlayerIndex
 from django.db import transaction
 import datetime
 
+# Completed matches
+COMPLETED_STATUSES = ['FT', 'AET', 'PEN']
+
 
 class Command(BaseCommand):
     help = "Fetch match statistics from API-FOOTBALL and save to MatchAnalysis"
+    # Batched fixtures?ids= payloads of a date-range run; None fetches per fixture
+    details = None
 
     def add_arguments(self, parser):
         parser.add_argument(
@@ -25,6 +33,8 @@ class Command(BaseCommand):
         client = APIFootballClient()
         days = options.get('days', 2)
         specific_match_id = options.get('match_id')
+        # Players of the per-player stat rows are resolved from memory, unknown ones created in bulk
+        self.players = PlayerIndex()
         
         # Fetch statistics for specific match if ID provided
         if specific_match_id:
@@ -45,7 +55,7 @@ class Command(BaseCommand):
         matches = Match.objects.filter(
             match_date__date__gte=from_date,
             match_date__date__lte=to_date,
-            status__in=['FT', 'AET', 'PEN']  # Completed matches
+            status__in=COMPLETED_STATUSES
         )
         
         if not matches:
@@ -53,6 +63,10 @@ class Command(BaseCommand):
             return
             
         self.stdout.write(self.style.SUCCESS(f"Found {matches.count()} completed matches to fetch statistics for"))
+        # Team and player statistics of up to 20 matches per request
+        self.details = FixtureDetails(client)
+        self.details.prefetch(matches.values_list('id', flat=True))
+        self.stdout.write(f"Fetched details of {len(self.details.items)} matches in {self.details.requests} requests")
         
         # Fetch statistics for each match
         for idx, match in enumerate(matches, 1):
@@ -64,11 +78,12 @@ class Command(BaseCommand):
         self.stdout.write(f"Fetching statistics for match: {match}")
         
         try:
+            details = self.details or FixtureDetails(client)
             # Fetch team statistics
-            stats_data = client.get_statistics(match.id)
+            stats_data = details.get('statistics', match.id, lambda: client.get_statistics(match.id))
             
             # Fetch player statistics
-            player_stats_data = client.get_player_statistics(match.id)
+            player_stats_data = details.get('players', match.id, lambda: client.get_player_statistics(match.id))
             
             # Check if API returned data
             if not stats_data or "response" not in stats_data or not stats_data["response"]:
@@ -95,6 +110,10 @@ class Command(BaseCommand):
                     if stat_type and stat_value is not None:
                         target_dict[stat_type] = stat_value
             
+            before = changelog.fingerprint('statistics', match.id)
+            stat_rows = player_stats.from_api(match, player_stats_data, self.players)
+            player_ratings = self.process_player_ratings(player_stats_data, match)
+
             # Create or update match analysis
             with transaction.atomic():
                 analysis, created = MatchAnalysis.objects.get_or_create(
@@ -107,7 +126,7 @@ class Command(BaseCommand):
                         "fouls": f"{home_team_stats.get('Fouls', 0)}-{away_team_stats.get('Fouls', 0)}",
                         "yellows": f"{home_team_stats.get('Yellow Cards', 0)}-{away_team_stats.get('Yellow Cards', 0)}",
                         "reds": f"{home_team_stats.get('Red Cards', 0)}-{away_team_stats.get('Red Cards', 0)}",
-                        "player_ratings": self.process_player_ratings(player_stats_data)
+                        "player_ratings": player_ratings
                     }
                 )
                 
@@ -120,16 +139,24 @@ class Command(BaseCommand):
                     analysis.fouls = f"{home_team_stats.get('Fouls', 0)}-{away_team_stats.get('Fouls', 0)}"
                     analysis.yellows = f"{home_team_stats.get('Yellow Cards', 0)}-{away_team_stats.get('Yellow Cards', 0)}"
                     analysis.reds = f"{home_team_stats.get('Red Cards', 0)}-{away_team_stats.get('Red Cards', 0)}"
-                    analysis.player_ratings = self.process_player_ratings(player_stats_data)
+                    analysis.player_ratings = player_ratings
                     analysis.save()
-                
+
+                # New players first, then one upsert for every player's row
+                created_players, _ = self.players.flush()
+                metrics.record_rows('fetch_match_statistics', 'Player', 'created', created_players)
+                written = player_stats.upsert(stat_rows)
+                metrics.record_rows('fetch_match_statistics', 'PlayerMatchStat', 'upserted', written)
+
+                changelog.record_if_changed('statistics', match.id, before)
+                metrics.record_rows('fetch_match_statistics', 'MatchAnalysis', 'created' if created else 'updated')
                 status = "Created" if created else "Updated"
                 self.stdout.write(self.style.SUCCESS(f"{status} match analysis for {match}"))
                     
         except Exception as e:
             self.stdout.write(self.style.ERROR(f"Error fetching statistics for match {match.id}: {str(e)}"))
     
-    def process_player_ratings(self, player_stats_data):
+    def process_player_ratings(self, player_stats_data, match=None):
         """Process player statistics and return ratings dictionary"""
         ratings = {"home": [], "away": []}
         
@@ -137,7 +164,10 @@ class Command(BaseCommand):
             return ratings
         
         for team_data in player_stats_data.get("response", []):
-            team_side = "home" if team_data.get("team", {}).get("name") == team_data.get("teams", {}).get("home", {}).get("name") else "away"
+            if match is not None:
+                team_side = "home" if str(team_data.get("team", {}).get("id")) == match.home_team_id else "away"
+            else:
+                team_side = "home" if team_data.get("team", {}).get("name") == team_data.get("teams", {}).get("home", {}).get("name") else "away"
             
             for player in team_data.get("players", []):
                 player_info = player.get("player", {})
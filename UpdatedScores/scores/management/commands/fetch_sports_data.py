@@ -3,9 +3,9 @@ from datetime import datetime
 from django.core.management.base import BaseCommand
 from django.db import transaction
 from django.utils import timezone
-from scores.api_client import TheSportsDBAPI, fetch_leagues, fetch_events_by_league
+from scores.api_client import TheSportsDBAPI
 from scores.models import League, Team, Player, Match, Event
-from django.utils.dateparse import parse_datetime
+from scores.player_index import PlayerIndex
 
 logger = logging.getLogger(__name__)
 
@@ -18,7 +18,7 @@ class Command(BaseCommand):
             action='store_true',
             help='Tam bir güncelleme yapar (Ligler, takımlar, maçlar)',
         )
-          parser.add_argument(
+        parser.add_argument(
             '--no-warnings',
             action='store_true',
             help='Uyarıları gösterme',
@@ -46,7 +46,7 @@ class Command(BaseCommand):
                 
                 # 3. Maçları çek - Son 14 gün ve gelecek 14 gün
                 self.stdout.write(self.style.SUCCESS("3/3: Maçları çekiyorum..."))
-                call_command('fetch_api_football_matches', verbosity=verbosity)
+                call_command('fetch_api_football_matches', no_delete=True, verbosity=verbosity)
                 
                 # Başarı mesajı
                 self.stdout.write(self.style.SUCCESS("✓ Tüm veriler başarıyla güncellendi!"))
@@ -66,7 +66,7 @@ class Command(BaseCommand):
             try:
                 from django.core.management import call_command
                 self.stdout.write(self.style.SUCCESS("API-FOOTBALL ile maç verilerini güncelliyorum..."))
-                call_command('fetch_api_football_matches', verbosity=verbosity)
+                call_command('fetch_api_football_matches', no_delete=True, verbosity=verbosity)
                 self.stdout.write(self.style.SUCCESS("✓ Maç verileri başarıyla güncellendi!"))
             except Exception as e:
                 self.stdout.write(self.style.ERROR(f"API-FOOTBALL maç verisi çekilirken hata: {str(e)}"))
@@ -191,6 +191,8 @@ class Command(BaseCommand):
         self.stdout.write('Maç verilerini güncelleme...')
         leagues = League.objects.all()
         today = datetime.now().strftime('%Y-%m-%d')
+        # Golcü/kart isimleri bellekteki kadrolardan eşleştirilir (takım başına tek sorgu)
+        self.players = PlayerIndex()
         
         # Son 7 güne ait maçları işle
         for league in leagues:
@@ -258,6 +260,7 @@ class Command(BaseCommand):
             
             # Maç olaylarını işle
             if score:  # Skoru varsa olayları da ekle
+                self.players.load_teams([home_team.id, away_team.id])
                 # Ev sahibi takım golleri
                 home_goals = event_data.get('strHomeGoalDetails')
                 if home_goals and home_goals != 'null':
@@ -318,13 +321,8 @@ class Command(BaseCommand):
             else:
                 player_name = event_detail.strip()
             
-            # Oyuncuyu bul
-            player = None
-            if player_name:
-                # Önce takım içinde ara
-                players = Player.objects.filter(team=team, name__icontains=player_name)
-                if players.exists():
-                    player = players.first()
+            # Oyuncuyu takım kadrosunda bul (aksan, isim sırası ve kısaltmalar önemsiz)
+            player = self.players.find(player_name, team.id) if player_name else None
             
             # Olay kaydı oluştur
             if minute is not None or player is not None:
@@ -345,26 +343,4 @@ class Command(BaseCommand):
                         'description': description
                     }
                 )
-        
-        leagues = fetch_leagues().get("leagues", [])
-        for league_data in leagues:
-            league, _ = League.objects.get_or_create(
-                name=league_data["strLeague"],
-                defaults={"country": league_data.get("strCountry", "")}
-            )
-            events = fetch_events_by_league(league_data["idLeague"]).get("events", [])
-            for event in events:
-                home_team, _ = Team.objects.get_or_create(name=event["strHomeTeam"])
-                away_team, _ = Team.objects.get_or_create(name=event["strAwayTeam"])
-                match_date = parse_datetime(event["dateEvent"] + "T" + (event.get("strTime", "00:00:00")))
-                Match.objects.update_or_create(
-                    home_team=home_team,
-                    away_team=away_team,
-                    match_date=match_date,
-                    league=league,
-                    defaults={
-                        "stadium": event.get("strVenue", ""),
-                        "score": (str(event.get("intHomeScore", "")) + "-" + str(event.get("intAwayScore", ""))) if event.get("intHomeScore") is not None else None
-                    }
-                )
-        self.stdout.write(self.style.SUCCESS("Sports data updated."))
+
@@ -1,13 +1,87 @@
+import io
 import random
 from django.core.management.base import BaseCommand
+from django.db import transaction
 from django.utils import timezone
-from scores.models import Match, MatchAnalysis, MatchPreview, Event, Player
+from scores.models import Match, MatchAnalysis, MatchPreview, Event
+from scores import h2h, match_ratings, parallel, team_form, team_ratings
+from scores.match_history import MatchHistory
 from datetime import timedelta
 import json
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Oyuncu puanları bu kadar maç için birlikte hesaplanır
+RATING_BATCH_SIZE = 200
+
+PREVIEW_FIELDS = ('home_form', 'away_form', 'home_stats', 'away_stats', 'key_players', 'prediction',
+                  'preview_text', 'head_to_head')
+ANALYSIS_FIELDS = ('possession', 'shots', 'shots_on_target', 'corners', 'fouls', 'yellows', 'reds',
+                   'analysis_text', 'key_moments', 'player_ratings')
+
+
+def _matches(match_ids):
+    return list(Match.objects.filter(pk__in=match_ids).select_related('home_team', 'away_team', 'league'))
+
+
+def build_previews(match_ids):
+    """Worker task: {match_id: preview fields} for one chunk, as plain data"""
+    command = Command(stdout=io.StringIO(), stderr=io.StringIO())
+    matches = _matches(match_ids)
+    history = MatchHistory.for_matches(matches)
+    forms = team_form.for_matches(matches)
+    pairs = h2h.for_matches(matches)
+    forecasts = team_ratings.forecast(matches)
+    squads = match_ratings.squads({team_id for m in matches for team_id in (m.home_team_id, m.away_team_id)})
+    results = {}
+    for match in matches:
+        preview = MatchPreview(match=match)
+        try:
+            command.fill_preview(preview, match, history, squads, forms, pairs, forecasts)
+        except Exception as e:
+            logger.error(f"Önizleme oluşturma hatası ({match.id}): {e}")
+            continue
+        results[match.id] = {field: getattr(preview, field) for field in PREVIEW_FIELDS}
+    return results
+
+
+def build_analyses(match_ids):
+    """Worker task: {match_id: analysis fields} for one chunk, as plain data"""
+    command = Command(stdout=io.StringIO(), stderr=io.StringIO())
+    matches = _matches(match_ids)
+    ratings = match_ratings.for_matches(matches)
+    results = {}
+    for match in matches:
+        analysis = MatchAnalysis(match=match)
+        try:
+            if not command.fill_analysis(analysis, match, ratings.get(match.id)):
+                continue
+        except Exception as e:
+            logger.error(f"Analiz oluşturma hatası ({match.id}): {e}")
+            continue
+        results[match.id] = {field: getattr(analysis, field) for field in ANALYSIS_FIELDS}
+    return results
+
+
+def save_previews(results):
+    """Upsert worker results into MatchPreview with one statement"""
+    MatchPreview.objects.bulk_create(
+        [MatchPreview(match_id=match_id, **fields) for match_id, fields in results.items()],
+        update_conflicts=True, unique_fields=['match'], update_fields=[*PREVIEW_FIELDS, 'last_updated'],
+    )
+    return len(results)
+
+
+def save_analyses(results):
+    """Upsert worker results into MatchAnalysis with one statement"""
+    MatchAnalysis.objects.bulk_create(
+        [MatchAnalysis(match_id=match_id, **fields) for match_id, fields in results.items()],
+        update_conflicts=True, unique_fields=['match'], update_fields=[*ANALYSIS_FIELDS, 'last_updated'],
+    )
+    return len(results)
+
+
 class Command(BaseCommand):
     help = 'Maçlar için otomatik analiz ve önizleme oluşturur'
 
@@ -33,6 +107,18 @@ class Command(BaseCommand):
             type=str,
             help='Belirli bir maç için analiz veya önizleme oluştur'
         )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=1,
+            help='Maçları bu kadar süreçte paralel işle (varsayılan: 1, sıralı)'
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=25,
+            help='--workers ile her görevde işlenen maç sayısı (varsayılan: 25)'
+        )
 
     def handle(self, *args, **options):
         days = options['days']
@@ -59,39 +145,91 @@ class Command(BaseCommand):
 
         # Tarih sınırlaması
         cutoff_date = timezone.now() - timedelta(days=days)
+
+        if options['workers'] > 1:
+            self.handle_parallel(generate_preview, generate_analysis, cutoff_date,
+                                 options['workers'], options['chunk_size'])
+            self.stdout.write(self.style.SUCCESS('İşlemler başarıyla tamamlandı!'))
+            return
         
         # Önizleme oluşturma
         if generate_preview:
             # Gelecekteki veya son 1 gün içindeki henüz oynanmamış maçlar
-            future_matches = Match.objects.filter(
+            future_matches = list(Match.objects.filter(
                 match_date__gte=timezone.now() - timedelta(hours=3),  # Biraz geçmiş maçları da dahil et
                 match_date__lte=timezone.now() + timedelta(days=7),   # Gelecek 7 gündeki maçlar
-                score__isnull=True  # Henüz oynanmamış maçlar
-            ).order_by('match_date')
+                score__isnull=True,  # Henüz oynanmamış maçlar
+                preview__isnull=True,
+            ).select_related('home_team', 'away_team', 'league').order_by('match_date'))
+            
+            # Geçmiş maçlar, form ve karşılaşma tabloları, kadrolar ve tahminler tüm önizlemeler için tek seferde
+            history = MatchHistory.for_matches(future_matches)
+            forms = team_form.for_matches(future_matches)
+            pairs = h2h.for_matches(future_matches)
+            forecasts = team_ratings.forecast(future_matches)
+            squads = match_ratings.squads({t for m in future_matches for t in (m.home_team_id, m.away_team_id)})
             
             # Preview oluştur
             for match in future_matches:
-                if not self.has_preview(match):
-                    self.generate_preview_for_match(match)
-                    self.stdout.write(f'Önizleme oluşturuldu: {match}')
+                self.generate_preview_for_match(match, history=history, squads=squads, forms=forms,
+                                                pairs=pairs, forecasts=forecasts)
+                self.stdout.write(f'Önizleme oluşturuldu: {match}')
         
         # Analiz oluşturma
         if generate_analysis:
-            # Son N gün içinde tamamlanmış maçlar
-            completed_matches = Match.objects.filter(
+            # Son N gün içinde tamamlanmış ve analizi olmayan maçlar
+            completed_matches = list(Match.objects.filter(
                 match_date__gte=cutoff_date,
                 match_date__lte=timezone.now(),
-                score__isnull=False  # Skoru olan (tamamlanmış) maçlar
-            ).order_by('-match_date')
+                score__isnull=False,  # Skoru olan (tamamlanmış) maçlar
+                analysis__isnull=True,
+            ).select_related('home_team', 'away_team', 'league').order_by('-match_date'))
             
-            # Analiz oluştur
-            for match in completed_matches:
-                if not self.has_analysis(match):
-                    self.generate_analysis_for_match(match)
+            # Analiz oluştur; oyuncu puanları her grup için tek seferde hesaplanır
+            for start in range(0, len(completed_matches), RATING_BATCH_SIZE):
+                batch = completed_matches[start:start + RATING_BATCH_SIZE]
+                ratings = match_ratings.for_matches(batch)
+                for match in batch:
+                    self.generate_analysis_for_match(match, player_ratings=ratings.get(match.id))
                     self.stdout.write(f'Analiz oluşturuldu: {match}')
         
         self.stdout.write(self.style.SUCCESS('İşlemler başarıyla tamamlandı!'))
 
+    def handle_parallel(self, generate_preview, generate_analysis, cutoff_date, workers, chunk_size):
+        """
+        Maçları parçalara bölüp süreç havuzunda işler. Her süreç kendi
+        veritabanı bağlantısıyla alanları hesaplar; sonuçları ana süreç her
+        parça için tek bir toplu upsert ile yazar.
+        """
+        jobs = []
+        if generate_preview:
+            preview_ids = Match.objects.filter(
+                match_date__gte=timezone.now() - timedelta(hours=3),
+                match_date__lte=timezone.now() + timedelta(days=7),
+                score__isnull=True,
+                preview__isnull=True,
+            ).order_by('match_date').values_list('id', flat=True)
+            jobs.append(('Önizleme', build_previews, save_previews, list(preview_ids)))
+        if generate_analysis:
+            analysis_ids = Match.objects.filter(
+                match_date__gte=cutoff_date,
+                match_date__lte=timezone.now(),
+                score__isnull=False,
+                analysis__isnull=True,
+            ).order_by('-match_date').values_list('id', flat=True)
+            jobs.append(('Analiz', build_analyses, save_analyses, list(analysis_ids)))
+
+        for label, task, save, match_ids in jobs:
+            if not match_ids:
+                continue
+            chunks = parallel.chunked(match_ids, chunk_size)
+            self.stdout.write(f'{label}: {len(match_ids)} maç, {len(chunks)} parça, {workers} süreç')
+            written = 0
+            for _, results in parallel.run(task, chunks, workers):
+                with transaction.atomic():
+                    written += save(results)
+            self.stdout.write(f'{label} oluşturuldu: {written} maç')
+
     def has_preview(self, match):
         """Maçın önizlemesi var mı kontrol et"""
         return hasattr(match, 'preview')
@@ -100,7 +238,7 @@ class Command(BaseCommand):
         """Maçın analizi var mı kontrol et"""
         return hasattr(match, 'analysis')
         
-    def generate_preview_for_match(self, match):
+    def generate_preview_for_match(self, match, history=None, squads=None, forms=None, pairs=None, forecasts=None):
         """Bir maç için önizleme oluştur"""
         try:
             # Eğer zaten varsa güncelle
@@ -109,96 +247,7 @@ class Command(BaseCommand):
             except MatchPreview.DoesNotExist:
                 preview = MatchPreview(match=match)
             
-            # İlgili takımların son 5 maçını al
-            home_last_matches = Match.objects.filter(
-                match_date__lt=match.match_date
-            ).filter(
-                home_team=match.home_team
-            ).order_by('-match_date')[:5]
-            
-            away_last_matches = Match.objects.filter(
-                match_date__lt=match.match_date
-            ).filter(
-                away_team=match.away_team
-            ).order_by('-match_date')[:5]
-            
-            # Form verilerini hesapla
-            home_form = self.calculate_form(home_last_matches, match.home_team)
-            away_form = self.calculate_form(away_last_matches, match.away_team)
-            
-            preview.home_form = home_form
-            preview.away_form = away_form
-            
-            # Karşılıklı maç istatistikleri
-            h2h_matches = Match.objects.filter(
-                match_date__lt=match.match_date,
-                home_team__in=[match.home_team, match.away_team],
-                away_team__in=[match.home_team, match.away_team],
-                score__isnull=False
-            ).order_by('-match_date')[:5]
-            
-            # H2H istatistiklerini JSON formatında kaydet
-            h2h_stats = {
-                'total': h2h_matches.count(),
-                'home_wins': 0,
-                'draws': 0,
-                'away_wins': 0,
-                'matches': []
-            }
-            
-            for h2h in h2h_matches:
-                if h2h.score:
-                    try:
-                        home_goals, away_goals = map(int, h2h.score.split('-'))
-                        match_result = {}
-                        
-                        # Eğer ev sahibi takım bizim ev sahibimizse
-                        if h2h.home_team == match.home_team:
-                            if home_goals > away_goals:
-                                h2h_stats['home_wins'] += 1
-                                result = "HOME_WIN"
-                            elif home_goals < away_goals:
-                                h2h_stats['away_wins'] += 1
-                                result = "AWAY_WIN"
-                            else:
-                                h2h_stats['draws'] += 1
-                                result = "DRAW"
-                        else:
-                            if home_goals < away_goals:
-                                h2h_stats['home_wins'] += 1
-                                result = "HOME_WIN"
-                            elif home_goals > away_goals:
-                                h2h_stats['away_wins'] += 1
-                                result = "AWAY_WIN"
-                            else:
-                                h2h_stats['draws'] += 1
-                                result = "DRAW"
-                                
-                        match_result = {
-                            'date': h2h.match_date.strftime('%Y-%m-%d'),
-                            'home_team': h2h.home_team.name,
-                            'away_team': h2h.away_team.name,
-                            'score': h2h.score,
-                            'result': result
-                        }
-                        h2h_stats['matches'].append(match_result)
-                    except (ValueError, IndexError):
-                        pass
-            
-            preview.head_to_head = h2h_stats
-            
-            # Takım istatistikleri
-            home_stats = self.generate_team_stats(match.home_team)
-            away_stats = self.generate_team_stats(match.away_team)
-            
-            preview.home_stats = home_stats
-            preview.away_stats = away_stats
-            
-            # Tahmin ve önizleme metni
-            preview.prediction = self.generate_prediction(match, home_form, away_form, h2h_stats)
-            preview.preview_text = self.generate_preview_text(match, home_form, away_form, h2h_stats)
-            preview.key_players = self.generate_key_players_text(match)
-            
+            self.fill_preview(preview, match, history, squads, forms, pairs, forecasts)
             preview.save()
             return preview
             
@@ -207,8 +256,54 @@ class Command(BaseCommand):
             self.stderr.write(self.style.ERROR(f"Hata: {e}"))
             return None
     
-    def generate_analysis_for_match(self, match):
-        """Bir maç için analiz oluştur"""
+    def fill_preview(self, preview, match, history=None, squads=None, forms=None, pairs=None, forecasts=None):
+        """
+        Önizleme alanlarını hesaplayıp doldur (kaydetmez). history
+        (MatchHistory), squads, forms (team_form.for_matches), pairs
+        (h2h.for_matches) ve forecasts (team_ratings.forecast) toplu
+        çalışmada tüm maçlar için bir kez yüklenir; history, squads ve
+        forecasts verilmezse bu maç için yüklenir.
+        """
+        if history is None:
+            history = MatchHistory.for_matches([match])
+        if squads is None:
+            squads = match_ratings.squads([match.home_team_id, match.away_team_id])
+        if forecasts is None:
+            forecasts = team_ratings.forecast([match])
+        forecast = forecasts[match.id]
+
+        # Form: ev sahibinin son 5 iç saha, deplasmanın son 5 dış saha maçı;
+        # önce form tablosundan, yetmezse tüm geçmişten
+        forms = forms or {}
+        home_form = (team_form.form(forms.get((match.home_team_id, None)), match.match_date, venue='home')
+                     or history.form(match.home_team_id, match.match_date, venue='home') or self.fallback_form())
+        away_form = (team_form.form(forms.get((match.away_team_id, None)), match.match_date, venue='away')
+                     or history.form(match.away_team_id, match.match_date, venue='away') or self.fallback_form())
+
+        preview.home_form = home_form
+        preview.away_form = away_form
+
+        # Karşılıklı son 5 maç; karşılaşma tablosu yetmezse tüm geçmişten
+        h2h_stats = (h2h.summary((pairs or {}).get(h2h.pair_key(match.home_team_id, match.away_team_id)),
+                                 match.home_team_id, match.match_date)
+                     or history.head_to_head(match.home_team_id, match.away_team_id, match.match_date))
+        preview.head_to_head = h2h_stats
+
+        # Takım istatistikleri ve güç derecesi
+        preview.home_stats = self.generate_team_stats(match.home_team, history, {
+            'elo': forecast['home_elo'], 'expected_goals': forecast['home_xg'], 'win_probability': forecast['home_win'],
+        })
+        preview.away_stats = self.generate_team_stats(match.away_team, history, {
+            'elo': forecast['away_elo'], 'expected_goals': forecast['away_xg'], 'win_probability': forecast['away_win'],
+        })
+
+        # Tahmin ve önizleme metni
+        preview.prediction = self.generate_prediction(match, forecast)
+        preview.preview_text = self.generate_preview_text(match, home_form, away_form, h2h_stats)
+        preview.key_players = self.generate_key_players_text(match, squads)
+
+    def generate_analysis_for_match(self, match, player_ratings=None):
+        """Bir maç için analiz oluştur (player_ratings verilmezse bu maç için hesaplanır)"""
         try:
             # Eğer zaten varsa güncelle
             try:
@@ -216,98 +311,9 @@ class Command(BaseCommand):
             except MatchAnalysis.DoesNotExist:
                 analysis = MatchAnalysis(match=match)
             
-            # Tamamlanmış maç için gerçekçi istatistikler oluştur
-            if match.score:
-                try:
-                    home_goals, away_goals = map(int, match.score.split('-'))
-                    
-                    # Gol farkına göre istatistikler oluştur
-                    goal_diff = home_goals - away_goals
-                    if goal_diff > 0:  # Ev sahibi kazanmış
-                        home_possession = random.randint(52, 65)
-                    elif goal_diff < 0:  # Deplasman kazanmış
-                        home_possession = random.randint(35, 48)
-                    else:  # Beraberlik
-                        home_possession = random.randint(45, 55)
-                    
-                    away_possession = 100 - home_possession
-                    
-                    # Şut istatistikleri, ev sahibinin daha çok topa sahip olmasıyla korele
-                    home_shots = random.randint(max(5, home_goals * 2), 15 + home_goals * 2)
-                    away_shots = random.randint(max(3, away_goals * 2), 12 + away_goals * 2)
-                    
-                    # İsabetli şutlar her zaman toplam şutlardan az olmalı ve gol sayısından fazla
-                    home_shots_on_target = random.randint(home_goals, min(home_shots, home_goals + 5))
-                    away_shots_on_target = random.randint(away_goals, min(away_shots, away_goals + 5))
-                    
-                    # Diğer istatistikler
-                    home_corners = random.randint(max(2, home_shots // 3), home_shots // 2 + 3)
-                    away_corners = random.randint(max(1, away_shots // 3), away_shots // 2 + 2)
-                    
-                    home_fouls = random.randint(5, 15)
-                    away_fouls = random.randint(5, 15)
-                    
-                    # Kart istatistikleri
-                    home_yellows = random.randint(0, min(5, home_fouls // 3 + 1))
-                    away_yellows = random.randint(0, min(5, away_fouls // 3 + 1))
-                    
-                    home_reds = 1 if random.random() < 0.05 else 0  # %5 ihtimalle kırmızı kart
-                    away_reds = 1 if random.random() < 0.05 else 0
-                    
-                    # İstatistikleri analiz nesnesine ata
-                    analysis.possession = f"{home_possession}%-{away_possession}%"
-                    analysis.shots = f"{home_shots}-{away_shots}"
-                    analysis.shots_on_target = f"{home_shots_on_target}-{away_shots_on_target}"
-                    analysis.corners = f"{home_corners}-{away_corners}"
-                    analysis.fouls = f"{home_fouls}-{away_fouls}"
-                    analysis.yellows = f"{home_yellows}-{away_yellows}"
-                    analysis.reds = f"{home_reds}-{away_reds}"
-                    
-                    # Gerçek olayları al ve anahtar anları oluştur
-                    events = Event.objects.filter(match=match).order_by('minute')
-                    key_moments = []
-                    
-                    for event in events:
-                        if event.event_type in ['GOAL', 'RED']:  # Önemli olaylar
-                            key_moments.append({
-                                'minute': event.minute,
-                                'type': event.event_type,
-                                'description': event.description,
-                                'player': event.player.name if event.player else "Bilinmiyor"
-                            })
-                    
-                    # Eğer az sayıda anahtar an varsa, rastgele birkaç tane ekle
-                    if len(key_moments) < 3:
-                        additional_moments = [
-                            {'minute': random.randint(10, 40), 'type': 'CHANCE', 
-                             'description': f"{match.home_team.name} tehlikeli bir atak geliştirdi ama değerlendiremedi.", 
-                             'player': ""},
-                            {'minute': random.randint(50, 80), 'type': 'CHANCE', 
-                             'description': f"{match.away_team.name} kaleci ile karşı karşıya kaldı ancak şansını değerlendiremedi.", 
-                             'player': ""},
-                            {'minute': random.randint(25, 65), 'type': 'TACTICAL', 
-                             'description': f"Taktiksel değişiklik yapıldı ve oyunun dengesi değişti.", 
-                             'player': ""}
-                        ]
-                        key_moments.extend(additional_moments[:3-len(key_moments)])
-                    
-                    # Anahtar anları dakika sırasına göre sırala
-                    key_moments.sort(key=lambda x: x['minute'])
-                    analysis.key_moments = key_moments
-                    
-                    # Genel maç analizini oluştur
-                    analysis.analysis_text = self.generate_analysis_text(match, home_goals, away_goals, home_possession, home_shots)
-                    
-                    # Oyuncu puanlarını oluştur
-                    analysis.player_ratings = self.generate_player_ratings(match, home_goals, away_goals)
-                    
-                    analysis.save()
-                    return analysis
-                    
-                except (ValueError, IndexError) as e:
-                    logger.error(f"Skor analizi hatası: {e}")
-                    self.stderr.write(self.style.ERROR(f"Skor analiz hatası: {e}"))
-            
+            if self.fill_analysis(analysis, match, player_ratings):
+                analysis.save()
+                return analysis
             return None
             
         except Exception as e:
@@ -315,117 +321,128 @@ class Command(BaseCommand):
             self.stderr.write(self.style.ERROR(f"Hata: {e}"))
             return None
     
-    def calculate_form(self, matches, team):
-        """Son 5 maçtan form hesapla (WWDLL gibi)"""
-        form = ""
-        for match in matches:
-            if not match.score:
-                continue
-                
-            try:
-                home_goals, away_goals = map(int, match.score.split('-'))
-                
-                if match.home_team == team:
-                    if home_goals > away_goals:
-                        form += "W"
-                    elif home_goals < away_goals:
-                        form += "L"
-                    else:
-                        form += "D"
-                else:
-                    if away_goals > home_goals:
-                        form += "W"
-                    elif away_goals < home_goals:
-                        form += "L"
-                    else:
-                        form += "D"
-            except (ValueError, IndexError):
-                pass
-                
-        if not form:
-            # Form bilgisi yoksa rastgele form oluştur
-            forms = ["W", "D", "L"]
-            weights = [0.45, 0.3, 0.25]  # Kazanmanın biraz daha olası olması için
-            form = ''.join(random.choices(forms, weights=weights, k=5))
+    def fill_analysis(self, analysis, match, player_ratings=None):
+        """Analiz alanlarını hesaplayıp doldur (kaydetmez); skor okunamazsa False döner"""
+        # Tamamlanmış maç için gerçekçi istatistikler oluştur
+        if not match.score:
+            return False
+        try:
+            home_goals, away_goals = map(int, match.score.split('-'))
+
+            # Gol farkına göre istatistikler oluştur
+            goal_diff = home_goals - away_goals
+            if goal_diff > 0:  # Ev sahibi kazanmış
+                home_possession = random.randint(52, 65)
+            elif goal_diff < 0:  # Deplasman kazanmış
+                home_possession = random.randint(35, 48)
+            else:  # Beraberlik
+                home_possession = random.randint(45, 55)
+
+            away_possession = 100 - home_possession
+
+            # Şut istatistikleri, ev sahibinin daha çok topa sahip olmasıyla korele
+            home_shots = random.randint(max(5, home_goals * 2), 15 + home_goals * 2)
+            away_shots = random.randint(max(3, away_goals * 2), 12 + away_goals * 2)
+
+            # İsabetli şutlar her zaman toplam şutlardan az olmalı ve gol sayısından fazla
+            home_shots_on_target = random.randint(home_goals, min(home_shots, home_goals + 5))
+            away_shots_on_target = random.randint(away_goals, min(away_shots, away_goals + 5))
+
+            # Diğer istatistikler
+            home_corners = random.randint(max(2, home_shots // 3), home_shots // 2 + 3)
+            away_corners = random.randint(max(1, away_shots // 3), away_shots // 2 + 2)
+
+            home_fouls = random.randint(5, 15)
+            away_fouls = random.randint(5, 15)
+
+            # Kart istatistikleri
+            home_yellows = random.randint(0, min(5, home_fouls // 3 + 1))
+            away_yellows = random.randint(0, min(5, away_fouls // 3 + 1))
+
+            home_reds = 1 if random.random() < 0.05 else 0  # %5 ihtimalle kırmızı kart
+            away_reds = 1 if random.random() < 0.05 else 0
+
+            # İstatistikleri analiz nesnesine ata
+            analysis.possession = f"{home_possession}%-{away_possession}%"
+            analysis.shots = f"{home_shots}-{away_shots}"
+            analysis.shots_on_target = f"{home_shots_on_target}-{away_shots_on_target}"
+            analysis.corners = f"{home_corners}-{away_corners}"
+            analysis.fouls = f"{home_fouls}-{away_fouls}"
+            analysis.yellows = f"{home_yellows}-{away_yellows}"
+            analysis.reds = f"{home_reds}-{away_reds}"
+
+            # Gerçek olayları al ve anahtar anları oluştur
+            events = Event.objects.filter(match=match).order_by('minute')
+            key_moments = []
+
+            for event in events:
+                if event.event_type in ['GOAL', 'RED']:  # Önemli olaylar
+                    key_moments.append({
+                        'minute': event.minute,
+                        'type': event.event_type,
+                        'description': event.description,
+                        'player': event.player.name if event.player else "Bilinmiyor"
+                    })
+
+            # Eğer az sayıda anahtar an varsa, rastgele birkaç tane ekle
+            if len(key_moments) < 3:
+                additional_moments = [
+                    {'minute': random.randint(10, 40), 'type': 'CHANCE', 
+                     'description': f"{match.home_team.name} tehlikeli bir atak geliştirdi ama değerlendiremedi.", 
+                     'player': ""},
+                    {'minute': random.randint(50, 80), 'type': 'CHANCE', 
+                     'description': f"{match.away_team.name} kaleci ile karşı karşıya kaldı ancak şansını değerlendiremedi.", 
+                     'player': ""},
+                    {'minute': random.randint(25, 65), 'type': 'TACTICAL', 
+                     'description': f"Taktiksel değişiklik yapıldı ve oyunun dengesi değişti.", 
+                     'player': ""}
+                ]
+                key_moments.extend(additional_moments[:3-len(key_moments)])
+
+            # Anahtar anları dakika sırasına göre sırala
+            key_moments.sort(key=lambda x: x['minute'])
+            analysis.key_moments = key_moments
+
+            # Genel maç analizini oluştur
+            analysis.analysis_text = self.generate_analysis_text(match, home_goals, away_goals, home_possession, home_shots)
+
+            # Oyuncu puanlarını oluştur
+            if player_ratings is None:
+                player_ratings = self.generate_player_ratings(match, home_goals, away_goals)
+            analysis.player_ratings = player_ratings
+            return True
             
-        return form
+        except (ValueError, IndexError) as e:
+            logger.error(f"Skor analizi hatası: {e}")
+            self.stderr.write(self.style.ERROR(f"Skor analiz hatası: {e}"))
+            return False
     
-    def generate_team_stats(self, team):
-        """Takım için istatistikler oluştur"""
-        # Son 5 maçtaki gol ortalaması
-        recent_matches = Match.objects.filter(
-            score__isnull=False,
-            home_team=team 
-        ).order_by('-match_date')[:5]
-        
-        goals_scored = 0
-        goals_conceded = 0
-        matches_played = 0
-        
-        for match in recent_matches:
-            try:
-                home_goals, away_goals = map(int, match.score.split('-'))
-                goals_scored += home_goals
-                goals_conceded += away_goals
-                matches_played += 1
-            except (ValueError, IndexError):
-                pass
-        
-        away_matches = Match.objects.filter(
-            score__isnull=False,
-            away_team=team
-        ).order_by('-match_date')[:5]
-        
-        for match in away_matches:
-            try:
-                home_goals, away_goals = map(int, match.score.split('-'))
-                goals_scored += away_goals
-                goals_conceded += home_goals
-                matches_played += 1
-            except (ValueError, IndexError):
-                pass
-        
-        avg_goals_scored = goals_scored / matches_played if matches_played > 0 else 1.5
-        avg_goals_conceded = goals_conceded / matches_played if matches_played > 0 else 1.0
+    def fallback_form(self):
+        """Form bilgisi yoksa rastgele form oluştur"""
+        forms = ["W", "D", "L"]
+        weights = [0.45, 0.3, 0.25]  # Kazanmanın biraz daha olası olması için
+        return ''.join(random.choices(forms, weights=weights, k=5))
+    
+    def generate_team_stats(self, team, history=None, strength=None):
+        """
+        Takım için istatistikler oluştur (son 5 iç saha ve son 5 dış saha
+        maçından); strength (Elo, beklenen gol, kazanma olasılığı) varsa eklenir
+        """
+        if history is None:
+            history = MatchHistory.for_teams([team.id])
+        stats = history.team_stats(team.id)
         
         return {
-            'avg_goals_scored': round(avg_goals_scored, 2),
-            'avg_goals_conceded': round(avg_goals_conceded, 2),
-            'clean_sheets': random.randint(0, 3),  # Rastgele temiz kağıt sayısı
-            'avg_shots_per_game': round(random.uniform(8, 16), 1),  # Rastgele maç başına şut
-            'avg_possession': f"{random.randint(45, 60)}%",  # Rastgele ortalama topa sahip olma
+            'avg_goals_scored': stats['avg_goals_scored'],
+            'avg_goals_conceded': stats['avg_goals_conceded'],
+            'clean_sheets': stats['clean_sheets'],
+            **(strength or {}),
         }
     
-    def generate_prediction(self, match, home_form, away_form, h2h_stats):
-        """Maç tahmini oluştur"""
-        predictions = [
-            f"{match.home_team.name} 2-1 {match.away_team.name}",
-            f"{match.home_team.name} 1-0 {match.away_team.name}",
-            f"{match.home_team.name} 1-1 {match.away_team.name}",
-            f"{match.home_team.name} 0-0 {match.away_team.name}",
-            f"{match.home_team.name} 2-2 {match.away_team.name}",
-            f"{match.home_team.name} 0-1 {match.away_team.name}",
-        ]
-        
-        # Home form performance'ına bağlı olarak ağırlık ver
-        home_wins = home_form.count('W')
-        away_wins = away_form.count('W')
-        
-        # Karşılıklı maç geçmişine dayalı ağırlıklar
-        h2h_home_bias = 0
-        if h2h_stats['total'] > 0:
-            h2h_home_bias = (h2h_stats['home_wins'] - h2h_stats['away_wins']) / h2h_stats['total']
-        
-        # Form ve h2h geçmişini kullanarak tahmin yap
-        if home_wins >= 3 or (h2h_home_bias > 0.3):  # Ev sahibi formda veya h2h avantajı varsa
-            weights = [0.35, 0.25, 0.15, 0.1, 0.1, 0.05]  # Ev sahibi galibiyet olasılığı yüksek
-        elif away_wins >= 3 or (h2h_home_bias < -0.3):  # Deplasman formda veya h2h avantajı varsa
-            weights = [0.1, 0.15, 0.2, 0.15, 0.1, 0.3]   # Deplasman galibiyet olasılığı yüksek
-        else:  # Dengeli
-            weights = [0.2, 0.2, 0.25, 0.15, 0.15, 0.05]  # Beraberlik olasılığı yüksek
-            
-        # Ağırlıklı rastgele seçim
-        return random.choices(predictions, weights=weights, k=1)[0]
+    def generate_prediction(self, match, forecast):
+        """Maç tahmini: derecelendirme motorunun en olası sonucundaki en olası skor"""
+        home_goals, away_goals = forecast['score']
+        return f"{match.home_team.name} {home_goals}-{away_goals} {match.away_team.name}"
     
     def generate_preview_text(self, match, home_form, away_form, h2h_stats):
         """Maç önizleme metni oluştur"""
@@ -475,8 +492,8 @@ Bu önemli mücadelede iki takım da sahada üstünlük kurmak için elinden gel
         else:
             return f"{team_name}, son maçlarında {win_count} galibiyet, {draw_count} beraberlik ve {loss_count} mağlubiyetle inişli çıkışlı bir performans sergiledi."
     
-    def generate_key_players_text(self, match):
-        """Önemli oyuncular metni oluştur"""
+    def generate_key_players_text(self, match, squads=None):
+        """Önemli oyuncular metni oluştur (squads: {takım_id: [(oyuncu_id, isim)]})"""
         # Şablon kilit oyuncu metinleri
         key_player_templates = [
             "{player} bu maçta takımının en önemli silahı olacak.",
@@ -487,27 +504,27 @@ Bu önemli mücadelede iki takım da sahada üstünlük kurmak için elinden gel
         ]
         
         # Takımlardaki oyuncuları al
-        home_players = Player.objects.filter(team=match.home_team)
-        away_players = Player.objects.filter(team=match.away_team)
+        if squads is None:
+            squads = match_ratings.squads([match.home_team_id, match.away_team_id])
+        home_players = [name for _, name in squads.get(match.home_team_id, [])]
+        away_players = [name for _, name in squads.get(match.away_team_id, [])]
         
         # Rastgele oyuncu seç
         key_players_text = "Kilit Oyuncular:\n\n"
         
         # Ev sahibi takım oyuncuları
         key_players_text += f"{match.home_team.name}:\n"
-        for _ in range(min(2, home_players.count())):
-            if home_players.exists():
-                player = random.choice(home_players)
-                template = random.choice(key_player_templates)
-                key_players_text += "- " + template.format(player=player.name) + "\n"
+        for _ in range(min(2, len(home_players))):
+            player = random.choice(home_players)
+            template = random.choice(key_player_templates)
+            key_players_text += "- " + template.format(player=player) + "\n"
                 
         # Deplasman takımı oyuncuları
         key_players_text += f"\n{match.away_team.name}:\n"
-        for _ in range(min(2, away_players.count())):
-            if away_players.exists():
-                player = random.choice(away_players)
-                template = random.choice(key_player_templates)
-                key_players_text += "- " + template.format(player=player.name) + "\n"
+        for _ in range(min(2, len(away_players))):
+            player = random.choice(away_players)
+            template = random.choice(key_player_templates)
+            key_players_text += "- " + template.format(player=player) + "\n"
                 
         return key_players_text
         
@@ -543,60 +560,5 @@ Maçın en önemli anlarından biri {random.randint(15, 75)}. dakikada yaşandı
         return analysis
         
     def generate_player_ratings(self, match, home_goals, away_goals):
-        """Oyuncu puanlamaları oluştur"""
-        player_ratings = {"home_team": {}, "away_team": {}}
-        
-        # Ev sahibi takım oyuncuları
-        home_players = Player.objects.filter(team=match.home_team)
-        for player in home_players:
-            # Eğer gol atmışsa puanı yüksek olsun
-            goal_event = Event.objects.filter(match=match, player=player, event_type='GOAL').exists()
-            assist_event = Event.objects.filter(match=match, player=player, event_type='ASSIST').exists()
-            card_event = Event.objects.filter(match=match, player=player, event_type__in=['YELLOW', 'RED']).exists()
-            
-            base_rating = 6.0 + random.uniform(0, 1)  # Temel puan 6-7 arası
-            
-            if goal_event:
-                base_rating += 1.5  # Gol atan oyuncu +1.5 puan
-            if assist_event:
-                base_rating += 1.0  # Asist yapan oyuncu +1 puan
-            if card_event:
-                base_rating -= 0.5  # Kart gören oyuncu -0.5 puan
-                
-            # Takımları kazandıysa veya berabere kaldıysa puan artışı
-            if home_goals > away_goals:
-                base_rating += 0.5
-            elif home_goals == away_goals:
-                base_rating += 0.2
-                
-            # Puanı 10'dan fazla olmasın
-            rating = min(round(base_rating, 1), 10.0)
-            
-            player_ratings["home_team"][player.name] = rating
-            
-        # Deplasman takımı oyuncuları
-        away_players = Player.objects.filter(team=match.away_team)
-        for player in away_players:
-            goal_event = Event.objects.filter(match=match, player=player, event_type='GOAL').exists()
-            assist_event = Event.objects.filter(match=match, player=player, event_type='ASSIST').exists()
-            card_event = Event.objects.filter(match=match, player=player, event_type__in=['YELLOW', 'RED']).exists()
-            
-            base_rating = 6.0 + random.uniform(0, 1)
-            
-            if goal_event:
-                base_rating += 1.5
-            if assist_event:
-                base_rating += 1.0
-            if card_event:
-                base_rating -= 0.5
-                
-            if away_goals > home_goals:
-                base_rating += 0.5
-            elif home_goals == away_goals:
-                base_rating += 0.2
-                
-            rating = min(round(base_rating, 1), 10.0)
-            
-            player_ratings["away_team"][player.name] = rating
-            
-        return player_ratings
\ No newline at end of file
+        """Oyuncu puanlamaları oluştur (bkz. scores.match_ratings)"""
+        return match_ratings.for_matches([match]).get(match.id, {"home_team": {}, "away_team": {}})
@@ -0,0 +1,62 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from scores import search
+from scores.synthetic import SCALES, DEFAULT_PASSWORD, USERNAME_PREFIX, SyntheticDataGenerator, scale_from_options
+
+
+class Command(BaseCommand):
+    help = 'Performans testleri için tekrarlanabilir (deterministik) sentetik veri üretir'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--scale',
+            choices=sorted(SCALES),
+            default='small',
+            help='Hazır ölçek (varsayılan: small, large: 50 lig, 1000 takım, 200k maç, 2M olay)',
+        )
+        parser.add_argument('--seed', type=int, default=42, help='Rastgele üretici tohumu (varsayılan: 42)')
+        parser.add_argument('--leagues', type=int, help='Lig sayısı')
+        parser.add_argument('--teams', type=int, help='Takım sayısı')
+        parser.add_argument('--players', type=int, help='Oyuncu sayısı')
+        parser.add_argument('--matches', type=int, help='Maç sayısı')
+        parser.add_argument('--events', type=int, help='Olay sayısı')
+        parser.add_argument('--profiles', type=int, help='Kullanıcı profili sayısı')
+        parser.add_argument('--favorites-per-profile', type=int, help='Profil başına favori takım sayısı')
+        parser.add_argument('--batch-size', type=int, default=5000, help='bulk_create parti boyutu')
+        parser.add_argument(
+            '--flush',
+            action='store_true',
+            help='Önce daha önce üretilmiş sentetik verileri sil',
+        )
+
+    def handle(self, *args, **options):
+        try:
+            scale = scale_from_options(options['scale'], **options)
+        except ValueError as e:
+            raise CommandError(str(e))
+        if scale.leagues < 1 or scale.teams < 2:
+            raise CommandError('En az 1 lig ve 2 takım gerekli')
+
+        if options['flush']:
+            SyntheticDataGenerator.flush()
+            self.stdout.write(self.style.WARNING('Eski sentetik veriler silindi.'))
+
+        self.stdout.write(f"Ölçek: {scale} (seed={options['seed']})")
+        generator = SyntheticDataGenerator(
+            scale,
+            seed=options['seed'],
+            batch_size=options['batch_size'],
+            stdout=self.stdout,
+        )
+        try:
+            generator.generate()
+        except Exception as e:
+            raise CommandError(f'Sentetik veri üretilemedi (önce --flush deneyin): {e}')
+        # bulk_create bypasses post_save, so the name index is rebuilt in one pass
+        counts = search.rebuild()
+        if counts:
+            self.stdout.write(f"Arama dizini: {sum(counts.values())} kayıt")
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Sentetik veri hazır. Kullanıcılar: {USERNAME_PREFIX}N / şifre: {DEFAULT_PASSWORD}"
+        ))
@@ -2,6 +2,7 @@ from django.core.management.base import BaseCommand
 from scores.models import Match, Event, Profile
 from scores.api_client import APIFootballClient
 from scores.notification_service import send_notification
+from scores import metrics
 from django.db import transaction
 from django.utils import timezone
 import datetime
@@ -40,6 +41,7 @@ class Command(BaseCommand):
         
         try:
             while True:
+                check_started = time.time()
                 self.stdout.write(f"Checking for live match events at {timezone.now().strftime('%H:%M:%S')}")
                 
                 # Get today's live matches
@@ -54,6 +56,8 @@ class Command(BaseCommand):
                     for match in live_matches:
                         self.check_and_notify_match_events(match, processed_events)
                 
+                metrics.mark_job_success('monitor_live_events', check_started)
+                
                 # Wait for next check
                 time.sleep(interval)
                 
@@ -194,6 +198,8 @@ class Command(BaseCommand):
             # Combine all relevant fans (without duplicates)
             fans = (league_fans | team_fans | player_fans).distinct()
             
+            fans = list(fans)
+            metrics.NOTIFICATION_FANOUT.observe(len(fans), kind=notify_type)
             if not fans:
                 logger.info(f"No fans to notify for this event")
                 return
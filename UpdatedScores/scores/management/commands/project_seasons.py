@@ -0,0 +1,39 @@
+import time
+from functools import partial
+
+from django.core.management.base import BaseCommand
+
+from scores import parallel, season_projection
+from scores.models import League
+
+
+class Command(BaseCommand):
+    help = ("Liglerin kalan maçlarını Monte Carlo ile simüle edip sıralama olasılıklarını (şampiyonluk, "
+            "küme düşme) hesaplar; sadece sonuçları değişen ligler yeniden simüle edilir")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--league', action='append', dest='leagues', help='Sadece bu lig (birden çok verilebilir)')
+        parser.add_argument('--simulations', type=int, default=season_projection.SIMULATIONS,
+                            help=f'Lig başına simülasyon sayısı (varsayılan: {season_projection.SIMULATIONS})')
+        parser.add_argument('--force', action='store_true', help='Sonuçları değişmemiş ligleri de yeniden simüle et')
+        parser.add_argument('--workers', type=int, default=1,
+                            help='Ligleri bu kadar süreçte paralel işle (varsayılan: 1, sıralı)')
+        parser.add_argument('--chunk-size', type=int, default=4,
+                            help='--workers ile her görevde işlenen lig sayısı (varsayılan: 4)')
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        league_ids = options['leagues'] or list(League.objects.order_by('id').values_list('id', flat=True))
+        task = partial(season_projection.project_leagues, simulations=options['simulations'],
+                       force=options['force'])
+        written = 0
+        if options['workers'] > 1:
+            chunks = parallel.chunked(league_ids, options['chunk_size'])
+            for _, projections in parallel.run(task, chunks, options['workers']):
+                written += season_projection.save(projections)
+        else:
+            written = season_projection.save(task(league_ids))
+        self.stdout.write(self.style.SUCCESS(
+            f"Sezon projeksiyonları güncellendi: {written}/{len(league_ids)} lig "
+            f"({time.perf_counter() - started:.1f} sn)"
+        ))
@@ -0,0 +1,19 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from scores import h2h
+
+
+class Command(BaseCommand):
+    help = "Karşılıklı maç tablosunu (HeadToHead) tamamlanmış maçlardan baştan oluşturur"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500, help='Tek seferde yazılan satır sayısı')
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        count = h2h.rebuild(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(
+            f"Karşılıklı maç tablosu oluşturuldu: {count} takım çifti ({time.perf_counter() - started:.1f} sn)"
+        ))
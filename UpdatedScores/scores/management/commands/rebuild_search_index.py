@@ -0,0 +1,29 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from scores import search
+
+
+class Command(BaseCommand):
+    help = "Takım, oyuncu ve lig arama dizinini (FTS5) veritabanından baştan oluşturur"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--kind',
+            nargs='+',
+            choices=search.KINDS,
+            default=list(search.KINDS),
+            help='Yeniden dizinlenecek türler (varsayılan: hepsi)',
+        )
+        parser.add_argument('--batch-size', type=int, default=5000, help='Tek seferde yazılan satır sayısı')
+
+    def handle(self, *args, **options):
+        if not search.enabled():
+            raise CommandError('Arama dizini sadece SQLite (FTS5) ile kullanılabilir')
+        started = time.perf_counter()
+        counts = search.rebuild(options['kind'], batch_size=options['batch_size'])
+        summary = ', '.join(f"{count} {kind}" for kind, count in counts.items())
+        self.stdout.write(self.style.SUCCESS(
+            f"Arama dizini oluşturuldu: {summary} ({time.perf_counter() - started:.1f} sn)"
+        ))
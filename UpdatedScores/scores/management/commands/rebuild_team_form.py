@@ -0,0 +1,20 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from scores import team_form
+
+
+class Command(BaseCommand):
+    help = "Takım form tablosunu (TeamForm) tamamlanmış maçlardan baştan oluşturur"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--team', nargs='+', help='Sadece bu takımların satırlarını yeniden oluştur')
+        parser.add_argument('--batch-size', type=int, default=500, help='Tek seferde yazılan satır sayısı')
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        count = team_form.rebuild(team_ids=options['team'], batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(
+            f"Takım formu oluşturuldu: {count} satır ({time.perf_counter() - started:.1f} sn)"
+        ))
@@ -0,0 +1,19 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from scores import team_ratings
+
+
+class Command(BaseCommand):
+    help = "Takım güç derecelerini (Elo ve Poisson hücum/savunma) tüm maç geçmişini baştan oynatarak hesaplar"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500, help='Tek seferde yazılan satır sayısı')
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        count = team_ratings.rebuild(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(
+            f"Güç dereceleri hesaplandı: {count} takım ({time.perf_counter() - started:.1f} sn)"
+        ))
@@ -0,0 +1,181 @@
+import contextlib
+import datetime
+import io
+import json
+import os
+import time
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from scores import metrics
+from scores.benchmarks import QueryCounter
+from scores.cassettes import add_listener, fixture_ids, remove_listener
+from scores.models import League, Match
+
+MANIFEST = 'manifest.json'
+MATCHES_COMMAND = 'fetch_api_football_matches'
+FIXTURE_COMMANDS = ['fetch_match_events', 'fetch_match_lineups', 'fetch_match_statistics']
+
+
+class Rollback(Exception):
+    """Raised to undo the rows written during a replay"""
+
+
+@contextlib.contextmanager
+def environ(**values):
+    saved = {key: os.environ.get(key) for key in values}
+    os.environ.update({key: str(value) for key, value in values.items()})
+    try:
+        yield
+    finally:
+        for key, value in saved.items():
+            if value is None:
+                os.environ.pop(key, None)
+            else:
+                os.environ[key] = value
+
+
+class Command(BaseCommand):
+    help = (
+        "Bir maç gününün API-FOOTBALL trafiğini cassette olarak kaydeder (--record) "
+        "veya kaydı tekrar oynatıp veri çekme komutlarının hızını ölçer"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'directory',
+            nargs='?',
+            default=os.environ.get('API_FOOTBALL_CASSETTE_DIR', 'cassettes'),
+            help='Cassette dizini (varsayılan: API_FOOTBALL_CASSETTE_DIR veya cassettes)',
+        )
+        parser.add_argument('--record', action='store_true', help='Gerçek API\'ye istek atıp kaydet')
+        parser.add_argument('--date', help='Kaydedilecek maç günü (YYYY-MM-DD, varsayılan: bugün)')
+        parser.add_argument('--season', type=int, help='Sezon (varsayılan: tarihin yılı)')
+        parser.add_argument(
+            '--commands',
+            nargs='+',
+            choices=[MATCHES_COMMAND] + FIXTURE_COMMANDS,
+            default=[MATCHES_COMMAND] + FIXTURE_COMMANDS,
+            help='Tekrar oynatılacak komutlar (varsayılan: hepsi)',
+        )
+        parser.add_argument(
+            '--timing',
+            type=float,
+            default=0.0,
+            help='Kaydedilen yanıt sürelerinin çarpanı (0: beklemeden, 1: gerçek hız)',
+        )
+        parser.add_argument('--keep', action='store_true', help='Tekrar oynatmada yazılan verileri geri alma')
+        parser.add_argument('--json', dest='json_path', help='Sonuçları bu dosyaya JSON olarak yaz')
+
+    def handle(self, *args, **options):
+        if options['record']:
+            self.record(options)
+        else:
+            self.replay(options)
+
+    def record(self, options):
+        try:
+            date = datetime.datetime.strptime(options['date'], '%Y-%m-%d').date() if options['date'] \
+                else datetime.date.today()
+        except ValueError:
+            raise CommandError(f"Geçersiz tarih: {options['date']}. YYYY-MM-DD formatında olmalı.")
+        season = options['season'] or date.year
+        directory = options['directory']
+
+        with environ(API_FOOTBALL_CASSETTE_MODE='record', API_FOOTBALL_CASSETTE_DIR=directory):
+            call_command(MATCHES_COMMAND, date=date.isoformat(), season=season, no_delete=True, stdout=self.stdout)
+            fixtures = sorted(Match.objects.filter(match_date__date=date).values_list('id', flat=True))
+            for idx, fixture in enumerate(fixtures, 1):
+                self.stdout.write(f"[{idx}/{len(fixtures)}] {fixture}")
+                for name in FIXTURE_COMMANDS:
+                    call_command(name, match_id=fixture, stdout=self.stdout)
+
+        manifest = {
+            'date': date.isoformat(),
+            'season': season,
+            'recorded_at': time.time(),
+            'leagues': list(League.objects.order_by('id').values('id', 'name', 'country')),
+            'fixtures': fixtures,
+        }
+        with open(os.path.join(directory, MANIFEST), 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, ensure_ascii=False, indent=2)
+        self.stdout.write(self.style.SUCCESS(f"{len(fixtures)} maç {directory} dizinine kaydedildi"))
+
+    def replay(self, options):
+        directory = options['directory']
+        try:
+            with open(os.path.join(directory, MANIFEST), encoding='utf-8') as f:
+                manifest = json.load(f)
+        except (OSError, ValueError) as e:
+            raise CommandError(f"Cassette dizini okunamadı ({e}); önce --record ile kaydedin")
+
+        results = []
+        try:
+            with transaction.atomic(), environ(
+                API_FOOTBALL_CASSETTE_MODE='replay',
+                API_FOOTBALL_CASSETTE_DIR=directory,
+                API_FOOTBALL_CASSETTE_TIMING=options['timing'],
+            ):
+                for league in manifest['leagues']:
+                    League.objects.get_or_create(id=league['id'], defaults=league)
+                for name in options['commands']:
+                    if name == MATCHES_COMMAND:
+                        calls = [dict(date=manifest['date'], season=manifest['season'], no_delete=True)]
+                    else:
+                        calls = [dict(match_id=fixture) for fixture in manifest['fixtures']]
+                    results.append(self.measure(name, calls))
+                if not options['keep']:
+                    raise Rollback
+        except Rollback:
+            pass
+
+        self.report(results)
+        if options['json_path']:
+            with open(options['json_path'], 'w', encoding='utf-8') as f:
+                json.dump({'manifest': manifest['date'], 'timing': options['timing'], 'results': results}, f, indent=2)
+
+    def measure(self, name, calls):
+        """Run one command over all its calls and collect throughput figures"""
+        interactions = []
+        fixtures = set()
+
+        def listener(interaction):
+            interactions.append(interaction)
+            fixtures.update(fixture_ids(interaction))
+
+        counter = QueryCounter()
+        rows_before = metrics.INGESTION_ROWS.total(command=name)
+        add_listener(listener)
+        started = time.perf_counter()
+        try:
+            with connection.execute_wrapper(counter):
+                for kwargs in calls:
+                    call_command(name, stdout=io.StringIO(), **kwargs)
+        finally:
+            elapsed = time.perf_counter() - started
+            remove_listener(listener)
+
+        rows = metrics.INGESTION_ROWS.total(command=name) - rows_before
+        return {
+            'command': name,
+            'seconds': round(elapsed, 4),
+            'requests': len(interactions),
+            'fixtures': len(fixtures),
+            'rows': int(rows),
+            'rows_per_second': round(rows / elapsed, 1) if elapsed else 0.0,
+            'queries': counter.count,
+            'queries_per_fixture': round(counter.count / len(fixtures), 1) if fixtures else None,
+        }
+
+    def report(self, results):
+        header = f"{'Komut':<28} {'Süre (s)':>9} {'İstek':>6} {'Maç':>5} {'Satır':>7} {'Satır/s':>9} {'Sorgu':>7} {'Sorgu/maç':>10}"
+        self.stdout.write(header)
+        self.stdout.write('-' * len(header))
+        for r in results:
+            per_fixture = '-' if r['queries_per_fixture'] is None else f"{r['queries_per_fixture']:.1f}"
+            self.stdout.write(
+                f"{r['command']:<28} {r['seconds']:>9.3f} {r['requests']:>6} {r['fixtures']:>5} "
+                f"{r['rows']:>7} {r['rows_per_second']:>9.1f} {r['queries']:>7} {per_fixture:>10}"
+            )
@@ -0,0 +1,147 @@
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+
+from scores import benchmarks
+
+
+class Command(BaseCommand):
+    help = 'Sık kullanılan görünümleri, API uçlarını ve veri çekme komutlarını ölçer; JSON baz çizgisiyle karşılaştırır'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--group',
+            action='append',
+            choices=benchmarks.GROUPS,
+            help='Çalıştırılacak grup (tekrarlanabilir, varsayılan: views ve api)',
+        )
+        parser.add_argument(
+            '--only',
+            action='append',
+            help='Sadece belirtilen benchmark (tekrarlanabilir)',
+        )
+        parser.add_argument('--repeat', type=int, default=5, help='Ölçülen tekrar sayısı (varsayılan: 5)')
+        parser.add_argument('--warmup', type=int, default=1, help='Ölçülmeyen ısınma turu sayısı (varsayılan: 1)')
+        parser.add_argument(
+            '--warm-cache',
+            action='store_true',
+            help='Turlar arasında önbelleği temizleme',
+        )
+        parser.add_argument('--save', help='Sonuçları bu JSON dosyasına baz çizgisi olarak kaydet')
+        parser.add_argument('--compare', help='Sonuçları bu JSON baz çizgisiyle karşılaştır')
+        parser.add_argument(
+            '--threshold',
+            type=float,
+            default=0.25,
+            help='Süre için izin verilen artış oranı (varsayılan: 0.25 = %%25)',
+        )
+        parser.add_argument(
+            '--fail-on-regression',
+            action='store_true',
+            help='Gerileme bulunursa hata koduyla çık',
+        )
+        parser.add_argument('--list', action='store_true', help='Benchmarkları listele ve çık')
+        parser.add_argument(
+            '--serializers',
+            action='store_true',
+            help='REST API serileştirme yollarını (ModelSerializer ve values()) satır/saniye olarak karşılaştır ve çık',
+        )
+        parser.add_argument('--rows', type=int, default=1000, help='--serializers için satır sayısı (varsayılan: 1000)')
+        parser.add_argument(
+            '--search',
+            action='store_true',
+            help='Arama dizininin yazarken tamamlama gecikmesini (p50/p95) ölç ve çık',
+        )
+        parser.add_argument(
+            '--ratings',
+            action='store_true',
+            help='Oyuncu puanlarını eski (oyuncu başına sorgu) ve toplu yolla hesaplayıp maç başına sorgu/süreyi karşılaştır ve çık',
+        )
+        parser.add_argument('--matches', type=int, default=100, help='--ratings için maç sayısı (varsayılan: 100)')
+
+    def handle(self, *args, **options):
+        if options['list']:
+            for benchmark in benchmarks.BENCHMARKS:
+                self.stdout.write(f"{benchmark.group:10} {benchmark.name:28} {benchmark.description}")
+            return
+        if options['serializers']:
+            self._serializers(options)
+            return
+        if options['search']:
+            self._search()
+            return
+        if options['ratings']:
+            self._ratings(options)
+            return
+
+        try:
+            selected = benchmarks.select_benchmarks(options['group'], options['only'])
+            baseline = benchmarks.load_baseline(options['compare']) if options['compare'] else None
+        except (ValueError, OSError) as e:
+            raise CommandError(str(e))
+
+        self.stdout.write(f"Veri seti: {benchmarks.dataset_summary()}")
+        self.stdout.write(f"{'benchmark':28} {'median ms':>10} {'min ms':>10} {'max ms':>10} {'queries':>8}")
+        results = benchmarks.run_benchmarks(
+            selected,
+            repeat=options['repeat'],
+            warmup=options['warmup'],
+            cold=not options['warm_cache'],
+            progress=self._print_result,
+        )
+
+        if options['save']:
+            directory = os.path.dirname(options['save'])
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            benchmarks.save_baseline(options['save'], results)
+            self.stdout.write(self.style.SUCCESS(f"Baz çizgisi kaydedildi: {options['save']}"))
+
+        if baseline is None:
+            return
+        regressions = benchmarks.compare(results, baseline, time_threshold=options['threshold'])
+        if not regressions:
+            self.stdout.write(self.style.SUCCESS('Baz çizgisine göre gerileme yok.'))
+            return
+        for regression in regressions:
+            self.stdout.write(self.style.ERROR(f"GERİLEME {regression}"))
+        if options['fail_on_regression']:
+            raise CommandError(f"{len(regressions)} gerileme bulundu")
+
+    def _print_result(self, result):
+        if result.status != 'ok':
+            style = self.style.WARNING if result.status == 'skipped' else self.style.ERROR
+            self.stdout.write(style(f"{result.name:28} {result.status}: {result.detail}"))
+            return
+        self.stdout.write(
+            f"{result.name:28} {result.median_ms:10.1f} {result.min_ms:10.1f} {result.max_ms:10.1f} {result.queries:8d}"
+        )
+
+    def _serializers(self, options):
+        self.stdout.write(f"{'serializer':12} {'rows':>6} {'model rows/s':>14} {'values rows/s':>14} {'speedup':>8}")
+        for r in benchmarks.serializer_throughput(rows=options['rows'], repeat=options['repeat']):
+            speedup = f"{r['speedup']:.1f}x" if r['speedup'] else '-'
+            self.stdout.write(
+                f"{r['name']:12} {r['rows']:>6} {r['model_rows_per_sec']:>14} {r['values_rows_per_sec']:>14} {speedup:>8}"
+            )
+
+    def _search(self):
+        result = benchmarks.search_latency()
+        if result is None:
+            raise CommandError('Veritabanında aranacak isim yok; önce generate_synthetic_data çalıştırın')
+        self.stdout.write(
+            f"{result['queries']} sorgu ({result['backend']}, {result['players']} oyuncu): "
+            f"p50 {result['p50_ms']:.2f} ms, p95 {result['p95_ms']:.2f} ms, max {result['max_ms']:.2f} ms, "
+            f"isabet oranı {result['hit_rate']:.0%}"
+        )
+
+    def _ratings(self, options):
+        result = benchmarks.rating_throughput(matches=options['matches'], repeat=options['repeat'])
+        if result is None:
+            raise CommandError('Veritabanında skoru olan maç yok; önce generate_synthetic_data çalıştırın')
+        self.stdout.write(f"{result['matches']} maç, {result['players']} oyuncu")
+        self.stdout.write(
+            f"önce:  {result['before_queries_per_match']:.1f} sorgu/maç, {result['before_ms_per_match']:.2f} ms/maç")
+        self.stdout.write(
+            f"sonra: {result['after_queries_per_match']:.2f} sorgu/maç, {result['after_ms_per_match']:.2f} ms/maç "
+            f"({result['speedup']}x)")
@@ -0,0 +1,84 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from scores.fake_api import Catalog, FakeAPIFootball, FakeAPIFootballServer, RateLimiter, RecordedResponses
+
+
+class Command(BaseCommand):
+    help = "Yerel sahte API-FOOTBALL sunucusu başlatır (kota harcamadan veri çekme ve canlı takip testleri için)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--host', default='127.0.0.1', help='Dinlenecek adres (varsayılan: 127.0.0.1)')
+        parser.add_argument('--port', type=int, default=8099, help='Dinlenecek port (varsayılan: 8099)')
+        parser.add_argument(
+            '--source',
+            choices=['generated', 'database'],
+            default='generated',
+            help='Veri kaynağı: üretilmiş dünya veya yerel veritabanı (varsayılan: generated)',
+        )
+        parser.add_argument('--seed', type=int, default=42, help='Rastgele üretici tohumu')
+        parser.add_argument('--leagues', type=int, default=8, help='Üretilecek lig sayısı (generated)')
+        parser.add_argument('--teams-per-league', type=int, default=20, help='Lig başına takım sayısı (generated)')
+        parser.add_argument('--season', type=int, help='Sezon (varsayılan: bu yıl)')
+        parser.add_argument('--recorded', help='APIFootballClient kayıt moduyla oluşturulmuş cassette dizini (üretilmiş veriye göre önceliklidir)')
+        parser.add_argument('--latency-ms', type=float, default=0, help='Ortalama yanıt gecikmesi (ms)')
+        parser.add_argument('--jitter-ms', type=float, default=0, help='Gecikmenin standart sapması (ms)')
+        parser.add_argument('--error-rate', type=float, default=0.0, help='Rastgele 5xx yanıt oranı (0-1)')
+        parser.add_argument('--throttle-rate', type=float, default=0.0, help='Rastgele 429 yanıt oranı (0-1)')
+        parser.add_argument('--daily-limit', type=int, default=7500, help='Günlük istek kotası (0: sınırsız)')
+        parser.add_argument('--per-minute-limit', type=int, default=300, help='Dakikalık istek sınırı (0: sınırsız)')
+        parser.add_argument('--api-key', help='Sadece bu x-apisports-key değerini kabul et')
+        parser.add_argument('--live', type=int, default=0, help='Sunucu açılışında başlayacak canlı maç sayısı')
+        parser.add_argument(
+            '--live-speed',
+            type=float,
+            default=90.0,
+            help='Canlı maç saatinin hızı (90: saniyede bir maç dakikası)',
+        )
+
+    def handle(self, *args, **options):
+        for name in ('error_rate', 'throttle_rate'):
+            if not 0 <= options[name] <= 1:
+                raise CommandError(f"--{name.replace('_', '-')} 0 ile 1 arasında olmalı")
+
+        if options['source'] == 'database':
+            catalog = Catalog.from_database()
+        else:
+            catalog = Catalog.generate(
+                seed=options['seed'],
+                leagues=options['leagues'],
+                teams_per_league=options['teams_per_league'],
+                season=options['season'],
+            )
+        try:
+            recorded = RecordedResponses(options['recorded']) if options['recorded'] else None
+        except (OSError, ValueError, KeyError) as e:
+            raise CommandError(f"Kayıtlı yanıtlar okunamadı: {e}")
+
+        api = FakeAPIFootball(
+            catalog,
+            seed=options['seed'],
+            recorded=recorded,
+            latency_ms=options['latency_ms'],
+            jitter_ms=options['jitter_ms'],
+            error_rate=options['error_rate'],
+            throttle_rate=options['throttle_rate'],
+            rate_limiter=RateLimiter(options['daily_limit'], options['per_minute_limit']),
+            api_key=options['api_key'],
+            live=options['live'],
+            live_speed=options['live_speed'],
+        )
+        server = FakeAPIFootballServer(api, host=options['host'], port=options['port'])
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Sahte API-FOOTBALL {server.base_url} adresinde: {len(catalog.leagues)} lig, "
+            f"{len(catalog.teams)} takım, {len(catalog.fixtures)} maç"
+        ))
+        if api.live_ids:
+            self.stdout.write(f"Canlı maçlar: {', '.join(str(i) for i in sorted(api.live_ids))}")
+        self.stdout.write(f"Kullanım: API_FOOTBALL_BASE_URL={server.base_url} python manage.py fetch_match_events")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            self.stdout.write(self.style.WARNING("Sunucu durduruldu"))
+        finally:
+            server.httpd.server_close()
@@ -0,0 +1,115 @@
+import functools
+import json
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+
+from scores import loadtest
+
+
+class Command(BaseCommand):
+    help = 'Web katmanına maç günü trafik profilleriyle yük bindirir; rota başına istek/saniye ve gecikme yüzdeliklerini raporlar'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', help='Çalışan sunucunun adresi (verilmezse istekler süreç içinde işlenir)')
+        parser.add_argument(
+            '--profile',
+            choices=sorted(loadtest.PROFILES),
+            default='matchday',
+            help='Trafik profili (varsayılan: matchday)',
+        )
+        parser.add_argument('--users', type=int, default=10, help='Eşzamanlı sanal kullanıcı sayısı (varsayılan: 10)')
+        parser.add_argument('--duration', type=float, default=30.0, help='Test süresi, saniye (varsayılan: 30)')
+        parser.add_argument('--requests', type=int, help='Toplam istek sınırı (süreden önce dolarsa durur)')
+        parser.add_argument(
+            '--think-time',
+            type=float,
+            default=0.0,
+            help='İstekler arası ortalama bekleme, saniye (0: beklemeden)',
+        )
+        parser.add_argument('--seed', type=int, default=42, help='Rota seçimi için rastgele üretici tohumu')
+        parser.add_argument(
+            '--ingest',
+            action='store_true',
+            help='Test boyunca sahte API-FOOTBALL sunucusundan veri çekme komutlarını arka planda çalıştır',
+        )
+        parser.add_argument(
+            '--ingest-interval',
+            type=float,
+            default=5.0,
+            help='Veri çekme turları arasındaki bekleme, saniye (varsayılan: 5)',
+        )
+        parser.add_argument('--json', dest='json_path', help='Sonuçları bu dosyaya JSON olarak yaz')
+
+    def handle(self, *args, **options):
+        if options['users'] < 1:
+            raise CommandError('--users en az 1 olmalı')
+        if not options['duration'] and not options['requests']:
+            raise CommandError('--duration veya --requests belirtilmeli')
+
+        pool = loadtest.Pool.from_database()
+        if not pool.match_ids:
+            raise CommandError('Veritabanında maç yok; önce generate_synthetic_data çalıştırın')
+        if options['url']:
+            target_factory = functools.partial(loadtest.HTTPTarget, options['url'])
+        else:
+            target_factory = loadtest.ClientTarget
+
+        ingestion = loadtest.IngestionLoop(interval=options['ingest_interval']) if options['ingest'] else None
+        test = loadtest.LoadTest(
+            loadtest.PROFILES[options['profile']],
+            target_factory,
+            pool,
+            users=options['users'],
+            duration=options['duration'],
+            requests=options['requests'],
+            think_time=options['think_time'],
+            seed=options['seed'],
+            ingestion=ingestion,
+        )
+        self.stdout.write(
+            f"Profil: {options['profile']}, {options['users']} kullanıcı, hedef: {options['url'] or 'süreç içi'}; "
+            f"{len(pool.live_match_ids)} canlı maç, {len(pool.usernames)} favorili kullanıcı"
+        )
+        if not pool.usernames:
+            self.stdout.write(self.style.WARNING('Favorili kullanıcı yok; oturum gerektiren rotalar atlanacak'))
+        summary = test.run()
+        summary['profile'] = options['profile']
+        summary['users'] = options['users']
+        if ingestion:
+            summary['ingestion'] = {'runs': ingestion.runs, 'errors': ingestion.errors}
+
+        self._print_summary(summary)
+        if options['json_path']:
+            directory = os.path.dirname(options['json_path'])
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(options['json_path'], 'w', encoding='utf-8') as f:
+                json.dump(summary, f, indent=2, ensure_ascii=False)
+            self.stdout.write(self.style.SUCCESS(f"Sonuçlar kaydedildi: {options['json_path']}"))
+
+    def _print_summary(self, summary):
+        header = (
+            f"{'rota':22} {'istek':>7} {'hata':>5} {'istek/s':>8} {'p50 ms':>8} {'p90 ms':>8} "
+            f"{'p95 ms':>8} {'p99 ms':>8} {'max ms':>8} {'p95 (yazma)':>12}"
+        )
+        self.stdout.write(header)
+        self.stdout.write('-' * len(header))
+        rows = list(summary['routes'].items()) + [('TOPLAM', summary['total'])]
+        for name, stats in rows:
+            def fmt(key, width=8):
+                value = stats.get(key)
+                return f"{value:>{width}.1f}" if value is not None else f"{'-':>{width}}"
+            line = (
+                f"{name:22} {stats['requests']:>7} {stats['errors']:>5} {stats['rps']:>8.1f} "
+                f"{fmt('p50_ms')} {fmt('p90_ms')} {fmt('p95_ms')} {fmt('p99_ms')} {fmt('max_ms')} "
+                f"{fmt('p95_ms_ingesting', 12)}"
+            )
+            style = self.style.ERROR if stats['errors'] else (lambda text: text)
+            self.stdout.write(style(line))
+            if stats.get('sample_error'):
+                self.stdout.write(self.style.WARNING(f"    {stats['sample_error']}"))
+        if 'ingestion' in summary:
+            self.stdout.write(
+                f"Arka plan veri çekme: {summary['ingestion']['runs']} komut, {summary['ingestion']['errors']} hata"
+            )
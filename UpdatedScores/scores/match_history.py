@@ -0,0 +1,156 @@
+"""
+Preloaded match history for batch preview generation.
+
+A preview needs each side's recent form, the head-to-head record and team
+scoring averages. Asked per match that is about ten queries; for a weekend of
+fixtures it is thousands. ``MatchHistory.for_matches`` loads every finished
+match of every team involved in the batch with one query into compact NumPy
+arrays (team codes, timestamps, goals) sorted by date, with a per-team row
+index. Form strings, head-to-head summaries and team stats are then answered
+in memory with binary searches over those arrays.
+"""
+from datetime import timedelta
+
+import numpy as np
+from django.db.models import Q
+
+from .match_ratings import parse_score
+from .models import Match
+
+# How far back the history of a batch reaches
+HISTORY_DAYS = 730
+RECENT = 5
+
+
+class MatchHistory:
+    def __init__(self, rows):
+        """``rows``: (id, home_team_id, away_team_id, match_date, score, home name, away name)"""
+        parsed = []
+        self.names = {}
+        for match_id, home_id, away_id, match_date, score, home_name, away_name in rows:
+            goals = parse_score(score)
+            if goals is None:
+                continue
+            parsed.append((match_date, match_id, home_id, away_id, score, goals))
+            self.names[home_id], self.names[away_id] = home_name, away_name
+        parsed.sort(key=lambda row: (row[0], row[1]))
+
+        self.team_ids = list(self.names)
+        self.codes = {team_id: code for code, team_id in enumerate(self.team_ids)}
+        self.ids = [row[1] for row in parsed]
+        self.dates = [row[0] for row in parsed]
+        self.scores = [row[4] for row in parsed]
+        self.when = np.array([row[0].timestamp() for row in parsed], dtype=np.float64)
+        self.home = np.array([self.codes[row[2]] for row in parsed], dtype=np.int32)
+        self.away = np.array([self.codes[row[3]] for row in parsed], dtype=np.int32)
+        self.home_goals = np.array([row[5][0] for row in parsed], dtype=np.int16)
+        self.away_goals = np.array([row[5][1] for row in parsed], dtype=np.int16)
+
+        # Rows of each team in date order: sort (team, row) pairs once and split
+        rows_index = np.arange(len(parsed), dtype=np.int64)
+        team_codes = np.concatenate([self.home, self.away])
+        team_rows = np.concatenate([rows_index, rows_index])
+        order = np.lexsort((team_rows, team_codes))
+        boundaries = np.searchsorted(team_codes[order], np.arange(len(self.codes) + 1))
+        sorted_rows = team_rows[order]
+        self._rows = [sorted_rows[boundaries[code]:boundaries[code + 1]] for code in range(len(self.codes))]
+
+    @classmethod
+    def for_teams(cls, team_ids, before=None, since=None):
+        """Finished matches of ``team_ids`` in [since, before) (one query)"""
+        queryset = Match.objects.filter(
+            Q(home_team_id__in=team_ids) | Q(away_team_id__in=team_ids), score__isnull=False)
+        if before is not None:
+            queryset = queryset.filter(match_date__lt=before)
+        if since is not None:
+            queryset = queryset.filter(match_date__gte=since)
+        return cls(queryset.values_list(
+            'id', 'home_team_id', 'away_team_id', 'match_date', 'score', 'home_team__name', 'away_team__name'))
+
+    @classmethod
+    def for_matches(cls, matches, days=HISTORY_DAYS):
+        """History of every team playing in ``matches``, up to the last kick-off (one query)"""
+        matches = list(matches)
+        if not matches:
+            return cls([])
+        dates = [match.match_date for match in matches]
+        return cls.for_teams(
+            {team_id for match in matches for team_id in (match.home_team_id, match.away_team_id)},
+            before=max(dates), since=min(dates) - timedelta(days=days))
+
+    def __len__(self):
+        return len(self.ids)
+
+    def _team_rows(self, team_id, before=None, venue=None):
+        """Row indexes of a team's matches before ``before``, oldest first"""
+        code = self.codes.get(team_id)
+        if code is None:
+            return np.empty(0, dtype=np.int64), None
+        rows = self._rows[code]
+        if before is not None:
+            rows = rows[:np.searchsorted(self.when[rows], before.timestamp(), side='left')]
+        if venue == 'home':
+            rows = rows[self.home[rows] == code]
+        elif venue == 'away':
+            rows = rows[self.away[rows] == code]
+        return rows, code
+
+    def _goals(self, rows, code):
+        """(goals for, goals against) arrays from the point of view of team ``code``"""
+        at_home = self.home[rows] == code
+        goals_for = np.where(at_home, self.home_goals[rows], self.away_goals[rows])
+        goals_against = np.where(at_home, self.away_goals[rows], self.home_goals[rows])
+        return goals_for, goals_against
+
+    def form(self, team_id, before=None, n=RECENT, venue=None):
+        """'WDLWW', most recent first; '' without history"""
+        rows, code = self._team_rows(team_id, before, venue)
+        rows = rows[-n:][::-1]
+        if not len(rows):
+            return ''
+        goals_for, goals_against = self._goals(rows, code)
+        return ''.join(np.where(goals_for > goals_against, 'W', np.where(goals_for < goals_against, 'L', 'D')))
+
+    def head_to_head(self, home_id, away_id, before=None, n=RECENT):
+        """Last ``n`` meetings, counted from ``home_id``'s side, in the MatchPreview.head_to_head shape"""
+        summary = {'total': 0, 'home_wins': 0, 'draws': 0, 'away_wins': 0, 'matches': []}
+        rows, code = self._team_rows(home_id, before)
+        opponent = self.codes.get(away_id)
+        if opponent is None or not len(rows):
+            return summary
+        rows = rows[(self.home[rows] == opponent) | (self.away[rows] == opponent)][-n:][::-1]
+        goals_for, goals_against = self._goals(rows, code)
+        summary['total'] = len(rows)
+        for row, scored, conceded in zip(rows.tolist(), goals_for.tolist(), goals_against.tolist()):
+            if scored > conceded:
+                summary['home_wins'] += 1
+                result = 'HOME_WIN'
+            elif scored < conceded:
+                summary['away_wins'] += 1
+                result = 'AWAY_WIN'
+            else:
+                summary['draws'] += 1
+                result = 'DRAW'
+            summary['matches'].append({
+                'date': self.dates[row].strftime('%Y-%m-%d'),
+                'home_team': self.names[self.team_ids[self.home[row]]],
+                'away_team': self.names[self.team_ids[self.away[row]]],
+                'score': self.scores[row],
+                'result': result,
+            })
+        return summary
+
+    def team_stats(self, team_id, before=None, n=RECENT):
+        """Scoring averages over the last ``n`` home and last ``n`` away matches"""
+        home_rows, code = self._team_rows(team_id, before, 'home')
+        away_rows, _ = self._team_rows(team_id, before, 'away')
+        rows = np.concatenate([home_rows[-n:], away_rows[-n:]])
+        if not len(rows):
+            return {'matches': 0, 'avg_goals_scored': 1.5, 'avg_goals_conceded': 1.0, 'clean_sheets': 0}
+        goals_for, goals_against = self._goals(rows, code)
+        return {
+            'matches': len(rows),
+            'avg_goals_scored': round(float(goals_for.mean()), 2),
+            'avg_goals_conceded': round(float(goals_against.mean()), 2),
+            'clean_sheets': int((goals_against == 0).sum()),
+        }
@@ -0,0 +1,91 @@
+"""
+What follows a saved match.
+
+A match whose score, status or kick-off changed is pushed to the live stream
+and the change log; a result that became final, or a final result that was
+corrected or withdrawn, also updates the team form, head-to-head and rating
+read models. The ``Match`` post_save receiver (signals.py) runs this for
+single saves through ``match_saved``. Bulk writers skip the signal
+(``bulk_create`` upserts in fetch_api_football_matches), so they feed a
+``MatchUpdates`` with the (match, previous snapshot) pairs they wrote instead;
+a step added here reaches both paths. Teams created in bulk are passed along
+as well and go into the name search index at once rather than at the nightly
+rebuild.
+
+``add`` publishes and logs straight away. Results are only queued and
+written to the read models by ``apply``, so a bulk run rebuilds each team
+and pair once at the end and applies rating steps in kick-off order.
+"""
+import logging
+
+from . import changelog, h2h, search, team_form, team_ratings
+from .team_form import final_goals
+
+logger = logging.getLogger(__name__)
+
+
+class MatchUpdates:
+    """Follow-up work of a set of saved matches"""
+
+    def __init__(self):
+        self.results = []
+
+    def add(self, changes, new_teams=()):
+        """
+        Publish and log ``changes``, (match, previous snapshot or None for a
+        new match) pairs, queue the ones that touch a result, and index
+        ``new_teams``.
+        """
+        changes = [(match, previous) for match, previous in changes if previous != match.snapshot()]
+        if changes:
+            from .live_stream import publish_match
+            for match, previous in changes:
+                try:
+                    publish_match(match, previous)
+                except Exception as e:
+                    logger.error(f"Failed to publish live match update: {str(e)}")
+            try:
+                changelog.record('match', [match.pk for match, _ in changes])
+            except Exception as e:
+                logger.error(f"Failed to record match change: {str(e)}")
+        for match, previous in changes:
+            was_final = previous is not None and final_goals(previous[0], previous[1]) is not None
+            if final_goals(match.score, match.status) is not None or was_final:
+                self.results.append((match, previous))
+        for team in new_teams:
+            try:
+                search.index(team)
+            except Exception as e:
+                logger.error(f"Failed to update search index: {str(e)}")
+
+    def apply(self):
+        """Write the queued results to the read models; a failure in one does not stop the others"""
+        results = sorted(self.results, key=lambda item: item[0].match_date)
+        self.results = []
+        if not results:
+            return
+        incremental = (team_form, h2h, team_ratings)
+        if len(results) > 1:
+            # Many results: recompute each team and pair once instead of one update per match
+            for read_model, keys in ((team_form, {team for match, _ in results
+                                                  for team in (match.home_team_id, match.away_team_id)}),
+                                     (h2h, {(match.home_team_id, match.away_team_id) for match, _ in results})):
+                try:
+                    read_model.rebuild(keys)
+                except Exception as e:
+                    logger.error(f"Failed to update {read_model.__name__}: {str(e)}")
+            # Rating steps depend on order; corrections are picked up by the nightly recompute
+            incremental = (team_ratings,)
+        for read_model in incremental:
+            try:
+                for match, previous in results:
+                    read_model.record_result(match, previous)
+            except Exception as e:
+                logger.error(f"Failed to update {read_model.__name__}: {str(e)}")
+
+
+def match_saved(match, previous):
+    """Run every follow-up of one saved match (the post_save path)"""
+    updates = MatchUpdates()
+    updates.add([(match, previous)])
+    updates.apply()
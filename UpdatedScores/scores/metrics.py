@@ -0,0 +1,544 @@
+"""
+Prometheus-compatible metrics for the web and scheduler processes.
+
+Metrics live in process memory and are rendered in the Prometheus text
+exposition format by ``metrics_view``. In multi-process deployments every
+process periodically publishes a snapshot of its samples to a shared store
+(``METRICS_MODE=directory`` or ``METRICS_MODE=cache``) and the exporter merges
+all snapshots at scrape time, so any web worker can answer ``/metrics`` for
+the whole deployment (including a separate ``run_scheduler`` process).
+"""
+import atexit
+import json
+import logging
+import math
+import os
+import socket
+import threading
+import time
+import uuid
+
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseForbidden
+from django.views.decorators.http import require_GET
+
+logger = logging.getLogger(__name__)
+
+METRIC_PREFIX = 'updatedscores_'
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+DEFAULT_LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+DEFAULT_COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200, 500, 1000)
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+class Metric:
+    """Base class for a metric family with a fixed set of label names"""
+    metric_type = None
+
+    def __init__(self, registry, name, documentation, labelnames=()):
+        self.registry = registry
+        self.name = METRIC_PREFIX + name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+
+    def _key(self, labels):
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def snapshot(self):
+        return {
+            'type': self.metric_type,
+            'help': self.documentation,
+            'labelnames': list(self.labelnames),
+            'samples': [[list(key), value] for key, value in self._values.items()],
+        }
+
+
+class Counter(Metric):
+    """Monotonically increasing counter"""
+    metric_type = 'counter'
+
+    def inc(self, amount=1, **labels):
+        if amount < 0:
+            raise ValueError("Counters can only be incremented")
+        key = self._key(labels)
+        with self.registry.lock:
+            self._values[key] = self._values.get(key, 0) + amount
+        self.registry.maybe_publish()
+
+    def total(self, **labels):
+        """Sum of this process' samples matching the given subset of labels"""
+        positions = [(self.labelnames.index(name), str(value)) for name, value in labels.items()]
+        with self.registry.lock:
+            return sum(
+                value for key, value in self._values.items()
+                if all(key[i] == wanted for i, wanted in positions)
+            )
+
+
+class Gauge(Metric):
+    """
+    Value that can go up and down.
+
+    ``aggregate`` decides how values from several processes are combined:
+    ``sum``, ``max`` or ``min``. ``keep_when_stale`` gauges (timestamps) are
+    still merged from snapshots past the stale cut-off, so the lag derived
+    from them keeps growing when their process stops publishing.
+    """
+    metric_type = 'gauge'
+
+    def __init__(self, registry, name, documentation, labelnames=(), aggregate='sum', keep_when_stale=False):
+        super().__init__(registry, name, documentation, labelnames)
+        self.aggregate = aggregate
+        self.keep_when_stale = keep_when_stale
+
+    def set(self, value, **labels):
+        key = self._key(labels)
+        with self.registry.lock:
+            self._values[key] = value
+        self.registry.maybe_publish()
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self.registry.lock:
+            self._values[key] = self._values.get(key, 0) + amount
+        self.registry.maybe_publish()
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+    def snapshot(self):
+        data = super().snapshot()
+        data['aggregate'] = self.aggregate
+        data['keep_when_stale'] = self.keep_when_stale
+        return data
+
+
+class Histogram(Metric):
+    """Distribution of observed values in cumulative buckets"""
+    metric_type = 'histogram'
+
+    def __init__(self, registry, name, documentation, labelnames=(), buckets=DEFAULT_LATENCY_BUCKETS):
+        super().__init__(registry, name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self.registry.lock:
+            # [count per bucket..., +Inf count, sum]
+            state = self._values.get(key)
+            if state is None:
+                state = [0] * (len(self.buckets) + 1) + [0.0]
+                self._values[key] = state
+            for idx, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state[idx] += 1
+            state[len(self.buckets)] += 1
+            state[-1] += value
+        self.registry.maybe_publish()
+
+    def snapshot(self):
+        data = super().snapshot()
+        data['buckets'] = list(self.buckets)
+        data['samples'] = [[key, list(value)] for key, value in data['samples']]
+        return data
+
+
+class SnapshotStore:
+    """Shared store that holds one JSON snapshot per process"""
+
+    def publish(self, process_key, snapshot):
+        raise NotImplementedError
+
+    def load(self):
+        raise NotImplementedError
+
+
+class DirectorySnapshotStore(SnapshotStore):
+    """Keeps snapshots as JSON files in a directory shared by all processes"""
+
+    def __init__(self, path, retention):
+        self.path = path
+        self.retention = retention
+
+    def publish(self, process_key, snapshot):
+        os.makedirs(self.path, exist_ok=True)
+        target = os.path.join(self.path, f"metrics-{process_key}.json")
+        tmp = f"{target}.{os.getpid()}.tmp"
+        with open(tmp, 'w', encoding='utf-8') as fh:
+            json.dump(snapshot, fh)
+        os.replace(tmp, target)
+
+    def load(self):
+        if not os.path.isdir(self.path):
+            return []
+        snapshots = []
+        now = time.time()
+        for filename in os.listdir(self.path):
+            if not (filename.startswith('metrics-') and filename.endswith('.json')):
+                continue
+            full_path = os.path.join(self.path, filename)
+            try:
+                if now - os.path.getmtime(full_path) > self.retention:
+                    os.remove(full_path)
+                    continue
+                with open(full_path, encoding='utf-8') as fh:
+                    snapshots.append(json.load(fh))
+            except (OSError, ValueError) as e:
+                logger.warning(f"Could not read metrics snapshot {full_path}: {e}")
+        return snapshots
+
+
+class CacheSnapshotStore(SnapshotStore):
+    """Keeps snapshots in a Django cache shared by all processes (e.g. Redis)"""
+    INDEX_KEY = 'metrics:processes'
+
+    def __init__(self, alias, retention):
+        self.alias = alias
+        self.retention = retention
+
+    @property
+    def cache(self):
+        from django.core.cache import caches
+        return caches[self.alias]
+
+    def publish(self, process_key, snapshot):
+        cache = self.cache
+        cache.set(f"metrics:snapshot:{process_key}", snapshot, self.retention)
+        index = cache.get(self.INDEX_KEY) or []
+        if process_key not in index:
+            # Races between processes only drop an entry until its next publish
+            cache.set(self.INDEX_KEY, index + [process_key], self.retention)
+
+    def load(self):
+        cache = self.cache
+        index = cache.get(self.INDEX_KEY) or []
+        found = cache.get_many([f"metrics:snapshot:{key}" for key in index])
+        alive = [key for key in index if f"metrics:snapshot:{key}" in found]
+        if len(alive) != len(index):
+            cache.set(self.INDEX_KEY, alive, self.retention)
+        return list(found.values())
+
+
+class MetricsRegistry:
+    """Holds all metric families of the current process"""
+
+    def __init__(self):
+        self.lock = threading.RLock()
+        self.metrics = {}
+        self.process_key = f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        self._last_publish = 0.0
+        self._publishing = False
+
+    def _register(self, metric):
+        if metric.name in self.metrics:
+            raise ValueError(f"Metric {metric.name} is already registered")
+        self.metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name, documentation, labelnames=()):
+        return self._register(Counter(self, name, documentation, labelnames))
+
+    def gauge(self, name, documentation, labelnames=(), aggregate='sum', keep_when_stale=False):
+        return self._register(Gauge(self, name, documentation, labelnames, aggregate, keep_when_stale))
+
+    def histogram(self, name, documentation, labelnames=(), buckets=DEFAULT_LATENCY_BUCKETS):
+        return self._register(Histogram(self, name, documentation, labelnames, buckets))
+
+    def snapshot(self):
+        with self.lock:
+            return {
+                'process': self.process_key,
+                'pid': os.getpid(),
+                'timestamp': time.time(),
+                'metrics': {name: metric.snapshot() for name, metric in self.metrics.items()},
+            }
+
+    def reset(self):
+        """Clear all samples (used by tests)"""
+        with self.lock:
+            for metric in self.metrics.values():
+                metric._values.clear()
+
+    def get_store(self):
+        mode = _setting('METRICS_MODE', 'local')
+        retention = _setting('METRICS_RETENTION', 24 * 60 * 60)
+        if mode == 'directory':
+            return DirectorySnapshotStore(_setting('METRICS_DIRECTORY', 'metrics'), retention)
+        if mode == 'cache':
+            return CacheSnapshotStore(_setting('METRICS_CACHE_ALIAS', 'default'), retention)
+        return None
+
+    def publish(self):
+        """Write this process' snapshot to the shared store (if any)"""
+        store = self.get_store()
+        if store is None:
+            return
+        try:
+            store.publish(self.process_key, self.snapshot())
+        except Exception as e:
+            logger.warning(f"Could not publish metrics snapshot: {e}")
+
+    def maybe_publish(self):
+        """Publish at most once per ``METRICS_PUBLISH_INTERVAL`` seconds"""
+        if _setting('METRICS_MODE', 'local') == 'local' or self._publishing:
+            return
+        now = time.monotonic()
+        if now - self._last_publish < _setting('METRICS_PUBLISH_INTERVAL', 5):
+            return
+        self._publishing = True
+        try:
+            self._last_publish = now
+            self.publish()
+        finally:
+            self._publishing = False
+
+    def collect(self):
+        """Return the merged snapshot of every process in the deployment"""
+        store = self.get_store()
+        if store is None:
+            return [self.snapshot()]
+        self.publish()
+        snapshots = store.load()
+        if not any(s.get('process') == self.process_key for s in snapshots):
+            snapshots.append(self.snapshot())
+        return snapshots
+
+
+def merge_snapshots(snapshots, stale_after=None):
+    """
+    Merge snapshots from several processes into a single set of families.
+
+    Counters and histograms are summed. Gauges are combined with the gauge's
+    ``aggregate`` function and ignored for snapshots older than ``stale_after``
+    seconds, so dead processes do not keep reporting live values; gauges
+    marked ``keep_when_stale`` are the exception.
+    """
+    now = time.time()
+    merged = {}
+    for snapshot in snapshots:
+        is_stale = stale_after is not None and now - snapshot.get('timestamp', now) > stale_after
+        for name, family in snapshot.get('metrics', {}).items():
+            if family['type'] == 'gauge' and is_stale and not family.get('keep_when_stale'):
+                continue
+            target = merged.setdefault(name, {
+                'type': family['type'],
+                'help': family['help'],
+                'labelnames': family['labelnames'],
+                'aggregate': family.get('aggregate', 'sum'),
+                'buckets': family.get('buckets'),
+                'samples': {},
+            })
+            for key, value in family['samples']:
+                key = tuple(key)
+                if key not in target['samples']:
+                    target['samples'][key] = list(value) if isinstance(value, list) else value
+                elif family['type'] == 'histogram':
+                    current = target['samples'][key]
+                    target['samples'][key] = [a + b for a, b in zip(current, value)]
+                elif family['type'] == 'gauge' and target['aggregate'] == 'max':
+                    target['samples'][key] = max(target['samples'][key], value)
+                elif family['type'] == 'gauge' and target['aggregate'] == 'min':
+                    target['samples'][key] = min(target['samples'][key], value)
+                else:
+                    target['samples'][key] += value
+    return merged
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(labelnames, key, extra=None):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(labelnames, key)]
+    if extra:
+        pairs.extend(f'{name}="{_escape(value)}"' for name, value in extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _format_value(value):
+    if isinstance(value, float):
+        if math.isinf(value):
+            return '+Inf' if value > 0 else '-Inf'
+        if math.isnan(value):
+            return 'NaN'
+        return repr(value)
+    return str(value)
+
+
+def _add_derived_metrics(merged):
+    """Compute metrics that depend on scrape time (freshness lag)"""
+    source = merged.get(JOB_LAST_SUCCESS.name)
+    if not source:
+        return
+    now = time.time()
+    merged[LIVE_UPDATE_LAG.name] = {
+        'type': 'gauge',
+        'help': LIVE_UPDATE_LAG.documentation,
+        'labelnames': source['labelnames'],
+        'aggregate': 'min',
+        'buckets': None,
+        'samples': {key: max(0.0, now - ts) for key, ts in source['samples'].items()},
+    }
+
+
+def render_metrics(snapshots):
+    """Render snapshots in the Prometheus text exposition format"""
+    merged = merge_snapshots(snapshots, stale_after=_setting('METRICS_STALE_SECONDS', 300))
+    _add_derived_metrics(merged)
+    lines = []
+    for name in sorted(merged):
+        family = merged[name]
+        lines.append(f"# HELP {name} {family['help']}")
+        lines.append(f"# TYPE {name} {family['type']}")
+        labelnames = family['labelnames']
+        for key in sorted(family['samples']):
+            value = family['samples'][key]
+            if family['type'] == 'histogram':
+                buckets = family['buckets']
+                for bound, count in zip(buckets, value):
+                    labels = _format_labels(labelnames, key, [('le', _format_value(float(bound)))])
+                    lines.append(f"{name}_bucket{labels} {count}")
+                labels = _format_labels(labelnames, key, [('le', '+Inf')])
+                lines.append(f"{name}_bucket{labels} {value[len(buckets)]}")
+                lines.append(f"{name}_sum{_format_labels(labelnames, key)} {_format_value(float(value[-1]))}")
+                lines.append(f"{name}_count{_format_labels(labelnames, key)} {value[len(buckets)]}")
+            else:
+                lines.append(f"{name}{_format_labels(labelnames, key)} {_format_value(value)}")
+    return '\n'.join(lines) + '\n'
+
+
+registry = MetricsRegistry()
+atexit.register(registry.publish)
+
+# ===== Metric families =====
+
+REQUEST_LATENCY = registry.histogram(
+    'http_request_duration_seconds', 'Request latency by view', ['view', 'method'])
+REQUESTS_TOTAL = registry.counter(
+    'http_requests_total', 'Requests by view, method and status code', ['view', 'method', 'status'])
+REQUEST_DB_QUERIES = registry.histogram(
+    'http_request_db_queries', 'Database queries issued per request', ['view'],
+    buckets=DEFAULT_COUNT_BUCKETS)
+DB_QUERIES_TOTAL = registry.counter(
+    'db_queries_total', 'Database queries issued while serving requests', ['view'])
+
+CACHE_LOOKUPS = registry.counter(
+    'cache_lookups_total', 'Application cache lookups by cache and result', ['cache', 'result'])
+
+API_REQUESTS = registry.counter(
+    'api_football_requests_total', 'API-FOOTBALL calls by endpoint and status', ['endpoint', 'status'])
+API_LATENCY = registry.histogram(
+    'api_football_request_duration_seconds', 'API-FOOTBALL call latency', ['endpoint'])
+API_QUOTA_REMAINING = registry.gauge(
+    'api_football_quota_remaining', 'Remaining API-FOOTBALL requests reported by the rate limit headers',
+    ['window'], aggregate='min')
+API_CIRCUIT_STATE = registry.gauge(
+    'api_football_circuit_state', 'API-FOOTBALL circuit breaker state by endpoint (0 closed, 1 half-open, 2 open)',
+    ['endpoint'], aggregate='max')
+API_CIRCUIT_TRANSITIONS = registry.counter(
+    'api_football_circuit_transitions_total', 'API-FOOTBALL circuit breaker state changes', ['endpoint', 'state'])
+API_SHORT_CIRCUITED = registry.counter(
+    'api_football_short_circuited_total', 'API-FOOTBALL calls refused while the circuit was open', ['endpoint'])
+API_RETRIES = registry.counter(
+    'api_football_retries_total', 'API-FOOTBALL calls retried after an error', ['endpoint'])
+
+INGESTION_ROWS = registry.counter(
+    'ingestion_rows_total', 'Rows written by ingestion commands', ['command', 'model', 'operation'])
+
+NOTIFICATION_FANOUT = registry.histogram(
+    'notification_fanout_size', 'Recipients per notification event', ['kind'],
+    buckets=DEFAULT_COUNT_BUCKETS)
+
+JOB_DURATION = registry.histogram(
+    'scheduler_job_duration_seconds', 'Scheduler job duration', ['job'],
+    buckets=(0.1, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600))
+JOB_LAST_SUCCESS = registry.gauge(
+    'scheduler_job_last_success_timestamp_seconds', 'Unix time of the last successful job run', ['job'],
+    aggregate='max', keep_when_stale=True)
+LIVE_STREAM_SUBSCRIBERS = registry.gauge(
+    'live_stream_subscribers', 'Open live score stream connections')
+LIVE_STREAM_MESSAGES = registry.counter(
+    'live_stream_messages_total', 'Live stream deltas delivered to subscribers', ['kind'])
+LIVE_STREAM_DROPPED = registry.counter(
+    'live_stream_dropped_total', 'Live stream deltas dropped because a subscriber fell behind')
+# Derived at scrape time from JOB_LAST_SUCCESS, never set directly
+LIVE_UPDATE_LAG = Gauge(
+    registry, 'live_update_lag_seconds', 'Seconds since the last successful live-update job run', ['job'])
+
+
+# ===== Helpers used by instrumented code =====
+
+def record_cache_lookup(cache_name, value):
+    """Count a cache hit or miss (``value`` is whatever ``cache.get`` returned)"""
+    CACHE_LOOKUPS.inc(cache=cache_name, result='miss' if value is None else 'hit')
+
+
+def record_api_response(endpoint, response=None, duration=None, error=False):
+    """Count an API-FOOTBALL call and remember the quota reported in its headers"""
+    status = 'error' if error or response is None else str(response.status_code)
+    API_REQUESTS.inc(endpoint=endpoint, status=status)
+    if duration is not None:
+        API_LATENCY.observe(duration, endpoint=endpoint)
+    if response is None:
+        return
+    for header, window in (('x-ratelimit-requests-remaining', 'day'), ('X-RateLimit-Remaining', 'minute')):
+        value = response.headers.get(header)
+        if value is None:
+            continue
+        try:
+            API_QUOTA_REMAINING.set(float(value), window=window)
+        except (TypeError, ValueError):
+            pass
+
+
+CIRCUIT_STATES = {'closed': 0, 'half_open': 1, 'open': 2}
+
+
+def record_circuit_state(endpoint, state):
+    """Export a circuit breaker state change (circuit_breaker.py)"""
+    API_CIRCUIT_STATE.set(CIRCUIT_STATES[state], endpoint=endpoint)
+    API_CIRCUIT_TRANSITIONS.inc(endpoint=endpoint, state=state)
+
+
+def record_short_circuit(endpoint):
+    """Count a call refused by an open circuit"""
+    API_SHORT_CIRCUITED.inc(endpoint=endpoint)
+
+
+def record_api_retry(endpoint):
+    """Count a retried API-FOOTBALL call"""
+    API_RETRIES.inc(endpoint=endpoint)
+
+
+def record_rows(command, model, operation, count=1):
+    """Count rows written by an ingestion command"""
+    if count:
+        INGESTION_ROWS.inc(count, command=command, model=model, operation=operation)
+
+
+def mark_job_success(job, started_at):
+    """Record a successful scheduler job run that started at ``started_at`` (time.time())"""
+    now = time.time()
+    JOB_DURATION.observe(now - started_at, job=job)
+    JOB_LAST_SUCCESS.set(now, job=job)
+
+
+@require_GET
+def metrics_view(request):
+    """Expose metrics in the Prometheus text format; without METRICS_TOKEN only while DEBUG is on"""
+    token = _setting('METRICS_TOKEN', '')
+    if not token and not settings.DEBUG:
+        return HttpResponseForbidden("METRICS_TOKEN is not configured")
+    if token and request.headers.get('Authorization') != f"Bearer {token}":
+        return HttpResponseForbidden("Invalid metrics token")
+    body = render_metrics(registry.collect())
+    response = HttpResponse(body, content_type=CONTENT_TYPE)
+    response['Cache-Control'] = 'no-cache, no-store, must-revalidate'
+    return response
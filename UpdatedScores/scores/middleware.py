@@ -2,6 +2,7 @@ import time
 import logging
 from django.db import connection
 from django.utils.deprecation import MiddlewareMixin
+from . import metrics
 
 logger = logging.getLogger(__name__)
 
@@ -98,3 +99,34 @@ class CacheHeadersMiddleware(MiddlewareMixin):
             response['Cache-Control'] = 'private, no-cache'
             
         return response
+
+
+class MetricsMiddleware:
+    """
+    Middleware to record request latency and database query counts per view
+    for the Prometheus /metrics endpoint
+    """
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        query_count = [0]
+
+        def count_queries(execute, sql, params, many, context):
+            query_count[0] += 1
+            return execute(sql, params, many, context)
+
+        start_time = time.perf_counter()
+        with connection.execute_wrapper(count_queries):
+            response = self.get_response(request)
+        duration = time.perf_counter() - start_time
+
+        # Use the URL name instead of the raw path to keep label cardinality low
+        resolver_match = getattr(request, 'resolver_match', None)
+        view = resolver_match.view_name if resolver_match and resolver_match.view_name else 'unresolved'
+
+        metrics.REQUEST_LATENCY.observe(duration, view=view, method=request.method)
+        metrics.REQUESTS_TOTAL.inc(view=view, method=request.method, status=str(response.status_code))
+        metrics.REQUEST_DB_QUERIES.observe(query_count[0], view=view)
+        metrics.DB_QUERIES_TOTAL.inc(query_count[0], view=view)
+        return response
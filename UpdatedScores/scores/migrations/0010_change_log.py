@@ -0,0 +1,35 @@
+# Generated by Django 5.2.18 on 2026-10-19 17:06
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scores', '0009_api_filter_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ChangeLogCompaction',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('compacted_through', models.BigIntegerField()),
+                ('removed', models.PositiveIntegerField(default=0)),
+                ('compacted_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='MatchChange',
+            fields=[
+                ('seq', models.BigAutoField(primary_key=True, serialize=False)),
+                ('match_id', models.CharField(max_length=20)),
+                ('kind', models.CharField(choices=[('match', 'Skor / durum / saat'), ('events', 'Maç olayları'), ('statistics', 'İstatistikler'), ('lineups', 'Kadrolar'), ('deleted', 'Silindi')], max_length=12)),
+                ('changed_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['match_id', 'kind'], name='change_match_kind_idx'), models.Index(fields=['changed_at'], name='change_changed_at_idx')],
+            },
+        ),
+    ]
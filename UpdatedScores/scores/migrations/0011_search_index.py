@@ -0,0 +1,57 @@
+import hashlib
+import re
+import unicodedata
+
+from django.db import migrations
+
+# Frozen copies of scores.search / scores.text_utils as of this migration, so
+# later changes to the runtime code do not change what it does
+TABLE = 'scores_search'
+CREATE_TABLE = (
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {TABLE} USING fts5("
+    "body, kind UNINDEXED, object_id UNINDEXED, "
+    "prefix='2 3 4', tokenize='unicode61 remove_diacritics 2')"
+)
+LETTERS = str.maketrans({
+    'ı': 'i', 'İ': 'i', 'ş': 's', 'Ş': 's', 'ğ': 'g', 'Ğ': 'g',
+    'ç': 'c', 'Ç': 'c', 'ö': 'o', 'Ö': 'o', 'ü': 'u', 'Ü': 'u',
+    'ø': 'o', 'Ø': 'o', 'ł': 'l', 'Ł': 'l', 'đ': 'd', 'Đ': 'd',
+    'æ': 'ae', 'Æ': 'ae', 'œ': 'oe', 'Œ': 'oe', 'ß': 'ss',
+})
+TOKEN = re.compile(r'\w+')
+
+
+def document(kind, object_id, *values):
+    text = unicodedata.normalize('NFKD', ' '.join(value for value in values if value).translate(LETTERS))
+    folded = ''.join(c for c in text if not unicodedata.combining(c)).casefold()
+    rowid = int.from_bytes(hashlib.blake2b(f"{kind}:{object_id}".encode(), digest_size=7).digest(), 'big')
+    return rowid, ' '.join(TOKEN.findall(folded)), kind, str(object_id)
+
+
+def create_search_index(apps, schema_editor):
+    # FTS5 is SQLite only; other databases use the icontains fallback in scores.search
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    schema_editor.execute(CREATE_TABLE)
+    sources = [('team', 'Team', ('name',)), ('player', 'Player', ('name',)), ('league', 'League', ('name', 'country'))]
+    with schema_editor.connection.cursor() as cursor:
+        for kind, model_name, columns in sources:
+            model = apps.get_model('scores', model_name)
+            documents = [document(kind, *row) for row in model.objects.values_list('pk', *columns).iterator()]
+            cursor.executemany(f"INSERT INTO {TABLE} (rowid, body, kind, object_id) VALUES (%s, %s, %s, %s)", documents)
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'sqlite':
+        schema_editor.execute(f"DROP TABLE IF EXISTS {TABLE}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scores', '0010_change_log'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
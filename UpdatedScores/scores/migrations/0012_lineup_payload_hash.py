@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-19 17:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scores', '0011_search_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='lineup',
+            name='payload_hash',
+            field=models.CharField(blank=True, default='', max_length=64),
+        ),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 5.2.18 on 2026-10-19 17:20
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scores', '0012_lineup_payload_hash'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PlayerMatchStat',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('season', models.CharField(blank=True, default='', max_length=50)),
+                ('minutes', models.PositiveSmallIntegerField(default=0)),
+                ('rating', models.FloatField(blank=True, null=True)),
+                ('goals', models.PositiveSmallIntegerField(default=0)),
+                ('assists', models.PositiveSmallIntegerField(default=0)),
+                ('shots', models.PositiveSmallIntegerField(default=0)),
+                ('shots_on_target', models.PositiveSmallIntegerField(default=0)),
+                ('passes', models.PositiveSmallIntegerField(default=0)),
+                ('key_passes', models.PositiveSmallIntegerField(default=0)),
+                ('tackles', models.PositiveSmallIntegerField(default=0)),
+                ('yellow_cards', models.PositiveSmallIntegerField(default=0)),
+                ('red_cards', models.PositiveSmallIntegerField(default=0)),
+                ('last_updated', models.DateTimeField(auto_now=True)),
+                ('league', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='player_match_stats', to='scores.league')),
+                ('match', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='player_stats', to='scores.match')),
+                ('player', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='match_stats', to='scores.player')),
+                ('team', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='player_match_stats', to='scores.team')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['player', 'season'], name='player_stat_player_season_idx'), models.Index(fields=['team', 'season'], name='player_stat_team_season_idx'), models.Index(fields=['league', 'season'], name='player_stat_league_season_idx')],
+                'constraints': [models.UniqueConstraint(fields=('match', 'player'), name='player_match_stat_unique')],
+            },
+        ),
+    ]
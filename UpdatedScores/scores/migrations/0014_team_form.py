@@ -0,0 +1,101 @@
+# Generated by Django 5.2.18 on 2026-10-19 17:31
+
+from collections import defaultdict
+from datetime import datetime
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+# Frozen copy of scores.team_form as of this migration, so later changes to
+# the runtime code do not change what it does
+FORM_LENGTH = 10
+LIVE_STATUSES = frozenset({'1H', 'HT', '2H', 'ET', 'BT', 'P', 'SUSP', 'INT', 'LIVE'})
+
+
+def final_goals(score, status):
+    if status in LIVE_STATUSES:
+        return None
+    try:
+        home_goals, away_goals = map(int, score.split('-'))
+    except (AttributeError, ValueError):
+        return None
+    return home_goals, away_goals
+
+
+def leading(results, wanted):
+    count = 0
+    for value in results:
+        if value not in wanted:
+            break
+        count += 1
+    return count
+
+
+def fill_team_forms(apps, schema_editor):
+    """One row per team over all competitions (no league) and one per competition, from finished matches"""
+    Match = apps.get_model('scores', 'Match')
+    TeamForm = apps.get_model('scores', 'TeamForm')
+    rows = Match.objects.filter(score__isnull=False).order_by('-match_date', '-id').values_list(
+        'id', 'match_date', 'score', 'status', 'league_id',
+        'home_team_id', 'home_team__name', 'away_team_id', 'away_team__name')
+
+    history = defaultdict(lambda: ([], [], []))
+    for match_id, match_date, score, status, league_id, home_id, home_name, away_id, away_name in rows.iterator():
+        goals = final_goals(score, status)
+        if goals is None:
+            continue
+        for team_id, goals_for, goals_against in ((home_id, *goals), (away_id, goals[1], goals[0])):
+            value = 'W' if goals_for > goals_against else 'L' if goals_for < goals_against else 'D'
+            for scope in (None, league_id):
+                results, goal_diffs, entries = history[(team_id, scope)]
+                results.append(value)
+                if len(entries) < FORM_LENGTH:
+                    goal_diffs.append(goals_for - goals_against)
+                    entries.append({
+                        'id': match_id, 'date': match_date.isoformat(),
+                        'home_team_id': home_id, 'home_team_name': home_name,
+                        'away_team_id': away_id, 'away_team_name': away_name,
+                        'score': score, 'venue': 'home' if team_id == home_id else 'away',
+                    })
+
+    forms = []
+    for (team_id, league_id), (results, goal_diffs, entries) in history.items():
+        forms.append(TeamForm(
+            team_id=team_id, league_id=league_id, form=''.join(results[:FORM_LENGTH]), goal_diffs=goal_diffs,
+            matches=entries, played=len(results), streak_result=results[0],
+            streak=leading(results, results[0]), unbeaten_streak=leading(results, 'WD'),
+            winless_streak=leading(results, 'DL'), last_match_date=datetime.fromisoformat(entries[0]['date']),
+        ))
+    TeamForm.objects.bulk_create(forms, batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scores', '0013_player_match_stat'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TeamForm',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('form', models.CharField(blank=True, default='', max_length=20)),
+                ('goal_diffs', models.JSONField(default=list)),
+                ('matches', models.JSONField(default=list)),
+                ('played', models.PositiveIntegerField(default=0)),
+                ('streak_result', models.CharField(blank=True, default='', max_length=1)),
+                ('streak', models.PositiveSmallIntegerField(default=0)),
+                ('unbeaten_streak', models.PositiveSmallIntegerField(default=0)),
+                ('winless_streak', models.PositiveSmallIntegerField(default=0)),
+                ('last_match_date', models.DateTimeField(blank=True, null=True)),
+                ('last_updated', models.DateTimeField(auto_now=True)),
+                ('league', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='team_forms', to='scores.league')),
+                ('team', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='forms', to='scores.team')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('team', 'league'), name='team_form_unique'), models.UniqueConstraint(condition=models.Q(('league__isnull', True)), fields=('team',), name='team_form_overall_unique')],
+            },
+        ),
+        migrations.RunPython(fill_team_forms, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 5.2.18 on 2026-10-19 17:35
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scores', '0014_team_form'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='HeadToHead',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('played', models.PositiveIntegerField(default=0)),
+                ('team_a_wins', models.PositiveIntegerField(default=0)),
+                ('draws', models.PositiveIntegerField(default=0)),
+                ('team_b_wins', models.PositiveIntegerField(default=0)),
+                ('team_a_goals', models.PositiveIntegerField(default=0)),
+                ('team_b_goals', models.PositiveIntegerField(default=0)),
+                ('meetings', models.JSONField(default=list)),
+                ('last_match_date', models.DateTimeField(blank=True, null=True)),
+                ('api_meetings', models.PositiveIntegerField(blank=True, null=True)),
+                ('last_updated', models.DateTimeField(auto_now=True)),
+                ('team_a', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='scores.team')),
+                ('team_b', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='scores.team')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('team_a', 'team_b'), name='head_to_head_unique')],
+            },
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 5.2.18 on 2026-10-19 17:39
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scores', '0015_head_to_head'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TeamRating',
+            fields=[
+                ('team', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='rating', serialize=False, to='scores.team')),
+                ('elo', models.FloatField(default=1500.0)),
+                ('attack', models.FloatField(default=0.0)),
+                ('defence', models.FloatField(default=0.0)),
+                ('matches', models.PositiveIntegerField(default=0)),
+                ('last_match_date', models.DateTimeField(blank=True, null=True)),
+                ('last_updated', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 5.2.18 on 2026-10-19 17:44
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scores', '0016_team_rating'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SeasonProjection',
+            fields=[
+                ('league', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='projection', serialize=False, to='scores.league')),
+                ('season', models.CharField(blank=True, max_length=50, null=True)),
+                ('results_key', models.CharField(max_length=40)),
+                ('simulations', models.PositiveIntegerField(default=0)),
+                ('remaining', models.PositiveIntegerField(default=0)),
+                ('table', models.JSONField(default=list)),
+                ('last_updated', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
@@ -1,6 +1,7 @@
 from django.db import models
 from django.contrib.auth.models import User
 from django.db.models import JSONField
+from django.utils import timezone
 
 class League(models.Model):
     id = models.CharField(max_length=20, primary_key=True)
@@ -47,6 +48,29 @@ class Match(models.Model):
     season = models.CharField(max_length=50, blank=True, null=True)
     status = models.CharField(max_length=50, blank=True, null=True)  # Scheduled, Completed, Live
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['match_date'], name='match_date_idx'),
+            models.Index(fields=['status'], name='match_status_idx'),
+            # API filters: league/team/status combined with a date range, keyset order (match_date, id)
+            models.Index(fields=['match_date', 'id'], name='match_date_id_idx'),
+            models.Index(fields=['league', 'match_date'], name='match_league_date_idx'),
+            models.Index(fields=['home_team', 'match_date'], name='match_home_date_idx'),
+            models.Index(fields=['away_team', 'match_date'], name='match_away_date_idx'),
+            models.Index(fields=['status', 'match_date'], name='match_status_date_idx'),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remembered so the live stream and change log only see real changes
+        instance._loaded_state = instance.snapshot()
+        return instance
+
+    def snapshot(self):
+        """(score, status, match_date) as last loaded or saved"""
+        return (self.__dict__.get('score'), self.__dict__.get('status'), self.__dict__.get('match_date'))
+
     def __str__(self):
         if self.score:
             return f"{self.home_team} {self.score} {self.away_team} ({self.match_date.strftime('%Y-%m-%d')})"
@@ -69,6 +93,9 @@ class Event(models.Model):
     # TheSportsDB API bazen aynı olaylar için farklı kayıtlar içerir, doğal bir anahtar olmadığı için bir bileşik anahtar kullanıyoruz
     class Meta:
         unique_together = ('match', 'minute', 'event_type', 'player')
+        indexes = [
+            models.Index(fields=['event_type'], name='event_type_idx'),
+        ]
 
     def __str__(self):
         player_name = self.player.name if self.player else "Unknown Player"
@@ -106,6 +133,125 @@ class MatchAnalysis(models.Model):
     def __str__(self):
         return f"Analiz: {self.match}"
 
+class PlayerMatchStat(models.Model):
+    """Per-player statistics of one match; the queryable form of MatchAnalysis.player_ratings"""
+    match = models.ForeignKey(Match, on_delete=models.CASCADE, related_name='player_stats')
+    player = models.ForeignKey(Player, on_delete=models.CASCADE, related_name='match_stats')
+    team = models.ForeignKey(Team, on_delete=models.CASCADE, related_name='player_match_stats')
+    # Copied from the match so season aggregates are served by the indexes below
+    league = models.ForeignKey(League, on_delete=models.CASCADE, related_name='player_match_stats')
+    season = models.CharField(max_length=50, blank=True, default='')
+    minutes = models.PositiveSmallIntegerField(default=0)
+    rating = models.FloatField(blank=True, null=True)
+    goals = models.PositiveSmallIntegerField(default=0)
+    assists = models.PositiveSmallIntegerField(default=0)
+    shots = models.PositiveSmallIntegerField(default=0)
+    shots_on_target = models.PositiveSmallIntegerField(default=0)
+    passes = models.PositiveSmallIntegerField(default=0)
+    key_passes = models.PositiveSmallIntegerField(default=0)
+    tackles = models.PositiveSmallIntegerField(default=0)
+    yellow_cards = models.PositiveSmallIntegerField(default=0)
+    red_cards = models.PositiveSmallIntegerField(default=0)
+    last_updated = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['match', 'player'], name='player_match_stat_unique'),
+        ]
+        indexes = [
+            models.Index(fields=['player', 'season'], name='player_stat_player_season_idx'),
+            models.Index(fields=['team', 'season'], name='player_stat_team_season_idx'),
+            models.Index(fields=['league', 'season'], name='player_stat_league_season_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.player_id} @ {self.match_id}: {self.minutes}' {self.rating}"
+
+class TeamForm(models.Model):
+    """
+    Rolling form of a team, kept current as results come in (see team_form.py):
+    one row over all competitions (no league) and one per competition played
+    """
+    team = models.ForeignKey(Team, on_delete=models.CASCADE, related_name='forms')
+    league = models.ForeignKey(League, on_delete=models.CASCADE, null=True, blank=True, related_name='team_forms')
+    # Most recent first; form, goal_diffs and matches are aligned
+    form = models.CharField(max_length=20, blank=True, default='')
+    goal_diffs = models.JSONField(default=list)
+    matches = models.JSONField(default=list)
+    # Finished matches; more than len(matches) means older ones were dropped
+    played = models.PositiveIntegerField(default=0)
+    streak_result = models.CharField(max_length=1, blank=True, default='')
+    streak = models.PositiveSmallIntegerField(default=0)
+    unbeaten_streak = models.PositiveSmallIntegerField(default=0)
+    winless_streak = models.PositiveSmallIntegerField(default=0)
+    last_match_date = models.DateTimeField(blank=True, null=True)
+    last_updated = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['team', 'league'], name='team_form_unique'),
+            # NULL leagues are distinct in the constraint above
+            models.UniqueConstraint(fields=['team'], condition=models.Q(league__isnull=True),
+                                    name='team_form_overall_unique'),
+        ]
+
+    def __str__(self):
+        return f"{self.team_id} ({self.league_id or 'all'}): {self.form}"
+
+class HeadToHead(models.Model):
+    """Record of every meeting of two teams, stored once per unordered pair (team_a_id < team_b_id, see h2h.py)"""
+    team_a = models.ForeignKey(Team, on_delete=models.CASCADE, related_name='+')
+    team_b = models.ForeignKey(Team, on_delete=models.CASCADE, related_name='+')
+    played = models.PositiveIntegerField(default=0)
+    team_a_wins = models.PositiveIntegerField(default=0)
+    draws = models.PositiveIntegerField(default=0)
+    team_b_wins = models.PositiveIntegerField(default=0)
+    team_a_goals = models.PositiveIntegerField(default=0)
+    team_b_goals = models.PositiveIntegerField(default=0)
+    # Summaries of the last meetings, most recent first
+    meetings = models.JSONField(default=list)
+    last_match_date = models.DateTimeField(blank=True, null=True)
+    # Meetings the API reported at the last fixtures/headtohead call; None if never asked
+    api_meetings = models.PositiveIntegerField(blank=True, null=True)
+    last_updated = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['team_a', 'team_b'], name='head_to_head_unique'),
+        ]
+
+    def __str__(self):
+        return f"{self.team_a_id} {self.team_a_wins}-{self.draws}-{self.team_b_wins} {self.team_b_id}"
+
+class TeamRating(models.Model):
+    """Elo and Poisson attack/defence strength of a team over all its results (see team_ratings.py)"""
+    team = models.OneToOneField(Team, on_delete=models.CASCADE, primary_key=True, related_name='rating')
+    elo = models.FloatField(default=1500.0)
+    # Log-scale goal rates relative to an average side; higher is better for both
+    attack = models.FloatField(default=0.0)
+    defence = models.FloatField(default=0.0)
+    matches = models.PositiveIntegerField(default=0)
+    last_match_date = models.DateTimeField(blank=True, null=True)
+    last_updated = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.team_id}: {self.elo:.0f}"
+
+class SeasonProjection(models.Model):
+    """Monte Carlo final-position probabilities of a league's current season (see season_projection.py)"""
+    league = models.OneToOneField(League, on_delete=models.CASCADE, primary_key=True, related_name='projection')
+    season = models.CharField(max_length=50, blank=True, null=True)
+    # Digest of the season's results and remaining fixtures the projection was simulated from
+    results_key = models.CharField(max_length=40)
+    simulations = models.PositiveIntegerField(default=0)
+    remaining = models.PositiveIntegerField(default=0)
+    # One row per team, by expected finishing position: current table, expected points and chances
+    table = models.JSONField(default=list)
+    last_updated = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.league_id} ({self.season}): {self.simulations} simulations"
+
 class Profile(models.Model):
     NOTIFICATION_METHOD_CHOICES = [
         ('push', 'Push Bildirimi'),
@@ -148,10 +294,15 @@ class Lineup(models.Model):
     team = models.ForeignKey(Team, on_delete=models.CASCADE, related_name='match_lineups')
     formation = models.CharField(max_length=10, blank=True, null=True)
     is_confirmed = models.BooleanField(default=False)
+    # sha256 of the feed payload the rows were built from; unchanged payloads are skipped
+    payload_hash = models.CharField(max_length=64, blank=True, default='')
     last_updated = models.DateTimeField(auto_now=True)
     
     class Meta:
         unique_together = ('match', 'team')
+        indexes = [
+            models.Index(fields=['match', 'team'], name='lineup_match_team_idx'),
+        ]
     
     def __str__(self):
         return f"{self.team.name} lineup for {self.match}"
@@ -166,7 +317,44 @@ class LineupPlayer(models.Model):
     
     class Meta:
         unique_together = ('lineup', 'player')
+        indexes = [
+            models.Index(fields=['lineup', 'is_starter'], name='lineup_player_starter_idx'),
+        ]
         
     def __str__(self):
         status = "Starting XI" if self.is_starter else "Substitute"
-        return f"{self.player.name} - {status} ({self.lineup.team.name})"
\ No newline at end of file
+        return f"{self.player.name} - {status} ({self.lineup.team.name})"
+
+class MatchChange(models.Model):
+    """Append-only change log read by /api/changes/; seq only ever grows"""
+    KIND_CHOICES = [
+        ('match', 'Skor / durum / saat'),
+        ('events', 'Maç olayları'),
+        ('statistics', 'İstatistikler'),
+        ('lineups', 'Kadrolar'),
+        ('deleted', 'Silindi'),
+    ]
+
+    seq = models.BigAutoField(primary_key=True)
+    match_id = models.CharField(max_length=20)
+    kind = models.CharField(max_length=12, choices=KIND_CHOICES)
+    changed_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['match_id', 'kind'], name='change_match_kind_idx'),
+            models.Index(fields=['changed_at'], name='change_changed_at_idx'),
+        ]
+
+    def __str__(self):
+        return f"#{self.seq} {self.kind} {self.match_id}"
+
+
+class ChangeLogCompaction(models.Model):
+    """Clients asking for changes at or before compacted_through must reload"""
+    compacted_through = models.BigIntegerField()
+    removed = models.PositiveIntegerField(default=0)
+    compacted_at = models.DateTimeField(default=timezone.now)
+
+    def __str__(self):
+        return f"Compaction through #{self.compacted_through}"
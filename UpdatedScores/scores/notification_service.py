@@ -5,6 +5,7 @@ from django.utils import timezone
 from django.urls import reverse
 from .models import Profile, Match, Event, Team, Player
 from .notifications import Notification
+from . import metrics
 
 logger = logging.getLogger(__name__)
 
@@ -97,6 +98,7 @@ class NotificationService:
         # Combine and remove duplicates
         followers = set(list(team_followers) + list(player_followers))
         
+        metrics.NOTIFICATION_FANOUT.observe(len(followers), kind="goal")
         for profile in followers:
             cls.send_notification(profile, subject, message, "goal", match_url)
     
@@ -117,6 +119,7 @@ class NotificationService:
         # Combine and remove duplicates
         followers = set(list(team_followers) + list(player_followers))
         
+        metrics.NOTIFICATION_FANOUT.observe(len(followers), kind="red_card")
         for profile in followers:
             cls.send_notification(profile, subject, message, "red_card", match_url)
     
@@ -136,6 +139,7 @@ class NotificationService:
         # Generate URL for the match detail page
         match_url = reverse("scores:match_detail", kwargs={"match_id": match.id})
         
+        metrics.NOTIFICATION_FANOUT.observe(len(followers), kind="match_start")
         for profile in followers:
             cls.send_notification(profile, subject, message, "match_start", match_url)
     
@@ -159,6 +163,7 @@ class NotificationService:
         # Generate URL for the match detail page
         match_url = reverse("scores:match_detail", kwargs={"match_id": match.id})
         
+        metrics.NOTIFICATION_FANOUT.observe(len(followers), kind="lineup")
         for profile in followers:
             cls.send_notification(profile, subject, message, "lineup", match_url)
 
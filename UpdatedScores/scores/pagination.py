@@ -0,0 +1,27 @@
+"""
+Keyset (cursor) pagination for the REST API.
+
+Offsets get slower the deeper the page and skip or repeat rows while
+ingestion writes; a cursor continues from the last row seen instead. Every
+paginator has a hard page size cap regardless of ``?page_size=``.
+"""
+from rest_framework.pagination import CursorPagination
+
+
+class CappedCursorPagination(CursorPagination):
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 200
+
+
+class MatchCursorPagination(CappedCursorPagination):
+    # Newest first; id breaks ties between matches kicking off together
+    ordering = ('-match_date', '-id')
+
+
+class TeamCursorPagination(CappedCursorPagination):
+    ordering = ('id',)
+
+
+class LeagueCursorPagination(CappedCursorPagination):
+    ordering = ('id',)
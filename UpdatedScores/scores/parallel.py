@@ -0,0 +1,58 @@
+"""
+Process pool for CPU- and query-heavy batch jobs.
+
+Work is split into chunks of ids; each worker process runs a module-level
+task function over one chunk with its own database connection and returns
+plain data (dicts, lists, strings), which the parent writes in bulk. Nothing
+here imports models at module level, so workers started with ``spawn``
+(Windows, macOS) can unpickle the initializer before Django is set up.
+Such a worker runs ``django.setup()`` and so ``ScoresConfig.ready()``; the
+initializer marks the process as a pool worker first, so ``ready()`` does
+not start a scheduler with every job in each worker.
+"""
+import os
+import random
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+# Set in pool worker processes (see in_worker)
+WORKER_ENV = 'SCORES_POOL_WORKER'
+
+
+def chunked(items, size):
+    """Consecutive lists of at most ``size`` items"""
+    items = list(items)
+    size = max(1, size)
+    return [items[start:start + size] for start in range(0, len(items), size)]
+
+
+def in_worker():
+    """Whether this process is a pool worker started by ``run``"""
+    return os.environ.get(WORKER_ENV) == '1'
+
+
+def _init_worker(settings_module):
+    os.environ[WORKER_ENV] = '1'
+    if settings_module:
+        os.environ.setdefault('DJANGO_SETTINGS_MODULE', settings_module)
+    import django
+    django.setup()
+    from django.db import connections
+    # A forked worker inherits the parent's connection objects; open its own instead
+    connections.close_all()
+    # Forked workers would otherwise share the parent's random state
+    random.seed()
+
+
+def run(task, chunks, workers):
+    """
+    Yield (chunk, result) as workers finish ``task(chunk)``; order is not
+    preserved. The parent's connections are closed first so no socket or
+    SQLite handle is shared with the children.
+    """
+    from django.db import connections
+    connections.close_all()
+    settings_module = os.environ.get('DJANGO_SETTINGS_MODULE')
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(settings_module,)) as pool:
+        futures = {pool.submit(task, chunk): chunk for chunk in chunks}
+        for future in as_completed(futures):
+            yield futures[future], future.result()
@@ -5,6 +5,7 @@ from functools import wraps
 from django.db import connection, reset_queries
 from django.conf import settings
 from django.core.cache import cache
+from . import metrics
 
 logger = logging.getLogger(__name__)
 
@@ -41,6 +42,7 @@ def caching_decorator(timeout=3600):
             
             # Try to get from cache
             result = cache.get(cache_key)
+            metrics.record_cache_lookup('function', result)
             
             # If not in cache, call the function and cache the result
             if result is None:
@@ -0,0 +1,141 @@
+"""
+Per-run identity map of players for the ingestion commands.
+
+Instead of one ``Player`` query per event or lineup row, a command preloads
+the players of the teams it is about to touch in one query and resolves rows
+from memory: by id in O(1), or by name for feeds that only carry a name
+(TheSportsDB goal/card strings). Players the feed mentions but the database
+does not know yet are collected and written with one ``bulk_create`` when the
+command flushes, before the rows that reference them.
+
+Name lookup compares folded, order-independent token keys, so "Kahveci İrfan
+Can" finds "İrfan Can Kahveci"; then initials ("M. Salah"), then a fuzzy
+match within the team.
+"""
+import difflib
+from collections import defaultdict
+
+from .models import Player
+from .text_utils import tokens
+
+FUZZY_CUTOFF = 0.85
+
+
+def name_key(name):
+    """Folded tokens in sorted order: 'Kahveci İrfan Can' -> 'can irfan kahveci'"""
+    return ' '.join(sorted(tokens(name)))
+
+
+def _initials_match(query_tokens, candidate_tokens):
+    """'m salah' matches 'mohamed salah': each query token is a token or an initial"""
+    remaining = list(candidate_tokens)
+    for token in query_tokens:
+        for idx, candidate in enumerate(remaining):
+            if candidate == token or (len(token) == 1 and candidate.startswith(token)):
+                del remaining[idx]
+                break
+        else:
+            return False
+    return True
+
+
+class PlayerIndex:
+    def __init__(self):
+        self._by_id = {}
+        self._by_team = defaultdict(list)
+        self._by_key = defaultdict(list)
+        self._loaded_teams = set()
+        self._checked = set()
+        self._new = {}
+        self._moved = {}
+        self.queries = 0
+
+    @classmethod
+    def for_teams(cls, team_ids):
+        index = cls()
+        index.load_teams(team_ids)
+        return index
+
+    def load_teams(self, team_ids):
+        """Preload every player of the teams not loaded yet (one query)"""
+        missing = {str(team_id) for team_id in team_ids if team_id is not None} - self._loaded_teams
+        if not missing:
+            return
+        self._loaded_teams |= missing
+        self.queries += 1
+        for player in Player.objects.filter(team_id__in=missing).only('id', 'name', 'team_id', 'position'):
+            self._add(player)
+
+    def _add(self, player):
+        self._by_id[player.pk] = player
+        self._by_team[player.team_id].append(player)
+        self._by_key[player.team_id, name_key(player.name)].append(player)
+
+    def _remove(self, player):
+        self._by_team[player.team_id].remove(player)
+        self._by_key[player.team_id, name_key(player.name)].remove(player)
+
+    def __len__(self):
+        return len(self._by_id)
+
+    def get(self, player_id):
+        """Player by id: loaded, created this run, or None"""
+        return self._by_id.get(str(player_id))
+
+    def find(self, name, team_id=None):
+        """Best player for a bare name, preferring ``team_id``'s squad"""
+        key = name_key(name)
+        if not key:
+            return None
+        team_id = str(team_id) if team_id is not None else None
+        if team_id is not None and self._by_key.get((team_id, key)):
+            return self._by_key[team_id, key][0]
+        candidates = self._by_team.get(team_id, ()) if team_id is not None else list(self._by_id.values())
+        query = key.split()
+        for player in candidates:
+            if _initials_match(query, tokens(player.name)):
+                return player
+        keys = {name_key(player.name): player for player in candidates}
+        close = difflib.get_close_matches(key, list(keys), n=1, cutoff=FUZZY_CUTOFF)
+        return keys[close[0]] if close else None
+
+    def prefetch_ids(self, player_ids):
+        """Load players by id that no preloaded team covered (one query)"""
+        wanted = {str(player_id) for player_id in player_ids if player_id} - self._by_id.keys() - self._checked
+        if not wanted:
+            return
+        self._checked |= wanted
+        self.queries += 1
+        for player in Player.objects.filter(pk__in=wanted).only('id', 'name', 'team_id', 'position'):
+            self._add(player)
+
+    def get_or_add(self, player_id, name, team_id, position='MF', move=False):
+        """
+        Known player, or a new one queued for ``flush``. Never queries: ids
+        outside the loaded teams must be passed to ``prefetch_ids`` first.
+        With ``move`` a known player whose team changed is queued for update.
+        """
+        player_id = str(player_id)
+        player = self._by_id.get(player_id)
+        if player is None:
+            player = Player(id=player_id, name=name, team_id=str(team_id), position=position)
+            self._new[player_id] = player
+            self._add(player)
+        elif move and team_id is not None and player.team_id != str(team_id):
+            self._remove(player)
+            player.team_id = str(team_id)
+            self._add(player)
+            self._moved[player_id] = player
+        return player
+
+    def flush(self):
+        """Write queued players; returns (created, moved)"""
+        created = len(self._new)
+        if self._new:
+            Player.objects.bulk_create(list(self._new.values()), ignore_conflicts=True)
+            self._new.clear()
+        moved = len(self._moved)
+        if self._moved:
+            Player.objects.bulk_update(list(self._moved.values()), ['team'])
+            self._moved.clear()
+        return created, moved
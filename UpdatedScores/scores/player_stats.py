@@ -0,0 +1,165 @@
+"""
+Per-player match statistics (``PlayerMatchStat``).
+
+``fetch_match_statistics`` keeps writing the ``MatchAnalysis.player_ratings``
+blob for the match screens, and also upserts one row per player here. Season
+questions (average rating, minutes, goals per player or per team) then become
+one grouped query over the (player, season) / (team, season) indexes instead
+of loading and parsing every blob.
+
+Rows are built from the API-FOOTBALL ``fixtures/players`` payload
+(``from_api``) or from a stored blob (``from_ratings``, used by the backfill),
+and written with ``upsert``: one ``INSERT ... ON CONFLICT DO UPDATE`` per
+batch.
+"""
+from django.db.models import Avg, Count, Sum
+
+from .models import PlayerMatchStat
+
+STAT_FIELDS = (
+    'minutes', 'rating', 'goals', 'assists', 'shots', 'shots_on_target', 'passes', 'key_passes', 'tackles',
+    'yellow_cards', 'red_cards',
+)
+POSITIONS = {'G': 'GK', 'D': 'DF', 'M': 'MF', 'F': 'FW'}
+
+# Season aggregates shared by player_totals and team_totals (names must not clash with fields)
+TOTALS = {
+    'appearances': Count('id'),
+    'avg_rating': Avg('rating'),
+    **{f'total_{field}': Sum(field) for field in STAT_FIELDS if field != 'rating'},
+}
+
+
+def _count(value):
+    """API counters are null when zero; some blobs carry strings"""
+    try:
+        return max(int(value or 0), 0)
+    except (TypeError, ValueError):
+        return 0
+
+
+def _rating(value):
+    """'7.3' -> 7.3; 'N/A', '' and None -> None"""
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _row(match, player, team_id, **stats):
+    return PlayerMatchStat(match=match, player=player, team_id=team_id, league_id=match.league_id,
+                           season=match.season or '', **stats)
+
+
+def from_api(match, payload, players):
+    """
+    Unsaved rows from a ``fixtures/players`` response. Unknown players are
+    queued on ``players`` (a PlayerIndex), which the caller flushes first.
+    """
+    teams = {match.home_team_id, match.away_team_id}
+    response = [team_data for team_data in (payload or {}).get('response') or []
+                if str(team_data.get('team', {}).get('id')) in teams]
+    players.load_teams(teams)
+    players.prefetch_ids(
+        entry.get('player', {}).get('id') for team_data in response for entry in team_data.get('players', []))
+
+    rows = {}
+    for team_data in response:
+        team_id = str(team_data['team']['id'])
+        for entry in team_data.get('players', []):
+            info = entry.get('player', {})
+            player_id = str(info.get('id') or '')
+            if not player_id:
+                continue
+            stats = (entry.get('statistics') or [{}])[0]
+            games, goals, shots = stats.get('games') or {}, stats.get('goals') or {}, stats.get('shots') or {}
+            passes, tackles, cards = stats.get('passes') or {}, stats.get('tackles') or {}, stats.get('cards') or {}
+            position = POSITIONS.get(games.get('position'), 'MF')
+            player = players.get_or_add(player_id, info.get('name') or 'Unknown Player', team_id, position)
+            rows[player_id] = _row(
+                match, player, team_id,
+                minutes=_count(games.get('minutes')),
+                rating=_rating(games.get('rating')),
+                goals=_count(goals.get('total')),
+                assists=_count(goals.get('assists')),
+                shots=_count(shots.get('total')),
+                shots_on_target=_count(shots.get('on')),
+                passes=_count(passes.get('total')),
+                key_passes=_count(passes.get('key')),
+                tackles=_count(tackles.get('total')),
+                yellow_cards=_count(cards.get('yellow')),
+                red_cards=_count(cards.get('red')),
+            )
+    return list(rows.values())
+
+
+def from_ratings(match, ratings, players):
+    """
+    Unsaved rows from a stored ``player_ratings`` blob in the API shape
+    ({'home': [{'id', 'name', 'rating', 'minutes', ...}], 'away': [...]}).
+
+    Blobs written by ``generate_match_analysis`` ({'home_team': {name:
+    rating}}) carry no player statistics and yield nothing. Older blobs may
+    list players under the wrong side, so a known player's own team wins
+    over the side when it played in the match.
+    """
+    if not isinstance(ratings, dict):
+        return []
+    sides = {'home': match.home_team_id, 'away': match.away_team_id}
+    entries = [(side, entry) for side in sides for entry in ratings.get(side) or [] if isinstance(entry, dict)]
+    if not entries:
+        return []
+    players.load_teams(sides.values())
+    players.prefetch_ids(entry.get('id') for _, entry in entries)
+
+    rows = {}
+    for side, entry in entries:
+        player_id = str(entry.get('id') or '')
+        if not player_id:
+            continue
+        known = players.get(player_id)
+        team_id = known.team_id if known is not None and known.team_id in sides.values() else sides[side]
+        player = players.get_or_add(player_id, entry.get('name') or 'Unknown Player', team_id)
+        rows[player_id] = _row(
+            match, player, team_id,
+            minutes=_count(entry.get('minutes')),
+            rating=_rating(entry.get('rating')),
+            goals=_count(entry.get('goals')),
+            assists=_count(entry.get('assists')),
+            shots=_count(entry.get('shots')),
+            passes=_count(entry.get('passes')),
+            key_passes=_count(entry.get('key_passes')),
+        )
+    return list(rows.values())
+
+
+def upsert(rows, batch_size=500):
+    """Insert or update ``rows`` on (match, player); returns the number written"""
+    if not rows:
+        return 0
+    PlayerMatchStat.objects.bulk_create(
+        rows, batch_size=batch_size, update_conflicts=True, unique_fields=['match', 'player'],
+        update_fields=['team', 'league', 'season', *STAT_FIELDS, 'last_updated'],
+    )
+    return len(rows)
+
+
+def _totals(group_by, season, order_by, **filters):
+    queryset = PlayerMatchStat.objects.filter(**filters)
+    if season is not None:
+        queryset = queryset.filter(season=season)
+    return queryset.values(*group_by).annotate(**TOTALS).order_by(*order_by)
+
+
+def player_totals(season=None, order_by=('-total_goals', '-avg_rating'), **filters):
+    """
+    Season totals per player, e.g. ``player_totals('2025', league_id='39')``
+    or ``player_totals('2025', player_id='276')``. One grouped query.
+    """
+    return _totals(('player_id', 'player__name'), season, order_by, **filters)
+
+
+def team_totals(season=None, order_by=('-total_goals',), **filters):
+    """Season totals per team, summed over its players (``appearances`` counts player rows)"""
+    return _totals(('team_id', 'team__name'), season, order_by, **filters).annotate(
+        matches=Count('match', distinct=True))
@@ -8,12 +8,14 @@ from django.utils import timezone
 from datetime import timedelta
 import os
 import sys
+import time
 import django
 import logging
 
 logger = logging.getLogger(__name__)
 
 from .models import Match, Profile
+from . import metrics
 
 # Circular import prevention
 def get_notification_service():
@@ -168,6 +170,46 @@ def start():
         replace_existing=True,
     )
     logger.info("Canlı maç olayları her 3 dakikada bir kontrol edilecek.")
+
+    # Değişiklik günlüğünü sıkıştırma (her gün 04:00'te)
+    scheduler.add_job(
+        compact_change_log,
+        trigger=CronTrigger(hour=4, minute=0),
+        id="compact_change_log",
+        max_instances=1,
+        replace_existing=True,
+    )
+    logger.info("Değişiklik günlüğü her gün 04:00'te sıkıştırılacak.")
+
+    # Arama dizinini yeniden oluşturma (tam güncellemeden sonra, her gün 03:30'da)
+    scheduler.add_job(
+        rebuild_search_index,
+        trigger=CronTrigger(hour=3, minute=30),
+        id="rebuild_search_index",
+        max_instances=1,
+        replace_existing=True,
+    )
+    logger.info("Arama dizini her gün 03:30'da yeniden oluşturulacak.")
+
+    # Takım güç derecelerini tüm geçmişten yeniden hesaplama (her gün 03:45'te)
+    scheduler.add_job(
+        rebuild_team_ratings,
+        trigger=CronTrigger(hour=3, minute=45),
+        id="rebuild_team_ratings",
+        max_instances=1,
+        replace_existing=True,
+    )
+    logger.info("Takım güç dereceleri her gün 03:45'te yeniden hesaplanacak.")
+
+    # Sonuçları değişen liglerin sezon projeksiyonları (her saat başı 50. dakikada)
+    scheduler.add_job(
+        project_seasons,
+        trigger=CronTrigger(minute=50),
+        id="project_seasons",
+        max_instances=1,
+        replace_existing=True,
+    )
+    logger.info("Sezon projeksiyonları her saat yenilenecek.")
     
     scheduler.start()
     logger.info("Scheduler started!")
@@ -176,10 +218,12 @@ def update_matches_data():
     """
     Sadece maç verilerini günceller - canlı skorlar için
     """
+    started = time.time()
     try:
         logger.info("Maç verileri güncelleniyor...")
-        management.call_command('fetch_api_football_matches')
+        management.call_command('fetch_api_football_matches', no_delete=True)
         logger.info("Maç verileri başarıyla güncellendi")
+        metrics.mark_job_success('update_matches_data', started)
     except Exception as e:
         logger.error(f"Maç verilerini güncellerken hata oluştu: {e}")
 
@@ -187,12 +231,14 @@ def update_todays_matches():
     """
     Bugünkü maçları günceller - daha sık güncelleme için
     """
+    started = time.time()
     try:
         logger.info("Bugünkü maçlar güncelleniyor...")
         from datetime import datetime
         today = datetime.now().strftime('%Y-%m-%d')
-        management.call_command('fetch_api_football_matches', date=today)
+        management.call_command('fetch_api_football_matches', date=today, no_delete=True)
         logger.info("Bugünkü maçlar başarıyla güncellendi")
+        metrics.mark_job_success('update_todays_matches', started)
     except Exception as e:
         logger.error(f"Bugünkü maçları güncellerken hata oluştu: {e}")
         
@@ -202,10 +248,12 @@ def update_match_lineups():
     """
     API-FOOTBALL'dan maç kadrolarını günceller
     """
+    started = time.time()
     try:
         logger.info("Maç kadroları güncelleniyor...")
         management.call_command('fetch_match_lineups', days=1)
         logger.info("Maç kadroları başarıyla güncellendi")
+        metrics.mark_job_success('update_match_lineups', started)
     except Exception as e:
         logger.error(f"Maç kadrolarını güncellerken hata oluştu: {e}")
 
@@ -213,10 +261,12 @@ def update_match_events():
     """
     API-FOOTBALL'dan maç olaylarını günceller
     """
+    started = time.time()
     try:
         logger.info("Maç olayları güncelleniyor...")
         management.call_command('fetch_match_events', days=1)
         logger.info("Maç olayları başarıyla güncellendi")
+        metrics.mark_job_success('update_match_events', started)
     except Exception as e:
         logger.error(f"Maç olaylarını güncellerken hata oluştu: {e}")
 
@@ -224,10 +274,12 @@ def update_match_statistics():
     """
     API-FOOTBALL'dan maç istatistiklerini günceller
     """
+    started = time.time()
     try:
         logger.info("Maç istatistikleri güncelleniyor...")
         management.call_command('fetch_match_statistics', days=1)
         logger.info("Maç istatistikleri başarıyla güncellendi")
+        metrics.mark_job_success('update_match_statistics', started)
     except Exception as e:
         logger.error(f"Maç istatistiklerini güncellerken hata oluştu: {e}")
 
@@ -318,3 +370,39 @@ def generate_match_previews():
         logger.info("Maç önizlemeleri başarıyla oluşturuldu.")
     except Exception as e:
         logger.error(f"Maç önizlemeleri oluşturulurken hata oluştu: {e}")
+
+def compact_change_log():
+    """/api/changes/ günlüğündeki eski ve geçersiz kayıtları temizle"""
+    started = time.time()
+    try:
+        management.call_command('compact_change_log')
+        metrics.mark_job_success('compact_change_log', started)
+    except Exception as e:
+        logger.error(f"Değişiklik günlüğü sıkıştırılırken hata oluştu: {e}")
+
+def rebuild_search_index():
+    """Toplu eklenen veya silinen takım/oyuncu/ligleri arama dizinine yansıt"""
+    started = time.time()
+    try:
+        management.call_command('rebuild_search_index')
+        metrics.mark_job_success('rebuild_search_index', started)
+    except Exception as e:
+        logger.error(f"Arama dizini oluşturulurken hata oluştu: {e}")
+
+def rebuild_team_ratings():
+    """Düzeltilen ve toplu yazılan skorları takım güç derecelerine yansıt"""
+    started = time.time()
+    try:
+        management.call_command('rebuild_team_ratings')
+        metrics.mark_job_success('rebuild_team_ratings', started)
+    except Exception as e:
+        logger.error(f"Takım güç dereceleri hesaplanırken hata oluştu: {e}")
+
+def project_seasons():
+    """Sonuçları değişen liglerin şampiyonluk ve küme düşme olasılıklarını yeniden simüle et"""
+    started = time.time()
+    try:
+        management.call_command('project_seasons')
+        metrics.mark_job_success('project_seasons', started)
+    except Exception as e:
+        logger.error(f"Sezon projeksiyonları hesaplanırken hata oluştu: {e}")
@@ -0,0 +1,180 @@
+"""
+Full-text search over team, player and league names.
+
+On SQLite the names live in an FTS5 table (``scores_search``) created by
+migration 0011. Documents are stored folded (see ``text_utils.fold``), so
+"galatasaray", "GALATASARAY" and "Galatasaray" match, as do "besiktas" and
+"Beşiktaş". Every query token is a prefix, which makes ``search`` usable for
+typeahead; the FTS prefix indexes keep 2-4 character prefixes fast. Exact
+and leading matches come first, then shorter names.
+
+Rows are keyed by a hash of (kind, id) so a save replaces its document with a
+rowid lookup. ``post_save`` keeps single rows in sync; ``bulk_create`` paths
+and deletes are picked up by ``rebuild`` (stale hits for deleted rows are
+dropped when the results are resolved). Other databases fall back to
+``icontains`` on the name columns.
+"""
+import hashlib
+
+from django.db import connections, router
+from django.db.models.expressions import RawSQL
+
+from .models import League, Player, Team
+from .text_utils import tokens
+
+TABLE = 'scores_search'
+CREATE_TABLE = (
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {TABLE} USING fts5("
+    "body, kind UNINDEXED, object_id UNINDEXED, "
+    "prefix='2 3 4', tokenize='unicode61 remove_diacritics 2')"
+)
+MIN_QUERY_LENGTH = 2
+DEFAULT_LIMIT = 10
+MAX_LIMIT = 50
+CANDIDATES = 200
+
+# kind -> (model, indexed columns, columns returned as (name, detail))
+SOURCES = {
+    'team': (Team, ('name',), ('name', 'league__name')),
+    'player': (Player, ('name',), ('name', 'team__name')),
+    'league': (League, ('name', 'country'), ('name', 'country')),
+}
+KINDS = tuple(SOURCES)
+_KIND_BY_MODEL = {model: kind for kind, (model, _, _) in SOURCES.items()}
+
+
+def _connection():
+    return connections[router.db_for_write(Player)]
+
+
+def enabled():
+    return _connection().vendor == 'sqlite'
+
+
+def _rowid(kind, object_id):
+    digest = hashlib.blake2b(f"{kind}:{object_id}".encode(), digest_size=7).digest()
+    return int.from_bytes(digest, 'big')
+
+
+def _document(kind, object_id, *values):
+    body = ' '.join(tokens(' '.join(value for value in values if value)))
+    return _rowid(kind, object_id), body, kind, str(object_id)
+
+
+def index(instance):
+    """Add or replace the document of one Team, Player or League"""
+    kind = _KIND_BY_MODEL.get(type(instance))
+    if kind is None or not enabled():
+        return
+    _, columns, _ = SOURCES[kind]
+    document = _document(kind, instance.pk, *(getattr(instance, column) for column in columns))
+    with _connection().cursor() as cursor:
+        cursor.execute(f"DELETE FROM {TABLE} WHERE rowid = %s", [document[0]])
+        cursor.execute(f"INSERT INTO {TABLE} (rowid, body, kind, object_id) VALUES (%s, %s, %s, %s)", document)
+
+
+def rebuild(kinds=KINDS, batch_size=5000):
+    """Re-index every row of ``kinds`` from scratch; returns {kind: documents}"""
+    if not enabled():
+        return {}
+    counts = {}
+    with _connection().cursor() as cursor:
+        if set(kinds) == set(KINDS):
+            cursor.execute(f"DELETE FROM {TABLE}")
+        for kind in kinds:
+            model, columns, _ = SOURCES[kind]
+            if set(kinds) != set(KINDS):
+                cursor.execute(f"DELETE FROM {TABLE} WHERE kind = %s", [kind])
+            batch, counts[kind] = [], 0
+            for row in model.objects.order_by().values_list('pk', *columns).iterator(chunk_size=batch_size):
+                batch.append(_document(kind, *row))
+                if len(batch) >= batch_size:
+                    cursor.executemany(f"INSERT INTO {TABLE} (rowid, body, kind, object_id) VALUES (%s, %s, %s, %s)", batch)
+                    counts[kind] += len(batch)
+                    batch = []
+            if batch:
+                cursor.executemany(f"INSERT INTO {TABLE} (rowid, body, kind, object_id) VALUES (%s, %s, %s, %s)", batch)
+                counts[kind] += len(batch)
+        # Merge the b-trees written above so queries touch as few segments as possible
+        cursor.execute(f"INSERT INTO {TABLE} ({TABLE}) VALUES ('optimize')")
+    return counts
+
+
+def _match_expression(query):
+    """Every token as a quoted prefix: 'fener bah' -> '"fener"* "bah"*'"""
+    return ' '.join(f'"{token}"*' for token in tokens(query))
+
+
+def _hits(query, kinds, limit):
+    """(kind, object_id) pairs, best first"""
+    expression = _match_expression(query)
+    if not expression:
+        return []
+    folded = ' '.join(tokens(query))
+    # Ranking every match (ORDER BY rank) costs ~15 ms for a two-letter
+    # prefix on 100k players, so three small unranked lookups are merged and
+    # ranked below instead. Two cheap initial-token queries bring names that
+    # start with the query as whole tokens (the exact name among them) and as
+    # a prefix, so a short prefix does not lose them to the arbitrary
+    # CANDIDATES matches of the last lookup
+    kind_filter = f" AND kind IN ({', '.join(['%s'] * len(kinds))})" if set(kinds) != set(KINDS) else ''
+    lookups = [(f'^"{folded}"', limit), (f'^"{folded}"*', limit), (expression, max(limit, CANDIDATES))]
+    sql, params = [], []
+    for match, size in lookups:
+        sql.append(f"SELECT * FROM (SELECT kind, object_id, body FROM {TABLE} WHERE {TABLE} MATCH %s"
+                   f"{kind_filter} LIMIT %s)")
+        params.extend([match, *(kinds if kind_filter else []), size])
+    with _connection().cursor() as cursor:
+        cursor.execute(' UNION ALL '.join(sql), params)
+        rows = list(dict.fromkeys(cursor.fetchall()))
+
+    rows.sort(key=lambda row: (row[2] != folded, not row[2].startswith(folded), len(row[2]), row[2]))
+    return [(kind, object_id) for kind, object_id, _ in rows[:limit]]
+
+
+def _fallback_hits(query, kinds, limit):
+    hits = []
+    for kind in kinds:
+        model, columns, _ = SOURCES[kind]
+        queryset = model.objects.filter(**{f"{columns[0]}__icontains": query.strip()})
+        hits.extend((kind, pk) for pk in queryset.order_by(columns[0]).values_list('pk', flat=True)[:limit])
+    return hits[:limit]
+
+
+def object_ids(kind, query):
+    """
+    Every id of one kind matching ``query``, as a subquery for ``pk__in``
+    (used by the admin search box, so not capped or ranked)
+    """
+    if not enabled():
+        model, columns, _ = SOURCES[kind]
+        return model.objects.filter(**{f"{columns[0]}__icontains": query.strip()}).values('pk')
+    expression = _match_expression(query)
+    if not expression:
+        return []
+    return RawSQL(f"SELECT object_id FROM {TABLE} WHERE {TABLE} MATCH %s AND kind = %s", (expression, kind))
+
+
+def search(query, kinds=KINDS, limit=DEFAULT_LIMIT):
+    """
+    Typeahead results: [{'type', 'id', 'name', 'detail'}], best first.
+
+    Queries shorter than MIN_QUERY_LENGTH return nothing; a one-letter prefix
+    matches most of the index and cannot be answered quickly.
+    """
+    kinds = [kind for kind in KINDS if kind in kinds]
+    if len(query.strip()) < MIN_QUERY_LENGTH or not kinds:
+        return []
+    limit = max(1, min(limit, MAX_LIMIT))
+    hits = _hits(query, kinds, limit) if enabled() else _fallback_hits(query, kinds, limit)
+
+    wanted = {}
+    for kind, object_id in hits:
+        wanted.setdefault(kind, []).append(object_id)
+    rows = {}
+    for kind, ids in wanted.items():
+        model, _, shown = SOURCES[kind]
+        for pk, name, detail in model.objects.filter(pk__in=ids).values_list('pk', *shown):
+            rows[kind, pk] = {'type': kind, 'id': pk, 'name': name, 'detail': detail}
+    # Rows deleted since the last rebuild are skipped
+    return [rows[hit] for hit in hits if hit in rows]
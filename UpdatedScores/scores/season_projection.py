@@ -0,0 +1,247 @@
+"""
+Monte Carlo season projections (``SeasonProjection``).
+
+The remaining fixtures of a league's current season are played
+``SIMULATIONS`` times at once: the goals of every fixture in every
+simulation are drawn from Poisson distributions whose means are the
+expected goals of the team ratings (team_ratings.py), as one
+(simulations, fixtures) array per side sampled by inverse CDF against
+uniform draws. Points, goal difference and goals
+scored are added to the current table with two matrix products against the
+fixture/team incidence matrices, every simulated table is ranked with one
+``argsort``, and the counts give each team's probability of finishing in
+each position. 10,000 simulations of a 380-fixture season take a fraction of
+a second.
+
+A projection is stored per league together with a key of the season's
+results and fixture list. ``project_seasons`` (hourly in the scheduler)
+simulates again only the leagues whose key changed, i.e. where a result or
+the fixture list changed; this also covers results written in bulk without
+signals. It can spread the leagues over a process pool (parallel.py).
+Requests never simulate: ``stored`` reads the saved row and marks it stale
+when it belongs to an earlier season.
+"""
+import hashlib
+
+import numpy as np
+
+from .models import Match, SeasonProjection
+from .team_form import final_goals
+from .team_ratings import MAX_GOALS, RatingEngine, goal_distribution
+
+SIMULATIONS = 10000
+# Simulations drawn per block, to keep the (block, fixtures) arrays small
+BLOCK = 2500
+TOP_PLACES = 4
+RELEGATION_PLACES = 3
+# Fixtures that will not be played
+VOID_STATUSES = frozenset({'CANC', 'ABD'})
+
+
+def current_season(league_id):
+    """Season label of the league's latest match (None when unlabelled or without matches)"""
+    return Match.objects.filter(league_id=league_id).order_by('-match_date').values_list(
+        'season', flat=True).first()
+
+
+def load(league_id):
+    """
+    Inputs of a projection as plain data (one query for the season's
+    matches): team ids, the current table, the remaining fixtures and the
+    results key. A league whose latest match has no season label has no
+    projection (no team ids), rather than one over every season's fixtures.
+    """
+    season = current_season(league_id)
+    rows = []
+    if season is not None:
+        rows = Match.objects.filter(league_id=league_id, season=season).order_by('match_date', 'id').values_list(
+            'id', 'score', 'status', 'home_team_id', 'away_team_id')
+
+    team_ids, codes = [], {}
+    table = {}
+    fixtures = []
+    digest = hashlib.sha1()
+    for match_id, score, status, home_id, away_id in rows:
+        if home_id == away_id or status in VOID_STATUSES:
+            continue
+        for team_id in (home_id, away_id):
+            if team_id not in codes:
+                codes[team_id] = len(team_ids)
+                team_ids.append(team_id)
+                table[team_id] = [0, 0, 0, 0]  # played, points, goal difference, goals for
+        goals = final_goals(score, status)
+        if goals is None:
+            fixtures.append((codes[home_id], codes[away_id]))
+            digest.update(f"{match_id}:{home_id}:{away_id};".encode())
+            continue
+        home_goals, away_goals = goals
+        for team_id, scored, conceded in ((home_id, home_goals, away_goals), (away_id, away_goals, home_goals)):
+            row = table[team_id]
+            row[0] += 1
+            row[1] += 3 if scored > conceded else 1 if scored == conceded else 0
+            row[2] += scored - conceded
+            row[3] += scored
+        digest.update(f"{match_id}:{home_id}:{away_id}:{home_goals}-{away_goals};".encode())
+    return {
+        'league_id': league_id,
+        'season': season,
+        'team_ids': team_ids,
+        'table': [table[team_id] for team_id in team_ids],
+        'fixtures': fixtures,
+        'key': digest.hexdigest(),
+    }
+
+
+def simulate(table, home, away, home_xg, away_xg, simulations=SIMULATIONS, rng=None):
+    """
+    (teams, teams) matrix of final position probabilities (row: team,
+    column: position, 0 is first) from the current ``table`` rows
+    (played, points, goal difference, goals for) and the remaining fixtures
+    as parallel arrays of team codes and expected goals. Ties on points,
+    goal difference and goals scored are broken at random.
+    """
+    rng = np.random.default_rng(rng)
+    table = np.asarray(table, dtype=np.float32).reshape(-1, 4)
+    size = len(table)
+    home = np.asarray(home, dtype=np.int64)
+    away = np.asarray(away, dtype=np.int64)
+    home_matrix = np.zeros((len(home), size), dtype=np.float32)
+    away_matrix = np.zeros((len(away), size), dtype=np.float32)
+    home_matrix[np.arange(len(home)), home] = 1.0
+    away_matrix[np.arange(len(away)), away] = 1.0
+    difference_matrix = home_matrix - away_matrix
+    # Inverse-CDF sampling: the goals of a side are the number of CDF steps below a uniform draw
+    home_cdf = np.cumsum(goal_distribution(home_xg), axis=1).astype(np.float32)
+    away_cdf = np.cumsum(goal_distribution(away_xg), axis=1).astype(np.float32)
+
+    def goals(cdf, block):
+        draws = rng.random((block, len(cdf)), dtype=np.float32)
+        sampled = np.zeros((block, len(cdf)), dtype=np.int8)
+        for column in cdf[:, :MAX_GOALS].T:
+            sampled += draws > column
+        return sampled
+
+    counts = np.zeros(size * size, dtype=np.int64)
+    done = 0
+    while done < simulations:
+        block = min(BLOCK, simulations - done)
+        home_goals = goals(home_cdf, block)
+        away_goals = goals(away_cdf, block)
+        wins = home_goals > away_goals
+        draws = home_goals == away_goals
+        losses = ~(wins | draws)
+        home_points = (3 * wins + draws).astype(np.float32)
+        away_points = (3 * losses + draws).astype(np.float32)
+
+        points = table[:, 1] + home_points @ home_matrix + away_points @ away_matrix
+        goal_diff = table[:, 2] + (home_goals - away_goals).astype(np.float32) @ difference_matrix
+        goals_for = (table[:, 3] + home_goals.astype(np.float32) @ home_matrix
+                     + away_goals.astype(np.float32) @ away_matrix)
+        # One sortable number per team: points, then goal difference, then goals, then a coin toss
+        score = (points.astype(np.float64) * 1e7 + (goal_diff + 5e3) * 1e3 + goals_for
+                 + rng.random((block, size)))
+        order = np.argsort(-score, axis=1)
+        counts += np.bincount((order * size + np.arange(size)).ravel(), minlength=size * size)
+        done += block
+    return counts.reshape(size, size) / max(simulations, 1)
+
+
+def project(inputs, simulations=SIMULATIONS, rng=None):
+    """Projection of the league described by ``inputs`` (see ``load``) as a dict of SeasonProjection fields"""
+    team_ids = inputs['team_ids']
+    fixtures = np.asarray(inputs['fixtures'], dtype=np.int64).reshape(-1, 2)
+    engine = RatingEngine.load(team_ids)
+    expected = engine.predict(fixtures[:, 0], fixtures[:, 1])
+    positions = simulate(inputs['table'], fixtures[:, 0], fixtures[:, 1], expected['home_xg'], expected['away_xg'],
+                         simulations, rng)
+
+    size = len(team_ids)
+    # Expected points: current points plus the expected points of each remaining fixture
+    expected_points = np.array([row[1] for row in inputs['table']], dtype=np.float64).reshape(size)
+    np.add.at(expected_points, fixtures[:, 0], 3 * expected['home_win'] + expected['draw'])
+    np.add.at(expected_points, fixtures[:, 1], 3 * expected['away_win'] + expected['draw'])
+    relegation = RELEGATION_PLACES if size > 2 * RELEGATION_PLACES else 0
+    rows = []
+    for code, team_id in enumerate(team_ids):
+        played, points, goal_diff, goals_for = inputs['table'][code]
+        odds = positions[code]
+        rows.append({
+            'team_id': team_id,
+            'played': played,
+            'points': points,
+            'goal_diff': goal_diff,
+            'expected_points': round(float(expected_points[code]), 1),
+            'expected_position': round(float(odds @ np.arange(1, size + 1)), 2),
+            'title': round(float(odds[0]), 4),
+            'top': round(float(odds[:TOP_PLACES].sum()), 4),
+            'relegation': round(float(odds[size - relegation:].sum()), 4) if relegation else 0.0,
+            'positions': [round(float(value), 4) for value in odds],
+        })
+    rows.sort(key=lambda row: row['expected_position'])
+    return {
+        'league_id': inputs['league_id'],
+        'season': inputs['season'],
+        'results_key': inputs['key'],
+        'simulations': simulations,
+        'remaining': len(fixtures),
+        'table': rows,
+    }
+
+
+# ---------------------------------------------------------------------------
+# Writing
+# ---------------------------------------------------------------------------
+
+def _is_current(row, inputs, simulations):
+    return row is not None and row.results_key == inputs['key'] and row.simulations == simulations
+
+
+def project_leagues(league_ids, simulations=SIMULATIONS, force=False):
+    """
+    Projections (SeasonProjection field dicts) of the leagues in
+    ``league_ids`` whose results changed since they were stored, or all of
+    them with ``force``. Module-level so it can run in a worker process.
+    """
+    stored = SeasonProjection.objects.in_bulk(league_ids)
+    projections = []
+    for league_id in league_ids:
+        inputs = load(league_id)
+        if not inputs['team_ids'] or (not force and _is_current(stored.get(league_id), inputs, simulations)):
+            continue
+        projections.append(project(inputs, simulations))
+    return projections
+
+
+def save(projections, batch_size=100):
+    """Upsert projection dicts; returns the number written"""
+    if projections:
+        SeasonProjection.objects.bulk_create(
+            [SeasonProjection(**fields) for fields in projections], batch_size=batch_size, update_conflicts=True,
+            unique_fields=['league'],
+            update_fields=['season', 'results_key', 'simulations', 'remaining', 'table', 'last_updated'],
+        )
+    return len(projections)
+
+
+# ---------------------------------------------------------------------------
+# Reading
+# ---------------------------------------------------------------------------
+
+def stored(league_id):
+    """
+    The league's stored projection, without simulating (None when
+    ``project_seasons`` has not written one yet). ``stale`` is set on it when
+    it belongs to another season than the league's latest match.
+    """
+    row = SeasonProjection.objects.filter(league_id=league_id).first()
+    if row is not None:
+        row.stale = row.season != current_season(league_id)
+    return row
+
+
+def chances(projection):
+    """{team_id: projection row} of a stored projection (empty for None)"""
+    if projection is None:
+        return {}
+    return {row['team_id']: row for row in projection.table}
+
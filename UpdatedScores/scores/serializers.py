@@ -27,3 +27,101 @@ class ProfileSerializer(serializers.ModelSerializer):
     class Meta:
         model = Profile
         fields = ['user', 'first_name', 'last_name', 'birth_date', 'favorite_teams']
+
+
+# Hızlı okuma yolu: liste uçlarında her satır için ModelSerializer örneği
+# oluşturmak yerine .values() satırlarından doğrudan dict üretilir.
+# Çıktı, yukarıdaki serializer'larla birebir aynıdır.
+
+class ValuesSerializer:
+    """
+    Read-only serializer over ``.values()`` rows.
+
+    ``fields`` lists the output keys in order; ``relations`` maps a key to the
+    ValuesSerializer used when it is expanded (otherwise the key holds the
+    related id). ``representations`` converts a column's raw value.
+    """
+    fields = ()
+    relations = {}
+    representations = {}
+
+    def __init__(self, fields=None, expand=None):
+        unknown = set(fields or ()) - set(self.fields)
+        if unknown:
+            raise serializers.ValidationError({'fields': f"Bilinmeyen alan(lar): {', '.join(sorted(unknown))}"})
+        unknown = set(expand or ()) - set(self.relations)
+        if unknown:
+            raise serializers.ValidationError({'expand': f"Genişletilemeyen alan(lar): {', '.join(sorted(unknown))}"})
+        self.selected = [f for f in self.fields if not fields or f in fields]
+        # No ?expand= keeps the nested output of the ModelSerializers
+        self.expanded = set(self.relations) if expand is None else set(expand)
+
+    @classmethod
+    def from_request(cls, request):
+        def names(param):
+            raw = request.query_params.get(param)
+            return None if raw is None else [name.strip() for name in raw.split(',') if name.strip()]
+        return cls(fields=names('fields'), expand=names('expand'))
+
+    def _plan(self, prefix=''):
+        """(key, column, converter, nested plan) for every selected field"""
+        plan = []
+        for name in self.selected:
+            if name in self.relations and name in self.expanded:
+                nested = self.relations[name]()
+                plan.append((name, f"{prefix}{name}__id", None, nested._plan(f"{prefix}{name}__")))
+            elif name in self.relations:
+                plan.append((name, f"{prefix}{name}_id", None, None))
+            else:
+                plan.append((name, f"{prefix}{name}", self.representations.get(name), None))
+        return plan
+
+    @staticmethod
+    def _columns(plan):
+        for _, column, _, nested in plan:
+            if nested is None:
+                yield column
+            else:
+                yield from ValuesSerializer._columns(nested)
+
+    def columns(self, *always):
+        """Columns to pass to .values(); ``always`` adds e.g. the pagination ordering"""
+        columns = list(dict.fromkeys(self._columns(self._plan())))
+        return columns + [c for c in always if c not in columns]
+
+    def values(self, queryset, *always):
+        return queryset.values(*self.columns(*always))
+
+    @staticmethod
+    def _build(row, plan):
+        data = {}
+        for key, column, convert, nested in plan:
+            if nested is not None:
+                data[key] = ValuesSerializer._build(row, nested) if row[column] is not None else None
+            else:
+                value = row[column]
+                data[key] = convert(value) if convert is not None and value is not None else value
+        return data
+
+    def to_representation(self, rows):
+        plan = self._plan()
+        return [self._build(row, plan) for row in rows]
+
+
+class LeagueValuesSerializer(ValuesSerializer):
+    fields = ('id', 'name', 'country')
+
+
+class TeamValuesSerializer(ValuesSerializer):
+    fields = ('id', 'name', 'logo', 'league')
+    relations = {'league': LeagueValuesSerializer}
+
+
+class MatchValuesSerializer(ValuesSerializer):
+    fields = ('id', 'home_team', 'away_team', 'match_date', 'league', 'stadium', 'score')
+    relations = {
+        'home_team': TeamValuesSerializer,
+        'away_team': TeamValuesSerializer,
+        'league': LeagueValuesSerializer,
+    }
+    representations = {'match_date': serializers.DateTimeField().to_representation}
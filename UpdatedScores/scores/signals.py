@@ -1,11 +1,15 @@
 from django.db.models.signals import post_save
 from django.contrib.auth.models import User
-from django.dispatch import receiver
-from .models import Profile, Event, Match
+from django.dispatch import Signal, receiver
+from .models import Profile, Event, Match, Team, Player, League
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Sent once per match, when the lineups of both sides are stored as confirmed.
+# Arguments: match, lineup_info ({'home_team': [starter names], 'away_team': [...]})
+lineups_confirmed = Signal()
+
 # Prevent circular imports
 def get_notification_service():
     from .notification_service import NotificationService
@@ -61,3 +65,41 @@ def handle_match_status_changes(sender, instance, **kwargs):
             notification_service.notify_match_start(instance)
     except Exception as e:
         logger.error(f"Failed to process match notification: {str(e)}")
+
+
+@receiver(post_save, sender=Match)
+def publish_match_delta(sender, instance, **kwargs):
+    """Push score/status/kick-off changes to the live stream, the change log and the result read models."""
+    # Shared with bulk writers that skip this signal (match_updates.py)
+    from .match_updates import match_saved
+    match_saved(instance, getattr(instance, '_loaded_state', None))
+    instance._loaded_state = instance.snapshot()
+
+@receiver(post_save, sender=Event)
+def publish_event_delta(sender, instance, created, **kwargs):
+    """Push new match events to the live stream subscribers."""
+    if created:
+        try:
+            from .live_stream import publish_event
+            publish_event(instance)
+        except Exception as e:
+            logger.error(f"Failed to publish live event: {str(e)}")
+
+@receiver(post_save, sender=Team)
+@receiver(post_save, sender=Player)
+@receiver(post_save, sender=League)
+def update_search_index(sender, instance, **kwargs):
+    """Keep the name search index in step with single-row saves."""
+    try:
+        from .search import index
+        index(instance)
+    except Exception as e:
+        logger.error(f"Failed to update search index: {str(e)}")
+
+@receiver(lineups_confirmed)
+def handle_lineups_confirmed(sender, match, lineup_info, **kwargs):
+    """Tell followers the starting elevens once the lineups are confirmed."""
+    try:
+        get_notification_service().notify_lineup(match, lineup_info)
+    except Exception as e:
+        logger.error(f"Failed to send lineup notification: {str(e)}")
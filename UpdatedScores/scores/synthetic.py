@@ -0,0 +1,279 @@
+"""
+Deterministic synthetic data for load and performance testing.
+
+The generator writes leagues, teams, players, matches, events and user
+profiles with favorites using bulk_create in batches, so signals (and the
+notifications they trigger) are not fired. The same seed and scale always
+produce the same rows, which keeps benchmark baselines comparable.
+"""
+import logging
+import random
+from dataclasses import dataclass, fields, replace
+from datetime import timedelta
+from itertools import accumulate
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.utils import timezone
+
+from .models import League, Team, Player, Match, Event, Profile
+
+logger = logging.getLogger(__name__)
+
+# Synthetic ids start here so they never collide with API-FOOTBALL ids
+ID_OFFSET = 900000000
+USERNAME_PREFIX = 'synthetic_user_'
+DEFAULT_PASSWORD = 'synthetic-pass-123'
+
+
+@dataclass(frozen=True)
+class Scale:
+    leagues: int
+    teams: int
+    players: int
+    matches: int
+    events: int
+    profiles: int
+    favorites_per_profile: int = 3
+
+
+SCALES = {
+    'tiny': Scale(leagues=2, teams=8, players=120, matches=60, events=400, profiles=20),
+    'small': Scale(leagues=5, teams=100, players=3000, matches=5000, events=50000, profiles=1000),
+    'medium': Scale(leagues=20, teams=400, players=12000, matches=50000, events=500000, profiles=20000),
+    'large': Scale(leagues=50, teams=1000, players=30000, matches=200000, events=2000000, profiles=100000),
+}
+
+COUNTRIES = ['England', 'Spain', 'Italy', 'Germany', 'France', 'Turkey', 'Portugal', 'Netherlands']
+NAME_PARTS = ['Ali', 'Mehmet', 'John', 'Luca', 'Pierre', 'Hans', 'Diego', 'Jan', 'Emre', 'Marco',
+              'Yılmaz', 'Smith', 'Rossi', 'Müller', 'García', 'Silva', 'Dupont', 'Öztürk', 'Jansen', 'Costa']
+STADIUM_SUFFIXES = ['Arena', 'Stadium', 'Park', 'Ground']
+POSITIONS = ['GK', 'DF', 'DF', 'DF', 'DF', 'MF', 'MF', 'MF', 'FW', 'FW', 'FW']
+EVENT_WEIGHTS = [('GOAL', 3), ('YELLOW', 4), ('SUB', 5), ('ASSIST', 2), ('RED', 1)]
+
+
+def scale_from_options(name, **overrides):
+    """Return the named scale with any non-None overrides applied."""
+    if name not in SCALES:
+        raise ValueError(f"Unknown scale '{name}', choose one of: {', '.join(SCALES)}")
+    known = {f.name for f in fields(Scale)}
+    changes = {key: value for key, value in overrides.items() if key in known and value is not None}
+    return replace(SCALES[name], **changes)
+
+
+def synthetic_id(index):
+    return str(ID_OFFSET + index)
+
+
+class SyntheticDataGenerator:
+    """Writes a deterministic dataset for the given scale and seed."""
+
+    def __init__(self, scale, seed=42, batch_size=5000, now=None, stdout=None):
+        self.scale = scale
+        self.seed = seed
+        self.batch_size = batch_size
+        # Anchor dates on midnight so reruns on the same day produce the same rows
+        base = now or timezone.now()
+        self.now = base.replace(hour=0, minute=0, second=0, microsecond=0)
+        self.stdout = stdout
+        self.counts = {}
+
+    def _rng(self, name):
+        # One stream per table, so changing one count does not reshuffle the others
+        return random.Random(f'{self.seed}:{name}')
+
+    def _log(self, message):
+        logger.info(message)
+        if self.stdout:
+            self.stdout.write(message)
+
+    def _bulk(self, model, rows):
+        batch = []
+        total = 0
+        for row in rows:
+            batch.append(row)
+            if len(batch) >= self.batch_size:
+                model.objects.bulk_create(batch, batch_size=self.batch_size)
+                total += len(batch)
+                batch = []
+        if batch:
+            model.objects.bulk_create(batch, batch_size=self.batch_size)
+            total += len(batch)
+        self.counts[model.__name__] = total
+        self._log(f"{model.__name__}: {total} kayıt oluşturuldu")
+        return total
+
+    @staticmethod
+    def flush():
+        """Delete every synthetic row (cascades to matches, events, lineups...)."""
+        User.objects.filter(username__startswith=USERNAME_PREFIX).delete()
+        League.objects.filter(id__regex=r'^9\d{8}$').delete()
+
+    def generate(self):
+        with transaction.atomic():
+            self._leagues()
+            self._teams()
+            self._players()
+            self._matches()
+            self._events()
+            self._profiles()
+        return self.counts
+
+    def _leagues(self):
+        rng = self._rng('leagues')
+        self._bulk(League, (
+            League(id=synthetic_id(i), name=f"Synthetic League {i + 1}", country=rng.choice(COUNTRIES))
+            for i in range(self.scale.leagues)
+        ))
+
+    def _team_league(self, team_index):
+        return synthetic_id(team_index % self.scale.leagues)
+
+    def _teams(self):
+        self._bulk(Team, (
+            Team(
+                id=synthetic_id(i),
+                name=f"Synthetic FC {i + 1}",
+                logo=f"https://example.com/logos/{ID_OFFSET + i}.png",
+                league_id=self._team_league(i),
+            )
+            for i in range(self.scale.teams)
+        ))
+
+    def _players(self):
+        rng = self._rng('players')
+        self._bulk(Player, (
+            Player(
+                id=synthetic_id(i),
+                name=f"{rng.choice(NAME_PARTS)} {rng.choice(NAME_PARTS)} {i + 1}",
+                team_id=synthetic_id(i % self.scale.teams),
+                position=POSITIONS[(i // self.scale.teams) % len(POSITIONS)],
+            )
+            for i in range(self.scale.players)
+        ))
+
+    def _match_teams(self, rng, league_index):
+        # Teams of league L are L, L + leagues, L + 2 * leagues, ...
+        league_teams = range(league_index, self.scale.teams, self.scale.leagues)
+        if len(league_teams) < 2:
+            return rng.sample(range(self.scale.teams), 2)
+        return rng.sample(league_teams, 2)
+
+    def _matches(self):
+        rng = self._rng('matches')
+        # Matches span a season: 80% played, the rest upcoming
+        past_days = 300
+        future_days = 75
+        self.match_status = []
+
+        def rows():
+            for i in range(self.scale.matches):
+                league_index = i % self.scale.leagues
+                home, away = self._match_teams(rng, league_index)
+                offset = rng.uniform(-past_days, future_days)
+                match_date = self.now + timedelta(days=offset)
+                if offset < -0.1:
+                    status = 'FT'
+                    score = f"{rng.randint(0, 4)}-{rng.randint(0, 3)}"
+                elif offset < 0:
+                    status = '2H'
+                    score = f"{rng.randint(0, 2)}-{rng.randint(0, 2)}"
+                else:
+                    status = 'NS'
+                    score = None
+                self.match_status.append(status != 'NS')
+                yield Match(
+                    id=synthetic_id(i),
+                    home_team_id=synthetic_id(home),
+                    away_team_id=synthetic_id(away),
+                    match_date=match_date,
+                    league_id=synthetic_id(league_index),
+                    stadium=f"Synthetic {rng.choice(STADIUM_SUFFIXES)} {home + 1}",
+                    score=score,
+                    round=f"Regular Season - {i // max(self.scale.leagues, 1) % 38 + 1}",
+                    season=str(self.now.year),
+                    status=status,
+                )
+
+        self._bulk(Match, rows())
+
+    def _events(self):
+        rng = self._rng('events')
+        played = [i for i, started in enumerate(self.match_status) if started]
+        event_types = [name for name, weight in EVENT_WEIGHTS for _ in range(weight)]
+        teams = self.scale.teams
+
+        def rows():
+            if not played:
+                return
+            per_match, extra = divmod(self.scale.events, len(played))
+            for position, match_index in enumerate(played):
+                count = min(per_match + (1 if position < extra else 0), 90)
+                # Distinct minutes keep (match, minute, event_type, player) unique
+                for minute in sorted(rng.sample(range(1, 91), count)):
+                    team = rng.randrange(teams)
+                    squad = range(team, self.scale.players, teams)
+                    player = rng.choice(squad) if squad else None
+                    event_type = rng.choice(event_types)
+                    yield Event(
+                        match_id=synthetic_id(match_index),
+                        minute=minute,
+                        event_type=event_type,
+                        description=f"{event_type} {minute}'",
+                        player_id=synthetic_id(player) if player is not None else None,
+                    )
+
+        self._bulk(Event, rows())
+
+    def _profiles(self):
+        rng = self._rng('profiles')
+        # Hashing is deliberately slow, so every synthetic user shares one hash
+        password = make_password(DEFAULT_PASSWORD, salt='synthetic')
+        self._bulk(User, (
+            User(
+                username=f"{USERNAME_PREFIX}{i}",
+                email=f"{USERNAME_PREFIX}{i}@example.com",
+                password=password,
+            )
+            for i in range(self.scale.profiles)
+        ))
+        user_ids = User.objects.filter(
+            username__startswith=USERNAME_PREFIX
+        ).order_by('id').values_list('id', flat=True)
+        self._bulk(Profile, (
+            Profile(user_id=user_id, notification_method=rng.choice(['push', 'email', 'both']))
+            for user_id in user_ids.iterator()
+        ))
+
+        profile_ids = list(Profile.objects.filter(
+            user__username__startswith=USERNAME_PREFIX
+        ).order_by('user_id').values_list('id', flat=True))
+        favorites = min(self.scale.favorites_per_profile, self.scale.teams)
+        # Popularity is skewed: low-numbered teams have many more fans
+        cum_weights = list(accumulate(1.0 / (i + 1) for i in range(self.scale.teams)))
+        team_indexes = range(self.scale.teams)
+
+        def team_rows():
+            through = Profile.favorite_teams.through
+            for profile_id in profile_ids:
+                chosen = set()
+                while len(chosen) < favorites:
+                    chosen.add(rng.choices(team_indexes, cum_weights=cum_weights)[0])
+                for team in sorted(chosen):
+                    yield through(profile_id=profile_id, team_id=synthetic_id(team))
+
+        def league_rows():
+            through = Profile.favorite_leagues.through
+            for profile_id in profile_ids:
+                yield through(profile_id=profile_id, league_id=synthetic_id(rng.randrange(self.scale.leagues)))
+
+        def player_rows():
+            through = Profile.favorite_players.through
+            for profile_id in profile_ids:
+                yield through(profile_id=profile_id, player_id=synthetic_id(rng.randrange(self.scale.players)))
+
+        self._bulk(Profile.favorite_teams.through, team_rows())
+        self._bulk(Profile.favorite_leagues.through, league_rows())
+        if self.scale.players:
+            self._bulk(Profile.favorite_players.through, player_rows())
@@ -0,0 +1,279 @@
+"""
+Rolling team form (``TeamForm``).
+
+The match screens, the preview generators and the team page each asked for a
+team's last results with their own ordered query. ``TeamForm`` keeps, per
+team and competition, the last ``FORM_LENGTH`` results ('W'/'D'/'L', most
+recent first), the matching goal-difference series, short summaries of those
+matches and the current streaks, so every consumer reads it with one keyed
+lookup. Each team also has a row over all competitions (``league`` None);
+"last 5" on the match and team pages reads that one, so cup and European
+matches count, while a league-only form (as in API-FOOTBALL predictions)
+reads the team's row in that league.
+
+Rows are maintained from ``post_save`` on ``Match``: when a match first gets
+a final score the result is pushed onto both teams' overall and competition
+rows. Anything that can
+not be applied incrementally (a corrected score, a result older than the
+newest stored one, a team without a row yet) rebuilds the affected rows from
+the matches table, which is also what ``rebuild_team_form`` does for all of
+them.
+
+Readers pass a cut-off date: for upcoming fixtures the stored window is the
+answer; for an old match the window may already have moved past it, in which
+case ``recent`` and ``form`` return None and the caller queries as before.
+"""
+from collections import defaultdict
+from datetime import datetime
+
+from django.db import transaction
+from django.db.models import Q
+
+from .match_ratings import parse_score
+from .models import Match, TeamForm
+
+FORM_LENGTH = 10
+RECENT = 5
+# A score with one of these statuses is not final yet
+LIVE_STATUSES = frozenset({'1H', 'HT', '2H', 'ET', 'BT', 'P', 'SUSP', 'INT', 'LIVE'})
+STATE_FIELDS = ['form', 'goal_diffs', 'matches', 'played', 'streak_result', 'streak', 'unbeaten_streak',
+                'winless_streak', 'last_match_date']
+
+
+def final_goals(score, status):
+    """(home goals, away goals) of a finished match, else None"""
+    if status in LIVE_STATUSES:
+        return None
+    return parse_score(score)
+
+
+def result(goals_for, goals_against):
+    return 'W' if goals_for > goals_against else 'L' if goals_for < goals_against else 'D'
+
+
+def entry(match_id, match_date, home_id, home_name, away_id, away_name, score, team_id):
+    """Summary of one match from ``team_id``'s side, as stored in ``TeamForm.matches``"""
+    return {
+        'id': match_id,
+        'date': match_date.isoformat(),
+        'home_team_id': home_id,
+        'home_team_name': home_name,
+        'away_team_id': away_id,
+        'away_team_name': away_name,
+        'score': score,
+        'venue': 'home' if team_id == home_id else 'away',
+    }
+
+
+def _leading(results, wanted):
+    count = 0
+    for value in results:
+        if value not in wanted:
+            break
+        count += 1
+    return count
+
+
+def _fill(row, results, goal_diffs, entries, played):
+    """Set every derived field of ``row`` from a most-recent-first history"""
+    row.form = ''.join(results[:FORM_LENGTH])
+    row.goal_diffs = goal_diffs[:FORM_LENGTH]
+    row.matches = entries[:FORM_LENGTH]
+    row.played = played
+    row.streak_result = results[0] if results else ''
+    row.streak = _leading(results, row.streak_result) if results else 0
+    row.unbeaten_streak = _leading(results, 'WD')
+    row.winless_streak = _leading(results, 'DL')
+    row.last_match_date = datetime.fromisoformat(entries[0]['date']) if entries else None
+
+
+def _push(row, value, goal_diff, summary, match_date):
+    """Apply one result newer than everything in ``row``"""
+    row.form = (value + row.form)[:FORM_LENGTH]
+    row.goal_diffs = [goal_diff, *row.goal_diffs][:FORM_LENGTH]
+    row.matches = [summary, *row.matches][:FORM_LENGTH]
+    row.played += 1
+    row.streak = row.streak + 1 if value == row.streak_result else 1
+    row.streak_result = value
+    row.unbeaten_streak = row.unbeaten_streak + 1 if value in 'WD' else 0
+    row.winless_streak = row.winless_streak + 1 if value in 'DL' else 0
+    row.last_match_date = match_date
+
+
+# ---------------------------------------------------------------------------
+# Writing
+# ---------------------------------------------------------------------------
+
+def rebuild(team_ids=None, batch_size=500):
+    """
+    Recompute every row (overall and per competition) of ``team_ids``
+    (every team when None) from the matches table with one query; returns
+    the number of rows written.
+    """
+    queryset = Match.objects.filter(score__isnull=False)
+    if team_ids is not None:
+        queryset = queryset.filter(Q(home_team_id__in=team_ids) | Q(away_team_id__in=team_ids))
+    rows = queryset.order_by('-match_date', '-id').values_list(
+        'id', 'match_date', 'score', 'status', 'league_id',
+        'home_team_id', 'home_team__name', 'away_team_id', 'away_team__name')
+
+    history = defaultdict(lambda: ([], [], []))
+    for match_id, match_date, score, status, league_id, home_id, home_name, away_id, away_name in rows:
+        goals = final_goals(score, status)
+        if goals is None:
+            continue
+        for team_id, goals_for, goals_against in ((home_id, *goals), (away_id, goals[1], goals[0])):
+            if team_ids is not None and team_id not in team_ids:
+                continue
+            for scope in (None, league_id):
+                # Streaks need the whole run of results, the stored window only FORM_LENGTH matches
+                results, goal_diffs, entries = history[(team_id, scope)]
+                results.append(result(goals_for, goals_against))
+                if len(entries) < FORM_LENGTH:
+                    goal_diffs.append(goals_for - goals_against)
+                    entries.append(entry(match_id, match_date, home_id, home_name, away_id, away_name, score,
+                                         team_id))
+
+    forms = []
+    for (team_id, league_id), (results, goal_diffs, entries) in history.items():
+        row = TeamForm(team_id=team_id, league_id=league_id)
+        _fill(row, results, goal_diffs, entries, len(results))
+        forms.append(row)
+
+    # Replaced wholesale: this also drops rows without any finished match left
+    # (a withdrawn score), and the overall rows (NULL league) have no
+    # conflict target an upsert could use
+    existing = TeamForm.objects.all()
+    if team_ids is not None:
+        existing = existing.filter(team_id__in=team_ids)
+    with transaction.atomic():
+        existing.delete()
+        TeamForm.objects.bulk_create(forms, batch_size=batch_size)
+    return len(forms)
+
+
+def record_result(match, previous=None):
+    """
+    Update the form rows of ``match``'s teams (overall and in its
+    competition) after a save. ``previous`` is the (score, status,
+    match_date) snapshot from before it; None for a new match.
+    """
+    if previous == match.snapshot():
+        return
+    goals = final_goals(match.score, match.status)
+    was_final = previous is not None and final_goals(previous[0], previous[1]) is not None
+    if goals is None and not was_final:
+        return
+    if goals is None or was_final:
+        # Withdrawn, corrected or re-dated result: recompute from the table
+        rebuild([match.home_team_id, match.away_team_id])
+        return
+
+    rows = {(row.team_id, row.league_id): row for row in TeamForm.objects.filter(
+        Q(league__isnull=True) | Q(league_id=match.league_id),
+        team_id__in=[match.home_team_id, match.away_team_id])}
+    stale = set()
+    updated = []
+    for team_id, goals_for, goals_against in ((match.home_team_id, *goals), (match.away_team_id, goals[1], goals[0])):
+        for scope in (None, match.league_id):
+            row = rows.get((team_id, scope))
+            if row is None or (row.last_match_date and match.match_date <= row.last_match_date):
+                stale.add(team_id)
+                continue
+            _push(row, result(goals_for, goals_against), goals_for - goals_against,
+                  entry(match.id, match.match_date, match.home_team_id, match.home_team.name,
+                        match.away_team_id, match.away_team.name, match.score, team_id),
+                  match.match_date)
+            updated.append(row)
+    for row in updated:
+        if row.team_id not in stale:
+            row.save(update_fields=[*STATE_FIELDS, 'last_updated'])
+    if stale:
+        rebuild(sorted(stale))
+
+
+# ---------------------------------------------------------------------------
+# Reading
+# ---------------------------------------------------------------------------
+
+def lookup(team_id, league_id=None):
+    """
+    The form row of a team over all competitions, or in ``league_id`` only;
+    None when there is none (one keyed query)
+    """
+    return TeamForm.objects.filter(team_id=team_id, league_id=league_id).first()
+
+
+def for_matches(matches):
+    """
+    {(team_id, league_id): TeamForm} for both teams of every match, over all
+    competitions (league_id None) and in the match's competition (one query)
+    """
+    matches = list(matches)
+    team_ids = {team_id for match in matches for team_id in (match.home_team_id, match.away_team_id)}
+    if not team_ids:
+        return {}
+    league_ids = {match.league_id for match in matches}
+    return {(row.team_id, row.league_id): row for row in TeamForm.objects.filter(
+        Q(league__isnull=True) | Q(league_id__in=league_ids), team_id__in=team_ids)}
+
+
+def recent(row, before=None, n=RECENT, venue=None):
+    """
+    Up to ``n`` match summaries (most recent first) before ``before``, each
+    with ``match_date``, ``result`` and ``goal_diff`` added; None when the
+    stored window cannot answer and the caller has to query.
+    """
+    if row is None:
+        return None
+    selected = []
+    for summary, value, goal_diff in zip(row.matches, row.form, row.goal_diffs):
+        match_date = datetime.fromisoformat(summary['date'])
+        if before is not None and match_date >= before:
+            continue
+        if venue is not None and summary['venue'] != venue:
+            continue
+        selected.append({**summary, 'match_date': match_date, 'result': value, 'goal_diff': goal_diff})
+        if len(selected) == n:
+            return selected
+    # Fewer than n: only an answer if nothing older was dropped from the window
+    return selected if row.played <= len(row.matches) else None
+
+
+def summary(match, team_id):
+    """A ``recent`` item built from a ``Match``, for the query fallback"""
+    item = entry(match.id, match.match_date, match.home_team_id, match.home_team.name,
+                 match.away_team_id, match.away_team.name, match.score, team_id)
+    goals = parse_score(match.score)
+    if goals is None:
+        return {**item, 'match_date': match.match_date, 'result': '', 'goal_diff': 0}
+    goals_for, goals_against = goals if item['venue'] == 'home' else goals[::-1]
+    return {**item, 'match_date': match.match_date, 'result': result(goals_for, goals_against),
+            'goal_diff': goals_for - goals_against}
+
+
+def last_matches(match, n=RECENT):
+    """
+    ([home team items], [away team items]) of the last ``n`` results before
+    ``match`` in any competition: one keyed query, plus an ordered query per
+    team the stored window cannot answer for.
+    """
+    forms = for_matches([match])
+    sides = []
+    for team_id in (match.home_team_id, match.away_team_id):
+        items = recent(forms.get((team_id, None)), match.match_date, n)
+        if items is None:
+            items = [summary(m, team_id) for m in Match.objects.filter(
+                Q(home_team_id=team_id) | Q(away_team_id=team_id),
+                match_date__lt=match.match_date, score__isnull=False,
+            ).select_related('home_team', 'away_team').order_by('-match_date')[:n]]
+        sides.append(items)
+    return sides
+
+
+def form(row, before=None, n=RECENT, venue=None):
+    """'WDLWW' (most recent first) from the stored window, or None (see ``recent``)"""
+    summaries = recent(row, before, n, venue)
+    if summaries is None:
+        return None
+    return ''.join(summary['result'] for summary in summaries)
@@ -0,0 +1,225 @@
+"""
+Team strength ratings for the generated match predictions.
+
+``generate_match_analysis`` used to pick a prediction with weighted
+``random.choices`` and fill the team stats with random shot and possession
+numbers. Each team now has a persisted ``TeamRating``:
+
+* an Elo rating (K=20, 60 points for playing at home), and
+* Poisson attack and defence parameters on a log scale, so the expected
+  goals of a side are ``MEAN_GOALS * exp(home bonus + attack - opponent
+  defence)``. After every result both parameters move by ``LEARNING_RATE``
+  times (goals - expected goals), one stochastic gradient step on the Poisson
+  log-likelihood.
+
+``rebuild`` replays every finished match once, oldest first, and writes the
+ratings; after that ``post_save`` on ``Match`` applies each new result to
+the two teams involved, an O(1) update of two rows. A result dated at or
+before a team's last applied one is skipped: it was either applied already
+(a match deleted and ingested again arrives as new) or is out of order.
+Those, and corrected or withdrawn scores, which are not unwound
+incrementally, are picked up by the nightly rebuild.
+
+``forecast`` scores a whole batch of fixtures in one NumPy pass: the
+expected goals of both sides, the (MAX_GOALS + 1)^2 scoreline probabilities,
+win/draw/loss probabilities, and the most likely score of the most likely
+outcome.
+"""
+import math
+
+import numpy as np
+
+from .models import Match, TeamRating
+from .team_form import final_goals
+
+INITIAL_ELO = 1500.0
+ELO_K = 20.0
+HOME_ELO = 60.0
+# Goals per side between two average teams on neutral ground, and the home side's log-rate bonus
+MEAN_GOALS = 1.3
+HOME_GOALS = 0.15
+LEARNING_RATE = 0.04
+MAX_GOALS = 10
+FIELDS = ['elo', 'attack', 'defence', 'matches', 'last_match_date']
+
+_GOALS = np.arange(MAX_GOALS + 1)
+_LOG_FACTORIALS = np.concatenate([[0.0], np.cumsum(np.log(np.arange(1, MAX_GOALS + 1)))])
+_HOME_WIN = np.tril(np.ones((MAX_GOALS + 1, MAX_GOALS + 1), dtype=bool), -1)
+_DRAW = np.eye(MAX_GOALS + 1, dtype=bool)
+_AWAY_WIN = ~(_HOME_WIN | _DRAW)
+
+
+def goal_distribution(rates):
+    """(n, MAX_GOALS + 1) Poisson probabilities of 0..MAX_GOALS goals for each expected-goals rate"""
+    rates = np.asarray(rates, dtype=np.float64)
+    return np.exp(np.log(rates)[:, None] * _GOALS - rates[:, None] - _LOG_FACTORIALS)
+
+
+def step(home, away, home_goals, away_goals):
+    """
+    Apply one result to ``home`` and ``away`` (objects with elo, attack and
+    defence); returns the Elo points moved to the home side.
+    """
+    expected = 1.0 / (1.0 + 10.0 ** ((away.elo - home.elo - HOME_ELO) / 400.0))
+    actual = 1.0 if home_goals > away_goals else 0.5 if home_goals == away_goals else 0.0
+    delta = ELO_K * (actual - expected)
+    home.elo += delta
+    away.elo -= delta
+
+    home_error = home_goals - MEAN_GOALS * math.exp(HOME_GOALS + home.attack - away.defence)
+    away_error = away_goals - MEAN_GOALS * math.exp(away.attack - home.defence)
+    home.attack += LEARNING_RATE * home_error
+    away.defence -= LEARNING_RATE * home_error
+    away.attack += LEARNING_RATE * away_error
+    home.defence -= LEARNING_RATE * away_error
+    return delta
+
+
+class RatingEngine:
+    """Ratings of a set of teams in arrays indexed by team code"""
+
+    def __init__(self, team_ids, elo=None, attack=None, defence=None):
+        self.team_ids = list(team_ids)
+        self.codes = {team_id: code for code, team_id in enumerate(self.team_ids)}
+        size = len(self.team_ids)
+        self.elo = np.full(size, INITIAL_ELO) if elo is None else np.asarray(elo, dtype=np.float64)
+        self.attack = np.zeros(size) if attack is None else np.asarray(attack, dtype=np.float64)
+        self.defence = np.zeros(size) if defence is None else np.asarray(defence, dtype=np.float64)
+
+    @classmethod
+    def load(cls, team_ids):
+        """Persisted ratings of ``team_ids`` (one query); unrated teams start from the defaults"""
+        team_ids = list(dict.fromkeys(team_ids))
+        stored = {row[0]: row[1:] for row in TeamRating.objects.filter(team_id__in=team_ids).values_list(
+            'team_id', 'elo', 'attack', 'defence')}
+        defaults = (INITIAL_ELO, 0.0, 0.0)
+        values = np.array([stored.get(team_id, defaults) for team_id in team_ids], dtype=np.float64).reshape(-1, 3)
+        return cls(team_ids, values[:, 0], values[:, 1], values[:, 2])
+
+    def predict(self, home_codes, away_codes):
+        """Forecast arrays for fixtures given as parallel arrays of team codes"""
+        home = np.asarray(home_codes, dtype=np.int64)
+        away = np.asarray(away_codes, dtype=np.int64)
+        home_xg = MEAN_GOALS * np.exp(HOME_GOALS + self.attack[home] - self.defence[away])
+        away_xg = MEAN_GOALS * np.exp(self.attack[away] - self.defence[home])
+        scorelines = goal_distribution(home_xg)[:, :, None] * goal_distribution(away_xg)[:, None, :]
+        outcomes = np.stack([scorelines[:, mask].sum(axis=1) for mask in (_HOME_WIN, _DRAW, _AWAY_WIN)], axis=1)
+        # Most likely score within the most likely outcome
+        likely = outcomes.argmax(axis=1)
+        regions = np.stack([_HOME_WIN, _DRAW, _AWAY_WIN])[likely]
+        best = np.where(regions, scorelines, -1.0).reshape(len(home), -1).argmax(axis=1)
+        return {
+            'home_xg': home_xg,
+            'away_xg': away_xg,
+            'home_win': outcomes[:, 0],
+            'draw': outcomes[:, 1],
+            'away_win': outcomes[:, 2],
+            'home_goals': best // (MAX_GOALS + 1),
+            'away_goals': best % (MAX_GOALS + 1),
+            'home_elo': self.elo[home],
+            'away_elo': self.elo[away],
+        }
+
+
+# ---------------------------------------------------------------------------
+# Writing
+# ---------------------------------------------------------------------------
+
+class _Strength:
+    __slots__ = ('elo', 'attack', 'defence', 'matches', 'last_match_date')
+
+    def __init__(self):
+        self.elo, self.attack, self.defence, self.matches, self.last_match_date = INITIAL_ELO, 0.0, 0.0, 0, None
+
+
+def replay(rows):
+    """{team_id: strength} from (match_date, score, status, home_id, away_id) rows, oldest first"""
+    strengths = {}
+    for match_date, score, status, home_id, away_id in rows:
+        goals = final_goals(score, status)
+        if goals is None or home_id == away_id:
+            continue
+        home = strengths.setdefault(home_id, _Strength())
+        away = strengths.setdefault(away_id, _Strength())
+        step(home, away, *goals)
+        for side in (home, away):
+            side.matches += 1
+            side.last_match_date = match_date
+    return strengths
+
+
+def rebuild(batch_size=500):
+    """Replay every finished match (one query) and rewrite all ratings; returns the number of teams rated"""
+    rows = Match.objects.filter(score__isnull=False).order_by('match_date', 'id').values_list(
+        'match_date', 'score', 'status', 'home_team_id', 'away_team_id')
+    strengths = replay(rows.iterator(chunk_size=5000))
+    ratings = [TeamRating(team_id=team_id, **{field: getattr(strength, field) for field in FIELDS})
+               for team_id, strength in strengths.items()]
+    stale = set(TeamRating.objects.values_list('team_id', flat=True)) - strengths.keys()
+    if stale:
+        TeamRating.objects.filter(team_id__in=stale).delete()
+    if ratings:
+        TeamRating.objects.bulk_create(
+            ratings, batch_size=batch_size, update_conflicts=True, unique_fields=['team'],
+            update_fields=[*FIELDS, 'last_updated'],
+        )
+    return len(ratings)
+
+
+def record_result(match, previous=None):
+    """
+    Apply a newly final result of ``match`` to both teams' ratings: one read
+    and one upsert. ``previous`` is the (score, status, match_date) snapshot
+    from before the save; None for a new match. Results not newer than a
+    team's last applied one are left to ``rebuild``.
+    """
+    if previous == match.snapshot() or match.home_team_id == match.away_team_id:
+        return
+    goals = final_goals(match.score, match.status)
+    if goals is None or (previous is not None and final_goals(previous[0], previous[1]) is not None):
+        return
+    rows = {row.team_id: row
+            for row in TeamRating.objects.filter(team_id__in=[match.home_team_id, match.away_team_id])}
+    if any(row.last_match_date is not None and match.match_date <= row.last_match_date for row in rows.values()):
+        return
+    home = rows.get(match.home_team_id) or TeamRating(team_id=match.home_team_id)
+    away = rows.get(match.away_team_id) or TeamRating(team_id=match.away_team_id)
+    step(home, away, *goals)
+    for side in (home, away):
+        side.matches += 1
+        side.last_match_date = match.match_date
+    TeamRating.objects.bulk_create(
+        [home, away], update_conflicts=True, unique_fields=['team'], update_fields=[*FIELDS, 'last_updated'],
+    )
+
+
+# ---------------------------------------------------------------------------
+# Reading
+# ---------------------------------------------------------------------------
+
+def forecast(matches):
+    """
+    {match_id: forecast} for ``matches``: one query for the ratings and one
+    vectorized pass. Probabilities are rounded to three decimals and expected
+    goals to two.
+    """
+    matches = list(matches)
+    if not matches:
+        return {}
+    engine = RatingEngine.load(team_id for match in matches for team_id in (match.home_team_id, match.away_team_id))
+    result = engine.predict([engine.codes[match.home_team_id] for match in matches],
+                            [engine.codes[match.away_team_id] for match in matches])
+    columns = {key: values.tolist() for key, values in result.items()}
+    forecasts = {}
+    for index, match in enumerate(matches):
+        forecasts[match.id] = {
+            'home_win': round(columns['home_win'][index], 3),
+            'draw': round(columns['draw'][index], 3),
+            'away_win': round(columns['away_win'][index], 3),
+            'home_xg': round(columns['home_xg'][index], 2),
+            'away_xg': round(columns['away_xg'][index], 2),
+            'score': (columns['home_goals'][index], columns['away_goals'][index]),
+            'home_elo': round(columns['home_elo'][index]),
+            'away_elo': round(columns['away_elo'][index]),
+        }
+    return forecasts
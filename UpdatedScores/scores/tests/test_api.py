@@ -0,0 +1,128 @@
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.test import TestCase
+
+from scores.benchmarks import serializer_throughput
+from scores.models import League, Team, Player, Match, Event, Lineup, LineupPlayer, MatchAnalysis, MatchPreview
+from scores.serializers import LeagueSerializer, TeamSerializer, MatchSerializer
+
+KICKOFF = datetime(2025, 3, 1, 15, 0, tzinfo=dt_timezone.utc)
+
+
+class MatchAPITests(TestCase):
+    """Cursor pagination, filtering and query counts of the REST viewsets"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.leagues = [League.objects.create(id=str(i), name=f"League {i}", country='England' if i else 'Spain')
+                       for i in range(2)]
+        cls.teams = [Team.objects.create(id=str(10 + i), name=f"Team {i}", league=cls.leagues[i % 2])
+                     for i in range(4)]
+        for i in range(30):
+            league = cls.leagues[i % 2]
+            home, away = [t for t in cls.teams if t.league == league]
+            Match.objects.create(
+                id=str(100 + i), home_team=home, away_team=away, league=league, stadium='Stadium',
+                match_date=KICKOFF + timedelta(days=i), status='FT' if i < 20 else 'NS',
+            )
+
+    def get(self, url, **params):
+        return self.client.get(url, params, secure=True)
+
+    def test_cursor_pages_cover_every_match_once(self):
+        seen = []
+        url, params = '/api/matches/', {'page_size': 7}
+        while url:
+            with self.assertNumQueries(1):
+                response = self.get(url, **params)
+            self.assertEqual(response.status_code, 200)
+            seen.extend(m['id'] for m in response.data['results'])
+            url, params = response.data['next'], {}
+
+        self.assertEqual(len(seen), 30)
+        self.assertEqual(len(set(seen)), 30)
+        self.assertEqual(seen[0], '129')  # newest first
+
+    def test_page_size_is_capped(self):
+        response = self.get('/api/matches/', page_size=100000)
+        self.assertEqual(len(response.data['results']), 30)
+        self.assertEqual(self.get('/api/teams/', page_size=1).data['results'][0]['league']['id'], '0')
+
+    def test_filters(self):
+        def ids(**params):
+            response = self.get('/api/matches/', **params)
+            self.assertEqual(response.status_code, 200)
+            return {m['id'] for m in response.data['results']}
+
+        self.assertEqual(ids(league='1'), {str(100 + i) for i in range(1, 30, 2)})
+        self.assertEqual(ids(team='10'), {str(100 + i) for i in range(0, 30, 2)})
+        self.assertEqual(ids(status='NS'), {str(100 + i) for i in range(20, 30)})
+        self.assertEqual(ids(date_from='2025-03-03', date_to='2025-03-04'), {'102', '103'})
+        self.assertEqual(ids(date_to='2025-03-02T12:00:00Z'), {'100'})
+        self.assertEqual(ids(status='FT,NS', league='0', date_from='2025-03-20'), {'120', '122', '124', '126', '128'})
+        self.assertEqual(self.get('/api/matches/', date_from='yesterday').status_code, 400)
+        self.assertEqual([l['id'] for l in self.get('/api/leagues/', country='Spain').data['results']], ['0'])
+        self.assertEqual(len(self.get('/api/teams/', league='1').data['results']), 2)
+
+    def test_values_path_matches_model_serializers(self):
+        response = self.get('/api/matches/', page_size=200)
+        expected = MatchSerializer(Match.objects.order_by('-match_date', '-id'), many=True).data
+        self.assertEqual(response.data['results'], expected)
+        self.assertEqual(self.get('/api/matches/105/').data, MatchSerializer(Match.objects.get(id='105')).data)
+        self.assertEqual(self.get('/api/matches/nope/').status_code, 404)
+        self.assertEqual(self.get('/api/teams/').data['results'], TeamSerializer(Team.objects.order_by('id'), many=True).data)
+        self.assertEqual(self.get('/api/leagues/').data['results'], LeagueSerializer(League.objects.order_by('id'), many=True).data)
+        self.assertEqual(self.get('/api/matches/').content, self.get('/api/matches/', expand='home_team,away_team,league').content)
+
+    def test_sparse_fields_and_expand(self):
+        match = self.get('/api/matches/105/', fields='id,home_team,match_date', expand='').data
+        self.assertEqual(match, {'id': '105', 'home_team': '11', 'match_date': '2025-03-06T15:00:00Z'})
+        match = self.get('/api/matches/105/', fields='id,league', expand='league').data
+        self.assertEqual(match, {'id': '105', 'league': {'id': '1', 'name': 'League 1', 'country': 'England'}})
+        team = self.get('/api/teams/10/', expand='').data
+        self.assertEqual(team, {'id': '10', 'name': 'Team 0', 'logo': None, 'league': '0'})
+        # Cursor pagination still works when the ordering columns are not requested
+        page = self.get('/api/matches/', fields='score', page_size=5)
+        self.assertEqual(len(self.get(page.data['next']).data['results']), 5)
+        self.assertEqual(self.get('/api/matches/', fields='secret').status_code, 400)
+        self.assertEqual(self.get('/api/matches/', expand='stadium').status_code, 400)
+
+    def test_bundle_uses_one_query_per_relation(self):
+        for i in range(10):
+            match = Match.objects.get(id=str(100 + i))
+            player = Player.objects.create(id=str(500 + i), name=f"Player {i}", team=match.home_team, position='FW')
+            Event.objects.create(match=match, minute=10 + i, event_type='GOAL', description='Goal', player=player)
+            lineup = Lineup.objects.create(match=match, team=match.home_team, formation='4-4-2')
+            LineupPlayer.objects.create(lineup=lineup, player=player, is_starter=True, position='FW', shirt_number=9)
+            MatchAnalysis.objects.create(match=match, possession='55%-45%')
+            MatchPreview.objects.create(match=match, prediction='1-0')
+
+        def bundle(ids, **params):
+            response = self.get('/api/matches/bundle/', ids=','.join(ids), **params)
+            self.assertEqual(response.status_code, 200)
+            return response.data
+
+        # match + events + lineups (2) + stats + preview, however many ids are asked for
+        with self.assertNumQueries(6):
+            bundle(['100'])
+        with self.assertNumQueries(6):
+            data = bundle([str(109 - i) for i in range(10)] + ['nope'])
+        self.assertEqual([b['id'] for b in data['results']], [str(109 - i) for i in range(10)])
+        self.assertEqual(data['missing'], ['nope'])
+        first = data['results'][-1]
+        self.assertEqual(first['match'], MatchSerializer(Match.objects.get(id='100')).data)
+        self.assertEqual(first['events'][0]['player'], {'id': '500', 'name': 'Player 0', 'team': '10'})
+        self.assertEqual(first['lineups'][0]['starting'], [{'id': '500', 'name': 'Player 0', 'position': 'FW', 'number': 9}])
+        self.assertEqual(first['stats']['possession'], '55%-45%')
+        self.assertEqual(first['preview']['prediction'], '1-0')
+
+        with self.assertNumQueries(2):
+            data = bundle(['110', '100'], include='events', fields='id,score')
+        self.assertEqual(data['results'][0], {'id': '110', 'match': {'id': '110', 'score': None}, 'events': []})
+        self.assertEqual(self.get('/api/matches/bundle/', ids='100', include='odds').status_code, 400)
+        self.assertEqual(self.get('/api/matches/bundle/').status_code, 400)
+
+    def test_serializer_throughput(self):
+        results = {r['name']: r for r in serializer_throughput(rows=20, repeat=1)}
+        self.assertEqual(results['matches']['rows'], 20)
+        self.assertGreater(results['teams']['values_rows_per_sec'], 0)
@@ -37,7 +37,7 @@ class APIFootballClientTestCase(TestCase):
             f"{self.client.base_url}/leagues",
             headers=self.client.headers,
             params={},
-            timeout=30
+            timeout=self.client.timeout
         )
         self.assertEqual(result["response"][0]["league"]["name"], "Premier League")
         
@@ -84,7 +84,7 @@ class APIFootballClientTestCase(TestCase):
             f"{self.client.base_url}/fixtures",
             headers=self.client.headers,
             params={'league': 39, 'season': 2024},
-            timeout=30
+            timeout=self.client.timeout
         )
         self.assertEqual(result["response"][0]["teams"]["home"]["name"], "Arsenal FC")
         
@@ -123,7 +123,7 @@ class APIFootballClientTestCase(TestCase):
             f"{self.client.base_url}/fixtures/lineups",
             headers=self.client.headers,
             params={'fixture': 123},
-            timeout=30
+            timeout=self.client.timeout
         )
         self.assertEqual(result["response"][0]["formation"], "4-3-3")
         
@@ -161,7 +161,7 @@ class APIFootballClientTestCase(TestCase):
             f"{self.client.base_url}/fixtures/events",
             headers=self.client.headers,
             params={'fixture': 123},
-            timeout=30
+            timeout=self.client.timeout
         )
         self.assertEqual(result["response"][0]["type"], "Goal")
         
@@ -196,7 +196,7 @@ class APIFootballClientTestCase(TestCase):
             f"{self.client.base_url}/fixtures/statistics",
             headers=self.client.headers,
             params={'fixture': 123},
-            timeout=30
+            timeout=self.client.timeout
         )
         self.assertEqual(result["response"][0]["statistics"][0]["type"], "Shots on Goal")
         
@@ -0,0 +1,79 @@
+from datetime import datetime, timezone as dt_timezone
+
+from django.contrib.auth.models import User
+from django.test import TestCase
+
+from scores import benchmarks
+from scores.models import League, Team, Player, Match, Event, Profile
+from scores.synthetic import SCALES, SyntheticDataGenerator
+
+FIXED_NOW = datetime(2025, 3, 1, 12, 0, tzinfo=dt_timezone.utc)
+
+
+class SyntheticDataTests(TestCase):
+    """Deterministic synthetic dataset generation"""
+
+    def _generate(self, seed=7):
+        return SyntheticDataGenerator(SCALES['tiny'], seed=seed, batch_size=50, now=FIXED_NOW).generate()
+
+    def test_generates_requested_counts(self):
+        counts = self._generate()
+
+        scale = SCALES['tiny']
+        self.assertEqual(League.objects.count(), scale.leagues)
+        self.assertEqual(Team.objects.count(), scale.teams)
+        self.assertEqual(Player.objects.count(), scale.players)
+        self.assertEqual(Match.objects.count(), scale.matches)
+        self.assertEqual(Event.objects.count(), counts['Event'])
+        self.assertEqual(Profile.objects.count(), scale.profiles)
+        self.assertEqual(Profile.favorite_teams.through.objects.count(), scale.profiles * scale.favorites_per_profile)
+        self.assertTrue(User.objects.get(username='synthetic_user_0').check_password('synthetic-pass-123'))
+
+    def test_same_seed_gives_same_rows(self):
+        def fingerprint():
+            return (
+                list(Match.objects.order_by('id').values_list('id', 'home_team_id', 'away_team_id', 'score')),
+                list(Event.objects.order_by('match_id', 'minute').values_list('match_id', 'minute', 'event_type', 'player_id')),
+            )
+
+        self._generate()
+        first = fingerprint()
+        SyntheticDataGenerator.flush()
+        self.assertEqual(Match.objects.count(), 0)
+        self._generate()
+
+        self.assertEqual(fingerprint(), first)
+
+
+class BenchmarkTests(TestCase):
+    """Benchmark runner and baseline comparison"""
+
+    def test_runs_views_and_counts_queries(self):
+        SyntheticDataGenerator(SCALES['tiny'], seed=1, now=FIXED_NOW).generate()
+        selected = benchmarks.select_benchmarks(only=['league_detail', 'api_favorites'])
+
+        results = benchmarks.run_benchmarks(selected, repeat=1, warmup=0)
+
+        self.assertEqual([r.status for r in results], ['ok', 'ok'], [r.detail for r in results])
+        self.assertTrue(all(r.queries > 0 for r in results))
+        baseline = benchmarks.to_baseline(results)
+        self.assertEqual(baseline['dataset']['leagues'], SCALES['tiny'].leagues)
+        self.assertEqual(set(baseline['results']), {'league_detail', 'api_favorites'})
+
+    def test_compare_flags_query_and_time_regressions(self):
+        baseline = {'results': {
+            'index': {'status': 'ok', 'queries': 10, 'median_ms': 100.0},
+            'team_detail': {'status': 'ok', 'queries': 5, 'median_ms': 10.0},
+        }}
+        results = [
+            benchmarks.BenchmarkResult('index', 'views', runs=3, median_ms=200.0, queries=12),
+            # +50% but under the noise floor
+            benchmarks.BenchmarkResult('team_detail', 'views', runs=3, median_ms=15.0, queries=5),
+        ]
+
+        regressions = benchmarks.compare(results, baseline, time_threshold=0.25)
+
+        self.assertEqual(
+            [(r.name, r.metric) for r in regressions],
+            [('index', 'queries'), ('index', 'median_ms')],
+        )
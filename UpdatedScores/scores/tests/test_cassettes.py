@@ -0,0 +1,90 @@
+import datetime
+import io
+import json
+import os
+import shutil
+import tempfile
+import time
+from unittest.mock import patch
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from scores.api_client import APIFootballClient
+from scores.cassettes import CassetteStore, request_key
+from scores.fake_api import Catalog, FakeAPIFootball, FakeAPIFootballServer
+from scores.models import League, Team, Match, Event
+
+
+def make_api():
+    catalog = Catalog.generate(seed=5, leagues=1, teams_per_league=6, now=time.time())
+    return FakeAPIFootball(catalog, seed=5, sleep=lambda seconds: None)
+
+
+class CassetteTests(TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+
+    def test_request_key_ignores_parameter_order_and_types(self):
+        self.assertEqual(
+            request_key('fixtures', {'league': 39, 'season': 2025}),
+            request_key('/fixtures', {'season': '2025', 'league': '39', 'date': None}),
+        )
+        self.assertNotEqual(request_key('fixtures', {'league': 39}), request_key('fixtures', {'league': 40}))
+
+    def test_record_then_replay_without_network(self):
+        api = make_api()
+        fixture = next(iter(api.catalog.fixtures.values()))
+        with FakeAPIFootballServer(api) as server, patch.dict(os.environ, {'API_FOOTBALL_BASE_URL': server.base_url}):
+            recorded = APIFootballClient(cassette_mode='record', cassette_dir=self.directory).get_fixtures(
+                league_id=fixture.league_id, season=fixture.season, last=5)
+            missing = APIFootballClient(cassette_mode='replay', cassette_dir=self.directory).get_leagues()
+        requests_seen = sum(api.stats.values())
+
+        replayed = APIFootballClient(cassette_mode='replay', cassette_dir=self.directory).get_fixtures(
+            league_id=str(fixture.league_id), season=str(fixture.season), last='5')
+
+        self.assertEqual(replayed, recorded)
+        self.assertEqual(len(replayed['response']), 5)
+        self.assertIsNone(missing)
+        self.assertEqual(sum(api.stats.values()), requests_seen)
+        self.assertEqual(len(CassetteStore(self.directory)), 1)
+        with self.assertRaises(ValueError):
+            APIFootballClient(cassette_mode='rewind')
+
+    def test_replay_ingestion_reports_and_rolls_back(self):
+        api = make_api()
+        fixture = next(f for f in api.catalog.fixtures.values() if api.match_clock(f)[0] == 'FT')
+        date = datetime.datetime.fromtimestamp(fixture.kickoff, tz=datetime.timezone.utc).date()
+        league = League.objects.create(id=str(fixture.league_id), name='Premier League', country='England')
+        for team_id, (name, *_) in api.catalog.teams.items():
+            Team.objects.create(id=str(team_id), name=name, league=league)
+
+        with FakeAPIFootballServer(api) as server, patch.dict(os.environ, {'API_FOOTBALL_BASE_URL': server.base_url}):
+            call_command('replay_ingestion', self.directory, record=True, date=date.isoformat(),
+                         season=fixture.season, stdout=io.StringIO())
+        with open(os.path.join(self.directory, 'manifest.json')) as f:
+            manifest = json.load(f)
+        self.assertIn(str(fixture.id), manifest['fixtures'])
+
+        Match.objects.all().delete()
+        out = io.StringIO()
+        results_path = os.path.join(self.directory, 'results.json')
+        call_command('replay_ingestion', self.directory, json_path=results_path, stdout=out)
+
+        with open(results_path) as f:
+            results = {r['command']: r for r in json.load(f)['results']}
+        self.assertEqual(set(results), {
+            'fetch_api_football_matches', 'fetch_match_events', 'fetch_match_lineups', 'fetch_match_statistics'})
+        self.assertGreater(results['fetch_api_football_matches']['rows'], 0)
+        self.assertEqual(results['fetch_match_events']['fixtures'], len(manifest['fixtures']))
+        self.assertIsNotNone(results['fetch_match_events']['queries_per_fixture'])
+        self.assertIn('fetch_match_events', out.getvalue())
+        # Replayed rows are rolled back unless --keep is given
+        self.assertFalse(Match.objects.exists())
+        self.assertFalse(Event.objects.exists())
+
+        call_command('replay_ingestion', self.directory, commands=['fetch_api_football_matches'], keep=True,
+                     stdout=io.StringIO())
+        self.assertTrue(Match.objects.filter(id=str(fixture.id)).exists())
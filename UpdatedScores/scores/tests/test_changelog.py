@@ -0,0 +1,88 @@
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.test import TestCase
+
+from scores import changelog
+from scores.models import League, Team, Player, Match, Event, MatchChange
+
+KICKOFF = datetime(2025, 3, 1, 15, 0, tzinfo=dt_timezone.utc)
+
+
+class ChangeLogTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        league = League.objects.create(id='39', name='Premier League', country='England')
+        cls.home = Team.objects.create(id='1', name='Home', league=league)
+        cls.away = Team.objects.create(id='2', name='Away', league=league)
+        cls.player = Player.objects.create(id='7', name='Striker', team=cls.home, position='FW')
+        for i in range(3):
+            Match.objects.create(id=str(100 + i), home_team=cls.home, away_team=cls.away, league=league,
+                                 stadium='Stadium', match_date=KICKOFF + timedelta(days=i), status='NS')
+
+    def changes(self, **params):
+        response = self.client.get('/api/changes/', params, secure=True)
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def test_only_real_changes_are_logged(self):
+        since = changelog.latest_seq()
+        match = Match.objects.get(pk='100')
+        match.stadium = 'Renamed'
+        match.save()  # not a score/status/kick-off change
+        self.assertEqual(self.changes(since=since)['matches'], [])
+
+        match.status, match.score = '1H', '1-0'
+        match.save()
+        match.save()
+        match.status = '2H'
+        match.save()
+        data = self.changes(since=since)
+        self.assertEqual(MatchChange.objects.filter(seq__gt=since).count(), 2)
+        self.assertEqual(data['matches'], [{
+            'id': '100', 'score': '1-0', 'status': '2H', 'date': KICKOFF.isoformat(),
+            'league': '39', 'home': '1', 'away': '2',
+        }])
+        self.assertFalse(data['reset'])
+        self.assertEqual(self.changes(since=data['next'])['matches'], [])
+
+    def test_events_stale_sections_and_paging(self):
+        since = changelog.latest_seq()
+        before = changelog.fingerprint('events', '101')
+        Event.objects.create(match_id='101', minute=12, event_type='GOAL', player=self.player, description='Goal')
+        self.assertTrue(changelog.record_if_changed('events', '101', before))
+        self.assertFalse(changelog.record_if_changed('events', '101', changelog.fingerprint('events', '101')))
+        changelog.record('lineups', ['102'])
+        changelog.record('deleted', ['999'])
+
+        first = self.changes(since=since, limit=2)
+        self.assertTrue(first['more'])
+        self.assertEqual(first['events'], {'101': [{'minute': 12, 'type': 'GOAL', 'player': '7', 'name': 'Striker'}]})
+        self.assertEqual(first['stale'], {'statistics': [], 'lineups': ['102']})
+        second = self.changes(since=first['next'], limit=2)
+        self.assertFalse(second['more'])
+        self.assertEqual(second['deleted'], ['999'])
+
+        self.assertEqual(self.client.get('/api/changes/', {'since': 'x'}, secure=True).status_code, 400)
+
+    def test_compaction_dedupes_then_expires(self):
+        since = changelog.latest_seq()
+        for _ in range(3):
+            changelog.record('statistics', ['100'])
+        removed, watermark = changelog.compact()
+        self.assertEqual(removed, 2)
+        # Superseded rows never force a reload
+        self.assertFalse(self.changes(since=since)['reset'])
+        self.assertEqual(self.changes(since=since)['stale']['statistics'], ['100'])
+
+        MatchChange.objects.update(changed_at=KICKOFF)
+        changelog.record('match', ['101'])
+        removed, watermark = changelog.compact(timedelta(days=1))
+        self.assertEqual(MatchChange.objects.count(), 1)
+        data = self.changes(since=since)
+        self.assertTrue(data['reset'])
+        self.assertFalse(self.changes(since=data['next'])['reset'])
+
+        # A wipe makes even caught-up clients reload
+        latest = changelog.latest_seq()
+        changelog.reset()
+        self.assertTrue(self.changes(since=latest)['reset'])
@@ -0,0 +1,126 @@
+import io
+import os
+import time
+from unittest.mock import MagicMock, patch
+
+import requests
+from django.core.management import call_command
+from django.test import TestCase
+
+from scores import circuit_breaker, metrics
+from scores.api_client import APIFootballClient
+from scores.circuit_breaker import CircuitBreaker, CircuitBreakers, RetryBudget
+from scores.fake_api import Catalog, FakeAPIFootball, FakeAPIFootballServer
+from scores.models import League
+
+
+def response(status_code, body=None):
+    mock = MagicMock()
+    mock.status_code = status_code
+    mock.headers = {}
+    mock.json.return_value = body or {'response': []}
+    if status_code >= 400:
+        mock.raise_for_status.side_effect = requests.exceptions.HTTPError(f"{status_code} Error")
+    return mock
+
+
+class CircuitBreakerTests(TestCase):
+    def setUp(self):
+        metrics.registry.reset()
+        self.clock = [0.0]
+
+    def test_opens_after_threshold_and_probes_once_when_half_open(self):
+        breaker = CircuitBreaker('fixtures/events', threshold=3, reset_timeout=30, clock=lambda: self.clock[0])
+        for _ in range(3):
+            self.assertTrue(breaker.allow())
+            breaker.record_failure()
+        self.assertEqual(breaker.state, circuit_breaker.OPEN)
+        self.assertFalse(breaker.allow())
+
+        self.clock[0] += 30
+        self.assertTrue(breaker.allow())
+        self.assertEqual(breaker.state, circuit_breaker.HALF_OPEN)
+        # One probe at a time; a failed probe opens the circuit again
+        self.assertFalse(breaker.allow())
+        breaker.record_failure()
+        self.assertEqual(breaker.state, circuit_breaker.OPEN)
+
+        self.clock[0] += 30
+        self.assertTrue(breaker.allow())
+        breaker.record_success()
+        self.assertEqual(breaker.state, circuit_breaker.CLOSED)
+        self.assertEqual(metrics.API_CIRCUIT_STATE._values[('fixtures/events',)], 0)
+        self.assertEqual(metrics.API_CIRCUIT_TRANSITIONS.total(endpoint='fixtures/events', state='open'), 2)
+        body = metrics.render_metrics([metrics.registry.snapshot()])
+        self.assertIn('updatedscores_api_football_circuit_state{endpoint="fixtures/events"} 0', body)
+
+    def test_retry_budget_and_backoff(self):
+        budget = RetryBudget(ratio=0.5, capacity=1)
+        self.assertTrue(budget.withdraw())
+        self.assertFalse(budget.withdraw())
+        budget.deposit()
+        budget.deposit()
+        self.assertTrue(budget.withdraw())
+
+        for attempt in range(6):
+            self.assertLessEqual(circuit_breaker.backoff(attempt), min(circuit_breaker.BACKOFF_CAP, 0.5 * 2 ** attempt))
+        self.assertEqual(circuit_breaker.backoff(0, retry_after=60), circuit_breaker.BACKOFF_CAP)
+
+
+class ClientRetryTests(TestCase):
+    def setUp(self):
+        metrics.registry.reset()
+        self.sleeps = []
+        self.client = APIFootballClient(breakers=CircuitBreakers(threshold=3, reset_timeout=30),
+                                         retry_budget=RetryBudget(), sleep=self.sleeps.append)
+
+    @patch('scores.api_client.requests.get')
+    def test_retries_server_errors_with_backoff(self, mock_get):
+        mock_get.side_effect = [response(503), requests.exceptions.ConnectTimeout("timed out"),
+                                response(200, {'response': [1]})]
+
+        self.assertEqual(self.client.get_events(1), {'response': [1]})
+        self.assertEqual(mock_get.call_count, 3)
+        self.assertEqual(len(self.sleeps), 2)
+        self.assertEqual(mock_get.call_args.kwargs['timeout'], self.client.timeout)
+        self.assertEqual(metrics.API_RETRIES.total(endpoint='fixtures/events'), 2)
+
+    @patch('scores.api_client.requests.get')
+    def test_open_circuit_fails_fast_per_endpoint(self, mock_get):
+        mock_get.side_effect = requests.exceptions.ConnectionError("refused")
+
+        self.assertIsNone(self.client.get_events(1))  # three attempts: the circuit opens
+        self.assertIsNone(self.client.get_events(2))
+        self.assertEqual(mock_get.call_count, 3)
+        self.assertEqual(metrics.API_SHORT_CIRCUITED.total(endpoint='fixtures/events'), 1)
+        self.assertEqual(self.client.breakers.states(), {'fixtures/events': circuit_breaker.OPEN})
+
+        # Other endpoints keep their own circuit; client errors are not retried
+        mock_get.side_effect = [response(404)]
+        self.assertIsNone(self.client.get_lineups(1))
+        self.assertEqual(mock_get.call_count, 4)
+        self.assertEqual(self.client.breakers.get('fixtures/lineups').state, circuit_breaker.CLOSED)
+
+
+class DegradedUpstreamTests(TestCase):
+    """A failing upstream costs a detail run a handful of requests, not one timeout per fixture"""
+
+    def test_events_run_short_circuits_against_failing_api(self):
+        now = time.time()
+        catalog = Catalog.generate(seed=3, leagues=2, teams_per_league=8, now=now)
+        api = FakeAPIFootball(catalog, seed=3, clock=lambda: now, sleep=lambda seconds: None)
+        for league_id, (name, country) in catalog.leagues.items():
+            League.objects.create(id=str(league_id), name=name, country=country)
+        out = io.StringIO()
+        with FakeAPIFootballServer(api) as server, \
+                patch.dict(os.environ, {'API_FOOTBALL_BASE_URL': server.base_url}), \
+                patch.object(circuit_breaker, 'BREAKERS', CircuitBreakers(threshold=2, reset_timeout=60)), \
+                patch.object(circuit_breaker, 'RETRY_BUDGET', RetryBudget(capacity=0)):
+            call_command('fetch_api_football_matches', no_delete=True, last=50, next=5, stdout=out)
+            api.error_rate = 1.0
+            api.stats.clear()
+            call_command('fetch_match_events', days=400, stdout=out)
+
+        # Two failed fixtures?ids= batches open that circuit, two per-fixture calls open the events one
+        self.assertEqual(api.stats['fixtures'], 2)
+        self.assertEqual(api.stats['fixtures/events'], 2)
@@ -0,0 +1,98 @@
+import io
+import os
+import time
+from unittest.mock import patch
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from scores.fake_api import Catalog, FakeAPIFootball, FakeAPIFootballServer, RateLimiter
+from scores.models import League, Team, Match, Event
+
+NOW = 1760000000.0  # fixed clock for deterministic responses
+
+
+class FakeClock:
+    def __init__(self, now=NOW):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+def make_api(**kwargs):
+    clock = kwargs.pop('clock', FakeClock())
+    catalog = Catalog.generate(seed=3, leagues=2, teams_per_league=6, now=clock())
+    return FakeAPIFootball(catalog, seed=3, clock=clock, sleep=lambda seconds: None, **kwargs), clock
+
+
+class FakeAPIFootballTests(TestCase):
+    """Responses of the fake API without HTTP"""
+
+    def test_fixtures_and_events_are_consistent(self):
+        api, _ = make_api()
+
+        status, _, body = api.handle('/fixtures?league=39&season=2025&last=5', {})
+
+        self.assertEqual(status, 200)
+        self.assertEqual(body['results'], 5)
+        fixture = body['response'][-1]
+        self.assertEqual(fixture['fixture']['status']['short'], 'FT')
+        _, _, events = api.handle(f"/fixtures/events?fixture={fixture['fixture']['id']}", {})
+        home_id = fixture['teams']['home']['id']
+        home_goals = sum(1 for e in events['response'] if e['type'] == 'Goal' and e['team']['id'] == home_id)
+        self.assertEqual(home_goals, fixture['goals']['home'])
+        # Same seed, same answer
+        self.assertEqual(make_api()[0].handle('/fixtures?league=39&season=2025&last=5', {})[2], body)
+
+    def test_live_fixture_advances(self):
+        api, clock = make_api(live=1, live_speed=90)
+        fixture_id = next(iter(api.live_ids))
+
+        clock.now += 10  # 15 match minutes
+        live = api.handle('/fixtures?live=all', {})[2]['response']
+        early_events = api.handle(f'/fixtures/events?fixture={fixture_id}', {})[2]['response']
+        clock.now += 80  # full time
+        finished = api.handle(f'/fixtures?id={fixture_id}', {})[2]['response'][0]
+
+        self.assertEqual([f['fixture']['id'] for f in live], [fixture_id])
+        self.assertEqual(live[0]['fixture']['status'], {'long': 'First Half', 'short': '1H', 'elapsed': 16})
+        self.assertTrue(all(e['time']['elapsed'] <= 16 for e in early_events))
+        self.assertEqual(finished['fixture']['status']['short'], 'FT')
+        self.assertEqual(finished['events'][:len(early_events)], early_events)
+        self.assertGreater(len(finished['events']), len(early_events))
+
+    def test_rate_limit_and_fault_injection(self):
+        clock = FakeClock()
+        api, _ = make_api(clock=clock, rate_limiter=RateLimiter(daily_limit=100, per_minute_limit=2, clock=clock))
+
+        statuses = [api.handle('/leagues', {})[0] for _ in range(3)]
+        headers = api.handle('/leagues', {})[1]
+
+        self.assertEqual(statuses, [200, 200, 429])
+        self.assertEqual(headers['X-RateLimit-Remaining'], '0')
+        self.assertEqual(headers['x-ratelimit-requests-remaining'], '98')
+
+        failing, _ = make_api(error_rate=1.0)
+        self.assertIn(failing.handle('/leagues', {})[0], (500, 502, 503))
+
+
+class FakeAPIFootballServerTests(TestCase):
+    """Ingestion commands end to end against the HTTP server"""
+
+    def test_ingestion_commands_use_fake_server(self):
+        api, _ = make_api(clock=FakeClock(time.time()))
+        fixture = next(f for f in api.catalog.fixtures.values() if api.match_clock(f)[0] == 'FT')
+        league = League.objects.create(id=str(fixture.league_id), name='Premier League', country='England')
+        for team_id in (fixture.home_id, fixture.away_id):
+            Team.objects.create(id=str(team_id), name=api.catalog.teams[team_id][0], league=league)
+
+        with FakeAPIFootballServer(api) as server, patch.dict(os.environ, {'API_FOOTBALL_BASE_URL': server.base_url}):
+            call_command('fetch_api_football_matches', no_delete=True, last=50, next=1, stdout=io.StringIO())
+            call_command('fetch_match_events', match_id=str(fixture.id), stdout=io.StringIO())
+
+        match = Match.objects.get(id=str(fixture.id))
+        expected = api.fixture_json(fixture, None)
+        self.assertEqual(match.score, f"{expected['goals']['home']}-{expected['goals']['away']}")
+        self.assertTrue(Event.objects.filter(match=match).exists())
+        self.assertGreater(api.stats['fixtures/events'], 0)
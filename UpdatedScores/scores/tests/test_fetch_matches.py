@@ -0,0 +1,88 @@
+import io
+import os
+import time
+from unittest.mock import patch
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from scores.api_client import RequestRateLimiter
+from scores.fake_api import Catalog, FakeAPIFootball, FakeAPIFootballServer
+from scores import scheduler, search
+from scores.models import League, Match, MatchChange, Team, TeamForm, TeamRating
+
+
+class RequestRateLimiterTests(TestCase):
+    def test_waits_for_the_oldest_request_to_leave_the_window(self):
+        clock = [100.0]
+        sleeps = []
+
+        def sleep(seconds):
+            sleeps.append(seconds)
+            clock[0] += seconds
+
+        limiter = RequestRateLimiter(2, clock=lambda: clock[0], sleep=sleep)
+        self.assertEqual([limiter.wait(), limiter.wait()], [0.0, 0.0])
+        clock[0] += 15
+        self.assertEqual(limiter.wait(), 45.0)
+        self.assertEqual(sleeps, [45.0])
+        self.assertEqual(RequestRateLimiter(0).wait(), 0.0)
+
+
+class ScheduledFetchTests(TestCase):
+    def test_scheduled_jobs_never_delete_stored_matches(self):
+        with patch.object(scheduler.management, 'call_command') as call:
+            scheduler.update_matches_data()
+            scheduler.update_todays_matches()
+        self.assertEqual([c.args for c in call.call_args_list], [('fetch_api_football_matches',)] * 2)
+        self.assertTrue(all(c.kwargs['no_delete'] for c in call.call_args_list))
+
+
+class ParallelFetchTests(TestCase):
+    """League shards fetched in threads write the same rows as a serial run"""
+
+    def setUp(self):
+        now = time.time()
+        catalog = Catalog.generate(seed=5, leagues=4, teams_per_league=6, now=now)
+        self.api = FakeAPIFootball(catalog, seed=5, clock=lambda: now, sleep=lambda seconds: None)
+        for league_id, (name, country) in catalog.leagues.items():
+            League.objects.create(id=str(league_id), name=name, country=country)
+
+    def fetch(self, **options):
+        out = io.StringIO()
+        with FakeAPIFootballServer(self.api) as server, \
+                patch.dict(os.environ, {'API_FOOTBALL_BASE_URL': server.base_url}):
+            call_command('fetch_api_football_matches', no_delete=True, last=50, next=5, stdout=out, **options)
+        return out.getvalue()
+
+    def rows(self):
+        return set(Match.objects.values_list('id', 'home_team_id', 'away_team_id', 'league_id', 'score', 'status',
+                                             'match_date', 'season'))
+
+    def test_parallel_run_matches_serial_run(self):
+        self.fetch()
+        serial = self.rows()
+        forms = set(TeamForm.objects.values_list('team_id', 'form', 'played'))
+        self.assertTrue(serial)
+        self.assertTrue(forms)
+
+        Match.objects.all().delete()
+        TeamForm.objects.all().delete()
+        output = self.fetch(workers=4, rate_limit=1000)
+
+        self.assertEqual(self.rows(), serial)
+        # Bulk writes skip the post_save hooks; the command updates the read models itself
+        self.assertEqual(set(TeamForm.objects.values_list('team_id', 'form', 'played')), forms)
+        self.assertIn(f"Özet: 4 lig, 12 istek (0 başarısız), {len(serial)} yeni / 0 güncellenen maç", output)
+
+        # Nothing changed upstream: every match is updated, none logged as changed
+        output = self.fetch(workers=4)
+        self.assertIn(f"0 yeni / {len(serial)} güncellenen maç, 0 değişiklik", output)
+
+    def test_bulk_writes_run_the_post_save_follow_ups(self):
+        self.fetch()
+        # Same steps as a single save: change log, read models, and the search index for new teams
+        self.assertEqual(MatchChange.objects.filter(kind='match').count(), Match.objects.count())
+        self.assertTrue(TeamRating.objects.exists())
+        team = Team.objects.order_by('id').first()
+        self.assertIn(team.id, [hit['id'] for hit in search.search(team.name, kinds=['team'])])
@@ -0,0 +1,91 @@
+import io
+import math
+import os
+import time
+from unittest.mock import patch
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from scores.fake_api import Catalog, FakeAPIFootball, FakeAPIFootballServer
+from scores.fixture_details import FixtureDetails
+from scores.management.commands.fetch_match_events import EVENT_STATUSES
+from scores.models import Event, League, Lineup, Match, MatchAnalysis
+
+
+class FailingClient:
+    """Answers the first fixtures?ids= batch and fails the rest"""
+
+    def __init__(self):
+        self.batches = []
+
+    def iter_fixture_details(self, fixture_ids, batch_size):
+        fixture_ids = list(fixture_ids)
+        for start in range(0, len(fixture_ids), batch_size):
+            batch = fixture_ids[start:start + batch_size]
+            self.batches.append(batch)
+            if start == 0:
+                yield batch, [{'fixture': {'id': int(batch[0])}, 'events': [{'type': 'Goal'}]}]
+            else:
+                yield batch, None
+
+
+class FixtureDetailsTests(TestCase):
+    def test_failed_batches_fall_back_to_the_fixture_endpoints(self):
+        client = FailingClient()
+        details = FixtureDetails(client, batch_size=2)
+        details.prefetch(['1', '2', '3', 2, '1'])
+        details.prefetch(['1', '3'])
+
+        self.assertEqual(client.batches, [['1', '2'], ['3']])
+        self.assertEqual(details.requests, 2)
+        self.assertEqual(details.get('events', 1, lambda: 'endpoint'), {'response': [{'type': 'Goal'}]})
+        # Left out of a successful batch: no details yet, no extra request
+        self.assertEqual(details.get('lineups', '2', lambda: 'endpoint'), {'response': []})
+        self.assertEqual(details.get('events', '3', lambda: 'endpoint'), 'endpoint')
+        self.assertEqual(details.get('events', '4', lambda: 'endpoint'), 'endpoint')
+
+
+class BatchedDetailCommandTests(TestCase):
+    """The detail commands read a date range's fixtures 20 per request"""
+
+    def setUp(self):
+        now = time.time()
+        catalog = Catalog.generate(seed=9, leagues=3, teams_per_league=8, now=now)
+        self.api = FakeAPIFootball(catalog, seed=9, clock=lambda: now, sleep=lambda seconds: None)
+        for league_id, (name, country) in catalog.leagues.items():
+            League.objects.create(id=str(league_id), name=name, country=country)
+        self.run_command('fetch_api_football_matches', no_delete=True, last=50, next=10)
+        self.api.stats.clear()
+
+    def run_command(self, name, **options):
+        out = io.StringIO()
+        with FakeAPIFootballServer(self.api) as server, \
+                patch.dict(os.environ, {'API_FOOTBALL_BASE_URL': server.base_url}):
+            call_command(name, stdout=out, **options)
+        return out.getvalue()
+
+    def test_events_of_a_date_range_come_from_batched_fixture_requests(self):
+        self.run_command('fetch_match_events', days=400)
+        matches = Match.objects.filter(status__in=EVENT_STATUSES).count()
+
+        self.assertGreater(matches, 20)
+        self.assertEqual(self.api.stats['fixtures'], math.ceil(matches / 20))
+        self.assertEqual(self.api.stats['fixtures/events'], 0)
+        self.assertTrue(Event.objects.exists())
+
+    def test_lineups_and_statistics_skip_the_per_fixture_endpoints(self):
+        self.run_command('fetch_match_lineups', days=400)
+        self.run_command('fetch_match_statistics', days=400)
+
+        self.assertTrue(Lineup.objects.exists())
+        self.assertTrue(MatchAnalysis.objects.exclude(possession='').exists())
+        for endpoint in ('fixtures/lineups', 'fixtures/statistics', 'fixtures/players'):
+            self.assertEqual(self.api.stats[endpoint], 0)
+
+    def test_single_match_keeps_the_fixture_endpoints(self):
+        match = Match.objects.filter(status='FT').first()
+        self.run_command('fetch_match_events', match_id=match.id)
+
+        self.assertEqual(self.api.stats['fixtures'], 0)
+        self.assertEqual(self.api.stats['fixtures/events'], 1)
@@ -0,0 +1,89 @@
+from datetime import datetime, timedelta, timezone as dt_timezone
+from io import StringIO
+from unittest import mock
+
+from django.test import TestCase
+
+from scores import h2h
+from scores.management.commands.fetch_match_previews import Command
+from scores.models import League, Team, Match, MatchPreview, HeadToHead
+
+KICKOFF = datetime(2025, 3, 1, 15, 0, tzinfo=dt_timezone.utc)
+
+
+class HeadToHeadTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.league = League.objects.create(id='39', name='Premier League', country='England')
+        cls.a, cls.b, cls.c = [Team.objects.create(id=str(i), name=f"Team {i}", league=cls.league)
+                               for i in range(1, 4)]
+
+    def play(self, day, home, away, score, status='FT'):
+        return Match.objects.create(id=str(100 + day), home_team=home, away_team=away, league=self.league,
+                                    stadium='Stadium', match_date=KICKOFF + timedelta(days=day), score=score,
+                                    status=status)
+
+    def state(self):
+        return {(row.team_a_id, row.team_b_id): {field: getattr(row, field) for field in h2h.COUNTER_FIELDS}
+                for row in HeadToHead.objects.all()}
+
+    def test_pairs_are_unordered_and_updated_incrementally(self):
+        self.play(0, self.b, self.a, '2-0')
+        self.play(7, self.a, self.b, '1-1')
+        self.play(14, self.a, self.c, '3-0')
+        live = self.play(21, self.a, self.b, '0-1', status='1H')
+
+        row = HeadToHead.objects.get(team_a=self.a, team_b=self.b)
+        self.assertEqual((row.played, row.team_a_wins, row.draws, row.team_b_wins), (2, 0, 1, 1))
+        self.assertEqual((row.team_a_goals, row.team_b_goals), (1, 3))
+
+        live.status = 'FT'
+        live.save()
+        row.refresh_from_db()
+        self.assertEqual((row.played, row.team_b_wins), (3, 2))
+        self.assertEqual([item['id'] for item in row.meetings], ['121', '107', '100'])
+
+        # From Team 2's side at home, the last two meetings before day 21
+        summary = h2h.summary(h2h.lookup('2', '1'), '2', live.match_date, n=2)
+        self.assertEqual((summary['total'], summary['home_wins'], summary['draws']), (2, 1, 1))
+        self.assertEqual(summary['matches'][0]['result'], 'DRAW')
+
+        # Withdrawn and corrected scores rebuild the pair; the result equals a full rebuild
+        live.score, live.status = None, 'PST'
+        live.save()
+        old = Match.objects.get(pk='100')
+        old.score = '0-1'
+        old.save()
+        incremental = self.state()
+        self.assertEqual(incremental[('1', '2')]['team_a_wins'], 1)
+        HeadToHead.objects.all().delete()
+        h2h.rebuild()
+        self.assertEqual(self.state(), incremental)
+
+    def test_previews_call_the_api_only_for_incomplete_pairs(self):
+        self.play(0, self.a, self.b, '2-1')
+        upcoming = Match.objects.create(id='200', home_team=self.a, away_team=self.b, league=self.league,
+                                        stadium='Stadium', match_date=KICKOFF + timedelta(days=40), status='NS')
+        client = mock.Mock()
+        client.get_predictions.return_value = {'response': [{'predictions': {}, 'teams': {}}]}
+        client._make_request.return_value = {'response': [
+            {'teams': {'home': {'id': 1, 'name': 'Team 1'}, 'away': {'id': 2, 'name': 'Team 2'}},
+             'goals': {'home': 2, 'away': 1}, 'fixture': {'date': '2025-03-01T15:00:00+00:00'}},
+        ]}
+        command = Command(stdout=StringIO())
+
+        # Never asked: one API call, whose meeting count is remembered
+        command.fetch_and_save_preview(client, upcoming)
+        self.assertEqual(client._make_request.call_count, 1)
+        self.assertEqual(h2h.lookup('1', '2').api_meetings, 1)
+
+        # The local history now covers everything the API knows
+        command.fetch_and_save_preview(client, upcoming)
+        self.assertEqual(client._make_request.call_count, 1)
+        info = MatchPreview.objects.get(match=upcoming).head_to_head
+        self.assertEqual((info['total_matches'], info['home_wins']), (1, 1))
+        self.assertEqual(info['matches'][0]['result'], 'home_win')
+
+        with self.assertNumQueries(1):
+            meetings = h2h.recent_meetings(upcoming)
+        self.assertEqual([(m['id'], m['league_name']) for m in meetings], [('100', 'Premier League')])
@@ -0,0 +1,88 @@
+import json
+import os
+import time
+import tracemalloc
+from unittest.mock import patch
+
+from django.test import SimpleTestCase
+
+from scores.api_client import APIFootballClient
+from scores.fake_api import Catalog, FakeAPIFootball, FakeAPIFootballServer
+from scores.json_stream import JSONStream
+from scores.management.commands.fetch_api_football_matches_new import fetch_league, new_shard
+
+
+class JSONStreamTests(SimpleTestCase):
+    def test_items_match_json_loads_for_any_chunking(self):
+        items = [{'id': i, 'name': f'Şükrü "{i}" \\ ç', 'goals': [None, i * 1.5, True], 'empty': {}}
+                 for i in range(50)] + [12345, 'end', []]
+        body = {'get': 'fixtures', 'errors': [], 'paging': {'current': 1, 'total': 3}, 'response': items,
+                'results': 123456}
+        raw = json.dumps(body, ensure_ascii=False).encode('utf-8')
+        for size in (1, 2, 7, 4096):
+            stream = JSONStream(raw[i:i + size] for i in range(0, len(raw), size))
+            self.assertEqual(list(stream), items, size)
+            self.assertEqual(stream.meta, {key: value for key, value in body.items() if key != 'response'})
+            self.assertEqual(stream.count, len(items))
+
+        self.assertEqual(list(JSONStream([b'{"response": []}'])), [])
+        with self.assertRaises(ValueError):
+            list(JSONStream([raw[:len(raw) // 2]]))
+        with self.assertRaises(ValueError):
+            list(JSONStream([b'{"response": [1 2]}']))
+
+    def test_memory_stays_flat_for_large_payloads(self):
+        item = json.dumps({'fixture': {'id': 1, 'venue': {'name': 'x' * 200}}, 'teams': {}}).encode()
+
+        def chunks(count):
+            yield b'{"errors": [], "response": ['
+            for i in range(count):
+                yield (b',' if i else b'') + item
+            yield b']}'
+
+        tracemalloc.start()
+        try:
+            consumed = sum(1 for _ in JSONStream(chunks(40000)))
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        self.assertEqual(consumed, 40000)
+        # About 10 MB of JSON goes through; only the current chunk and item are ever held
+        self.assertLess(peak, 1024 * 1024)
+
+
+class StreamingClientTests(SimpleTestCase):
+    def setUp(self):
+        now = time.time()
+        self.catalog = Catalog.generate(seed=5, leagues=1, teams_per_league=6, now=now)
+        self.api = FakeAPIFootball(self.catalog, seed=5, clock=lambda: now, sleep=lambda seconds: None)
+        self.server = FakeAPIFootballServer(self.api).__enter__()
+        self.addCleanup(self.server.__exit__, None, None, None)
+        patcher = patch.dict(os.environ, {'API_FOOTBALL_BASE_URL': self.server.base_url})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.league_id, (self.league_name, _) = next(iter(self.catalog.leagues.items()))
+
+    def test_fixtures_and_player_pages_stream(self):
+        client = APIFootballClient()
+        whole = client.get_fixtures(league_id=self.league_id, last=50)['response']
+        stream = client.iter_fixtures(league_id=self.league_id, last=50)
+        self.assertEqual(list(stream), whole)
+        self.assertEqual(stream.meta['errors'], [])
+
+        team_id = next(iter(self.catalog.teams))
+        players = list(client.iter_players(team_id))
+        squad = self.catalog.squad(team_id)
+        self.assertGreater(len(squad), 20)  # more than one page of 20
+        self.assertEqual([p['player']['id'] for p in players], [p[0] for p in squad])
+
+    def test_league_fetch_yields_bounded_batches(self):
+        league = type('League', (), {'id': self.league_id, 'name': self.league_name})()
+        shard = new_shard()
+        season = time.gmtime().tm_year
+        batches = list(fetch_league(league, [({'last': 50}, 'Gecmis')], season, season - 1, shard, batch_size=4))
+        self.assertTrue(batches)
+        self.assertTrue(all(len(batch) <= 4 for batch in batches))
+        self.assertEqual(sum(len(batch) for batch in batches),
+                         len(APIFootballClient().get_fixtures(league_id=self.league_id, last=50)['response']))
+        self.assertEqual((shard['requests'], shard['failed']), (1, 0))
@@ -0,0 +1,108 @@
+import copy
+from datetime import datetime, timezone as dt_timezone
+from io import StringIO
+from unittest import mock
+
+from django.test import TestCase
+
+from scores import changelog
+from scores.management.commands.fetch_match_lineups import Command
+from scores.models import League, Team, Player, Match, Lineup, LineupPlayer
+from scores.player_index import PlayerIndex
+from scores.signals import lineups_confirmed
+
+
+def squad(team_id, first_id):
+    return {
+        "team": {"id": int(team_id)},
+        "formation": "4-3-3",
+        "coach": {"name": "Coach"},
+        "startXI": [{"player": {"id": first_id + i, "name": f"Starter {first_id + i}", "number": i + 1, "pos": "M"}}
+                    for i in range(11)],
+        "substitutes": [{"player": {"id": first_id + 11 + i, "name": f"Sub {first_id + 11 + i}", "number": 12 + i,
+                                    "pos": "D"}} for i in range(7)],
+    }
+
+
+class LineupIngestionTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        league = League.objects.create(id='39', name='Premier League', country='England')
+        cls.home = Team.objects.create(id='1', name='Home', league=league)
+        cls.away = Team.objects.create(id='2', name='Away', league=league)
+        cls.match = Match.objects.create(id='100', home_team=cls.home, away_team=cls.away, league=league,
+                                         stadium='Stadium', match_date=datetime(2025, 3, 1, 15, 0, tzinfo=dt_timezone.utc))
+
+    def setUp(self):
+        self.payload = {"response": [squad('1', 1000), squad('2', 2000)]}
+
+    def fetch(self, payload):
+        command = Command(stdout=StringIO())
+        command.players = PlayerIndex()
+        client = mock.Mock()
+        client.get_lineups.return_value = copy.deepcopy(payload)
+        with self.captureOnCommitCallbacks(execute=True):
+            command.fetch_and_save_lineup(client, self.match)
+
+    def test_unchanged_payload_is_skipped(self):
+        self.fetch(self.payload)
+        self.assertEqual(LineupPlayer.objects.count(), 36)
+        self.assertEqual(Player.objects.count(), 36)
+        self.assertEqual(Lineup.objects.filter(is_confirmed=True).count(), 2)
+
+        since = changelog.latest_seq()
+        with self.assertNumQueries(2):  # stored lineups, teams
+            self.fetch(self.payload)
+        self.assertEqual(changelog.latest_seq(), since)
+
+    def test_only_the_difference_is_written(self):
+        self.fetch(self.payload)
+        kept = set(LineupPlayer.objects.values_list('pk', flat=True))
+
+        away = self.payload["response"][1]
+        away["substitutes"][0]["player"]["number"] = 99
+        away["substitutes"].pop()
+        away["substitutes"].append({"player": {"id": 3000, "name": "Late Call-up", "number": 40, "pos": "F"}})
+        self.fetch(self.payload)
+
+        rows = LineupPlayer.objects.filter(lineup__team=self.away)
+        self.assertEqual(rows.count(), 18)
+        self.assertEqual(rows.get(player_id='2011').shirt_number, 99)
+        self.assertFalse(rows.filter(player_id='2017').exists())
+        self.assertTrue(Player.objects.filter(pk='3000', team=self.away).exists())
+        # Untouched rows keep their primary keys
+        self.assertEqual(len(kept - set(LineupPlayer.objects.values_list('pk', flat=True))), 1)
+
+    def test_confirmation_is_announced_once(self):
+        received = []
+
+        def listener(sender, match, lineup_info, **kwargs):
+            received.append(lineup_info)
+
+        lineups_confirmed.connect(listener)
+        self.addCleanup(lineups_confirmed.disconnect, listener)
+        self.fetch(self.payload)
+        self.payload["response"][0]["formation"] = "4-4-2"
+        self.fetch(self.payload)
+
+        self.assertEqual(len(received), 1)
+        self.assertEqual(received[0]["home_team"][0], "Starter 1000")
+        self.assertEqual(len(received[0]["away_team"]), 11)
+
+    def test_confirmation_waits_for_both_sides(self):
+        received = []
+
+        def listener(sender, match, lineup_info, **kwargs):
+            received.append(lineup_info)
+
+        lineups_confirmed.connect(listener)
+        self.addCleanup(lineups_confirmed.disconnect, listener)
+        self.fetch({"response": [squad('1', 1000)]})
+        self.assertEqual(received, [])
+
+        self.fetch(self.payload)
+        self.fetch(self.payload)
+        self.assertEqual(len(received), 1)
+        # The side confirmed earlier (and unchanged now) is announced as well
+        self.assertEqual(received[0]["home_team"], [f"Starter {1000 + i}" for i in range(11)])
+        self.assertEqual(received[0]["away_team"], [f"Starter {2000 + i}" for i in range(11)])
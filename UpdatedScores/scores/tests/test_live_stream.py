@@ -0,0 +1,113 @@
+import json
+from datetime import datetime, timezone as dt_timezone
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+
+from scores import live_stream
+from scores.models import League, Team, Player, Match, Event, Profile
+
+
+def parse(chunk):
+    fields = dict(line.split(': ', 1) for line in chunk.decode().strip().split('\n'))
+    return fields['event'], json.loads(fields['data'])
+
+
+class LiveStreamTests(TestCase):
+    def setUp(self):
+        live_stream._broadcaster = None
+        self.league = League.objects.create(id='39', name='Premier League', country='England')
+        self.other_league = League.objects.create(id='140', name='La Liga', country='Spain')
+        self.home = Team.objects.create(id='1', name='Home FC', league=self.league)
+        self.away = Team.objects.create(id='2', name='Away FC', league=self.league)
+        self.player = Player.objects.create(id='7', name='Striker', team=self.home, position='FW')
+        self.match = Match.objects.create(
+            id='1000', home_team=self.home, away_team=self.away, league=self.league, stadium='Ground',
+            match_date=datetime(2025, 3, 1, 15, 0, tzinfo=dt_timezone.utc), status='NS',
+        )
+
+    def test_fanout_by_channel(self):
+        broadcaster = live_stream.get_broadcaster()
+        by_match = live_stream.ThreadSubscriber(matches=['1000'])
+        by_league = live_stream.ThreadSubscriber(leagues=['39'])
+        by_team = live_stream.ThreadSubscriber(teams=['2'])
+        elsewhere = live_stream.ThreadSubscriber(leagues=['140'])
+        for subscriber in (by_match, by_league, by_team, elsewhere):
+            broadcaster.subscribe(subscriber)
+
+        self.match.status, self.match.score = '1H', '0-0'
+        self.match.save()
+        self.match.save()  # unchanged, nothing published
+        Event.objects.create(match=self.match, minute=12, event_type='GOAL', description='Goal', player=self.player)
+        self.match.score = '1-0'
+        self.match.save()
+        # Ingestion deletes and re-creates events; the goal is not published twice
+        Event.objects.filter(match=self.match).delete()
+        Event.objects.create(match=self.match, minute=12, event_type='GOAL', description='Goal', player=self.player)
+
+        for subscriber in (by_match, by_league, by_team):
+            kinds = [subscriber.get(0).kind for _ in range(subscriber.queue.qsize())]
+            self.assertEqual(kinds, ['score', 'event', 'score'])
+        self.assertTrue(elsewhere.queue.empty())
+        event = broadcaster.backlog[1].data
+        self.assertEqual(event, {'match': '1000', 'minute': 12, 'type': 'GOAL', 'player': 'Striker', 'team': 'home'})
+
+        broadcaster.unsubscribe(by_match)
+        self.assertEqual(broadcaster.subscriber_count, 3)
+
+    def test_event_payload_comes_from_the_saved_instance(self):
+        broadcaster = live_stream.get_broadcaster()
+        subscriber = live_stream.ThreadSubscriber(matches=['1000'])
+        broadcaster.subscribe(subscriber)
+
+        event = Event(match=self.match, minute=30, event_type='CARD', description='Card', player=self.player)
+        with self.assertNumQueries(0):
+            live_stream.publish_event(event)
+        self.assertEqual(subscriber.get(0).data['team'], 'home')
+
+        # Only ids known: nothing is looked up inside the save, the event follows the commit
+        event = Event(match_id='1000', minute=44, event_type='GOAL', description='Goal', player_id='7')
+        live_stream._broadcaster = broadcaster = live_stream.Broadcaster()
+        broadcaster.subscribe(subscriber)
+        with self.captureOnCommitCallbacks() as callbacks, self.assertNumQueries(0):
+            self.assertIsNone(live_stream.publish_event(event))
+        self.assertTrue(subscriber.queue.empty())
+        for callback in callbacks:
+            callback()
+        self.assertEqual(subscriber.get(0).data, {'match': '1000', 'minute': 44, 'type': 'GOAL', 'player': 'Striker',
+                                                  'team': 'home'})
+
+    def test_backlog_and_lagging_subscriber(self):
+        broadcaster = live_stream.get_broadcaster()
+        for score in ('0-0', '1-0', '2-0'):
+            broadcaster.publish('score', '1000', '39', ('1', '2'), {'score': score})
+        missed = broadcaster.subscribe(live_stream.ThreadSubscriber(matches=['1000']), last_event_id=1)
+        self.assertEqual([d.data['score'] for d in missed], ['1-0', '2-0'])
+
+        slow = live_stream.ThreadSubscriber(leagues=['39'], queue_size=1)
+        broadcaster.subscribe(slow)
+        broadcaster.publish('score', '1000', '39', ('1', '2'), {'score': '3-0'})
+        broadcaster.publish('score', '1000', '39', ('1', '2'), {'score': '4-0'})
+        self.assertTrue(slow.lagged)
+        self.assertEqual(slow.get(0).data['score'], '3-0')
+
+    @override_settings(LIVE_STREAM_HEARTBEAT=0.05)
+    async def test_stream_endpoint(self):
+        response = await self.async_client.get('/live/stream/', {'match': '1000'}, secure=True)
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        chunks = response.streaming_content
+        self.assertTrue((await anext(chunks)).startswith(b'retry:'))
+        self.assertEqual(await anext(chunks), b': ping\n\n')
+
+        self.match.status, self.match.score = '2H', '2-1'
+        await sync_to_async(self.match.save)()
+
+        self.assertEqual(parse(await anext(chunks)), ('score', {'match': '1000', 'score': '2-1', 'status': '2H'}))
+        self.assertEqual((await self.async_client.get('/live/stream/', secure=True)).status_code, 400)
+        self.assertEqual((await self.async_client.get('/live/stream/', {'favorites': 1}, secure=True)).status_code, 401)
+
+    def test_favorites_channel(self):
+        user = User.objects.create_user('fan', password='pass-1234')
+        Profile.objects.get(user=user).favorite_teams.add(self.away)
+        self.assertEqual(live_stream._favorites(user), (['2'], []))
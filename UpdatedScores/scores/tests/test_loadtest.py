@@ -0,0 +1,60 @@
+import io
+import json
+import os
+import tempfile
+
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+
+from scores import loadtest
+from scores.models import Match
+from scores.synthetic import SCALES, SyntheticDataGenerator
+
+
+class LoadTestTests(TestCase):
+    """Load generator against the in-process client"""
+
+    @classmethod
+    def setUpTestData(cls):
+        SyntheticDataGenerator(SCALES['tiny'], seed=3, batch_size=50, now=timezone.now()).generate()
+        # Live matches are rare at tiny scale; make a few
+        live_ids = Match.objects.filter(status='FT').order_by('-match_date').values_list('id', flat=True)[:3]
+        Match.objects.filter(id__in=list(live_ids)).update(status='2H')
+
+    def test_percentile_nearest_rank(self):
+        values = list(range(1, 101))
+        self.assertEqual(loadtest.percentile(values, 50), 50)
+        self.assertEqual(loadtest.percentile(values, 99), 99)
+        self.assertEqual(loadtest.percentile([7], 95), 7)
+        self.assertIsNone(loadtest.percentile([], 50))
+
+    def test_matchday_profile_reports_each_route(self):
+        pool = loadtest.Pool.from_database()
+        self.assertTrue(pool.live_match_ids)
+        self.assertTrue(pool.usernames)
+
+        summary = loadtest.LoadTest(
+            loadtest.PROFILES['matchday'], loadtest.ClientTarget, pool, users=1, duration=0, requests=60, seed=1,
+        ).run()
+
+        self.assertEqual(summary['total']['requests'], 60)
+        self.assertEqual(summary['total']['errors'], 0, summary['routes'])
+        self.assertIn('match_detail_live', summary['routes'])
+        self.assertEqual(summary['routes']['index']['statuses'], {'200': summary['routes']['index']['requests']})
+        # Regular users are bounced from refresh, never allowed to trigger ingestion
+        if 'refresh_data' in summary['routes']:
+            self.assertEqual(set(summary['routes']['refresh_data']['statuses']), {'302'})
+        for stats in summary['routes'].values():
+            self.assertLessEqual(stats['p50_ms'], stats['p99_ms'])
+
+    def test_command_writes_json(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'load.json')
+            out = io.StringIO()
+            call_command('run_load_test', profile='weekday', users=1, duration=0, requests=20, json_path=path, stdout=out)
+            with open(path) as f:
+                summary = json.load(f)
+        self.assertEqual(summary['profile'], 'weekday')
+        self.assertEqual(summary['total']['requests'], 20)
+        self.assertIn('TOPLAM', out.getvalue())
@@ -0,0 +1,66 @@
+from datetime import datetime, timedelta, timezone as dt_timezone
+from io import StringIO
+
+from django.test import TestCase
+
+from scores.management.commands.generate_match_analysis import Command
+from scores import team_ratings
+from scores.match_history import MatchHistory
+from scores.models import League, Team, Match, MatchPreview
+
+KICKOFF = datetime(2025, 3, 1, 15, 0, tzinfo=dt_timezone.utc)
+
+
+class MatchHistoryTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.league = League.objects.create(id='39', name='Premier League', country='England')
+        cls.teams = [Team.objects.create(id=str(i), name=f"Team {i}", league=cls.league) for i in range(1, 4)]
+        a, b, c = cls.teams
+        # (days after KICKOFF, home, away, score)
+        results = [(0, a, b, '2-0'), (7, b, a, '1-1'), (14, a, c, '0-1'), (21, c, b, '3-2'), (28, b, a, '2-1'),
+                   (35, a, b, None)]
+        for day, home, away, score in results:
+            Match.objects.create(id=str(100 + day), home_team=home, away_team=away, league=cls.league,
+                                 stadium='Stadium', match_date=KICKOFF + timedelta(days=day), score=score)
+        cls.upcoming = [
+            Match.objects.create(id=str(200 + i), home_team=home, away_team=away, league=cls.league,
+                                 stadium='Stadium', match_date=KICKOFF + timedelta(days=40 + i))
+            for i, (home, away) in enumerate([(a, b), (c, a)])
+        ]
+
+    def test_form_h2h_and_stats_from_one_query(self):
+        with self.assertNumQueries(1):
+            history = MatchHistory.for_matches(self.upcoming)
+        self.assertEqual(len(history), 5)  # unscored matches are left out
+
+        with self.assertNumQueries(0):
+            self.assertEqual(history.form('1', KICKOFF + timedelta(days=40)), 'LLDW')
+            self.assertEqual(history.form('1', KICKOFF + timedelta(days=40), venue='home'), 'LW')
+            self.assertEqual(history.form('1', KICKOFF + timedelta(days=10)), 'DW')
+            self.assertEqual(history.form('9', KICKOFF), '')
+            h2h = history.head_to_head('1', '2', KICKOFF + timedelta(days=40))
+            stats = history.team_stats('2')
+
+        self.assertEqual((h2h['total'], h2h['home_wins'], h2h['draws'], h2h['away_wins']), (3, 1, 1, 1))
+        self.assertEqual(h2h['matches'][0], {
+            'date': '2025-03-29', 'home_team': 'Team 2', 'away_team': 'Team 1', 'score': '2-1', 'result': 'AWAY_WIN',
+        })
+        # Team 2: home 1-1, 2-1; away 0-2, 2-3
+        self.assertEqual(stats, {'matches': 4, 'avg_goals_scored': 1.25, 'avg_goals_conceded': 1.75,
+                                 'clean_sheets': 0})
+
+    def test_batch_previews_do_not_query_per_match(self):
+        command = Command(stdout=StringIO(), stderr=StringIO())
+        matches = list(Match.objects.filter(pk__in=['200', '201']).select_related('home_team', 'away_team', 'league'))
+        history = MatchHistory.for_matches(matches)
+        forecasts = team_ratings.forecast(matches)
+        with self.assertNumQueries(0):
+            previews = []
+            for match in matches:
+                preview = MatchPreview(match=match)
+                command.fill_preview(preview, match, history, squads={}, forecasts=forecasts)
+                previews.append(preview)
+        self.assertEqual(previews[0].home_form, 'LW')
+        self.assertEqual(previews[0].head_to_head['total'], 3)
+        self.assertEqual(previews[1].home_stats['avg_goals_scored'], 2.0)  # 3-2 at home, 1-0 away
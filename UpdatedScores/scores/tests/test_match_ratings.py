@@ -0,0 +1,91 @@
+from datetime import datetime, timedelta, timezone as dt_timezone
+import json
+import os
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+
+import scores
+from scores import match_ratings, parallel, scheduler
+from scores.apps import ScoresConfig
+from scores.management.commands import generate_match_analysis
+from scores.models import League, Team, Player, Match, MatchAnalysis, Event
+
+KICKOFF = datetime(2025, 3, 1, 15, 0, tzinfo=dt_timezone.utc)
+
+
+class MatchRatingTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        league = League.objects.create(id='39', name='Premier League', country='England')
+        cls.home = Team.objects.create(id='1', name='Home', league=league)
+        cls.away = Team.objects.create(id='2', name='Away', league=league)
+        for team in (cls.home, cls.away):
+            for i in range(11):
+                Player.objects.create(id=f"{team.id}{i:02d}", name=f"{team.name} {i}", team=team, position='MF')
+        cls.matches = [
+            Match.objects.create(id=str(100 + i), home_team=cls.home, away_team=cls.away, league=league,
+                                 stadium='Stadium', match_date=KICKOFF + timedelta(days=i), score=score, status='FT')
+            for i, score in enumerate(['2-0', '1-1', '0-3'])
+        ]
+        Event.objects.create(match=cls.matches[0], minute=10, event_type='GOAL', player_id='100', description='Goal')
+        Event.objects.create(match=cls.matches[0], minute=50, event_type='GOAL', player_id='100', description='Goal')
+        Event.objects.create(match=cls.matches[0], minute=10, event_type='ASSIST', player_id='101', description='Assist')
+        Event.objects.create(match=cls.matches[0], minute=70, event_type='YELLOW', player_id='200', description='Card')
+
+    def test_batch_is_two_queries_and_deterministic(self):
+        with self.assertNumQueries(2):
+            ratings = match_ratings.for_matches(self.matches)
+        self.assertEqual(ratings, match_ratings.for_matches(self.matches))
+        self.assertEqual(set(ratings), {'100', '101', '102'})
+
+        first = ratings['100']
+        form = dict(zip(['100', '101', '200'], match_ratings.form_terms('100', ['100', '101', '200'])))
+        # Two goals count once; winners get +0.5, losers nothing
+        self.assertEqual(first['home_team']['Home 0'], round(6.0 + form['100'] + 1.5 + 0.5, 1))
+        self.assertEqual(first['home_team']['Home 1'], round(6.0 + form['101'] + 1.0 + 0.5, 1))
+        self.assertEqual(first['away_team']['Away 0'], round(6.0 + form['200'] - 0.5, 1))
+        self.assertEqual(len(first['away_team']), 11)
+        self.assertTrue(all(6.2 <= r < 7.3 for r in ratings['101']['home_team'].values()))
+
+    def test_command_writes_batched_ratings(self):
+        Match.objects.filter(pk__in=[m.pk for m in self.matches]).update(match_date=timezone.now() - timedelta(hours=5))
+        call_command('generate_match_analysis', analysis=True, days=1, stdout=StringIO(), stderr=StringIO())
+        expected = match_ratings.for_matches(Match.objects.filter(pk__in=['100', '101', '102']))
+        for analysis in MatchAnalysis.objects.all():
+            self.assertEqual(analysis.player_ratings, expected[analysis.match_id])
+        self.assertEqual(MatchAnalysis.objects.count(), 3)
+
+    def test_parallel_mode_writes_worker_results_in_bulk(self):
+        Match.objects.filter(pk__in=[m.pk for m in self.matches]).update(match_date=timezone.now() - timedelta(hours=5))
+        results = generate_match_analysis.build_analyses(['100', '101'])
+        json.dumps(results)  # plain data only
+        self.assertEqual(results['100']['player_ratings'], match_ratings.for_matches([self.matches[0]])['100'])
+
+        def inline(task, chunks, workers):
+            return ((chunk, task(chunk)) for chunk in chunks)
+
+        self.assertEqual(parallel.chunked(['1', '2', '3'], 2), [['1', '2'], ['3']])
+        with mock.patch.object(parallel, 'run', side_effect=inline) as run:
+            call_command('generate_match_analysis', analysis=True, days=1, workers=4, chunk_size=2,
+                         stdout=StringIO(), stderr=StringIO())
+        self.assertEqual(sorted(len(chunk) for chunk in run.call_args.args[1]), [1, 2])
+        self.assertEqual(MatchAnalysis.objects.count(), 3)
+        self.assertEqual(generate_match_analysis.save_analyses(results), 2)
+        self.assertEqual(MatchAnalysis.objects.count(), 3)
+
+    def test_pool_workers_do_not_start_the_scheduler(self):
+        config = ScoresConfig('scores', scores)
+        with mock.patch.object(scheduler, 'start') as start, mock.patch.dict(os.environ):
+            os.environ.pop(parallel.WORKER_ENV, None)
+            config.ready()
+            self.assertEqual(start.call_count, 1)
+            # What a spawned worker does before django.setup() runs ready()
+            with mock.patch('django.setup', side_effect=config.ready), \
+                    mock.patch('django.db.connections.close_all'):
+                parallel._init_worker(None)
+            self.assertTrue(parallel.in_worker())
+            self.assertEqual(start.call_count, 1)
@@ -0,0 +1,125 @@
+import os
+import tempfile
+import time
+
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from scores import metrics
+from scores.models import League
+
+
+class MetricsRenderingTests(TestCase):
+    """Prometheus text format rendering and snapshot merging"""
+
+    def setUp(self):
+        metrics.registry.reset()
+
+    def test_counter_and_histogram_rendering(self):
+        metrics.INGESTION_ROWS.inc(3, command='fetch_match_events', model='Event', operation='created')
+        metrics.API_LATENCY.observe(0.2, endpoint='fixtures')
+
+        body = metrics.render_metrics([metrics.registry.snapshot()])
+
+        self.assertIn('# TYPE updatedscores_ingestion_rows_total counter', body)
+        self.assertIn(
+            'updatedscores_ingestion_rows_total{command="fetch_match_events",model="Event",operation="created"} 3',
+            body,
+        )
+        self.assertIn('updatedscores_api_football_request_duration_seconds_bucket{endpoint="fixtures",le="0.1"} 0', body)
+        self.assertIn('updatedscores_api_football_request_duration_seconds_bucket{endpoint="fixtures",le="0.25"} 1', body)
+        self.assertIn('updatedscores_api_football_request_duration_seconds_count{endpoint="fixtures"} 1', body)
+
+    def test_merge_sums_counters_and_aggregates_gauges(self):
+        metrics.CACHE_LOOKUPS.inc(cache='match', result='hit')
+        metrics.API_QUOTA_REMAINING.set(90, window='day')
+        first = metrics.registry.snapshot()
+        metrics.registry.reset()
+        metrics.CACHE_LOOKUPS.inc(2, cache='match', result='hit')
+        metrics.API_QUOTA_REMAINING.set(80, window='day')
+        second = metrics.registry.snapshot()
+
+        merged = metrics.merge_snapshots([first, second])
+
+        self.assertEqual(merged['updatedscores_cache_lookups_total']['samples'][('match', 'hit')], 3)
+        self.assertEqual(merged['updatedscores_api_football_quota_remaining']['samples'][('day',)], 80)
+
+    def test_stale_gauges_are_ignored(self):
+        metrics.API_QUOTA_REMAINING.set(10, window='day')
+        metrics.CACHE_LOOKUPS.inc(cache='match', result='miss')
+        snapshot = metrics.registry.snapshot()
+        snapshot['timestamp'] = time.time() - 3600
+
+        merged = metrics.merge_snapshots([snapshot], stale_after=300)
+
+        self.assertNotIn('updatedscores_api_football_quota_remaining', merged)
+        self.assertIn('updatedscores_cache_lookups_total', merged)
+
+    def test_live_update_lag_keeps_growing_when_the_scheduler_stops_publishing(self):
+        metrics.JOB_LAST_SUCCESS.set(time.time() - 3660, job='update_match_events')
+        snapshot = metrics.registry.snapshot()
+        snapshot['timestamp'] = time.time() - 3600
+
+        body = metrics.render_metrics([snapshot])
+
+        line = next(line for line in body.splitlines()
+                    if line.startswith('updatedscores_live_update_lag_seconds{job="update_match_events"}'))
+        self.assertGreaterEqual(float(line.split()[-1]), 3660)
+
+    def test_live_update_lag_is_derived(self):
+        metrics.JOB_LAST_SUCCESS.set(time.time() - 30, job='update_match_events')
+
+        body = metrics.render_metrics([metrics.registry.snapshot()])
+
+        self.assertIn('updatedscores_live_update_lag_seconds{job="update_match_events"}', body)
+
+
+class MetricsEndpointTests(TestCase):
+    """The /metrics endpoint and the request middleware (over https, SECURE_SSL_REDIRECT is on)"""
+
+    def setUp(self):
+        metrics.registry.reset()
+        League.objects.create(id="39", name="Premier League", country="England")
+
+    @override_settings(METRICS_TOKEN='secret')
+    def test_request_metrics_are_exposed(self):
+        self.client.get(reverse('scores:leagues'), secure=True)
+
+        response = self.client.get(reverse('metrics'), secure=True, HTTP_AUTHORIZATION='Bearer secret')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response['Content-Type'].startswith('text/plain'))
+        body = response.content.decode()
+        self.assertIn('updatedscores_http_requests_total{view="scores:leagues",method="GET",status="200"} 1', body)
+        self.assertIn('updatedscores_http_request_db_queries_count{view="scores:leagues"} 1', body)
+
+    @override_settings(METRICS_TOKEN='secret')
+    def test_token_is_required_when_configured(self):
+        self.assertEqual(self.client.get(reverse('metrics'), secure=True).status_code, 403)
+        response = self.client.get(reverse('metrics'), secure=True, HTTP_AUTHORIZATION='Bearer secret')
+        self.assertEqual(response.status_code, 200)
+
+    @override_settings(METRICS_TOKEN='')
+    def test_endpoint_is_closed_without_a_token_outside_debug(self):
+        self.assertEqual(self.client.get(reverse('metrics'), secure=True).status_code, 403)
+        with override_settings(DEBUG=True):
+            self.assertEqual(self.client.get(reverse('metrics'), secure=True).status_code, 200)
+
+    def test_directory_mode_merges_other_processes(self):
+        with tempfile.TemporaryDirectory() as directory:
+            other = metrics.DirectorySnapshotStore(directory, retention=3600)
+            metrics.INGESTION_ROWS.inc(5, command='fetch_match_lineups', model='LineupPlayer', operation='created')
+            snapshot = metrics.registry.snapshot()
+            snapshot['process'] = 'scheduler-1'
+            other.publish('scheduler-1', snapshot)
+            metrics.registry.reset()
+
+            with override_settings(METRICS_MODE='directory', METRICS_DIRECTORY=directory):
+                metrics.INGESTION_ROWS.inc(1, command='fetch_match_lineups', model='LineupPlayer', operation='created')
+                body = metrics.render_metrics(metrics.registry.collect())
+
+            self.assertEqual(len(os.listdir(directory)), 2)
+        self.assertIn(
+            'updatedscores_ingestion_rows_total{command="fetch_match_lineups",model="LineupPlayer",operation="created"} 6',
+            body,
+        )
@@ -0,0 +1,79 @@
+import io
+import os
+from unittest.mock import patch
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from scores.fake_api import Catalog, FakeAPIFootball, FakeAPIFootballServer
+from scores.models import League, Team, Player, Match, LineupPlayer
+from scores.player_index import PlayerIndex, name_key
+
+NOW = 1760000000.0
+
+
+class PlayerIndexTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        league = League.objects.create(id='203', name='Süper Lig', country='Türkiye')
+        cls.team = Team.objects.create(id='611', name='Fenerbahçe', league=league)
+        cls.other = Team.objects.create(id='549', name='Beşiktaş', league=league)
+        Player.objects.create(id='1', name='İrfan Can Kahveci', team=cls.team, position='MF')
+        Player.objects.create(id='2', name='Mohamed Salah', team=cls.team, position='FW')
+        Player.objects.create(id='3', name='Edin Džeko', team=cls.team, position='FW')
+        Player.objects.create(id='4', name='Ciro Immobile', team=cls.other, position='FW')
+
+    def test_name_lookup(self):
+        self.assertEqual(name_key('Kahveci İrfan Can'), 'can irfan kahveci')
+        with self.assertNumQueries(1):
+            index = PlayerIndex.for_teams(['611', '549'])
+            self.assertEqual(index.find('kahveci irfan can', '611').pk, '1')
+            self.assertEqual(index.find('M. Salah', '611').pk, '2')
+            self.assertEqual(index.find('Edin Dzeko', '611').pk, '3')
+            self.assertEqual(index.find('Edin Dzekko', '611').pk, '3')  # fuzzy
+            self.assertIsNone(index.find('Immobile', '611'))
+            self.assertEqual(index.find('Immobile').pk, '4')
+            self.assertEqual(index.get(4).name, 'Ciro Immobile')
+            index.load_teams(['611'])  # already loaded
+
+    def test_unknown_players_are_created_in_one_insert(self):
+        index = PlayerIndex.for_teams(['611'])
+        index.prefetch_ids(['4', '99'])
+        with self.assertNumQueries(0):
+            new = index.get_or_add('99', 'Yeni Oyuncu', '611', 'DF')
+            index.get_or_add('98', 'Başka Oyuncu', '611')
+            self.assertIs(index.get_or_add('99', 'Yeni Oyuncu', '611'), new)
+            index.get_or_add('4', 'Ciro Immobile', '611', move=True)
+        self.assertEqual(index.find('Yeni Oyuncu', '611'), new)
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(index.flush(), (2, 1))
+        self.assertLessEqual(len(queries), 4)  # insert + update (+ savepoint)
+        self.assertEqual(Player.objects.get(id='99').position, 'DF')
+        self.assertEqual(Player.objects.get(id='4').team_id, '611')
+        self.assertEqual(index.flush(), (0, 0))
+
+    def test_lineups_command_uses_preloaded_players(self):
+        catalog = Catalog.generate(seed=3, leagues=1, teams_per_league=4, now=NOW)
+        api = FakeAPIFootball(catalog, seed=3, clock=lambda: NOW, sleep=lambda seconds: None)
+        fixture = next(f for f in catalog.fixtures.values() if api.match_clock(f)[0] == 'FT')
+        league = League.objects.create(id=str(fixture.league_id), name='Premier League', country='England')
+        for team_id, (name, *_) in catalog.teams.items():
+            Team.objects.create(id=str(team_id), name=name, league=league)
+
+        with FakeAPIFootballServer(api) as server, patch.dict(os.environ, {'API_FOOTBALL_BASE_URL': server.base_url}):
+            call_command('fetch_api_football_matches', no_delete=True, last=50, next=1, stdout=io.StringIO())
+            match = Match.objects.get(id=str(fixture.id))
+            call_command('fetch_match_lineups', match_id=match.id, stdout=io.StringIO())
+            created = LineupPlayer.objects.filter(lineup__match=match).count()
+            players = Player.objects.count()
+            with CaptureQueriesContext(connection) as queries:
+                call_command('fetch_match_lineups', match_id=match.id, stdout=io.StringIO())
+
+        self.assertGreater(created, 20)
+        self.assertEqual(LineupPlayer.objects.filter(lineup__match=match).count(), created)
+        self.assertEqual(Player.objects.count(), players)
+        # No per-player SELECT/INSERT on the second run
+        player_queries = [q for q in queries.captured_queries if '"scores_player"' in q['sql']]
+        self.assertLessEqual(len(player_queries), 3)
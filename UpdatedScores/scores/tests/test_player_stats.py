@@ -0,0 +1,103 @@
+from datetime import datetime, timezone as dt_timezone
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from scores import player_stats
+from scores.management.commands.fetch_match_statistics import Command
+from scores.models import League, Team, Player, Match, MatchAnalysis, PlayerMatchStat
+from scores.player_index import PlayerIndex
+
+KICKOFF = datetime(2025, 3, 1, 15, 0, tzinfo=dt_timezone.utc)
+
+
+def player_entry(player_id, name, minutes=90, rating='7.1', goals=None, shots=2, yellow=0):
+    return {
+        'player': {'id': player_id, 'name': name},
+        'statistics': [{
+            'games': {'minutes': minutes, 'rating': rating, 'position': 'F'},
+            'goals': {'total': goals, 'assists': None},
+            'shots': {'total': shots, 'on': 1},
+            'passes': {'total': 30, 'key': 2},
+            'tackles': {'total': 3},
+            'cards': {'yellow': yellow, 'red': 0},
+        }],
+    }
+
+
+class PlayerMatchStatTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.league = League.objects.create(id='39', name='Premier League', country='England')
+        cls.home = Team.objects.create(id='1', name='Home', league=cls.league)
+        cls.away = Team.objects.create(id='2', name='Away', league=cls.league)
+        Player.objects.create(id='10', name='Known Striker', team=cls.home, position='FW')
+        cls.matches = [
+            Match.objects.create(id=str(100 + i), home_team=cls.home, away_team=cls.away, league=cls.league,
+                                 stadium='Stadium', match_date=KICKOFF, season='2025', status='FT')
+            for i in range(2)
+        ]
+
+    def fetch(self, match, players_payload):
+        command = Command(stdout=StringIO())
+        command.players = PlayerIndex()
+        client = mock.Mock()
+        client.get_statistics.return_value = {'response': [
+            {'team': {'id': 1}, 'statistics': [{'type': 'Total Shots', 'value': 9}]},
+            {'team': {'id': 2}, 'statistics': [{'type': 'Total Shots', 'value': 4}]},
+        ]}
+        client.get_player_statistics.return_value = players_payload
+        command.fetch_and_save_stats(client, match)
+
+    def test_fetch_upserts_rows_and_aggregates_in_sql(self):
+        first = {'response': [
+            {'team': {'id': 1, 'name': 'Home'}, 'players': [player_entry(10, 'Known Striker', goals=1)]},
+            {'team': {'id': 2, 'name': 'Away'}, 'players': [player_entry(20, 'New Keeper', rating=None, shots=0)]},
+        ]}
+        self.fetch(self.matches[0], first)
+        self.assertEqual(PlayerMatchStat.objects.count(), 2)
+        self.assertEqual(Player.objects.get(pk='20').team_id, '2')
+        ratings = MatchAnalysis.objects.get(match=self.matches[0]).player_ratings
+        self.assertEqual([p['id'] for p in ratings['away']], ['20'])
+
+        # A re-run updates in place
+        first['response'][0]['players'][0] = player_entry(10, 'Known Striker', goals=2, yellow=1)
+        self.fetch(self.matches[0], first)
+        self.fetch(self.matches[1], {'response': [
+            {'team': {'id': 1, 'name': 'Home'}, 'players': [player_entry(10, 'Known Striker', minutes=60,
+                                                                         rating='8.0')]},
+        ]})
+        self.assertEqual(PlayerMatchStat.objects.count(), 3)
+
+        with self.assertNumQueries(1):
+            striker = player_stats.player_totals('2025', league_id='39').get(player_id='10')
+        self.assertEqual(striker['appearances'], 2)
+        self.assertEqual(striker['total_minutes'], 150)
+        self.assertEqual(striker['total_goals'], 2)
+        self.assertEqual(striker['total_yellow_cards'], 1)
+        self.assertAlmostEqual(striker['avg_rating'], 7.55)
+        teams = {row['team_id']: row for row in player_stats.team_totals('2025')}
+        self.assertEqual(teams['1']['matches'], 2)
+        self.assertIsNone(teams['2']['avg_rating'])
+
+    def test_backfill_from_stored_blobs(self):
+        MatchAnalysis.objects.create(match=self.matches[0], player_ratings={
+            # Known player listed under the wrong side by older fetches
+            'home': [],
+            'away': [{'id': '10', 'name': 'Known Striker', 'rating': '6.9', 'minutes': 90, 'goals': 1,
+                      'assists': 0, 'passes': 25, 'key_passes': 1, 'shots': 3},
+                     {'id': '30', 'name': 'Unknown Winger', 'rating': 'N/A', 'minutes': 12}],
+        })
+        MatchAnalysis.objects.create(match=self.matches[1], player_ratings={'home_team': {'Known Striker': 7.0}})
+
+        call_command('backfill_player_match_stats', stdout=StringIO())
+        call_command('backfill_player_match_stats', stdout=StringIO())
+
+        rows = {row.player_id: row for row in PlayerMatchStat.objects.all()}
+        self.assertEqual(set(rows), {'10', '30'})
+        self.assertEqual(rows['10'].team_id, '1')
+        self.assertEqual((rows['10'].goals, rows['10'].shots, rows['10'].rating), (1, 3, 6.9))
+        self.assertEqual(rows['30'].team_id, '2')
+        self.assertIsNone(rows['30'].rating)
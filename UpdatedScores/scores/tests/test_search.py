@@ -0,0 +1,68 @@
+from django.test import TestCase
+
+from scores import search
+from scores.models import League, Team, Player
+from scores.text_utils import fold, tokens
+
+
+class SearchTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.league = League.objects.create(id='203', name='Süper Lig', country='Türkiye')
+        cls.fener = Team.objects.create(id='611', name='Fenerbahçe', league=cls.league)
+        cls.besiktas = Team.objects.create(id='549', name='Beşiktaş', league=cls.league)
+        Player.objects.create(id='1', name='İrfan Can Kahveci', team=cls.fener, position='MF')
+        Player.objects.create(id='2', name='Kerem Aktürkoğlu', team=cls.fener, position='FW')
+        Player.objects.create(id='3', name='Ciro Immobile', team=cls.besiktas, position='FW')
+
+    def names(self, query, **kwargs):
+        return [r['name'] for r in search.search(query, **kwargs)]
+
+    def test_fold_handles_turkish_letters(self):
+        self.assertEqual(fold('İSTANBUL Başakşehir'), 'istanbul basaksehir')
+        self.assertEqual(tokens('Ødegaard, Müller'), ['odegaard', 'muller'])
+
+    def test_prefix_search_folds_diacritics_and_token_order(self):
+        self.assertEqual(self.names('fener'), ['Fenerbahçe'])
+        self.assertEqual(self.names('BESIK'), ['Beşiktaş'])
+        self.assertEqual(self.names('kahveci irf'), ['İrfan Can Kahveci'])
+        self.assertEqual(self.names('turkiye'), ['Süper Lig'])
+        self.assertEqual(self.names('ke', kinds=['player']), ['Kerem Aktürkoğlu'])
+        self.assertEqual(self.names('k'), [])
+        # Exact and leading matches before longer names
+        Team.objects.create(id='612', name='Fener', league=self.league)
+        self.assertEqual(self.names('fener'), ['Fener', 'Fenerbahçe'])
+
+    def test_saves_update_index_and_rebuild_catches_bulk_writes(self):
+        player = Player.objects.get(id='3')
+        player.name = 'Gedson Fernandes'
+        player.save()
+        self.assertEqual(self.names('immob'), [])
+        self.assertEqual(self.names('gedson'), ['Gedson Fernandes'])
+
+        Player.objects.bulk_create([Player(id='4', name='Dušan Tadić', team=self.fener, position='MF')])
+        self.assertEqual(self.names('tadic'), [])
+        Player.objects.filter(id='3').delete()
+        self.assertEqual(search.rebuild(), {'team': 2, 'player': 3, 'league': 1})
+        self.assertEqual(self.names('tadic'), ['Dušan Tadić'])
+        self.assertEqual(self.names('gedson'), [])
+
+    def test_typeahead_api(self):
+        response = self.client.get('/api/search/', {'q': 'fen', 'type': 'team'}, secure=True)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['results'], [
+            {'type': 'team', 'id': '611', 'name': 'Fenerbahçe', 'detail': 'Süper Lig'},
+        ])
+        self.assertEqual(self.client.get('/api/search/', {'q': 'fen', 'type': 'coach'}, secure=True).status_code, 400)
+
+    def test_short_prefix_keeps_exact_matches_and_admin_search_is_not_capped(self):
+        Player.objects.bulk_create([
+            Player(id=str(100 + k), name=f'Arda Oyuncu {k}', team=self.fener, position='MF') for k in range(1200)
+        ] + [Player(id='99', name='Ar', team=self.besiktas, position='GK'),
+              Player(id='98', name='Oyun Kurucu', team=self.besiktas, position='MF')])
+        search.rebuild(['player'])
+
+        self.assertEqual(self.names('ar', kinds=['player'])[0], 'Ar')
+        # A leading match is not lost among the names that only contain the prefix
+        self.assertEqual(self.names('oy', kinds=['player'])[0], 'Oyun Kurucu')
+        self.assertEqual(Player.objects.filter(pk__in=search.object_ids('player', 'ar')).count(), 1201)
@@ -0,0 +1,114 @@
+import time
+from datetime import datetime, timedelta, timezone as dt_timezone
+from io import StringIO
+from unittest import mock
+
+import numpy as np
+from django.core.management import call_command
+from django.test import TestCase
+
+from scores import season_projection
+from scores.models import League, Team, Match, SeasonProjection
+
+KICKOFF = datetime(2025, 3, 1, 15, 0, tzinfo=dt_timezone.utc)
+
+
+class SimulationTests(TestCase):
+    def test_probabilities_and_speed(self):
+        size = 20
+        home, away = zip(*[(i, j) for i in range(size) for j in range(size) if i != j])
+        rng = np.random.default_rng(7)
+        home_xg, away_xg = rng.uniform(0.8, 2.0, len(home)), rng.uniform(0.6, 1.6, len(home))
+        # Team 0 leads by more points than the rest of the season can give anyone else
+        table = [[0, 200, 0, 0]] + [[0, 0, 0, 0]] * (size - 1)
+
+        started = time.perf_counter()
+        positions = season_projection.simulate(table, home, away, home_xg, away_xg, 10000, rng=1)
+        self.assertLess(time.perf_counter() - started, 1.0)
+
+        self.assertEqual(positions.shape, (size, size))
+        np.testing.assert_allclose(positions.sum(axis=0), 1.0)
+        np.testing.assert_allclose(positions.sum(axis=1), 1.0)
+        self.assertEqual(positions[0, 0], 1.0)
+
+    def test_stronger_side_is_more_likely_to_finish_first(self):
+        # Two teams level on points, two meetings left; the first scores far more
+        positions = season_projection.simulate([[0, 10, 0, 0], [0, 10, 0, 0]], [0, 1], [1, 0], [2.5, 0.5],
+                                               [0.5, 2.5], 4000, rng=3)
+        self.assertGreater(positions[0, 0], 0.8)
+
+
+class SeasonProjectionTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.league = League.objects.create(id='39', name='Premier League', country='England')
+        cls.teams = [Team.objects.create(id=str(i), name=f"Team {i}", league=cls.league) for i in range(1, 9)]
+
+    def setUp(self):
+        day = 0
+        for home in range(8):
+            for away in range(8):
+                if home != away:
+                    score = ('3-0' if home < away else '0-1') if day < 30 else None
+                    Match.objects.create(id=str(100 + day), home_team=self.teams[home],
+                                         away_team=self.teams[away], league=self.league, stadium='Stadium',
+                                         match_date=KICKOFF + timedelta(days=day), score=score,
+                                         status='FT' if score else 'NS', season='2024')
+                    day += 1
+
+    def test_projection_is_recomputed_only_when_a_result_changes(self):
+        with mock.patch.object(season_projection, 'simulate', wraps=season_projection.simulate) as simulate:
+            first, = season_projection.project_leagues(['39'], simulations=2000)
+            season_projection.save([first])
+            self.assertEqual(season_projection.project_leagues(['39'], simulations=2000), [])
+            self.assertEqual(simulate.call_count, 1)
+            self.assertEqual(first['remaining'], 26)
+
+            match = Match.objects.get(pk='130')
+            match.score, match.status = '2-2', 'FT'
+            match.save()
+            season_projection.save(season_projection.project_leagues(['39'], simulations=2000))
+            self.assertEqual(simulate.call_count, 2)
+        updated = season_projection.stored('39')
+        self.assertEqual(updated.remaining, 25)
+        self.assertFalse(updated.stale)
+
+        rows = season_projection.chances(updated)
+        self.assertEqual(set(rows), {team.id for team in self.teams})
+        self.assertAlmostEqual(sum(row['title'] for row in rows.values()), 1.0, places=3)
+        self.assertAlmostEqual(sum(row['relegation'] for row in rows.values()), 3.0, places=3)
+        # Team 1 has won every match it played
+        self.assertEqual(updated.table[0]['team_id'], '1')
+
+    def test_league_page_only_reads_the_stored_projection(self):
+        with mock.patch.object(season_projection, 'simulate') as simulate:
+            response = self.client.get('/league/39/', secure=True)
+        simulate.assert_not_called()
+        self.assertFalse(SeasonProjection.objects.exists())
+        self.assertContains(response, 'henüz hesaplanmadı')
+        self.assertNotContains(response, 'Şampiyonluk')
+
+        season_projection.save(season_projection.project_leagues(['39'], simulations=1000))
+        response = self.client.get('/league/39/', secure=True)
+        self.assertContains(response, 'Şampiyonluk')
+        self.assertNotContains(response, 'önceki bir sezona')
+
+        # A new season started: the old table is shown as stale until the scheduler runs
+        Match.objects.create(id='999', home_team=self.teams[0], away_team=self.teams[1], league=self.league,
+                             stadium='Stadium', match_date=KICKOFF + timedelta(days=400), season='2025')
+        self.assertTrue(season_projection.stored('39').stale)
+        self.assertContains(self.client.get('/league/39/', secure=True), 'önceki bir sezona')
+
+    def test_unlabelled_season_has_no_projection(self):
+        Match.objects.create(id='999', home_team=self.teams[0], away_team=self.teams[1], league=self.league,
+                             stadium='Stadium', match_date=KICKOFF + timedelta(days=400))
+        self.assertEqual(season_projection.load('39')['team_ids'], [])
+        self.assertEqual(season_projection.project_leagues(['39'], simulations=1000), [])
+
+    def test_command_skips_unchanged_leagues(self):
+        out = StringIO()
+        call_command('project_seasons', '--simulations', '1000', stdout=out)
+        self.assertIn('1/1 lig', out.getvalue())
+        call_command('project_seasons', '--simulations', '1000', stdout=out)
+        self.assertIn('0/1 lig', out.getvalue())
+        self.assertEqual(SeasonProjection.objects.get().simulations, 1000)
@@ -0,0 +1,111 @@
+import importlib
+from datetime import datetime, timedelta, timezone as dt_timezone
+from unittest import mock
+
+from django.apps import apps
+from django.test import TestCase
+from django.urls import reverse
+
+from scores import team_form
+from scores.models import League, Team, Match, TeamForm
+
+KICKOFF = datetime(2025, 3, 1, 15, 0, tzinfo=dt_timezone.utc)
+
+
+class TeamFormTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.league = League.objects.create(id='39', name='Premier League', country='England')
+        cls.cup = League.objects.create(id='45', name='FA Cup', country='England')
+        cls.a, cls.b, cls.c = [Team.objects.create(id=str(i), name=f"Team {i}", league=cls.league)
+                               for i in range(1, 4)]
+
+    def play(self, day, home, away, score, league=None, status='FT'):
+        return Match.objects.create(id=str(100 + day), home_team=home, away_team=away, league=league or self.league,
+                                    stadium='Stadium', match_date=KICKOFF + timedelta(days=day), score=score,
+                                    status=status)
+
+    def state(self, team, league=None):
+        row = TeamForm.objects.get(team=team, league=league)
+        return {field: getattr(row, field) for field in team_form.STATE_FIELDS}
+
+    def states(self):
+        return {(row.team_id, row.league_id): {field: getattr(row, field) for field in team_form.STATE_FIELDS}
+                for row in TeamForm.objects.all()}
+
+    def test_results_are_applied_incrementally_and_match_a_rebuild(self):
+        self.play(0, self.a, self.b, '2-0')
+        self.play(7, self.b, self.a, '1-1')
+        self.play(14, self.a, self.c, '3-1')
+        self.play(17, self.c, self.a, '0-0', league=self.cup)
+        live = self.play(21, self.c, self.a, '1-0', status='2H')
+
+        # The overall row counts the cup draw like the league results; each competition has its own row
+        row = TeamForm.objects.get(team=self.a, league=None)
+        self.assertEqual((row.form, row.goal_diffs, row.played), ('DWDW', [0, 2, 0, 2], 4))
+        self.assertEqual((row.streak_result, row.streak, row.unbeaten_streak, row.winless_streak), ('D', 1, 4, 1))
+        self.assertEqual([m['id'] for m in row.matches], ['117', '114', '107', '100'])
+        self.assertEqual(self.state(self.a, self.league)['form'], 'WDW')
+        self.assertEqual(self.state(self.a, self.cup)['form'], 'D')
+
+        # Full time: pushed onto both rows
+        live.status = 'FT'
+        live.save()
+        row.refresh_from_db()
+        self.assertEqual((row.form, row.streak_result, row.unbeaten_streak), ('LDWDW', 'L', 0))
+        self.assertEqual(self.state(self.c)['form'], 'WDL')
+        self.assertEqual(self.state(self.c, self.league)['form'], 'WL')
+
+        # A corrected old score rebuilds, and incremental state equals a rebuild
+        old = Match.objects.get(pk='107')
+        old.score = '2-1'
+        old.save()
+        self.assertEqual(self.state(self.a)['form'], 'LDWLW')
+        self.assertEqual(self.state(self.a, self.league)['form'], 'LWLW')
+        incremental = self.states()
+        TeamForm.objects.all().delete()
+        team_form.rebuild()
+        self.assertEqual(self.states(), incremental)
+        # The migration fills the table the same way
+        migration = importlib.import_module('scores.migrations.0014_team_form')
+        TeamForm.objects.all().delete()
+        migration.fill_team_forms(apps, None)
+        self.assertEqual(self.states(), incremental)
+
+    def test_consumers_read_the_window_or_fall_back(self):
+        for day, score in enumerate(['1-0', '0-1', '2-2', '3-0'], start=1):
+            self.play(day * 7, self.a, self.b, score)
+        upcoming = Match.objects.create(id='200', home_team=self.a, away_team=self.b, league=self.league,
+                                        stadium='Stadium', match_date=KICKOFF + timedelta(days=40))
+
+        with self.assertNumQueries(1):
+            home, away = team_form.last_matches(upcoming, n=3)
+        self.assertEqual([(m['id'], m['result'], m['goal_diff']) for m in home],
+                         [('128', 'W', 3), ('121', 'D', 0), ('114', 'L', -1)])
+        self.assertEqual([m['result'] for m in away], ['L', 'D', 'W'])
+        self.assertEqual(team_form.form(team_form.lookup('1'), upcoming.match_date, venue='away'), '')
+        self.assertEqual(team_form.form(team_form.lookup('1', '39'), upcoming.match_date), 'WDLW')
+
+        # The window no longer reaches back far enough for the first match
+        with mock.patch.object(team_form, 'FORM_LENGTH', 2):
+            team_form.rebuild()
+        first = Match.objects.get(pk='114')
+        self.assertIsNone(team_form.recent(team_form.lookup('1'), first.match_date))
+        with self.assertNumQueries(3):
+            home, _ = team_form.last_matches(first)
+        self.assertEqual([m['id'] for m in home], ['107'])
+
+        response = self.client.get(reverse('scores:team_detail', args=['1']), secure=True)
+        self.assertEqual(response.context['match_results'], [1, -1, 0, 3])  # oldest first, from the fallback
+
+    def test_last_matches_cover_every_competition(self):
+        self.play(7, self.a, self.b, '1-0')
+        self.play(10, self.c, self.a, '2-0', league=self.cup)
+        upcoming = Match.objects.create(id='200', home_team=self.a, away_team=self.b, league=self.league,
+                                        stadium='Stadium', match_date=KICKOFF + timedelta(days=20))
+
+        home, away = team_form.last_matches(upcoming)
+        self.assertEqual([(m['id'], m['result']) for m in home], [('110', 'L'), ('107', 'W')])
+        self.assertEqual([m['id'] for m in away], ['107'])
+        response = self.client.get(reverse('scores:team_detail', args=['1']), secure=True)
+        self.assertEqual(response.context['match_results'], [1, -2])
@@ -0,0 +1,90 @@
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.test import TestCase
+
+from scores import team_ratings
+from scores.match_updates import MatchUpdates
+from scores.models import League, Team, Match, TeamRating
+
+KICKOFF = datetime(2025, 3, 1, 15, 0, tzinfo=dt_timezone.utc)
+
+
+class TeamRatingTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.league = League.objects.create(id='39', name='Premier League', country='England')
+        cls.teams = [Team.objects.create(id=str(i), name=f"Team {i}", league=cls.league) for i in range(1, 5)]
+
+    def play(self, day, home, away, score, status='FT'):
+        return Match.objects.create(id=str(100 + day), home_team=self.teams[home], away_team=self.teams[away],
+                                    league=self.league, stadium='Stadium', match_date=KICKOFF + timedelta(days=day),
+                                    score=score, status=status)
+
+    def ratings(self):
+        return {row.team_id: (round(row.elo, 6), round(row.attack, 6), round(row.defence, 6), row.matches)
+                for row in TeamRating.objects.all()}
+
+    def test_incremental_updates_equal_a_full_replay(self):
+        # Team 1 beats everyone, Team 4 loses to everyone
+        day = 0
+        for _ in range(3):
+            for home, away, score in [(0, 3, '3-0'), (1, 2, '1-1'), (0, 1, '2-0'), (2, 3, '2-1'), (3, 1, '0-2')]:
+                self.play(day, home, away, score)
+                day += 1
+        live = self.play(day, 0, 2, '2-0', status='1H')
+
+        # Full time: one read and one upsert, whatever the length of the history
+        live.status = 'FT'
+        with self.assertNumQueries(2):
+            team_ratings.record_result(live, (live.score, '1H', live.match_date))
+        Match.objects.filter(pk=live.pk).update(status='FT')
+        incremental = self.ratings()
+        TeamRating.objects.all().delete()
+        self.assertEqual(team_ratings.rebuild(), 4)
+        self.assertEqual(self.ratings(), incremental)
+
+        elo = {team_id: values[0] for team_id, values in incremental.items()}
+        self.assertEqual(sorted(elo, key=elo.get, reverse=True)[0], '1')
+        self.assertEqual(min(elo, key=elo.get), '4')
+        self.assertEqual(incremental['1'][3], 7)
+
+    def test_a_result_is_applied_once(self):
+        match = self.play(0, 0, 1, '3-0')
+        applied = self.ratings()
+        self.assertEqual(applied['1'][3], 1)
+
+        # Deleted and ingested again: it comes back as a new match
+        match.delete()
+        updates = MatchUpdates()
+        updates.add([(self.play(0, 0, 1, '3-0'), None)])
+        updates.apply()
+        self.assertEqual(self.ratings(), applied)
+
+        # So does an older result arriving after a newer one; the nightly rebuild orders them
+        self.play(5, 2, 0, '1-1')
+        before = self.ratings()
+        self.play(3, 1, 0, '0-0')
+        self.assertEqual(self.ratings(), before)
+        team_ratings.rebuild()
+        self.assertEqual(self.ratings()['1'][3], 3)
+
+    def test_forecast_scores_a_batch_in_one_query(self):
+        for day in range(6):
+            self.play(day, 0, 1, '3-0')
+            self.play(day + 10, 1, 0, '0-2')
+        fixtures = [Match(id=f'f{i}', home_team_id=home, away_team_id=away, league=self.league, match_date=KICKOFF)
+                    for i, (home, away) in enumerate([('1', '2'), ('2', '1'), ('3', '4')])]
+
+        with self.assertNumQueries(1):
+            forecasts = team_ratings.forecast(fixtures)
+
+        strong_home, strong_away, unrated = forecasts['f0'], forecasts['f1'], forecasts['f2']
+        for forecast in forecasts.values():
+            self.assertAlmostEqual(forecast['home_win'] + forecast['draw'] + forecast['away_win'], 1.0, places=2)
+        self.assertGreater(strong_home['home_win'], 0.5)
+        self.assertGreater(strong_home['home_xg'], strong_home['away_xg'])
+        self.assertGreater(strong_home['score'][0], strong_home['score'][1])
+        self.assertGreater(strong_away['away_win'], strong_away['home_win'])
+        # Equal teams: only the home advantage separates them
+        self.assertEqual((unrated['home_elo'], unrated['away_elo']), (1500, 1500))
+        self.assertGreater(unrated['home_win'], unrated['away_win'])
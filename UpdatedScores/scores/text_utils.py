@@ -0,0 +1,30 @@
+"""
+Text normalisation shared by search and name matching.
+
+``fold`` lowercases and strips diacritics so that "Fenerbahçe", "FENERBAHCE"
+and "fenerbahce" compare equal. Turkish letters need an explicit table:
+the dotless ı and the dotted İ do not decompose under NFKD, and ``lower()``
+turns İ into "i̇" (i + combining dot).
+"""
+import re
+import unicodedata
+
+_LETTERS = str.maketrans({
+    'ı': 'i', 'İ': 'i', 'ş': 's', 'Ş': 's', 'ğ': 'g', 'Ğ': 'g',
+    'ç': 'c', 'Ç': 'c', 'ö': 'o', 'Ö': 'o', 'ü': 'u', 'Ü': 'u',
+    # Letters with no decomposition
+    'ø': 'o', 'Ø': 'o', 'ł': 'l', 'Ł': 'l', 'đ': 'd', 'Đ': 'd',
+    'æ': 'ae', 'Æ': 'ae', 'œ': 'oe', 'Œ': 'oe', 'ß': 'ss',
+})
+_TOKEN = re.compile(r'\w+')
+
+
+def fold(text):
+    """Lowercase ASCII-ish form of ``text`` without diacritics"""
+    text = unicodedata.normalize('NFKD', (text or '').translate(_LETTERS))
+    return ''.join(c for c in text if not unicodedata.combining(c)).casefold()
+
+
+def tokens(text):
+    """Folded word tokens of ``text``"""
+    return _TOKEN.findall(fold(text))
@@ -2,7 +2,8 @@
 from . import views
 from . import enhanced_views
 from . import performance_views
-from .views import router, FavoriteTeamsView
+from . import live_stream
+from .views import router, FavoriteTeamsView, ChangesView, SearchView
 
 app_name = "scores"
 
@@ -25,9 +26,12 @@ urlpatterns = [
     # path('admin/performance/', performance_views.performance_dashboard, name='performance_dashboard'),
     # REST API endpoints
     path('api/favorites/', FavoriteTeamsView.as_view(), name='api-favorites'),
+    path('api/changes/', ChangesView.as_view(), name='api-changes'),
+    path('api/search/', SearchView.as_view(), name='api-search'),
     path('api/', include(router.urls)),
     path('leagues/', views.leagues_list, name='leagues'),
     path('teams/', views.teams_list, name='teams'),
     path('today/', views.today_matches, name='today_matches'),
+    path('live/stream/', live_stream.live_stream, name='live_stream'),
     path('upcoming/', views.upcoming_matches, name='upcoming_matches'),
 ]
@@ -1,4 +1,5 @@
 from django.shortcuts import render, redirect, get_object_or_404
+from django.http import Http404
 from .models import League, Team, Player, Match, Event, Profile
 from django.db.models import Q
 from datetime import datetime, timedelta
@@ -12,6 +13,11 @@ from rest_framework import routers, serializers, viewsets
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from .serializers import LeagueSerializer, TeamSerializer, MatchSerializer, ProfileSerializer
+from .serializers import LeagueValuesSerializer, TeamValuesSerializer, MatchValuesSerializer
+from .pagination import LeagueCursorPagination, TeamCursorPagination, MatchCursorPagination
+from .filters import filter_leagues, filter_teams, filter_matches
+from . import changelog, h2h, search, season_projection, team_form
+from . import bundle as match_bundle
 from rest_framework.views import APIView
 from rest_framework.permissions import IsAuthenticated
 
@@ -24,7 +30,7 @@ def index(request):
         try:
             # Yönetici hesabıyla giriş yapmış kullanıcılar için API'den veri çekelim
             if request.user.is_superuser:
-                call_command('fetch_api_football_matches')
+                call_command('fetch_api_football_matches', no_delete=True)
                 messages.success(request, "Maç verileri API'den başarıyla çekildi!")
             else:
                 messages.warning(request, "Veritabanında henüz maç verisi bulunmuyor. Yönetici, 'Verileri Güncelle' işlemini yapmalıdır.")
@@ -135,7 +141,7 @@ def refresh_data(request):
         
         if data_type == 'matches':
             # Sadece maç verilerini güncelle
-            call_command('fetch_api_football_matches')
+            call_command('fetch_api_football_matches', no_delete=True)
             messages.success(request, "Maç verileri başarıyla güncellendi!")
         elif data_type == 'leagues':
             # Sadece lig verilerini güncelle
@@ -208,26 +214,11 @@ def match_detail(request, match_id):
     except:
         analysis = None
     
-    # Son 5 maç sonuçlarını al
-    home_team_last_matches = Match.objects.filter(
-        Q(home_team=match.home_team) | Q(away_team=match.home_team),
-        match_date__lt=match.match_date,
-        score__isnull=False
-    ).order_by('-match_date')[:5]
+    # Son 5 maç sonuçlarını al (form tablosundan; eski maçlar için sorguyla)
+    home_team_last_matches, away_team_last_matches = team_form.last_matches(match)
     
-    away_team_last_matches = Match.objects.filter(
-        Q(home_team=match.away_team) | Q(away_team=match.away_team),
-        match_date__lt=match.match_date,
-        score__isnull=False
-    ).order_by('-match_date')[:5]
-    
-    # İki takım arasındaki son maçları al
-    head_to_head = Match.objects.filter(
-        Q(home_team=match.home_team, away_team=match.away_team) | 
-        Q(home_team=match.away_team, away_team=match.home_team),
-        match_date__lt=match.match_date,
-        score__isnull=False
-    ).order_by('-match_date')[:5]
+    # İki takım arasındaki son maçları al (karşılaşma tablosundan)
+    head_to_head = h2h.recent_meetings(match)
     
     # Maçın durumu (canlı, tamamlanmış, yaklaşan)
     current_time = timezone.now()
@@ -365,6 +356,11 @@ def league_detail(request, league_id):
         points = won * 3 + draw
         standings.append({'team': team, 'played': played, 'won': won, 'draw': draw, 'lost': lost, 'goals_for': goals_for, 'goals_against': goals_against, 'points': points})
     standings = sorted(standings, key=lambda x: x['points'], reverse=True)
+    # Sezon sonu olasılıkları: zamanlayıcının sakladığı son simülasyon okunur, istekte simülasyon yapılmaz
+    projection = season_projection.stored(league.id)
+    chances = season_projection.chances(projection)
+    for row in standings:
+        row['projection'] = chances.get(row['team'].id)
     # En çok gol atan takımlar
     from django.db.models import Count, F, Sum, Value, Case, When
     
@@ -420,6 +416,7 @@ def league_detail(request, league_id):
         'league': league,
         'matches': matches,
         'standings': standings,
+        'projection': projection,
         'scorer_stats': scorer_stats,
         'least_conceded': least_conceded,
         'team_names': team_names,
@@ -433,12 +430,14 @@ def team_detail(request, team_id):
     team = Team.objects.select_related('league').get(id=team_id)
     players = Player.objects.filter(team=team)
     
-    # Son 5 maç (tamamlanmış maçları filtrele)
-    last_matches = Match.objects.filter(
-        Q(home_team=team) | Q(away_team=team),
-        match_date__lt=timezone.now(),
-        score__isnull=False  # Skoru olan maçlar (tamamlanmış maçlar)
-    ).order_by('-match_date')[:5]
+    # Son 5 maç (tüm turnuvalar; form tablosundan tek sorguyla)
+    last_matches = team_form.recent(team_form.lookup(team.id), timezone.now())
+    if last_matches is None:
+        last_matches = [team_form.summary(m, team.id) for m in Match.objects.filter(
+            Q(home_team=team) | Q(away_team=team),
+            match_date__lt=timezone.now(),
+            score__isnull=False  # Skoru olan maçlar (tamamlanmış maçlar)
+        ).select_related('home_team', 'away_team').order_by('-match_date')[:5]]
     
     # Yaklaşan maçlar (bugünden itibaren)
     next_matches = Match.objects.filter(
@@ -495,17 +494,8 @@ def team_detail(request, team_id):
         .order_by('-gol')[:5]
     )
     # Grafik için veri (son 5 maç)
-    match_labels = [m.match_date.strftime('%d.%m') for m in last_matches][::-1]
-    match_results = []
-    for m in reversed(last_matches):
-        if m.score:
-            home_goals, away_goals = map(int, m.score.split('-'))
-            if m.home_team == team:
-                match_results.append(home_goals - away_goals)
-            else:
-                match_results.append(away_goals - home_goals)
-        else:
-            match_results.append(0)
+    match_labels = [m['match_date'].strftime('%d.%m') for m in last_matches][::-1]
+    match_results = [m['goal_diff'] for m in last_matches][::-1]
     context = {
         'team': team,
         'players': players,
@@ -587,29 +577,103 @@ def remove_favorite_player(request, player_id):
     return redirect('scores:team_detail', team_id=player.team.id)
 
 
+class ValuesReadMixin:
+    """
+    list/retrieve through a ValuesSerializer instead of one ModelSerializer per
+    row; ?fields= selects keys and ?expand= the nested relations.
+    """
+    values_serializer_class = None
+
+    def list(self, request, *args, **kwargs):
+        serializer = self.values_serializer_class.from_request(request)
+        queryset = self.filter_queryset(self.get_queryset())
+        ordering = [field.lstrip('-') for field in self.paginator.ordering] if self.paginator else []
+        page = self.paginate_queryset(serializer.values(queryset, *ordering))
+        if page is None:
+            return Response(serializer.to_representation(serializer.values(queryset)))
+        return self.get_paginated_response(serializer.to_representation(page))
+
+    def retrieve(self, request, *args, **kwargs):
+        serializer = self.values_serializer_class.from_request(request)
+        queryset = self.filter_queryset(self.get_queryset()).filter(pk=kwargs[self.lookup_url_kwarg or self.lookup_field])
+        row = serializer.values(queryset).first()
+        if row is None:
+            raise Http404
+        return Response(serializer.to_representation([row])[0])
+
 # Ligler
-class LeagueViewSet(viewsets.ReadOnlyModelViewSet):
+class LeagueViewSet(ValuesReadMixin, viewsets.ReadOnlyModelViewSet):
     queryset = League.objects.all()
     serializer_class = LeagueSerializer
+    values_serializer_class = LeagueValuesSerializer
+    pagination_class = LeagueCursorPagination
+
+    def get_queryset(self):
+        return filter_leagues(super().get_queryset(), self.request.query_params)
 
 # Takımlar
-class TeamViewSet(viewsets.ReadOnlyModelViewSet):
-    queryset = Team.objects.all()
+class TeamViewSet(ValuesReadMixin, viewsets.ReadOnlyModelViewSet):
+    queryset = Team.objects.select_related('league')
     serializer_class = TeamSerializer
+    values_serializer_class = TeamValuesSerializer
+    pagination_class = TeamCursorPagination
+
+    def get_queryset(self):
+        return filter_teams(super().get_queryset(), self.request.query_params)
 
 # Maçlar
-class MatchViewSet(viewsets.ReadOnlyModelViewSet):
-    queryset = Match.objects.all()
+class MatchViewSet(ValuesReadMixin, viewsets.ReadOnlyModelViewSet):
+    queryset = Match.objects.select_related('home_team__league', 'away_team__league', 'league')
     serializer_class = MatchSerializer
+    values_serializer_class = MatchValuesSerializer
+    pagination_class = MatchCursorPagination
+
+    def get_queryset(self):
+        return filter_matches(super().get_queryset(), self.request.query_params)
+
+    @action(detail=False, url_path='bundle')
+    def bundle(self, request):
+        """?ids=1,2&include=events,lineups,stats,preview: maç ekranı için tek istek"""
+        ids, include = match_bundle.parse(request.query_params)
+        serializer = self.values_serializer_class.from_request(request)
+        return Response(match_bundle.build(serializer, self.queryset, ids, include))
 
 # Profil (sadece giriş yapan kullanıcının favori takımları)
 class FavoriteTeamsView(APIView):
     permission_classes = [IsAuthenticated]
     def get(self, request):
-        profile = request.user.profile
+        profile = Profile.objects.prefetch_related('favorite_teams__league').get(pk=request.user.profile.pk)
         serializer = ProfileSerializer(profile)
         return Response(serializer.data)
 
+# Değişiklik günlüğü: ?since=<seq> sonrasında değişen maçlar ve olaylar
+class ChangesView(APIView):
+    def get(self, request):
+        params = {}
+        for name, default in (('since', 0), ('limit', changelog.DEFAULT_LIMIT)):
+            raw = request.query_params.get(name, default)
+            try:
+                params[name] = int(raw)
+            except (TypeError, ValueError):
+                raise serializers.ValidationError({name: "Tam sayı olmalı."})
+            if params[name] < 0:
+                raise serializers.ValidationError({name: "Negatif olamaz."})
+        return Response(changelog.changes_since(params['since'], params['limit']))
+
+# Takım / oyuncu / lig arama (yazarken tamamlama)
+class SearchView(APIView):
+    def get(self, request):
+        kinds = [k.strip() for k in request.query_params.get('type', '').split(',') if k.strip()] or list(search.KINDS)
+        unknown = set(kinds) - set(search.KINDS)
+        if unknown:
+            raise serializers.ValidationError({'type': f"Bilinmeyen tür(ler): {', '.join(sorted(unknown))}"})
+        try:
+            limit = int(request.query_params.get('limit', search.DEFAULT_LIMIT))
+        except ValueError:
+            raise serializers.ValidationError({'limit': "Tam sayı olmalı."})
+        query = request.query_params.get('q', '')
+        return Response({'query': query, 'results': search.search(query, kinds, limit)})
+
 from rest_framework.routers import DefaultRouter
 router = DefaultRouter()
 router.register(r'leagues', LeagueViewSet)